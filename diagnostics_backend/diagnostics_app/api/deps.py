@@ -1,5 +1,8 @@
-from typing import Generator
-from diagnostics_backend.diagnostics_app.db.session import SessionLocal
+from typing import AsyncGenerator, Generator
+from sqlalchemy.ext.asyncio import AsyncSession
+from diagnostics_backend.diagnostics_app.db.session import AsyncSessionLocal, SessionLocal
+from diagnostics_backend.diagnostics_app.services.registry import get_registry
+from diagnostics_backend.diagnostics_app.services.triage_orchestrator import TriageOrchestrator
 
 def get_db() -> Generator:
     try:
@@ -7,3 +10,11 @@ def get_db() -> Generator:
         yield db
     finally:
         db.close()
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def get_orchestrator() -> TriageOrchestrator:
+    # async: a plain def dependency would be run in the threadpool on every request
+    return get_registry().orchestrator
@@ -21,6 +21,16 @@ class Settings(BaseSettings):
         backend_dir = Path(__file__).resolve().parent.parent.parent
         db_file = backend_dir / "sql_app.db"
         return f"sqlite:///{db_file}"
+
+    @property
+    def ASYNC_DATABASE_URL(self) -> str:
+        # Same database through an asyncio driver (aiosqlite / asyncpg)
+        url = self.DATABASE_URL
+        if url.startswith("sqlite:"):
+            return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+        if url.startswith("postgresql:"):
+            return url.replace("postgresql:", "postgresql+asyncpg:", 1)
+        return url
     
     OBJECT_STORAGE_BUCKET: Optional[str] = None
     VISION_MODEL_API_KEY: Optional[str] = None
@@ -1,4 +1,5 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from diagnostics_backend.diagnostics_app.core.config import settings
 
@@ -10,3 +11,12 @@ engine = create_engine(
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Async engine used by the API: driver calls (and SQLite's commit fsync) run off the
+# event loop, so a slow write no longer stalls every other request in the process.
+# The sync engine above stays for table creation and scripts.
+async_engine = create_async_engine(settings.ASYNC_DATABASE_URL)
+
+# expire_on_commit=False: attributes stay readable after commit (an expired attribute
+# would need lazy IO, which AsyncSession does not allow)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
@@ -1,11 +1,13 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.core.config import settings
-from app.api.api_v1.api import api_router
+from diagnostics_backend.diagnostics_app.core.config import settings
+from diagnostics_backend.diagnostics_app.api.api_v1.api import api_router
+from diagnostics_backend.diagnostics_app.services.registry import lifespan
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan
 )
 
 # Set all CORS enabled origins
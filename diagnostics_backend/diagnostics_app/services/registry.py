@@ -0,0 +1,45 @@
+"""
+App-lifetime services for the triage API.
+
+The vision, reasoning and safety services (models, compiled rule sets, caches) and the
+orchestrator that combines them are built once when the app starts and injected into
+requests through api.deps.get_orchestrator; only the database session is per request.
+The standalone app runs startup/shutdown through `lifespan`, the gateway from its
+startup and shutdown events.
+"""
+
+from contextlib import asynccontextmanager
+from typing import Optional
+from diagnostics_backend.diagnostics_app.services.vision_service import VisionService
+from diagnostics_backend.diagnostics_app.services.reasoning_service import ReasoningService
+from diagnostics_backend.diagnostics_app.services.safety_service import SafetyService
+from diagnostics_backend.diagnostics_app.services.triage_orchestrator import TriageOrchestrator
+
+class ServiceRegistry:
+    def __init__(self):
+        self.vision = VisionService()
+        self.reasoning = ReasoningService()
+        self.safety = SafetyService()
+        self.orchestrator = TriageOrchestrator(self.vision, self.reasoning, self.safety)
+
+_registry: Optional[ServiceRegistry] = None
+
+def startup_services() -> ServiceRegistry:
+    global _registry
+    if _registry is None:
+        _registry = ServiceRegistry()
+    return _registry
+
+def shutdown_services():
+    global _registry
+    _registry = None
+
+def get_registry() -> ServiceRegistry:
+    # Built on first use when the app was called without running its startup (ASGI calls in tests)
+    return _registry or startup_services()
+
+@asynccontextmanager
+async def lifespan(app):
+    startup_services()
+    yield
+    shutdown_services()
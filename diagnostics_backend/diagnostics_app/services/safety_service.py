@@ -1,25 +1,26 @@
 import re
 from typing import Optional, Dict, Any, List
 
+# Critical keywords that trigger immediate emergency response
+EMERGENCY_PATTERNS = [
+    r"\bsuicid", r"\bkill myself", r"\bwant to die",
+    r"\bchest pain\b", r"\bcant breathe\b", r"\bcan't breathe\b",
+    r"\bheart attack\b", r"\bstroke\b", r"\bsevere bleeding\b"
+]
+
 class SafetyService:
-    def __init__(self):
-        # Critical keywords that trigger immediate emergency response
-        self.emergency_patterns = [
-            r"\bsuicid", r"\bkill myself", r"\bwant to die",
-            r"\bchest pain\b", r"\bcant breathe\b", r"\bcan't breathe\b",
-            r"\bheart attack\b", r"\bstroke\b", r"\bsevere bleeding\b"
-        ]
+    def __init__(self, patterns: List[str] = EMERGENCY_PATTERNS):
+        self.emergency_patterns = list(patterns)
+        # Compiled once into one alternation: a single scan of the text per check
+        self._emergency = re.compile("|".join(f"(?:{p})" for p in self.emergency_patterns))
 
     def check_safety(self, text_input: str) -> Optional[Dict[str, Any]]:
         """
         Checks input for safety flags. 
         Returns a TriageOutput-like dict if unsafe, else None.
         """
-        text_lower = text_input.lower()
-        
-        for pattern in self.emergency_patterns:
-            if re.search(pattern, text_lower):
-                return self._create_emergency_response()
+        if self._emergency.search(text_input.lower()):
+            return self._create_emergency_response()
         
         return None
 
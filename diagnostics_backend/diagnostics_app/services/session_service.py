@@ -1,38 +1,48 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from diagnostics_backend.diagnostics_app.db.models import TriageSession, TriageMessage, TriageObservation
 from diagnostics_backend.diagnostics_app.models.schemas import SessionCreate, MessageCreate
 from typing import Optional
 
 class SessionService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def create_session(self, session_in: SessionCreate) -> TriageSession:
+    async def create_session(self, session_in: SessionCreate) -> TriageSession:
         db_session = TriageSession(language=session_in.language)
         self.db.add(db_session)
-        self.db.commit()
-        self.db.refresh(db_session)
+        await self.db.commit()
+        await self.db.refresh(db_session)
         return db_session
 
-    def get_session(self, session_id: str) -> Optional[TriageSession]:
-        return self.db.query(TriageSession).filter(TriageSession.id == session_id).first()
+    async def get_session(self, session_id: str) -> Optional[TriageSession]:
+        # Relationships are loaded up front (no lazy loads under AsyncSession);
+        # populate_existing refreshes a session already in the identity map
+        result = await self.db.execute(
+            select(TriageSession)
+            .where(TriageSession.id == session_id)
+            .options(selectinload(TriageSession.messages), selectinload(TriageSession.observations))
+            .execution_options(populate_existing=True)
+        )
+        return result.scalars().first()
 
-    def add_message(self, session_id: str, message_in: MessageCreate) -> TriageMessage:
+    async def add_message(self, session_id: str, message_in: MessageCreate) -> TriageMessage:
         db_message = TriageMessage(
             session_id=session_id,
             sender=message_in.sender,
             content=message_in.content
         )
         self.db.add(db_message)
-        self.db.commit()
-        self.db.refresh(db_message)
+        await self.db.commit()
+        await self.db.refresh(db_message)
         return db_message
 
-    def add_observation(self, session_id: str, source: str, data: dict):
+    async def add_observation(self, session_id: str, source: str, data: dict):
         observation = TriageObservation(
             session_id=session_id,
             source=source,
             observation_data=data
         )
         self.db.add(observation)
-        self.db.commit()
+        await self.db.commit()
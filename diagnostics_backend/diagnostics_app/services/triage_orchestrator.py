@@ -1,5 +1,5 @@
 from typing import Dict, Any, Optional
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from diagnostics_backend.diagnostics_app.services.vision_service import VisionService
 from diagnostics_backend.diagnostics_app.services.reasoning_service import ReasoningService, CONFIRMATION_QUESTION, GENERAL_QUESTIONS
 from diagnostics_backend.diagnostics_app.services.safety_service import SafetyService
@@ -8,18 +8,20 @@ from diagnostics_backend.diagnostics_app.models.schemas import SessionCreate, Me
 from diagnostics_backend.diagnostics_app.db.models import TriageSession
 
 class TriageOrchestrator:
-    def __init__(self, db: Session):
-        self.db = db
-        self.session_service = SessionService(db)
-        self.vision = VisionService()
-        self.reasoning = ReasoningService()
-        self.safety = SafetyService()
+    """
+    Built once per app (services.registry) around the shared vision, reasoning and safety
+    services; the request's database session is passed to each call.
+    """
+    def __init__(self, vision: VisionService, reasoning: ReasoningService, safety: SafetyService):
+        self.vision = vision
+        self.reasoning = reasoning
+        self.safety = safety
 
-    async def create_session(self, language: str = "en") -> TriageSession:
-        return self.session_service.create_session(SessionCreate(language=language))
+    async def create_session(self, db: AsyncSession, language: str = "en") -> TriageSession:
+        return await SessionService(db).create_session(SessionCreate(language=language))
 
-    async def get_session(self, session_id: str) -> Optional[TriageSession]:
-        return self.session_service.get_session(session_id)
+    async def get_session(self, db: AsyncSession, session_id: str) -> Optional[TriageSession]:
+        return await SessionService(db).get_session(session_id)
 
     def _build_context(self, session: TriageSession, current_input: str = "", input_mode: str = "mixed", severity: str = None, duration: str = None) -> Dict[str, Any]:
         """Combine symptoms, history, and observations."""
@@ -43,7 +45,7 @@ class TriageOrchestrator:
             "duration": duration
         }
 
-    async def _decide_next_step(self, session_id: str, context: Dict[str, Any]) -> TriageResponse:
+    async def _decide_next_step(self, db: AsyncSession, session_id: str, context: Dict[str, Any]) -> TriageResponse:
         """Core decision loop: Question or Final?"""
         # 1. Check Safety AGAIN (on combined text)
         unsafe = self.safety.check_safety(context["symptoms"])
@@ -66,7 +68,7 @@ class TriageOrchestrator:
             question = await self.reasoning.generate_question(context)
             # Log question as AI message provided we have a robust way to do so, 
             # or just return it. For session state, best to add it.
-            self.session_service.add_message(session_id, MessageCreate(sender="ai", content=question.text))
+            await SessionService(db).add_message(session_id, MessageCreate(sender="ai", content=question.text))
             
             return TriageResponse(
                 session_id=session_id,
@@ -82,12 +84,12 @@ class TriageOrchestrator:
             final_output=TriageOutputSchema(**result)
         )
 
-    async def process_text_triage(self, session_id: str, symptoms: str, severity: Optional[str] = None, duration: Optional[str] = None) -> TriageResponse:
+    async def process_text_triage(self, db: AsyncSession, session_id: str, symptoms: str, severity: Optional[str] = None, duration: Optional[str] = None) -> TriageResponse:
         # 1. Save User Input
-        self.session_service.add_message(session_id, MessageCreate(sender="user", content=symptoms))
+        await SessionService(db).add_message(session_id, MessageCreate(sender="user", content=symptoms))
         
         # 2. Build Context needed for decision
-        session = await self.get_session(session_id) # reload to get relationships
+        session = await self.get_session(db, session_id) # reload to get relationships
         if not session:
             # Should not happen if called correctly
              raise ValueError("Session not found")
@@ -95,20 +97,20 @@ class TriageOrchestrator:
         context = self._build_context(session, symptoms, input_mode="text", severity=severity, duration=duration) 
         
         # 3. Decide
-        return await self._decide_next_step(session_id, context)
+        return await self._decide_next_step(db, session_id, context)
 
-    async def process_image_triage(self, session_id: Optional[str], image_bytes: bytes) -> TriageResponse:
+    async def process_image_triage(self, db: AsyncSession, session_id: Optional[str], image_bytes: bytes) -> TriageResponse:
         # 0. Ensure Session
         if not session_id:
-            session = await self.create_session()
+            session = await self.create_session(db)
             session_id = session.id
         
         # 1. Vision Processing
         vision_result = await self.vision.analyze_image(image_bytes)
-        self.session_service.add_observation(session_id, "vision", vision_result)
+        await SessionService(db).add_observation(session_id, "vision", vision_result)
         
         # 2. Context
-        session = await self.get_session(session_id)
+        session = await self.get_session(db, session_id)
         context = self._build_context(session, input_mode="image")
         
         # 3. Return Confirmation (Multi-turn flow)
@@ -119,12 +121,12 @@ class TriageOrchestrator:
             next_question=CONFIRMATION_QUESTION
         )
 
-    async def process_answer(self, session_id: str, answer: str) -> TriageResponse:
+    async def process_answer(self, db: AsyncSession, session_id: str, answer: str) -> TriageResponse:
         # 1. Save Answer
-        self.session_service.add_message(session_id, MessageCreate(sender="user", content=answer))
+        await SessionService(db).add_message(session_id, MessageCreate(sender="user", content=answer))
         
         # 2. Context
-        session = await self.get_session(session_id)
+        session = await self.get_session(db, session_id)
         context = self._build_context(session, input_mode="mixed") # answers are treated as mixed context usually
         
         # 3. Logic based on Answer
@@ -161,14 +163,14 @@ class TriageOrchestrator:
             )
             
         # Fallback if unknown answer -> Standard Logic
-        return await self._decide_next_step(session_id, context)
+        return await self._decide_next_step(db, session_id, context)
 
-    async def process_session_text(self, session_id: str, symptoms: str, **kwargs) -> TriageResponse:
+    async def process_session_text(self, db: AsyncSession, session_id: str, symptoms: str, **kwargs) -> TriageResponse:
         """
         Add text symptoms to existing session and return Confirmation.
         """
         # 1. Save User Input
-        self.session_service.add_message(session_id, MessageCreate(sender="user", content=symptoms))
+        await SessionService(db).add_message(session_id, MessageCreate(sender="user", content=symptoms))
         
         # 2. Return Confirmation directly (as per spec)
         return TriageResponse(
@@ -0,0 +1,65 @@
+import asyncio
+import sqlite3
+import threading
+import time
+import httpx
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from diagnostics_backend.diagnostics_app.api import deps
+from diagnostics_backend.diagnostics_app.db import models  # noqa: F401 (registers the tables)
+from diagnostics_backend.diagnostics_app.db.base import Base
+from gateway.main import gateway_app
+
+LOCK_SECONDS = 0.5
+
+
+def test_event_loop_keeps_running_while_a_write_waits(tmp_path):
+    path = tmp_path / "triage.db"
+    Base.metadata.create_all(create_engine(f"sqlite:///{path}"))
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    sessions = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    async def get_test_db():
+        async with sessions() as db:
+            yield db
+
+    # Another writer holds SQLite's write lock, so the triage session insert waits for it
+    blocker = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+    blocker.execute("BEGIN IMMEDIATE")
+    release = threading.Timer(LOCK_SECONDS, blocker.execute, ("COMMIT",))
+
+    async def go():
+        gaps = []
+
+        async def tick():
+            last = time.perf_counter()
+            while True:
+                await asyncio.sleep(0.01)
+                now = time.perf_counter()
+                gaps.append(now - last)
+                last = now
+
+        ticker = asyncio.create_task(tick())
+        try:
+            release.start()
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=gateway_app), base_url="http://test") as client:
+                start = time.perf_counter()
+                response = await client.post("/diagnostics/triage/text", json={"symptoms": "itchy skin"})
+                seconds = time.perf_counter() - start
+        finally:
+            ticker.cancel()
+            await async_engine.dispose()
+        return response.json(), seconds, gaps
+
+    gateway_app.dependency_overrides[deps.get_async_db] = get_test_db
+    try:
+        body, seconds, gaps = asyncio.run(go())
+    finally:
+        gateway_app.dependency_overrides.pop(deps.get_async_db, None)
+        release.join()
+        blocker.close()
+
+    assert body["status"] == "needs_more_info"
+    assert seconds >= LOCK_SECONDS * 0.8  # the write really waited for the lock...
+    assert max(gaps) < 0.2  # ...while other coroutines kept being scheduled
+    assert len(gaps) >= LOCK_SECONDS / 0.01 * 0.5
@@ -1,4 +1,5 @@
-from diagnostics_backend.diagnostics_app.db.session import engine, SessionLocal
+import asyncio
+from diagnostics_backend.diagnostics_app.db.session import engine, AsyncSessionLocal
 from diagnostics_backend.diagnostics_app.db.base import Base
 from diagnostics_backend.diagnostics_app.db.models import TriageSession, TriageMessage
 from diagnostics_backend.diagnostics_app.services.session_service import SessionService
@@ -9,24 +10,27 @@ def test_db_init():
     Base.metadata.create_all(bind=engine)
     print("Tables created.")
 
+async def _session_workflow():
+    async with AsyncSessionLocal() as db:
+        service = SessionService(db)
+
+        print("Creating triage session...")
+        session_in = SessionCreate(language="fr")
+        session = await service.create_session(session_in)
+        print(f"Session created: {session.id}, language: {session.language}")
+
+        print("Adding message...")
+        msg_in = MessageCreate(sender="user", content="I have a headache")
+        await service.add_message(session.id, msg_in)
+
+        # Verify retrieval (the cached session's messages are reloaded)
+        s = await service.get_session(session.id)
+        print(f"Retrieved session has {len(s.messages)} messages.")
+        assert len(s.messages) > 0
+        print("DB Verification Successful!")
+
 def test_session_workflow():
-    db = SessionLocal()
-    service = SessionService(db)
-    
-    print("Creating triage session...")
-    session_in = SessionCreate(language="fr")
-    session = service.create_session(session_in)
-    print(f"Session created: {session.id}, language: {session.language}")
-    
-    print("Adding message...")
-    msg_in = MessageCreate(sender="user", content="I have a headache")
-    service.add_message(session.id, msg_in)
-    
-    # Verify retrieval
-    s = service.get_session(session.id)
-    print(f"Retrieved session has {len(s.messages)} messages.")
-    assert len(s.messages) > 0
-    print("DB Verification Successful!")
+    asyncio.run(_session_workflow())
 
 if __name__ == "__main__":
     test_db_init()
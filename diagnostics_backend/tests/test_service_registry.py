@@ -0,0 +1,38 @@
+from fastapi.testclient import TestClient
+from diagnostics_backend.diagnostics_app.main import app
+from diagnostics_backend.diagnostics_app.services import registry, safety_service
+from diagnostics_backend.diagnostics_app.services.safety_service import SafetyService
+from gateway.main import gateway_app
+
+
+def test_services_are_built_once_per_app(monkeypatch):
+    registry.shutdown_services()  # earlier tests may have built them lazily
+    built = []
+    original_init = SafetyService.__init__
+    monkeypatch.setattr(SafetyService, "__init__", lambda self, *a, **kw: (built.append(self), original_init(self, *a, **kw))[1])
+
+    with TestClient(gateway_app) as client:
+        services = registry.get_registry()
+        for symptoms in ("itchy skin", "headache since morning", "I want to die"):
+            assert client.post("/diagnostics/triage/text", json={"symptoms": symptoms}).status_code == 200
+        files = {"file": ("a.jpg", b"fakebytes", "image/jpeg")}
+        assert client.post("/diagnostics/triage/image", files=files).status_code == 200
+        assert registry.get_registry() is services
+    assert built == [services.safety]
+    assert services.orchestrator.safety is services.safety
+    assert registry._registry is None  # released on shutdown
+
+    # The standalone diagnostics app builds them through its lifespan
+    with TestClient(app) as client:
+        assert registry._registry is not None
+        assert client.post("/api/v1/triage/text", json={"symptoms": "chest pain"}).json()["final_output"]["severity"] == "high"
+    assert registry._registry is None
+
+
+def test_compiled_safety_patterns_match_like_the_pattern_list():
+    safety = SafetyService()
+    for text in ("I want to DIE", "Suicidal thoughts", "can't breathe at night", "had a stroke?", "severe bleeding"):
+        assert safety.check_safety(text)["severity"] == "high"
+    for text in ("strokes of luck", "mild chest pains", "headache", ""):
+        assert safety.check_safety(text) is None
+    assert safety.emergency_patterns == safety_service.EMERGENCY_PATTERNS
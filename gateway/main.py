@@ -14,10 +14,11 @@ Architecture:
 - Medicine: Mounts individual routers (medications, reminders, prescriptions)
 """
 
-from fastapi import FastAPI, APIRouter
+from fastapi import FastAPI, APIRouter, Query
 from fastapi.middleware.cors import CORSMiddleware
-from datetime import datetime, date
-from typing import List
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from datetime import datetime, date, timedelta
+from typing import List, Optional
 from pathlib import Path
 
 # ==========================================
@@ -35,12 +36,14 @@ diagnostics_router_custom.include_router(triage.router, prefix="/triage", tags=[
 # ==========================================
 # Mental health backend defines endpoints directly on app, so we create a router wrapper
 from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
 from mental_health_backend.mental_health_app.models import (
-    ChatRequest, ChatResponse,
-    CheckinQuestionsResponse, CheckinSubmitRequest, CheckinSubmitResponse
+    ChatRequest, ChatResponse, RiskBatchRequest, RiskBatchResponse,
+    CheckinQuestionsResponse, CheckinSubmitRequest, CheckinSubmitResponse, CheckinSummaryResponse,
+    MessagePage, RiskEventPage, RiskRollupResponse, SearchPage, MoodTrendResponse, MoodCohortTrendResponse
 )
 from mental_health_backend.mental_health_app import db
-from mental_health_backend.mental_health_app.services import ai_agent, risk_engine
+from mental_health_backend.mental_health_app.services import ai_agent, chat_turn, checkin_summaries, escalation, llm_scheduler, model_router, mood_trends, rescoring, risk_engine
 
 mental_health_router = APIRouter(prefix="/mental-health", tags=["Mental Health"])
 
@@ -50,58 +53,74 @@ def mental_health_health():
     return {"status": "ok"}
 
 @mental_health_router.post("/chat/message", response_model=ChatResponse)
-def mental_health_chat_message(request: ChatRequest):
+async def mental_health_chat_message(request: ChatRequest):
     """Chat with mental health AI agent and get risk assessment"""
-    # 1. Save User Message
-    user_msg_id = db.save_message(request.user_id, "user", request.message)
+    # 1. Note receive time (the whole turn is persisted in one transaction at the end)
+    received_at = datetime.utcnow().isoformat()
 
-    # 2. Get LLM Analysis
-    llm_result = ai_agent.analyze_message_llm(request.message)
-
-    # 3. Deterministic Risk Assessment
+    # 2. Deterministic Risk Assessment (cheap, runs before the LLM)
     kw_score, reasons = risk_engine.calculate_risk_score(request.message)
 
-    # Check if deterministic engine caught self-harm (score >= 20)
-    deterministic_sh = (kw_score >= 20)
-
-    final_risk_level = risk_engine.determinize_risk_level(
-        llm_result.get("risk_level", "medium"),
-        kw_score,
-        llm_result.get("self_harm_detected", False)
+    # Crisis fast path: regex-detected intent gets the crisis reply and SOS actions now;
+    # the LLM enriches the stored risk event in the background
+    if chat_turn.is_crisis(kw_score):
+        return await chat_turn.crisis_fast_path(
+            request.user_id, request.message, kw_score, reasons, received_at,
+            db.save_chat_turn, db.enrich_risk_event
+        )
+
+    # Coalescing mode: messages from a burst share one LLM call (each keeps its own risk score)
+    if chat_turn.coalescing_enabled():
+        return await chat_turn.coalesced_chat_turn(
+            request.user_id, request.message, kw_score, reasons, received_at,
+            db.save_chat_turn, db.get_recent_messages
+        )
+
+    # 3. Get LLM Analysis with the conversation so far (bounded by the prompt token budget),
+    #    merged with the keyword score (safety overrides apply)
+    context = await chat_turn.conversation_context(request.user_id, request.message, db.get_recent_messages)
+    llm_result = await ai_agent.analyze_message_llm_async(
+        request.message, priority=llm_scheduler.priority_for_score(kw_score), context=context,
+        route=model_router.router.route_for(kw_score, request.message)
     )
+    turn = chat_turn.finalize_turn(llm_result, kw_score)
 
-    # Unified self-harm flag
-    final_sh_detected = llm_result.get("self_harm_detected", False) or deterministic_sh
-
-    # 4. Determine Actions
-    actions = risk_engine.get_actions(final_risk_level)
-
-    # 5. Save Risk Event & Assistant Message
-    db.save_risk_event(
+    # 4. Save User Message, Risk Event & Assistant Message atomically
+    await run_in_threadpool(
+        db.save_chat_turn,
         user_id=request.user_id,
-        message_id=user_msg_id,
-        risk_level=final_risk_level,
-        self_harm_detected=final_sh_detected,
+        user_text=request.message,
+        assistant_text=turn["reply"],
+        risk_level=turn["risk_level"],
+        self_harm_detected=turn["self_harm_detected"],
         keyword_score=kw_score,
-        reasons=reasons
+        reasons=reasons,
+        user_created_at=received_at
+    )
+    chat_turn.remember_turn(request.user_id, request.message, turn["reply"])
+
+    return turn
+
+@mental_health_router.post("/chat/stream")
+async def mental_health_chat_stream(request: ChatRequest):
+    """
+    Streaming variant of /chat/message (text/event-stream).
+    Sends the keyword risk assessment first, then reply tokens, then the full ChatResponse as "done".
+    """
+    return StreamingResponse(
+        chat_turn.stream_chat_turn(
+            request.user_id, request.message, db.save_chat_turn, db.enrich_risk_event, db.get_recent_messages
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
-    reply_text = llm_result.get("reply", "I am here for you.")
-
-    # SAFETY OVERRIDE: If LLM failed (fallback used) AND risk is high
-    if reply_text == ai_agent.FALLBACK_ERROR_MESSAGE and final_risk_level in ["high", "critical"]:
-        reply_text = "I hear that you are in pain. Please reach out for help immediately – you are not alone. I've listed some resources below."
-
-    db.save_message(request.user_id, "assistant", reply_text)
-
-    return {
-        "reply": reply_text,
-        "risk_level": final_risk_level,
-        "self_harm_detected": final_sh_detected,
-        "advice": llm_result.get("advice", []),
-        "actions": actions,
-        "timestamp": datetime.utcnow().isoformat()
-    }
+@mental_health_router.post("/risk/score-batch", response_model=RiskBatchResponse)
+def mental_health_score_risk_batch(request: RiskBatchRequest):
+    """Deterministic risk assessment (keywords, intent patterns, paraphrases) of many messages at once, no LLM"""
+    if len(request.messages) > rescoring.RISK_BATCH_MAX_MESSAGES:
+        raise HTTPException(status_code=413, detail=f"At most {rescoring.RISK_BATCH_MAX_MESSAGES} messages per batch")
+    return {"results": rescoring.score_batch(request.messages), "rules_version": rescoring.rules_version()}
 
 @mental_health_router.get("/checkin/today", response_model=CheckinQuestionsResponse)
 def mental_health_get_checkin_questions(user_id: str):
@@ -119,30 +138,119 @@ def mental_health_get_checkin_questions(user_id: str):
     }
 
 @mental_health_router.post("/checkin/submit", response_model=CheckinSubmitResponse)
-def mental_health_submit_checkin(request: CheckinSubmitRequest):
+async def mental_health_submit_checkin(request: CheckinSubmitRequest):
     """Submit daily check-in responses"""
-    # 1. Summarize with LLM
-    summary_result = ai_agent.summarize_day_llm(request.answers)
-
-    # 2. Save Daily Summary
-    db.save_daily_summary(
+    # 1. Deterministic risk assessment of the answers (no LLM wait)
+    today = date.today().isoformat()
+    kw_score, _ = checkin_summaries.score_answers(request.answers)
+    assessment = checkin_summaries.preliminary_checkin(kw_score)
+    mood = mood_trends.parse_mood(request.answers)
+
+    # 2. Upsert today's check-in as pending (a resubmission replaces the earlier one)
+    revision = await run_in_threadpool(
+        db.save_pending_checkin,
         user_id=request.user_id,
-        date=date.today().isoformat(),
-        summary_text=summary_result.get("daily_summary", "Summary unavailable."),
-        risk_level=summary_result.get("risk_level", "low")
+        date=today,
+        answers=request.answers,
+        risk_level=assessment["risk_level"],
+        self_harm_detected=assessment["self_harm_detected"],
+        keyword_score=kw_score,
+        mood_score=mood
+    )
+    mood_trends.cache.record(request.user_id, today, mood)
+
+    # 3. Summarize with the LLM in the background; the client polls /checkin/summary
+    checkin_summaries.worker.submit(
+        checkin_summaries.CheckinJob(request.user_id, today, revision, request.answers, kw_score),
+        db.complete_daily_summary
     )
 
-    # 3. Determine Actions based on summary risk
-    actions = risk_engine.get_actions(summary_result.get("risk_level", "low"))
+    return {"daily_summary": "", "status": "pending", "date": today, "mood_score": mood, **assessment}
 
+@mental_health_router.get("/checkin/summary", response_model=CheckinSummaryResponse)
+def mental_health_checkin_summary(user_id: str, day: Optional[str] = Query(None, alias="date")):
+    """Status and result of a check-in summary (date defaults to today)"""
+    summary = db.get_daily_summary(user_id, day or date.today().isoformat())
+    if summary is None:
+        raise HTTPException(status_code=404, detail="No check-in for this date")
     return {
-        "daily_summary": summary_result.get("daily_summary", ""),
-        "risk_level": summary_result.get("risk_level", "low"),
-        "self_harm_detected": summary_result.get("self_harm_detected", False),
-        "advice": summary_result.get("advice", []),
-        "actions": actions
+        **summary,
+        "daily_summary": summary["summary_text"],
+        "actions": risk_engine.get_actions(summary["risk_level"] or "low")
     }
 
+@mental_health_router.get("/checkin/mood-trend", response_model=MoodTrendResponse)
+def mental_health_mood_trend(
+    user_id: str,
+    days: int = Query(90, ge=1, le=mood_trends.MOOD_TREND_DAYS),
+    window: int = Query(mood_trends.MOOD_TREND_WINDOW, ge=2, le=90)
+):
+    """Daily mood, rolling mean and slope over the last `days` days, with drop / decline alerts"""
+    mood_trends.cache.ensure_loaded(db.get_mood_scores)
+    trend = mood_trends.cache.user_trend(user_id, days, window)
+    if trend is None:
+        raise HTTPException(status_code=404, detail="No mood check-ins for this user")
+    return trend
+
+@mental_health_router.get("/checkin/mood-trend/cohort", response_model=MoodCohortTrendResponse)
+def mental_health_mood_cohort_trend(
+    user_ids: Optional[List[str]] = Query(None),
+    days: int = Query(90, ge=1, le=mood_trends.MOOD_TREND_DAYS),
+    window: int = Query(mood_trends.MOOD_TREND_WINDOW, ge=2, le=90)
+):
+    """Population mood trend for the given users (all users if omitted) and who needs attention"""
+    mood_trends.cache.ensure_loaded(db.get_mood_scores)
+    return mood_trends.cache.cohort_trend(user_ids, days, window)
+
+@mental_health_router.get("/history/messages", response_model=MessagePage)
+def mental_health_message_history(user_id: str, limit: int = Query(50, ge=1, le=200), cursor: Optional[str] = None):
+    """Newest-first messages for a user; pass next_cursor back to get the next page"""
+    try:
+        items, next_cursor = db.get_messages_page(user_id, limit=limit, cursor=cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"items": items, "next_cursor": next_cursor}
+
+@mental_health_router.get("/history/risk-events", response_model=RiskEventPage)
+def mental_health_risk_event_history(user_id: str, limit: int = Query(50, ge=1, le=200), cursor: Optional[str] = None):
+    """Newest-first risk events for a user; pass next_cursor back to get the next page"""
+    try:
+        items, next_cursor = db.get_risk_events_page(user_id, limit=limit, cursor=cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"items": items, "next_cursor": next_cursor}
+
+@mental_health_router.get("/history/risk-summary", response_model=RiskRollupResponse)
+def mental_health_risk_summary(user_id: str, days: int = Query(30, ge=1, le=90)):
+    """Per-user risk rollup (counts by level, last high-risk time, 7/30-day maximum, daily counts) without scanning history"""
+    rollup = db.get_risk_rollup(user_id, days=days)
+    if rollup is None:
+        raise HTTPException(status_code=404, detail="No risk events for this user")
+    return rollup
+
+@mental_health_router.get("/history/search", response_model=SearchPage)
+def mental_health_search_history(
+    q: str = Query(..., min_length=1, max_length=200),
+    user_id: Optional[str] = None,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    source: str = Query("all", pattern="^(all|messages|risk_events)$"),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None
+):
+    """Ranked full-text search over messages and risk event reasons, optionally for one user and a date range (until inclusive)"""
+    sources = db.SEARCH_SOURCES if source == "all" else (source,)
+    try:
+        items, next_cursor = db.search_history(
+            q, user_id=user_id,
+            since=since.isoformat() if since else None,
+            until=(until + timedelta(days=1)).isoformat() if until else None,
+            sources=sources, limit=limit, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": items, "next_cursor": next_cursor}
+
 # ==========================================
 # 3. MEDICINE BACKEND - Direct Router Mounting
 # ==========================================
@@ -178,15 +286,27 @@ def _setup_diagnostics_db():
     Base.metadata.create_all(bind=engine)
     print("[Gateway] ✓ Diagnostics database tables initialized")
 
+    # Vision, reasoning and safety services are built once and shared by all triage requests
+    from diagnostics_backend.diagnostics_app.services.registry import startup_services
+    startup_services()
+    print("[Gateway] ✓ Diagnostics services loaded")
+
 # Medicine: Fix DATABASE_URL to use absolute path
 def _setup_medicine_db():
     """Initialize medicine database with correct path"""
+    from medicine_backend.medicine_app.core.config import settings as medicine_settings
     from medicine_backend.medicine_app.core.db import engine, Base
+    from medicine_backend.medicine_app.core.group_commit import start_group_commit
     
     # Ensure tables are created
     Base.metadata.create_all(bind=engine)
     print("[Gateway] ✓ Medicine database tables initialized")
 
+    # Optional batched writer for dose-event status updates
+    if medicine_settings.GROUP_COMMIT_ENABLED:
+        start_group_commit()
+        print("[Gateway] ✓ Medicine group-commit writer started")
+
 # ==========================================
 # 4. GATEWAY APPLICATION
 # ==========================================
@@ -215,11 +335,212 @@ gateway_app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request Metrics (added last so it is outermost and times the full stack)
+from gateway.metrics import RequestMetricsMiddleware, metrics_registry
+
+gateway_app.add_middleware(RequestMetricsMiddleware, registry=metrics_registry)
+
+def _llm_breaker_metrics():
+    from mental_health_backend.mental_health_app.services.circuit_breaker import STATE_VALUES
+    breakers = [(breaker.name, breaker.stats()) for breaker in ai_agent.llm_breakers()]
+    lines = []
+    for metric, kind, help_text, value in (
+        ("llm_circuit_breaker_state", "gauge", "LLM circuit breaker state (0=closed, 1=half_open, 2=open).", lambda s: STATE_VALUES[s["state"]]),
+        ("llm_circuit_breaker_consecutive_failures", "gauge", "Failures since the last successful LLM call.", lambda s: s["consecutive_failures"]),
+        ("llm_circuit_breaker_trips_total", "counter", "Times the breaker opened.", lambda s: s["trips"]),
+    ):
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {kind}")
+        lines.extend(f'{metric}{{breaker="{name}"}} {value(stats)}' for name, stats in breakers)
+    lines.append("# HELP llm_calls_total LLM calls by outcome (short_circuit = answered by fallback while open).")
+    lines.append("# TYPE llm_calls_total counter")
+    for name, stats in breakers:
+        for outcome, key in (("success", "successes"), ("failure", "failures"), ("short_circuit", "short_circuits")):
+            lines.append(f'llm_calls_total{{breaker="{name}",outcome="{outcome}"}} {stats[key]}')
+    return lines
+
+metrics_registry.register_collector(_llm_breaker_metrics)
+
+def _llm_scheduler_metrics():
+    from mental_health_backend.mental_health_app.services.llm_scheduler import WAIT_BUCKETS
+    scheduler = ai_agent.llm_scheduler
+    if scheduler is None:
+        return []
+    stats = scheduler.stats()
+    lines = [
+        "# HELP llm_scheduler_wait_seconds Time LLM requests waited for a concurrency slot, by priority.",
+        "# TYPE llm_scheduler_wait_seconds histogram",
+    ]
+    for priority, s in stats.items():
+        for bound, count in zip(WAIT_BUCKETS, s["wait_buckets"]):
+            lines.append(f'llm_scheduler_wait_seconds_bucket{{priority="{priority}",le="{bound}"}} {count}')
+        lines.append(f'llm_scheduler_wait_seconds_bucket{{priority="{priority}",le="+Inf"}} {s["wait_buckets"][-1]}')
+        lines.append(f'llm_scheduler_wait_seconds_sum{{priority="{priority}"}} {s["wait_sum"]:.6f}')
+        lines.append(f'llm_scheduler_wait_seconds_count{{priority="{priority}"}} {s["served"]}')
+    for name, kind, help_text in (
+        ("queued", "gauge", "Requests currently waiting for an LLM slot."),
+        ("rejected", "counter", "Requests refused because the wait queue was full."),
+        ("evicted", "counter", "Queued requests dropped for a higher-priority request."),
+        ("expired", "counter", "Queued requests that reached their deadline before getting a slot (not provider failures)."),
+        ("promoted", "counter", "Requests served ahead of higher priorities after aging (starvation protection)."),
+    ):
+        metric = f"llm_scheduler_{name}" + ("_total" if kind == "counter" else "")
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {kind}")
+        for priority, s in stats.items():
+            lines.append(f'{metric}{{priority="{priority}"}} {s[name]}')
+    return lines
+
+metrics_registry.register_collector(_llm_scheduler_metrics)
+
+def _conversation_memory_metrics():
+    from mental_health_backend.mental_health_app.services.conversation_memory import PROMPT_TOKEN_BUCKETS, memory
+    stats = memory.stats()
+    lines = [
+        "# HELP llm_prompt_tokens Estimated chat prompt size (system prompt, conversation context and message).",
+        "# TYPE llm_prompt_tokens histogram",
+    ]
+    for bound, count in zip(PROMPT_TOKEN_BUCKETS, stats["prompt_buckets"]):
+        lines.append(f'llm_prompt_tokens_bucket{{le="{bound}"}} {count}')
+    lines += [
+        f'llm_prompt_tokens_bucket{{le="+Inf"}} {stats["prompt_buckets"][-1]}',
+        f"llm_prompt_tokens_sum {stats['prompt_tokens_sum']}",
+        f"llm_prompt_tokens_count {stats['prompts']}",
+        "# HELP conversation_memory_users Users whose recent turns are cached in this process.",
+        "# TYPE conversation_memory_users gauge",
+        f"conversation_memory_users {stats['users']}",
+        "# HELP conversation_memory_lookups_total Conversation memory lookups (miss = read back from the messages table).",
+        "# TYPE conversation_memory_lookups_total counter",
+        f'conversation_memory_lookups_total{{result="hit"}} {stats["hits"]}',
+        f'conversation_memory_lookups_total{{result="miss"}} {stats["misses"]}',
+        "# HELP conversation_memory_summary_folds_total Messages folded into a rolling summary.",
+        "# TYPE conversation_memory_summary_folds_total counter",
+        f"conversation_memory_summary_folds_total {stats['summary_folds']}",
+        "# HELP conversation_memory_dropped_messages_total Recent messages left out of a prompt to stay under the token budget.",
+        "# TYPE conversation_memory_dropped_messages_total counter",
+        f"conversation_memory_dropped_messages_total {stats['dropped_messages']}",
+    ]
+    return lines
+
+metrics_registry.register_collector(_conversation_memory_metrics)
+
+def _chat_coalescer_metrics():
+    from mental_health_backend.mental_health_app.services.message_coalescer import BATCH_SIZE_BUCKETS
+    stats = chat_turn.coalescer.stats()
+    lines = [
+        "# HELP chat_coalesce_messages_total Chat messages submitted for coalescing (CHAT_COALESCE_WINDOW_MS > 0).",
+        "# TYPE chat_coalesce_messages_total counter",
+        f"chat_coalesce_messages_total {stats['messages']}",
+        "# HELP chat_coalesce_llm_calls_total LLM calls made for coalesced bursts.",
+        "# TYPE chat_coalesce_llm_calls_total counter",
+        f"chat_coalesce_llm_calls_total {stats['llm_calls']}",
+        "# HELP chat_coalesce_llm_calls_saved_total Messages answered by another message's LLM call.",
+        "# TYPE chat_coalesce_llm_calls_saved_total counter",
+        f"chat_coalesce_llm_calls_saved_total {stats['calls_saved']}",
+        "# HELP chat_coalesce_pending_batches Bursts still collecting messages.",
+        "# TYPE chat_coalesce_pending_batches gauge",
+        f"chat_coalesce_pending_batches {stats['pending_batches']}",
+        "# HELP chat_coalesce_batch_size Messages per coalesced LLM call.",
+        "# TYPE chat_coalesce_batch_size histogram",
+    ]
+    for bound, count in zip(BATCH_SIZE_BUCKETS, stats["batch_sizes"]):
+        lines.append(f'chat_coalesce_batch_size_bucket{{le="{bound}"}} {count}')
+    lines.append(f'chat_coalesce_batch_size_bucket{{le="+Inf"}} {stats["batch_sizes"][-1]}')
+    lines.append(f"chat_coalesce_batch_size_count {stats['llm_calls']}")
+    return lines
+
+metrics_registry.register_collector(_chat_coalescer_metrics)
+
+def _checkin_summary_metrics():
+    stats = checkin_summaries.worker.stats()
+    return [
+        "# HELP checkin_summary_queued Check-in summaries waiting for a background worker.",
+        "# TYPE checkin_summary_queued gauge",
+        f"checkin_summary_queued {stats['queued']}",
+        "# HELP checkin_summaries_total Background check-in summaries by outcome (stale = answers resubmitted meanwhile).",
+        "# TYPE checkin_summaries_total counter",
+        f'checkin_summaries_total{{outcome="complete"}} {stats["completed"]}',
+        f'checkin_summaries_total{{outcome="failed"}} {stats["failed"]}',
+        f'checkin_summaries_total{{outcome="stale"}} {stats["stale"]}',
+        "# HELP checkin_summary_seconds_sum Total time from submission to stored summary.",
+        "# TYPE checkin_summary_seconds_sum counter",
+        f"checkin_summary_seconds_sum {stats['seconds_sum']:.6f}",
+    ]
+
+metrics_registry.register_collector(_checkin_summary_metrics)
+
+def _model_route_metrics():
+    stats = model_router.router.stats()
+    default_model = ai_agent.get_provider().model
+    lines = [
+        "# HELP llm_route_latency_seconds LLM call latency by model route (fast / standard / escalation).",
+        "# TYPE llm_route_latency_seconds histogram",
+    ]
+    for route, s in stats.items():
+        labels = f'route="{route}",model="{s["model"] or default_model}"'
+        for bound, count in zip(model_router.LATENCY_BUCKETS, s["latency_buckets"]):
+            lines.append(f'llm_route_latency_seconds_bucket{{{labels},le="{bound}"}} {count}')
+        lines.append(f'llm_route_latency_seconds_bucket{{{labels},le="+Inf"}} {s["latency_buckets"][-1]}')
+        lines.append(f'llm_route_latency_seconds_sum{{{labels}}} {s["latency_sum"]:.6f}')
+        lines.append(f'llm_route_latency_seconds_count{{{labels}}} {s["calls"]}')
+    lines += [
+        "# HELP llm_route_calls_total LLM calls by model route and outcome.",
+        "# TYPE llm_route_calls_total counter",
+    ]
+    for route, s in stats.items():
+        lines.append(f'llm_route_calls_total{{route="{route}",outcome="ok"}} {s["calls"] - s["failures"]}')
+        lines.append(f'llm_route_calls_total{{route="{route}",outcome="error"}} {s["failures"]}')
+    lines += [
+        "# HELP llm_route_tokens_total Estimated tokens (chars / 4) sent and received, by model route.",
+        "# TYPE llm_route_tokens_total counter",
+    ]
+    for route, s in stats.items():
+        lines.append(f'llm_route_tokens_total{{route="{route}",kind="prompt"}} {s["prompt_tokens"]}')
+        lines.append(f'llm_route_tokens_total{{route="{route}",kind="completion"}} {s["completion_tokens"]}')
+    return lines
+
+metrics_registry.register_collector(_model_route_metrics)
+
+def _mood_trend_metrics():
+    stats = mood_trends.cache.stats()
+    return [
+        "# HELP mood_trend_cache_users Users held in the mood trend matrix.",
+        "# TYPE mood_trend_cache_users gauge",
+        f"mood_trend_cache_users {stats['users']}",
+        "# HELP mood_trend_cache_loads_total Full reloads of the mood trend matrix from the database.",
+        "# TYPE mood_trend_cache_loads_total counter",
+        f"mood_trend_cache_loads_total {stats['loads']}",
+    ]
+
+metrics_registry.register_collector(_mood_trend_metrics)
+
+def _escalation_metrics():
+    stats = escalation.dispatcher.stats()
+    return [
+        "# HELP escalation_dispatcher_running Whether this process delivers the escalation outbox.",
+        "# TYPE escalation_dispatcher_running gauge",
+        f"escalation_dispatcher_running {stats['running']}",
+        "# HELP escalation_notifications_total Trusted-contact notifications by outcome (retried = delivery failed, will retry).",
+        "# TYPE escalation_notifications_total counter",
+        f'escalation_notifications_total{{outcome="sent"}} {stats["sent"]}',
+        f'escalation_notifications_total{{outcome="suppressed"}} {stats["suppressed"]}',
+        f'escalation_notifications_total{{outcome="retried"}} {stats["retried"]}',
+        f'escalation_notifications_total{{outcome="failed"}} {stats["failed"]}',
+        "# HELP escalation_batches_total Outbox batches claimed by the dispatcher.",
+        "# TYPE escalation_batches_total counter",
+        f"escalation_batches_total {stats['batches']}",
+        "# HELP escalation_delivery_seconds_sum Total time from risk event to delivered notification.",
+        "# TYPE escalation_delivery_seconds_sum counter",
+        f"escalation_delivery_seconds_sum {stats['delivery_seconds_sum']:.6f}",
+    ]
+
+metrics_registry.register_collector(_escalation_metrics)
+
 # ==========================================
 # 6. STARTUP EVENT - Initialize backends
 # ==========================================
 @gateway_app.on_event("startup")
-def on_startup():
+async def on_startup():
     """Initialize all backend services on startup"""
     # Initialize diagnostics database tables
     try:
@@ -237,9 +558,47 @@ def on_startup():
     try:
         db.init_db()
         print("[Gateway] ✓ Mental Health database initialized")
+        # Check-ins stored before mood scores were parsed
+        backfilled = db.backfill_mood_scores(mood_trends.parse_mood)
+        if backfilled:
+            print(f"[Gateway] Backfilled {backfilled} check-in mood scores")
     except Exception as e:
         print(f"[Gateway] Warning: Mental Health DB init error: {e}")
 
+    # Shared async LLM client (pooled keep-alive connections)
+    await ai_agent.startup_async_client()
+
+    # Check-in summaries left pending by the previous process
+    try:
+        pending = checkin_summaries.requeue_pending(db.get_pending_checkins(), db.complete_daily_summary)
+        if pending:
+            print(f"[Gateway] Re-queued {pending} pending check-in summaries")
+    except Exception as e:
+        print(f"[Gateway] Warning: Could not re-queue check-in summaries: {e}")
+
+    # Trusted-contact notifications queued with high/critical risk events
+    if escalation.ESCALATION_DISPATCHER:
+        escalation.dispatcher.start(db.claim_due_escalations, db.record_escalation_results)
+        print("[Gateway] ✓ Escalation dispatcher started")
+
+@gateway_app.on_event("shutdown")
+async def on_shutdown():
+    """Release pooled resources held by backend services"""
+    # Let background LLM work (crisis enrichment, check-in summaries) finish before the client closes
+    await chat_turn.drain_background_tasks()
+    await checkin_summaries.worker.stop()
+    await escalation.dispatcher.stop()
+    await ai_agent.shutdown_async_client()
+    db.close_db_connections()
+
+    from diagnostics_backend.diagnostics_app.db.session import async_engine
+    from diagnostics_backend.diagnostics_app.services.registry import shutdown_services
+    await async_engine.dispose()
+    shutdown_services()
+
+    from medicine_backend.medicine_app.core.group_commit import stop_group_commit
+    stop_group_commit()
+
 # ==========================================
 # 7. INCLUDE ROUTERS WITH PROPER TAGGING
 # ==========================================
@@ -280,6 +639,14 @@ def gateway_health():
     """Gateway health check"""
     return {"status": "ok", "timestamp": datetime.utcnow().isoformat()}
 
+@gateway_app.get("/metrics", tags=["Gateway"], response_class=PlainTextResponse)
+def gateway_metrics():
+    """Per-route latency, in-flight, status and body-size metrics (Prometheus text format)"""
+    return PlainTextResponse(
+        metrics_registry.render_prometheus(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
 # ==========================================
 # 9. EXTENSIBILITY GUIDE
 # ==========================================
@@ -0,0 +1,236 @@
+"""
+Gateway Metrics - Per-route request timing exposed as Prometheus text
+
+Provides:
+- RequestMetricsMiddleware: pure ASGI middleware that times every HTTP request
+- MetricsRegistry: fixed-bucket histograms / counters keyed by route template
+- render_prometheus(): text exposition served by the gateway at /metrics
+
+Design notes:
+- Stats are keyed by (method, route template) e.g. ("GET", "/medicine-reminder/medications/{id}"),
+  never by the raw path, so label cardinality stays bounded.
+- Each RouteStats object pre-renders its label string once; the hot path only
+  increments integers in preallocated lists (no label dicts per request).
+- The middleware runs on the event loop thread, so increments need no locking.
+"""
+
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Latency buckets in seconds (upper bounds, +Inf is implicit)
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+# Body size buckets in bytes (upper bounds, +Inf is implicit)
+SIZE_BUCKETS: Tuple[float, ...] = (
+    64, 256, 1024, 4096, 16384, 65536, 262144, 1048576
+)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_bound(bound: float) -> str:
+    return repr(float(bound)) if bound != int(bound) else f"{int(bound)}.0"
+
+
+class Histogram:
+    """Fixed-bucket histogram; counts are stored per bucket and made cumulative on render."""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name: str, labels: str) -> Iterable[str]:
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, self.counts):
+            cumulative += bucket_count
+            yield f'{name}_bucket{{{labels},le="{_format_bound(bound)}"}} {cumulative}'
+        cumulative += self.counts[-1]
+        yield f'{name}_bucket{{{labels},le="+Inf"}} {cumulative}'
+        yield f"{name}_sum{{{labels}}} {self.sum}"
+        yield f"{name}_count{{{labels}}} {self.count}"
+
+
+class RouteStats:
+    """All counters for a single (method, route template) pair."""
+
+    __slots__ = ("labels", "in_flight", "latency", "request_size", "response_size", "statuses")
+
+    def __init__(self, method: str, route: str):
+        self.labels = f'method="{_escape_label(method)}",route="{_escape_label(route)}"'
+        self.in_flight = 0
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.request_size = Histogram(SIZE_BUCKETS)
+        self.response_size = Histogram(SIZE_BUCKETS)
+        self.statuses: Dict[int, int] = {}
+
+
+class RouteResolver:
+    """
+    Maps a request (method and raw path) to the route template that will serve it.
+
+    Routes are read lazily from the app on first use (all routers are included by then).
+    Results are memoized per (method, path) up to `cache_size` entries; requests beyond that
+    fall back to an ordered regex scan, mirroring Starlette's first-match semantics: a route
+    only matches if it accepts the method, so a 405 is reported as unmatched.
+    """
+
+    def __init__(self, cache_size: int = 2048):
+        self._routes: Optional[List[Tuple[object, Optional[frozenset], str]]] = None
+        self._cache: Dict[Tuple[str, str], str] = {}
+        self._cache_size = cache_size
+
+    def _load(self, app) -> List[Tuple[object, Optional[frozenset], str]]:
+        routes = []
+        for route in getattr(app, "routes", []):
+            regex = getattr(route, "path_regex", None)
+            template = getattr(route, "path_format", None) or getattr(route, "path", None)
+            methods = getattr(route, "methods", None)  # None: any method (mounts, websockets)
+            if regex is not None and template is not None:
+                routes.append((regex, frozenset(methods) if methods else None, template))
+        return routes
+
+    def resolve(self, app, path: str, method: str = "GET") -> str:
+        key = (method, path)
+        template = self._cache.get(key)
+        if template is not None:
+            return template
+
+        if self._routes is None:
+            self._routes = self._load(app)
+
+        template = UNMATCHED_ROUTE
+        for regex, methods, candidate in self._routes:
+            if (methods is None or method in methods) and regex.match(path):
+                template = candidate
+                break
+
+        if len(self._cache) < self._cache_size:
+            self._cache[key] = template
+        return template
+
+
+class MetricsRegistry:
+    """Holds RouteStats per (method, route template) plus optional external collectors."""
+
+    def __init__(self):
+        self._stats: Dict[Tuple[str, str], RouteStats] = {}
+        self._collectors: List[Callable[[], Iterable[str]]] = []
+
+    def get(self, method: str, route: str) -> RouteStats:
+        key = (method, route)
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = RouteStats(method, route)
+            self._stats[key] = stats
+        return stats
+
+    def register_collector(self, collector: Callable[[], Iterable[str]]) -> None:
+        """Register a callable returning extra Prometheus text lines (e.g. backend service stats)."""
+        self._collectors.append(collector)
+
+    def render_prometheus(self) -> str:
+        stats = list(self._stats.values())
+        lines: List[str] = []
+
+        lines.append("# HELP gateway_http_request_duration_seconds Request latency by route template.")
+        lines.append("# TYPE gateway_http_request_duration_seconds histogram")
+        for s in stats:
+            lines.extend(s.latency.render("gateway_http_request_duration_seconds", s.labels))
+
+        lines.append("# HELP gateway_http_requests_in_flight Requests currently being served.")
+        lines.append("# TYPE gateway_http_requests_in_flight gauge")
+        for s in stats:
+            lines.append(f"gateway_http_requests_in_flight{{{s.labels}}} {s.in_flight}")
+
+        lines.append("# HELP gateway_http_responses_total Responses by route template and status code.")
+        lines.append("# TYPE gateway_http_responses_total counter")
+        for s in stats:
+            for status, count in sorted(s.statuses.items()):
+                lines.append(f'gateway_http_responses_total{{{s.labels},status="{status}"}} {count}')
+
+        lines.append("# HELP gateway_http_request_size_bytes Request body size by route template.")
+        lines.append("# TYPE gateway_http_request_size_bytes histogram")
+        for s in stats:
+            lines.extend(s.request_size.render("gateway_http_request_size_bytes", s.labels))
+
+        lines.append("# HELP gateway_http_response_size_bytes Response body size by route template.")
+        lines.append("# TYPE gateway_http_response_size_bytes histogram")
+        for s in stats:
+            lines.extend(s.response_size.render("gateway_http_response_size_bytes", s.labels))
+
+        for collector in self._collectors:
+            lines.extend(collector())
+
+        return "\n".join(lines) + "\n"
+
+
+class RequestMetricsMiddleware:
+    """
+    Pure ASGI middleware (no BaseHTTPMiddleware overhead, streaming-safe).
+
+    Records latency, in-flight count, status code and request/response body sizes
+    per route template. Non-HTTP scopes (lifespan, websocket) pass straight through.
+    """
+
+    def __init__(self, app, registry: MetricsRegistry, resolver: Optional[RouteResolver] = None):
+        self.app = app
+        self.registry = registry
+        self.resolver = resolver or RouteResolver()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = self.resolver.resolve(scope.get("app"), scope["path"], scope.get("method", "GET"))
+        stats = self.registry.get(scope["method"], route)
+
+        request_bytes = 0
+        response_bytes = 0
+        status_code = 500
+
+        async def receive_wrapper():
+            nonlocal request_bytes
+            message = await receive()
+            if message["type"] == "http.request":
+                request_bytes += len(message.get("body", b""))
+            return message
+
+        async def send_wrapper(message):
+            nonlocal response_bytes, status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        stats.in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            stats.latency.observe(time.perf_counter() - start)
+            stats.in_flight -= 1
+            stats.statuses[status_code] = stats.statuses.get(status_code, 0) + 1
+            stats.request_size.observe(request_bytes)
+            stats.response_size.observe(response_bytes)
+
+
+# Shared registry used by the gateway app
+metrics_registry = MetricsRegistry()
@@ -12,6 +12,11 @@ class Settings:
         return f"sqlite:///{db_file}"
     
     TIMEZONE: str = "Asia/Kolkata"
+
+    # Group commit for dose-event status updates (off by default; enable per deployment)
+    GROUP_COMMIT_ENABLED: bool = os.getenv("MEDICINE_GROUP_COMMIT", "0") == "1"
+    GROUP_COMMIT_MAX_BATCH: int = int(os.getenv("GROUP_COMMIT_MAX_BATCH", "128"))
+    GROUP_COMMIT_MAX_DELAY_MS: float = float(os.getenv("GROUP_COMMIT_MAX_DELAY_MS", "0"))  # 0 = batch whatever queued during the last commit
     
     # Upload directory: use absolute path
     @property
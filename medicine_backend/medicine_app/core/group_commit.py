@@ -0,0 +1,141 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from medicine_backend.medicine_app.core.config import settings
+from medicine_backend.medicine_app.core.db import SessionLocal
+
+_STOP = object()
+
+class GroupCommitWriter:
+    """
+    Single background thread with its own Session that applies queued write jobs
+    and commits them in batches (max_batch jobs or max_delay_ms, whichever first).
+
+    submit(fn) returns a Future resolved with fn(session)'s result once the batch
+    is committed. How durable that commit is follows the engine's SQLite settings:
+    with the defaults used here (rollback journal, synchronous=FULL) it is fsynced,
+    but under WAL with synchronous=NORMAL a committed batch can be lost on power
+    failure. If a batch fails, it is rolled back and each job is replayed in its own
+    transaction so only the failing caller sees the error.
+    """
+
+    def __init__(self, max_batch: int = settings.GROUP_COMMIT_MAX_BATCH, max_delay_ms: float = settings.GROUP_COMMIT_MAX_DELAY_MS):
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000.0
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self.batches_committed = 0
+        self.jobs_committed = 0
+        self.jobs_failed = 0
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="medicine-group-commit", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Flush everything already queued, then stop the thread."""
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+
+    def submit(self, fn: Callable[[Session], Any]) -> Future:
+        future = Future()
+        self._queue.put((fn, future))
+        return future
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "batches_committed": self.batches_committed,
+            "jobs_committed": self.jobs_committed,
+            "jobs_failed": self.jobs_failed,
+            "avg_batch_size": self.jobs_committed / self.batches_committed if self.batches_committed else 0.0,
+            "queue_depth": self._queue.qsize()
+        }
+
+    def _collect(self, first) -> Tuple[List, bool]:
+        batch, stopping = [first], False
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            try:
+                remaining = deadline - time.monotonic()
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                stopping = True
+                break
+            batch.append(item)
+        return batch, stopping
+
+    def _commit_batch(self, session: Session, batch: List):
+        try:
+            results = [fn(session) for fn, _ in batch]
+            session.commit()
+        except Exception:
+            session.rollback()
+            for fn, future in batch:
+                self._commit_one(session, fn, future)
+            return
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+        self.batches_committed += 1
+        self.jobs_committed += len(batch)
+
+    def _commit_one(self, session: Session, fn, future: Future):
+        try:
+            result = fn(session)
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            self.jobs_failed += 1
+            future.set_exception(e)
+            return
+        self.batches_committed += 1
+        self.jobs_committed += 1
+        future.set_result(result)
+
+    def _run(self):
+        session = SessionLocal()
+        try:
+            stopping = False
+            while not stopping:
+                item = self._queue.get()
+                if item is _STOP:
+                    break
+                batch, stopping = self._collect(item)
+                self._commit_batch(session, batch)
+                # Do not keep ORM objects around between batches
+                session.expunge_all()
+        finally:
+            session.close()
+
+group_commit_writer: Optional[GroupCommitWriter] = None
+
+def start_group_commit(max_batch: int = settings.GROUP_COMMIT_MAX_BATCH, max_delay_ms: float = settings.GROUP_COMMIT_MAX_DELAY_MS) -> GroupCommitWriter:
+    global group_commit_writer
+    if group_commit_writer is None:
+        group_commit_writer = GroupCommitWriter(max_batch, max_delay_ms)
+        group_commit_writer.start()
+    return group_commit_writer
+
+def stop_group_commit():
+    global group_commit_writer
+    if group_commit_writer is not None:
+        group_commit_writer.stop()
+        group_commit_writer = None
+
+def run_write(db: Session, fn: Callable[[Session], Any]) -> Any:
+    """
+    Apply a write job: through the group-commit writer when running,
+    otherwise directly on the request session followed by commit.
+    """
+    writer = group_commit_writer
+    if writer is not None:
+        return writer.submit(fn).result()
+    result = fn(db)
+    db.commit()
+    return result
@@ -4,6 +4,7 @@ import os
 
 from medicine_backend.medicine_app.core.config import settings
 from medicine_backend.medicine_app.core.db import engine, Base
+from medicine_backend.medicine_app.core.group_commit import start_group_commit, stop_group_commit
 from medicine_backend.medicine_app.routes import medications, reminders, prescriptions
 
 # Create database tables
@@ -14,6 +15,15 @@ app = FastAPI(title=settings.PROJECT_NAME)
 # Mount uploads directory for static access (optional but helpful for checking uploaded files)
 app.mount("/uploads", StaticFiles(directory=settings.UPLOAD_DIR), name="uploads")
 
+@app.on_event("startup")
+def on_startup():
+    if settings.GROUP_COMMIT_ENABLED:
+        start_group_commit()
+
+@app.on_event("shutdown")
+def on_shutdown():
+    stop_group_commit()
+
 app.include_router(medications.router)
 app.include_router(reminders.router)
 app.include_router(prescriptions.router)
@@ -4,6 +4,7 @@ from typing import List
 from datetime import datetime
 
 from medicine_backend.medicine_app.core.db import get_db
+from medicine_backend.medicine_app.core.group_commit import run_write
 from medicine_backend.medicine_app.models.dose_event import DoseEvent
 from medicine_backend.medicine_app.models.medication import Medication
 from medicine_backend.medicine_app.services.reminder_service import generate_dose_events, process_missed_doses
@@ -16,6 +17,24 @@ def get_user_id(x_user_id: str = Header(...)):
         raise HTTPException(status_code=400, detail="X-User-Id header missing")
     return x_user_id
 
+def _status_update_job(event_id: int, status: str, note: str, updated_at: datetime = None):
+    """
+    Build a write job for a dose event status change.
+    Runs on the request session or on the group-commit writer (see core/group_commit.py).
+    """
+    taken_at = datetime.utcnow() if status == "TAKEN" else None
+
+    def job(session: Session):
+        event = session.get(DoseEvent, event_id)
+        event.status = status
+        event.note = note
+        if updated_at is not None:
+            event.updated_at = updated_at
+        if taken_at is not None:
+            event.taken_at = taken_at
+
+    return job
+
 @router.post("/reminders/generate")
 def generate_reminders(
     days: int = 7,
@@ -90,14 +109,7 @@ def mark_dose_event(
     if not event:
         raise HTTPException(status_code=404, detail="Dose event not found")
         
-    event.status = status_update.status
-    event.note = status_update.note
-    
-    from datetime import datetime
-    if status_update.status == "TAKEN":
-        event.taken_at = datetime.utcnow()
-        
-    db.commit()
+    run_write(db, _status_update_job(event.id, status_update.status, status_update.note))
     db.refresh(event)
     return event
 
@@ -120,17 +132,11 @@ def mark_reminder_status(
     if status_update.status not in ["TAKEN", "SKIPPED"]:
          raise HTTPException(status_code=400, detail="Invalid status")
 
-    event.status = status_update.status
-    event.note = status_update.note
-    
-    from datetime import datetime
     # Use strict UTC or handle timezone if needed, but requirements say Asia/Kolkata fixed
     # For now, let's use the current time logic consistent with the app
-    event.updated_at = datetime.utcnow() # DB is usually UTC
-    
-    if status_update.status == "TAKEN":
-        event.taken_at = datetime.utcnow()
-        
-    db.commit()
+    run_write(db, _status_update_job(
+        event.id, status_update.status, status_update.note,
+        updated_at=datetime.utcnow()  # DB is usually UTC
+    ))
     db.refresh(event)
     return event
@@ -0,0 +1,21 @@
+import pytest
+from sqlalchemy import create_engine
+from medicine_backend.medicine_app.core import group_commit
+from medicine_backend.medicine_app.core.db import Base, SessionLocal
+import medicine_backend.medicine_app.models.dose_event  # noqa: F401 (registers the tables)
+import medicine_backend.medicine_app.models.medication  # noqa: F401
+import medicine_backend.medicine_app.models.prescription  # noqa: F401
+import medicine_backend.medicine_app.models.schedule  # noqa: F401
+
+
+@pytest.fixture
+def temp_db(tmp_path):
+    """Binds SessionLocal (request sessions and the group-commit writer) to a fresh database."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'medicine_test.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    original = SessionLocal.kw["bind"]
+    SessionLocal.configure(bind=engine)
+    yield SessionLocal
+    group_commit.stop_group_commit()
+    SessionLocal.configure(bind=original)
+    engine.dispose()
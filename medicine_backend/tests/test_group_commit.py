@@ -0,0 +1,85 @@
+from datetime import datetime
+import pytest
+from fastapi.testclient import TestClient
+from medicine_backend.medicine_app.core import group_commit
+from medicine_backend.medicine_app.core.config import settings
+from medicine_backend.medicine_app.main import app
+from medicine_backend.medicine_app.models.dose_event import DoseEvent
+from medicine_backend.medicine_app.models.medication import Medication
+from medicine_backend.medicine_app.routes.reminders import _status_update_job
+
+SEEDED_AT = datetime(2026, 1, 1, 8, 0)
+
+
+def seed_events(sessions, count=3, user_id="m1"):
+    with sessions() as session:
+        medication = Medication(user_id=user_id, name="Metformin", strength="500mg")
+        session.add(medication)
+        session.flush()
+        events = [DoseEvent(medication_id=medication.id, scheduled_at=SEEDED_AT, updated_at=SEEDED_AT) for _ in range(count)]
+        session.add_all(events)
+        session.commit()
+        return [event.id for event in events]
+
+
+def load_event(sessions, event_id):
+    with sessions() as session:
+        return session.get(DoseEvent, event_id)
+
+
+def test_failing_job_fails_only_its_caller(temp_db):
+    first, second = seed_events(temp_db, count=2)
+    writer = group_commit.start_group_commit(max_batch=8, max_delay_ms=50)
+
+    def broken(session):
+        session.get(DoseEvent, first).note = "lost with the failed job"
+        raise RuntimeError("bad job")
+
+    good = writer.submit(_status_update_job(first, "TAKEN", "with breakfast"))
+    bad = writer.submit(broken)
+    other = writer.submit(_status_update_job(second, "SKIPPED", "felt sick"))
+
+    assert good.result(timeout=5) is None and other.result(timeout=5) is None
+    with pytest.raises(RuntimeError, match="bad job"):
+        bad.result(timeout=5)
+    group_commit.stop_group_commit()
+
+    assert writer.stats()["jobs_committed"] == 2 and writer.stats()["jobs_failed"] == 1
+    assert load_event(temp_db, first).note == "with breakfast"
+    assert load_event(temp_db, second).status == "SKIPPED"
+
+
+def test_run_write_goes_through_the_writer(temp_db):
+    [event_id] = seed_events(temp_db, count=1)
+    writer = group_commit.start_group_commit(max_batch=8, max_delay_ms=0)
+
+    with temp_db() as request_session:
+        assert group_commit.run_write(request_session, lambda session: session.get(DoseEvent, event_id).id) == event_id
+        group_commit.run_write(request_session, _status_update_job(event_id, "TAKEN", "late"))
+        assert not request_session.new and not request_session.dirty
+
+    assert writer.stats()["jobs_committed"] == 2
+    assert load_event(temp_db, event_id).status == "TAKEN"
+
+
+@pytest.mark.parametrize("enabled", [False, True])
+@pytest.mark.parametrize("path", ["/dose-events/{id}/mark", "/reminders/{id}/mark"])
+def test_mark_endpoints_update_every_field(temp_db, monkeypatch, enabled, path):
+    monkeypatch.setattr(settings, "GROUP_COMMIT_ENABLED", enabled)
+    [event_id] = seed_events(temp_db, count=1)
+
+    with TestClient(app) as client:
+        assert (group_commit.group_commit_writer is not None) == enabled
+        response = client.post(path.format(id=event_id), json={"status": "TAKEN", "note": "after lunch"},
+                               headers={"X-User-Id": "m1"})
+        assert response.status_code == 200
+        missing = client.post(path.format(id=event_id), json={"status": "TAKEN"}, headers={"X-User-Id": "someone-else"})
+        assert missing.status_code == 404
+
+    body = response.json()
+    event = load_event(temp_db, event_id)
+    assert body["status"] == event.status == "TAKEN"
+    assert body["note"] == event.note == "after lunch"
+    assert event.taken_at is not None and body["taken_at"] is not None
+    assert event.updated_at > SEEDED_AT
+    assert datetime.fromisoformat(body["updated_at"]) == event.updated_at
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+"""
+Benchmark: sync OpenAI client on a threadpool vs shared async client, 200 concurrent chats.
+
+The sync path mirrors the old handlers: Starlette runs sync endpoints on a 40-thread
+pool, so each in-flight LLM call pins a thread. The async path awaits the pooled
+AsyncOpenAI client under the LLM_MAX_CONCURRENCY semaphore.
+
+Run from the repository root:
+    python mental_health_backend/benchmarks/bench_async_llm.py [--chats 200] [--delay 0.2]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT))
+
+from mental_health_backend.tests.llm_stub_server import StubLLMServer
+
+STARLETTE_THREADPOOL_SIZE = 40
+
+
+def run_sync(ai_agent, chats: int) -> float:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=STARLETTE_THREADPOOL_SIZE) as pool:
+        results = list(pool.map(ai_agent.analyze_message_llm, [f"message {i}" for i in range(chats)]))
+    elapsed = time.perf_counter() - start
+    assert all(r["reply"] != ai_agent.FALLBACK_ERROR_MESSAGE for r in results)
+    return elapsed
+
+
+async def run_async(ai_agent, chats: int) -> float:
+    await ai_agent.startup_async_client()
+    try:
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *(ai_agent.analyze_message_llm_async(f"message {i}") for i in range(chats))
+        )
+        elapsed = time.perf_counter() - start
+    finally:
+        await ai_agent.shutdown_async_client()
+    assert all(r["reply"] != ai_agent.FALLBACK_ERROR_MESSAGE for r in results)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chats", type=int, default=200)
+    parser.add_argument("--delay", type=float, default=0.2, help="stub LLM latency in seconds")
+    args = parser.parse_args()
+
+    with StubLLMServer(delay=args.delay) as server:
+        os.environ["GROQ_API_KEY"] = "stub"
+        os.environ["GROQ_BASE_URL"] = server.base_url
+        os.environ.setdefault("LLM_MAX_CONCURRENCY", str(args.chats))
+
+        from mental_health_backend.mental_health_app.services import ai_agent
+
+        sync_elapsed = run_sync(ai_agent, args.chats)
+        async_elapsed = asyncio.run(run_async(ai_agent, args.chats))
+
+    print(f"{args.chats} concurrent chats, stub LLM latency {args.delay * 1000:.0f} ms")
+    print(f"  sync  (threadpool={STARLETTE_THREADPOOL_SIZE}): {sync_elapsed:6.2f}s  {args.chats / sync_elapsed:8.1f} chats/s")
+    print(f"  async (max_concurrency={os.environ['LLM_MAX_CONCURRENCY']}): {async_elapsed:6.2f}s  {args.chats / async_elapsed:8.1f} chats/s")
+
+
+if __name__ == "__main__":
+    main()
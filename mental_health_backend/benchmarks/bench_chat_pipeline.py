@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+"""
+Benchmark: offline load test of the full /mental-health/chat/message pipeline
+(risk engine, LLM call with deadline and breaker, SQLite write) through the gateway ASGI app.
+
+The LLM is an in-process provider, so no network or API key is needed:
+  --provider mock    latency / jitter / failure rate from the flags below
+  --provider replay  answers from a recording made with LLM_PROVIDER=record (--record-path)
+
+Run from the repository root:
+    python mental_health_backend/benchmarks/bench_chat_pipeline.py [--chats 500] [--concurrency 50]
+        [--latency-ms 300] [--jitter-ms 150] [--failure-rate 0.02]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT))
+
+from mental_health_backend.tests.asgi_helpers import post_asgi
+
+MESSAGES = [
+    "I had a long day and feel tired",
+    "Work has been stressful and I can't sleep",
+    "I feel hopeless and alone lately",
+    "Today was actually pretty good",
+]
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+async def run(app, ai_agent, chats: int, concurrency: int):
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with slots:
+            chunks, total = await post_asgi(app, "/mental-health/chat/message", {"user_id": f"load-{i % 100}", "message": MESSAGES[i % len(MESSAGES)]})
+            return total, json.loads(b"".join(c for _, c in chunks))
+
+    try:
+        start = time.perf_counter()
+        results = await asyncio.gather(*(one(i) for i in range(chats)))
+        elapsed = time.perf_counter() - start
+    finally:
+        await ai_agent.shutdown_async_client()
+    return elapsed, results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chats", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--provider", choices=["mock", "replay"], default="mock")
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--jitter-ms", type=float, default=150)
+    parser.add_argument("--failure-rate", type=float, default=0.02)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--record-path", default="llm_recordings.jsonl")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.update({
+            "LLM_PROVIDER": args.provider,
+            "LLM_MOCK_LATENCY_MS": str(args.latency_ms),
+            "LLM_MOCK_JITTER_MS": str(args.jitter_ms),
+            "LLM_MOCK_FAILURE_RATE": str(args.failure_rate),
+            "LLM_MOCK_SEED": str(args.seed),
+            "LLM_RECORD_PATH": args.record_path,
+            "LLM_REPLAY_LATENCY": "1",
+            "MENTAL_HEALTH_DB_PATH": os.path.join(tmp, "load.db"),
+        })
+        from gateway.main import gateway_app
+        from mental_health_backend.mental_health_app import db
+        from mental_health_backend.mental_health_app.services import ai_agent
+
+        db.init_db()
+        elapsed, results = asyncio.run(run(gateway_app, ai_agent, args.chats, args.concurrency))
+        db.close_db_connections()
+
+    latencies = [t * 1000 for t, _ in results]
+    fallbacks = sum(body["reply"] == ai_agent.FALLBACK_ERROR_MESSAGE for _, body in results)
+    breaker = ai_agent.llm_breaker.stats()
+    print(f"{args.chats} chats, concurrency {args.concurrency}, provider {args.provider}"
+          + (f" ({args.latency_ms:.0f} ± {args.jitter_ms:.0f} ms, {args.failure_rate:.0%} failures)" if args.provider == "mock" else ""))
+    print(f"  throughput {args.chats / elapsed:8.1f} chats/s")
+    print(f"  latency    p50 {statistics.median(latencies):7.1f} ms   p95 {percentile(latencies, 0.95):7.1f} ms   p99 {percentile(latencies, 0.99):7.1f} ms")
+    print(f"  fallbacks  {fallbacks} ({fallbacks / args.chats:.1%})   breaker {breaker['state']}, trips {breaker['trips']}, short-circuits {breaker['short_circuits']}")
+
+
+if __name__ == "__main__":
+    main()
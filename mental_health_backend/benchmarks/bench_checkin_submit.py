@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+"""
+Benchmark: /checkin/submit latency, inline LLM summary (legacy) vs deferred summary
+(keyword assessment + pending upsert, LLM on the background worker).
+
+The legacy handler below is a reference copy of the pre-deferral code path
+(summarize_day_llm_async, then save_daily_summary). The LLM is the in-process mock.
+
+Run from the repository root:
+    python mental_health_backend/benchmarks/bench_checkin_submit.py [--checkins 200] [--concurrency 20] [--latency-ms 800]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT))
+
+from mental_health_backend.tests.asgi_helpers import post_asgi
+
+ANSWERS = {
+    "How are you feeling right now (1–10)?": "5",
+    "What was the strongest emotion you felt today?": "stress",
+    "What triggered stress or anxiety today?": "exams",
+    "Did you sleep well last night?": "not really",
+}
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+async def legacy_submit(ai_agent, db, user_id):
+    """Reference copy of the inline handler: the response waits for the LLM."""
+    from starlette.concurrency import run_in_threadpool
+    start = time.perf_counter()
+    result = await ai_agent.summarize_day_llm_async(ANSWERS)
+    await run_in_threadpool(db.save_daily_summary, user_id, date.today().isoformat(),
+                            result.get("daily_summary", ""), result.get("risk_level", "low"))
+    return time.perf_counter() - start
+
+
+async def deferred_submit(app, user_id):
+    _, total = await post_asgi(app, "/mental-health/checkin/submit", {"user_id": user_id, "answers": ANSWERS})
+    return total
+
+
+async def run(submit_one, checkins, concurrency, worker, ai_agent):
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with slots:
+            return await submit_one(f"checkin-{i}")
+
+    try:
+        start = time.perf_counter()
+        latencies = await asyncio.gather(*(one(i) for i in range(checkins)))
+        await worker.drain(timeout=600)
+        done = time.perf_counter() - start
+    finally:
+        await worker.stop()
+        await ai_agent.shutdown_async_client()
+    return [t * 1000 for t in latencies], done
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--checkins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=800)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.update({
+            "LLM_PROVIDER": "mock",
+            "LLM_MOCK_LATENCY_MS": str(args.latency_ms),
+            "LLM_DEADLINE_SECONDS": "30",
+            "MENTAL_HEALTH_DB_PATH": os.path.join(tmp, "checkin.db"),
+        })
+        from gateway.main import gateway_app
+        from mental_health_backend.mental_health_app import db
+        from mental_health_backend.mental_health_app.services import ai_agent, checkin_summaries
+
+        db.init_db()
+        print(f"{args.checkins} check-ins, concurrency {args.concurrency}, mock LLM {args.latency_ms:.0f} ms")
+        for label, submit_one in (
+            ("inline", lambda user_id: legacy_submit(ai_agent, db, user_id)),
+            ("deferred", lambda user_id: deferred_submit(gateway_app, user_id)),
+        ):
+            latencies, done = asyncio.run(run(submit_one, args.checkins, args.concurrency, checkin_summaries.worker, ai_agent))
+            print(f"  {label:<9} submit p50 {statistics.median(latencies):7.1f} ms  p95 {percentile(latencies, 0.95):7.1f} ms"
+                  f"   all summaries stored after {done:5.2f} s")
+        db.close_db_connections()
+
+
+if __name__ == "__main__":
+    main()
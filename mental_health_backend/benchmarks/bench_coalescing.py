@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+"""
+Benchmark: LLM calls and reply latency for rapid-fire message bursts, with and without
+coalescing (CHAT_COALESCE_WINDOW_MS), through the gateway /mental-health/chat/message.
+
+Each simulated user sends a burst of 3–5 short messages, --gap-ms apart; users start
+their bursts at random offsets within one second. The LLM is the in-process mock provider.
+
+Run from the repository root:
+    python mental_health_backend/benchmarks/bench_coalescing.py [--users 100] [--gap-ms 300]
+        [--window-ms 800] [--latency-ms 300]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT))
+
+from mental_health_backend.tests.asgi_helpers import post_asgi
+
+BURST = ["hey", "so today was bad", "my boss yelled at me again", "I can't stop crying", "idk what to do"]
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+async def run(app, ai_agent, chat_turn, users: int, gap: float, seed: int):
+    rng = random.Random(seed)
+
+    async def burst(u):
+        await asyncio.sleep(rng.random())
+        sends = []
+        for i in range(rng.randint(3, 5)):
+            sends.append(asyncio.ensure_future(
+                post_asgi(app, "/mental-health/chat/message", {"user_id": f"burst-{u}", "message": BURST[i]})
+            ))
+            await asyncio.sleep(gap)
+        return [(total, json.loads(b"".join(c for _, c in chunks))) for chunks, total in await asyncio.gather(*sends)]
+
+    try:
+        results = await asyncio.gather(*(burst(u) for u in range(users)))
+    finally:
+        await chat_turn.drain_background_tasks()
+        await ai_agent.shutdown_async_client()
+    return [r for user_results in results for r in user_results]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--gap-ms", type=float, default=300)
+    parser.add_argument("--window-ms", type=float, default=800)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.update({
+            "LLM_PROVIDER": "mock",
+            "LLM_MOCK_LATENCY_MS": str(args.latency_ms),
+            "LLM_MOCK_JITTER_MS": "0",
+            "LLM_DEADLINE_SECONDS": "30",
+            "MENTAL_HEALTH_DB_PATH": os.path.join(tmp, "coalesce.db"),
+        })
+        from gateway.main import gateway_app
+        from mental_health_backend.mental_health_app import db
+        from mental_health_backend.mental_health_app.services import ai_agent, chat_turn
+        from mental_health_backend.mental_health_app.services.message_coalescer import MessageCoalescer
+
+        db.init_db()
+        print(f"{args.users} users sending bursts of 3-5 messages {args.gap_ms:.0f} ms apart, mock LLM {args.latency_ms:.0f} ms")
+        for label, window in (("off", 0), (f"{args.window_ms:.0f} ms", args.window_ms)):
+            chat_turn.coalescer = MessageCoalescer(window / 1000, 2.0)
+            ai_agent.llm_breaker.reset()
+            calls_before = ai_agent.llm_breaker.stats()["successes"]
+            results = asyncio.run(run(gateway_app, ai_agent, chat_turn, args.users, args.gap_ms / 1000, args.seed))
+            calls = ai_agent.llm_breaker.stats()["successes"] - calls_before
+            latencies = [t * 1000 for t, _ in results]
+            print(f"  coalescing {label:<7} {len(results)} messages -> {calls:4d} LLM calls ({1 - calls / len(results):5.1%} saved)"
+                  f"   reply p50 {statistics.median(latencies):6.0f} ms  p95 {percentile(latencies, 0.95):6.0f} ms")
+        db.close_db_connections()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+"""
+Benchmark: per-turn prompt size and context-building cost over a long conversation,
+full history in every prompt (naive) vs conversation memory (ring buffer + rolling summary
+under LLM_PROMPT_TOKEN_BUDGET).
+
+Each turn is persisted with db.save_chat_turn. The naive variant reads the user's whole
+history back from the messages table and puts all of it in the prompt. The memory
+variant uses chat_turn.conversation_context, the same call the chat handlers make.
+No LLM is called: this measures what would be sent, not the completion.
+
+Run from the repository root:
+    python mental_health_backend/benchmarks/bench_conversation_memory.py [--turns 500]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT))
+
+from mental_health_backend.mental_health_app import db
+from mental_health_backend.mental_health_app.services import ai_agent, chat_turn, conversation_memory
+
+USER_MESSAGES = [
+    "I couldn't sleep again last night. My mind keeps racing about work.",
+    "My manager gave me another deadline today and I feel like I'm drowning.",
+    "I went for a walk like you suggested, it helped a little.",
+    "Sometimes I feel like nobody really listens to me.",
+]
+ASSISTANT_REPLY = "That sounds really hard. It makes sense that you feel worn out, and I'm glad you told me. What usually helps you unwind in the evening?"
+
+
+def prompt_tokens(messages):
+    return sum(conversation_memory.estimate_tokens(m["content"]) for m in messages)
+
+
+def naive_messages(user_id, message):
+    history = db.get_recent_messages(user_id, 1_000_000)
+    context = "\n".join(("User: " if role == "user" else "You: ") + text for role, text in history)
+    return ai_agent.build_chat_messages(message, context or None)
+
+
+async def memory_messages(user_id, message):
+    context = await chat_turn.conversation_context(user_id, message, db.get_recent_messages)
+    return ai_agent.build_chat_messages(message, context)
+
+
+async def run(turns, checkpoints):
+    results = {}
+    for label, build in (("naive", None), ("memory", memory_messages)):
+        user_id = f"bench-{label}"
+        rows = []
+        for i in range(1, turns + 1):
+            message = USER_MESSAGES[i % len(USER_MESSAGES)]
+            start = time.perf_counter()
+            messages = naive_messages(user_id, message) if build is None else await build(user_id, message)
+            elapsed = time.perf_counter() - start
+            if i in checkpoints:
+                rows.append((i, prompt_tokens(messages), elapsed * 1e6))
+            db.save_chat_turn(user_id, message, ASSISTANT_REPLY, "low", False, 0, [])
+            chat_turn.remember_turn(user_id, message, ASSISTANT_REPLY)
+        results[label] = rows
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=500)
+    args = parser.parse_args()
+    checkpoints = sorted({1, 10, 50, 100, args.turns // 2, args.turns})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_NAME = os.path.join(tmp, "bench_memory.db")
+        db.init_db()
+        try:
+            results = asyncio.run(run(args.turns, checkpoints))
+        finally:
+            db.close_db_connections()
+
+    memory = conversation_memory.memory
+    print(f"{args.turns}-turn conversation, prompt budget {memory.prompt_token_budget} tokens, "
+          f"{memory.max_messages // 2} turns verbatim + {memory.summary_token_limit}-token summary")
+    print(f"{'turn':>6} | {'naive tokens':>12} {'naive µs':>10} | {'memory tokens':>13} {'memory µs':>10}")
+    for (turn, naive_tokens, naive_us), (_, mem_tokens, mem_us) in zip(results["naive"], results["memory"]):
+        print(f"{turn:>6} | {naive_tokens:>12} {naive_us:>10.0f} | {mem_tokens:>13} {mem_us:>10.0f}")
+    stats = memory.stats()
+    print(f"memory lookups: {stats['hits']} hits, {stats['misses']} misses; max prompt {stats['prompt_tokens_max']} tokens")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+"""
+Benchmark: chat-turn write throughput, connect-per-call (legacy) vs pooled WAL connections
+vs single-transaction turns.
+
+A chat turn is three writes: user message, risk event, assistant message, committed
+separately (legacy, pooled) or in one transaction (db.save_chat_turn).
+The legacy helpers below are copies of the pre-pool code (fresh sqlite3.connect,
+default rollback journal, commit, close).
+
+Run from the repository root:
+    python mental_health_backend/benchmarks/bench_db_writes.py [--turns 500] [--threads 1 8]
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT))
+
+from mental_health_backend.mental_health_app import db
+
+
+# --- Legacy helpers (reference copy) ---
+
+def legacy_save_message(db_name, user_id, role, text):
+    conn = sqlite3.connect(db_name, timeout=30)
+    c = conn.cursor()
+    c.execute(
+        "INSERT INTO messages (user_id, role, text, created_at) VALUES (?, ?, ?, ?)",
+        (user_id, role, text, datetime.utcnow().isoformat())
+    )
+    msg_id = c.lastrowid
+    conn.commit()
+    conn.close()
+    return msg_id
+
+
+def legacy_save_risk_event(db_name, user_id, message_id, risk_level, self_harm_detected, keyword_score, reasons):
+    conn = sqlite3.connect(db_name, timeout=30)
+    conn.execute(
+        '''INSERT INTO risk_events
+           (user_id, message_id, risk_level, self_harm_detected, keyword_score, reasons_json, created_at)
+           VALUES (?, ?, ?, ?, ?, ?, ?)''',
+        (user_id, message_id, risk_level, int(self_harm_detected), keyword_score, json.dumps(reasons), datetime.utcnow().isoformat())
+    )
+    conn.commit()
+    conn.close()
+
+
+def legacy_turn(db_name, i):
+    user_id = f"user-{i % 50}"
+    msg_id = legacy_save_message(db_name, user_id, "user", "I had a long day and feel tired")
+    legacy_save_risk_event(db_name, user_id, msg_id, "low", False, 0, [])
+    legacy_save_message(db_name, user_id, "assistant", "Thanks for sharing. What helped you today?")
+
+
+def pooled_turn(_db_name, i):
+    user_id = f"user-{i % 50}"
+    msg_id = db.save_message(user_id, "user", "I had a long day and feel tired")
+    db.save_risk_event(user_id, msg_id, "low", False, 0, [])
+    db.save_message(user_id, "assistant", "Thanks for sharing. What helped you today?")
+
+
+def single_txn_turn(_db_name, i):
+    db.save_chat_turn(
+        f"user-{i % 50}", "I had a long day and feel tired",
+        "Thanks for sharing. What helped you today?", "low", False, 0, []
+    )
+
+
+def run(turn_fn, db_name, turns, threads):
+    start = time.perf_counter()
+    if threads == 1:
+        for i in range(turns):
+            turn_fn(db_name, i)
+    else:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(lambda i: turn_fn(db_name, i), range(turns)))
+    return turns / (time.perf_counter() - start)
+
+
+def fresh_db(directory, name):
+    path = os.path.join(directory, name)
+    db.DB_NAME = path
+    db.init_db()
+    db.close_db_connections()
+    if name.startswith("legacy"):
+        # Legacy connections used the default rollback journal
+        conn = sqlite3.connect(path)
+        conn.execute("PRAGMA journal_mode=DELETE")
+        conn.close()
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=500)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 8])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{args.turns} chat turns (3 writes each)")
+        for threads in args.threads:
+            legacy_path = fresh_db(tmp, f"legacy_{threads}.db")
+            legacy = run(legacy_turn, legacy_path, args.turns, threads)
+
+            pooled_path = fresh_db(tmp, f"pooled_{threads}.db")
+            pooled = run(pooled_turn, pooled_path, args.turns, threads)
+            db.close_db_connections()
+
+            txn_path = fresh_db(tmp, f"txn_{threads}.db")
+            txn = run(single_txn_turn, txn_path, args.turns, threads)
+            db.close_db_connections()
+
+            print(
+                f"  threads={threads:<3} legacy {legacy:8.0f} turns/s   pooled WAL {pooled:8.0f} turns/s"
+                f"   save_chat_turn {txn:8.0f} turns/s   x{txn / legacy:.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+"""
+Benchmark: escalation outbox.
+
+1. Chat-turn write cost with the outbox row (a high-risk turn) vs without (medium).
+2. Delivery throughput to a local webhook (5 ms per request) at batch size 1 vs
+   ESCALATION_BATCH_SIZE, one notification per user so nothing is deduplicated.
+
+Run from the repository root:
+    python mental_health_backend/benchmarks/bench_escalation.py [--turns 5000] [--notifications 2000]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=5000)
+    parser.add_argument("--notifications", type=int, default=2000)
+    parser.add_argument("--webhook-delay", type=float, default=0.005)
+    args = parser.parse_args()
+
+    os.environ["MENTAL_HEALTH_DB_PATH"] = os.path.join(tempfile.mkdtemp(), "bench.db")
+    from mental_health_backend.mental_health_app import db
+    from mental_health_backend.mental_health_app.services import escalation
+    from mental_health_backend.tests.webhook_stub_server import WebhookStubServer
+    db.init_db()
+
+    for level in ("medium", "high"):
+        t0 = time.perf_counter()
+        for i in range(args.turns):
+            db.save_chat_turn(f"w-{level}-{i}", "message", "reply", level, False, 0, [])
+        per_turn = (time.perf_counter() - t0) / args.turns
+        print(f"chat turn write, {level:>6} ({'with' if level == 'high' else 'no'} outbox row): {per_turn * 1e6:7.1f} us")
+
+    with WebhookStubServer(delay=args.webhook_delay) as hook:
+        for batch_size in (1, escalation.ESCALATION_BATCH_SIZE):
+            conn = db.get_db_connection()
+            with conn:
+                conn.execute("DELETE FROM escalation_outbox")
+            for i in range(args.notifications):
+                db.save_chat_turn(f"n{batch_size}-{i}", "message", "reply", "high", False, 0, [])
+            dispatcher = escalation.EscalationDispatcher(escalation.WebhookSink(hook.url), batch_size=batch_size)
+            now = datetime.utcnow() + timedelta(seconds=1)
+
+            async def drain():
+                try:
+                    while await dispatcher.dispatch_once(db.claim_due_escalations, db.record_escalation_results, now=now):
+                        pass
+                finally:
+                    await dispatcher.sink.close()
+
+            t0 = time.perf_counter()
+            asyncio.run(drain())
+            seconds = time.perf_counter() - t0
+            print(f"delivery, batch size {batch_size:>3}: {dispatcher.sent / seconds:8,.0f} notifications/s "
+                  f"({dispatcher.sent:,} in {seconds:.2f} s, {dispatcher.batches:,} webhook calls)")
+    db.close_db_connections()
+
+
+if __name__ == "__main__":
+    main()
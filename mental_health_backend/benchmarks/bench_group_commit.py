@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+"""
+Benchmark: write throughput with and without the group-commit writer at 1, 8 and 64
+concurrent writers.
+
+- mental health: db.save_chat_turn (3 rows per turn)
+- medicine: dose-event status updates through reminders._status_update_job / run_write
+
+Run from the repository root:
+    python mental_health_backend/benchmarks/bench_group_commit.py [--writes 2000] [--writers 1 8 64]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT))
+
+from sqlalchemy import create_engine
+from mental_health_backend.mental_health_app import db
+
+
+def timed(fn, writes: int, writers: int) -> float:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=writers) as pool:
+        list(pool.map(fn, range(writes)))
+    return writes / (time.perf_counter() - start)
+
+
+# --- Mental health ---
+
+def mh_write(i: int):
+    db.save_chat_turn(f"user-{i % 100}", "rough day at work", "I'm sorry it was rough.", "low", False, 0, [])
+
+
+def bench_mental_health(tmp: str, writes: int, writers: int, group_commit: bool) -> float:
+    db.DB_NAME = os.path.join(tmp, f"mh_{writers}_{int(group_commit)}.db")
+    db.init_db()
+    if group_commit:
+        db.start_group_commit()
+    try:
+        return timed(mh_write, writes, writers)
+    finally:
+        db.close_db_connections()
+
+
+# --- Medicine ---
+
+def setup_medicine(tmp: str):
+    from medicine_backend.medicine_app.core import db as medicine_db
+    from medicine_backend.medicine_app.models.medication import Medication
+    from medicine_backend.medicine_app.models.dose_event import DoseEvent
+    import medicine_backend.medicine_app.models.schedule  # noqa: F401 (register mappers)
+    import medicine_backend.medicine_app.models.prescription  # noqa: F401
+
+    engine = create_engine(f"sqlite:///{os.path.join(tmp, 'medicine.db')}", connect_args={"check_same_thread": False, "timeout": 30})
+    medicine_db.SessionLocal.configure(bind=engine)
+    medicine_db.Base.metadata.create_all(bind=engine)
+
+    session = medicine_db.SessionLocal()
+    med = Medication(user_id="bench", name="Paracetamol", strength="500mg")
+    session.add(med)
+    session.flush()
+    session.add_all([DoseEvent(medication_id=med.id, scheduled_at=datetime(2026, 1, 1, h % 24)) for h in range(500)])
+    session.commit()
+    session.close()
+    return medicine_db.SessionLocal
+
+
+def bench_medicine(session_factory, writes: int, writers: int, group_commit: bool) -> float:
+    from medicine_backend.medicine_app.core import group_commit as gc
+    from medicine_backend.medicine_app.routes.reminders import _status_update_job
+
+    def write(i: int):
+        session = session_factory()
+        try:
+            gc.run_write(session, _status_update_job(i % 500 + 1, "TAKEN" if i % 2 else "SKIPPED", f"note {i}"))
+        finally:
+            session.close()
+
+    if group_commit:
+        gc.start_group_commit()
+    try:
+        return timed(write, writes, writers)
+    finally:
+        gc.stop_group_commit()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--writes", type=int, default=2000)
+    parser.add_argument("--writers", type=int, nargs="+", default=[1, 8, 64])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"mental health save_chat_turn, {args.writes} turns")
+        for writers in args.writers:
+            off = bench_mental_health(tmp, args.writes, writers, False)
+            on = bench_mental_health(tmp, args.writes, writers, True)
+            print(f"  writers={writers:<3} direct {off:8.0f}/s   group commit {on:8.0f}/s   x{on / off:.2f}")
+
+        session_factory = setup_medicine(tmp)
+        print(f"medicine dose-event status updates, {args.writes} updates")
+        for writers in args.writers:
+            off = bench_medicine(session_factory, args.writes, writers, False)
+            on = bench_medicine(session_factory, args.writes, writers, True)
+            print(f"  writers={writers:<3} direct {off:8.0f}/s   group commit {on:8.0f}/s   x{on / off:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+"""
+Benchmark: searching conversation history, LIKE scan vs the FTS5 index (db.search_history),
+plus the batched backfill rate for rows written before the index existed.
+
+Run from the repository root:
+    python mental_health_backend/benchmarks/bench_history_search.py [--messages 200000] [--queries 20]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT))
+
+WORDS = ("feel tired today exams stress family sleep friends work anxious better talk lonely "
+         "coffee college mother father hostel calm walk music cry angry hope worried").split()
+RARE = ["overdose", "pills", "self harm", "hopeless"]
+
+LIKE_SQL = """
+    SELECT id, user_id, text, created_at FROM messages
+    WHERE text LIKE ? AND created_at >= ?
+    ORDER BY created_at DESC LIMIT 20
+"""
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=200_000)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    os.environ["MENTAL_HEALTH_DB_PATH"] = os.path.join(tempfile.mkdtemp(), "bench.db")
+    from mental_health_backend.mental_health_app import db
+
+    # Rows written before the search migration, then the migration and backfill
+    migrations = db.SCHEMA_MIGRATIONS
+    db.SCHEMA_MIGRATIONS = migrations[:4]
+    db.init_db()
+    rng = random.Random(11)
+    start = datetime(2026, 1, 1)
+    rows = []
+    for i in range(args.messages):
+        words = rng.choices(WORDS, k=rng.randint(5, 30))
+        if rng.random() < 0.01:
+            words.insert(rng.randrange(len(words)), rng.choice(RARE))
+        created = (start + timedelta(minutes=i * 525_600 // args.messages)).isoformat()
+        rows.append((f"user-{rng.randrange(args.users)}", "user", " ".join(words), created))
+    conn = db.get_db_connection()
+    with conn:
+        conn.executemany("INSERT INTO messages (user_id, role, text, created_at) VALUES (?, ?, ?, ?)", rows)
+    db.SCHEMA_MIGRATIONS = migrations
+    db.apply_migrations(conn)
+
+    t0 = time.perf_counter()
+    indexed = db.backfill_search_index(batch_size=args.batch_size)
+    elapsed = time.perf_counter() - t0
+    print(f"backfill: {indexed['messages']:,} messages in {elapsed:.1f} s "
+          f"({indexed['messages'] / elapsed:,.0f} rows/s, batches of {args.batch_size})")
+
+    since = (start + timedelta(days=335)).isoformat()  # last 30 days
+    like_ms = timed(lambda: conn.execute(LIKE_SQL, ("%overdose%", since)).fetchall(), args.queries)
+    fts_ms = timed(lambda: db.search_history("overdose", since=since, sources=("messages",)), args.queries)
+    print(f"'overdose', last 30 days:  LIKE {like_ms:8.2f} ms   FTS5 {fts_ms:8.2f} ms   ({like_ms / fts_ms:.0f}x)")
+
+    like_ms = timed(lambda: conn.execute(LIKE_SQL, ("%overdose%", "")).fetchall(), args.queries)
+    fts_ms = timed(lambda: db.search_history("overdose", sources=("messages",)), args.queries)
+    print(f"'overdose', all time:      LIKE {like_ms:8.2f} ms   FTS5 {fts_ms:8.2f} ms   ({like_ms / fts_ms:.0f}x)")
+
+    user = rows[0][0]
+    like_ms = timed(lambda: conn.execute(LIKE_SQL.replace("WHERE", "WHERE user_id = ? AND"), (user, "%tired%", "")).fetchall(), args.queries)
+    fts_ms = timed(lambda: db.search_history("tired", user_id=user, sources=("messages",)), args.queries)
+    print(f"'tired' (common), 1 user:  LIKE {like_ms:8.2f} ms   FTS5 {fts_ms:8.2f} ms")
+    db.close_db_connections()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+"""
+Benchmark: how long crisis messages wait for an LLM slot behind casual chats,
+FIFO (every request at the same priority, i.e. the old semaphore) vs the priority scheduler.
+
+Uses the in-process mock provider, so no network is needed. Casual and crisis chats
+arrive together in one burst; LLM concurrency is --slots.
+
+Run from the repository root:
+    python mental_health_backend/benchmarks/bench_llm_scheduler.py [--casual 400] [--crisis 20] [--slots 8] [--latency-ms 100]
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT))
+
+from mental_health_backend.mental_health_app.services import ai_agent
+from mental_health_backend.mental_health_app.services.llm_providers import MockProvider
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+async def burst(casual: int, crisis: int, use_priority: bool):
+    latencies = {"critical": [], "low": []}
+
+    async def chat(i, priority):
+        start = time.perf_counter()
+        await ai_agent.analyze_message_llm_async(f"message {i}", priority=priority if use_priority else "low")
+        latencies[priority].append(time.perf_counter() - start)
+
+    # Crisis messages are spread through the burst
+    every = max(casual // max(crisis, 1), 1)
+    jobs = []
+    for i in range(casual):
+        jobs.append(chat(i, "low"))
+        if i % every == every - 1 and len(jobs) - i - 1 < crisis:
+            jobs.append(chat(f"crisis-{i}", "critical"))
+    try:
+        await asyncio.gather(*jobs)
+    finally:
+        await ai_agent.shutdown_async_client()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--casual", type=int, default=400)
+    parser.add_argument("--crisis", type=int, default=20)
+    parser.add_argument("--slots", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=100)
+    args = parser.parse_args()
+
+    ai_agent.set_provider(MockProvider(latency=args.latency_ms / 1000, jitter=args.latency_ms / 4000))
+    ai_agent.LLM_MAX_CONCURRENCY = args.slots
+    ai_agent.LLM_DEADLINE_SECONDS = 600  # measure queueing, not fallbacks
+    ai_agent.LLM_SCHEDULER_AGING_SECONDS = 600
+
+    print(f"{args.casual} casual + {args.crisis} crisis chats in one burst, {args.slots} LLM slots, {args.latency_ms:.0f} ms mock latency")
+    for label, use_priority in (("FIFO", False), ("priority", True)):
+        latencies = asyncio.run(burst(args.casual, args.crisis, use_priority))
+        crisis_ms = [t * 1000 for t in latencies["critical"]]
+        casual_ms = [t * 1000 for t in latencies["low"]]
+        print(
+            f"  {label:<9} crisis p50 {statistics.median(crisis_ms):7.0f} ms  p95 {percentile(crisis_ms, 0.95):7.0f} ms"
+            f"   casual p50 {statistics.median(casual_ms):7.0f} ms  p95 {percentile(casual_ms, 0.95):7.0f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
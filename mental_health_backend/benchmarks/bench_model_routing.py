@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+"""
+Benchmark: chat latency per route tier with model routing (small model for small talk,
+large model only for risk signals) vs every request on the large model.
+
+A mixed workload of small talk, long venting messages and crisis messages goes through
+ai_agent.analyze_message_llm_async with the route model_router would pick. The LLM is
+the in-process mock, with a per-model latency (--small-ms, --large-ms).
+
+Run from the repository root:
+    python mental_health_backend/benchmarks/bench_model_routing.py [--requests 300] [--small-ms 250] [--large-ms 900]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT))
+
+MESSAGES = [
+    "hey, how's it going",
+    "had a nice walk today",
+    "I've been thinking a lot about how my week went. Work has been piling up, my manager keeps moving "
+    "deadlines, I haven't been sleeping well and I skipped the gym three days in a row. My sister visited "
+    "on the weekend which helped a bit but now I feel flat again and I'm not sure what to change first.",
+    "I feel hopeless and I don't want to live anymore",
+]
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+async def run(ai_agent, router, risk_engine, requests: int, force_route=None):
+    latencies = {}
+
+    async def one(i):
+        message = MESSAGES[i % len(MESSAGES)]
+        kw_score, _ = risk_engine.calculate_risk_score(message)
+        route = router.route_for(kw_score, message)
+        start = time.perf_counter()
+        await ai_agent.analyze_message_llm_async(message, route=force_route or route)
+        latencies.setdefault(route.name, []).append((time.perf_counter() - start) * 1000)
+
+    try:
+        await asyncio.gather(*(one(i) for i in range(requests)))
+    finally:
+        await ai_agent.shutdown_async_client()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--small-ms", type=float, default=250)
+    parser.add_argument("--large-ms", type=float, default=900)
+    args = parser.parse_args()
+
+    os.environ.update({"LLM_PROVIDER": "mock", "LLM_MAX_CONCURRENCY": "1000", "LLM_DEADLINE_SECONDS": "30"})
+    from mental_health_backend.mental_health_app.services import ai_agent, risk_engine
+    from mental_health_backend.mental_health_app.services.llm_providers import MockProvider
+    from mental_health_backend.mental_health_app.services.model_router import ModelRouter, Route
+
+    router = ModelRouter({
+        "fast": Route("fast", "small", 400, 0.4),
+        "standard": Route("standard", "small", 700, 0.4),
+        "escalation": Route("escalation", "large", 800, 0.3),
+    })
+    ai_agent.set_provider(MockProvider(model_latency={"small": args.small_ms / 1000, "large": args.large_ms / 1000}))
+
+    print(f"{args.requests} mixed requests, small model {args.small_ms:.0f} ms, large model {args.large_ms:.0f} ms")
+    for label, force_route in (("all large", router.routes["escalation"]), ("routed", None)):
+        latencies = asyncio.run(run(ai_agent, router, risk_engine, args.requests, force_route))
+        every = [t for values in latencies.values() for t in values]
+        print(f"  {label:<10} overall p50 {statistics.median(every):6.0f} ms  p95 {percentile(every, 0.95):6.0f} ms")
+        for name in ("fast", "standard", "escalation"):
+            values = latencies.get(name, [])
+            if values:
+                print(f"    {name:<11} {len(values):4d} requests  p50 {statistics.median(values):6.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+"""
+Benchmark: mood trend queries, per-request SQL + Python loops (naive) vs the cached
+(users x days) NumPy matrix of services/mood_trends.py.
+
+The naive path below is what the endpoint would do without the cache: read the user's
+(or cohort's) mood rows from daily_summaries, then compute the rolling mean and
+least-squares slope for each day in Python.
+
+Run from the repository root:
+    python mental_health_backend/benchmarks/bench_mood_trends.py [--users 2000] [--days 365] [--queries 200]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT))
+
+
+def naive_series(rows, days, window, today):
+    """Rolling mean / slope per day from (date, mood) rows, one window at a time."""
+    by_day = {d: m for d, m in rows}
+    dates = [(today - timedelta(days=days - 1 - i)).isoformat() for i in range(days)]
+    mean, slope = [], []
+    for i in range(days):
+        points = [(j, by_day[dates[j]]) for j in range(max(0, i - window + 1), i + 1) if dates[j] in by_day]
+        if len(points) < 3:
+            mean.append(None)
+            slope.append(None)
+            continue
+        xs, ys = zip(*points)
+        mx, my = sum(xs) / len(xs), sum(ys) / len(ys)
+        sxx = sum((x - mx) ** 2 for x in xs)
+        mean.append(my)
+        slope.append(sum((x - mx) * (y - my) for x, y in points) / sxx)
+    return mean, slope
+
+
+def naive_user(db, user_id, days, window, today):
+    since = (today - timedelta(days=days - 1)).isoformat()
+    rows = [(d, m) for _, d, m in db.get_mood_scores(since, user_id)]
+    return naive_series(rows, days, window, today)
+
+
+def naive_cohort(db, days, window, today):
+    since = (today - timedelta(days=days - 1)).isoformat()
+    per_day = {}
+    for _, d, m in db.get_mood_scores(since):
+        per_day.setdefault(d, []).append(m)
+    return naive_series([(d, statistics.fmean(v)) for d, v in per_day.items()], days, window, today)
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--checkin-rate", type=float, default=0.6, help="fraction of days each user checks in")
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ["MENTAL_HEALTH_DB_PATH"] = os.path.join(tmp, "bench.db")
+    from mental_health_backend.mental_health_app import db
+    from mental_health_backend.mental_health_app.services.mood_trends import MoodTrendCache
+    db.init_db()
+
+    rng = random.Random(7)
+    today = date.today()
+    rows = []
+    for u in range(args.users):
+        mood = rng.uniform(4, 8)
+        for d in range(args.days):
+            mood = min(10.0, max(1.0, mood + rng.gauss(0, 0.7)))
+            if rng.random() < args.checkin_rate:
+                rows.append((f"user-{u}", (today - timedelta(days=d)).isoformat(), round(mood, 1)))
+    conn = db.get_db_connection()
+    with conn:
+        conn.executemany(
+            "INSERT INTO daily_summaries (user_id, date, summary_text, risk_level, created_at, mood_score) VALUES (?, ?, '', 'low', ?, ?)",
+            [(u, d, d, m) for u, d, m in rows]
+        )
+    print(f"{args.users} users x {args.days} days, {len(rows):,} check-ins")
+
+    since = (today - timedelta(days=args.days - 1)).isoformat()
+    cache = MoodTrendCache(days=args.days)
+    load_ms = timed(lambda: cache.load(db.get_mood_scores(since), today), 3)
+    print(f"cache load (query + matrix build): {load_ms:.0f} ms, {cache.moods.nbytes / 1e6:.1f} MB")
+
+    users = [f"user-{rng.randrange(args.users)}" for _ in range(args.queries)]
+    it = iter(users * 2)
+    naive_ms = timed(lambda: naive_user(db, next(it), 90, 7, today), args.queries)
+    cached_ms = timed(lambda: cache.user_trend(next(it), 90, 7), args.queries)
+    print(f"user trend (90 days):   naive {naive_ms:8.2f} ms   cached {cached_ms:8.2f} ms   ({naive_ms / cached_ms:.0f}x)")
+
+    naive_ms = timed(lambda: naive_cohort(db, 90, 7, today), 3)
+    first_ms = timed(lambda: (cache._cohort_memo.clear(), cache.cohort_trend(None, 90, 7)), 3)
+    cached_ms = timed(lambda: cache.cohort_trend(None, 90, 7), 20)
+    print(f"cohort trend (90 days): naive {naive_ms:8.2f} ms   cached {first_ms:8.2f} ms   memoized {cached_ms:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
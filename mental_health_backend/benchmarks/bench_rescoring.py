@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+"""
+Benchmark: historical rescoring throughput (rows/sec), in-process vs a process pool,
+and the batch scoring endpoint vs one /chat-style scoring call per message.
+
+Run from the repository root:
+    python mental_health_backend/benchmarks/bench_rescoring.py [--messages 100000] [--workers 1,2,4]
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT))
+
+WORDS = ("feel tired today exams stress family sleep friends work anxious better talk lonely "
+         "coffee college mother father hostel calm walk music cry angry hope worried").split()
+SIGNALS = ["I feel hopeless", "there is no way out", "I want to die", "nobody would miss me", "such a burden"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=100_000)
+    parser.add_argument("--workers", default=f"1,{os.cpu_count() or 1}")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--batch", type=int, default=1000)
+    args = parser.parse_args()
+
+    os.environ["MENTAL_HEALTH_DB_PATH"] = os.path.join(tempfile.mkdtemp(), "bench.db")
+    from mental_health_backend.mental_health_app import db
+    from mental_health_backend.mental_health_app.services import rescoring, risk_engine
+    risk_engine.logger.setLevel(logging.ERROR)
+    db.init_db()
+
+    rng = random.Random(3)
+    texts = []
+    for _ in range(args.messages):
+        words = rng.choices(WORDS, k=rng.randint(5, 40))
+        if rng.random() < 0.05:
+            words.append(rng.choice(SIGNALS))
+        texts.append(" ".join(words))
+    conn = db.get_db_connection()
+    with conn:
+        conn.executemany("INSERT INTO messages (user_id, role, text, created_at) VALUES (?, 'user', ?, '2026-01-01')",
+                         [(f"user-{i % 500}", t) for i, t in enumerate(texts)])
+        # Stored assessments from "old rules": keyword score 0 everywhere
+        conn.execute("""INSERT INTO risk_events (user_id, message_id, risk_level, self_harm_detected, keyword_score, reasons_json, created_at)
+                        SELECT user_id, id, 'low', 0, 0, '[]', created_at FROM messages""")
+    print(f"{args.messages:,} stored messages")
+
+    for workers in (int(w) for w in args.workers.split(",")):
+        run_id = db.start_rescoring_run(rescoring.rules_version())
+        result = rescoring.rescore(db.fetch_messages_for_rescoring, lambda d: db.save_rescores(run_id, d),
+                                   chunk_size=args.chunk_size, workers=workers)
+        print(f"rescore, {workers:>2} worker(s): {result['rows_per_sec']:>9,.0f} rows/s  "
+              f"({result['seconds']:.1f} s, {result['changed']:,} changed)")
+
+    batch = texts[:args.batch]
+    t0 = time.perf_counter()
+    for text in batch:
+        risk_engine.calculate_risk_score(text)
+    single = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    rescoring.score_batch(batch)
+    batched = time.perf_counter() - t0
+    print(f"scoring {args.batch} messages: one call each {single * 1000:.1f} ms, score_batch {batched * 1000:.1f} ms")
+    db.close_db_connections()
+
+
+if __name__ == "__main__":
+    main()
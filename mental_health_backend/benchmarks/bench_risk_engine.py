@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+"""
+Micro-benchmark: risk_engine.keyword_risk_score vs the original per-call implementation,
+plus the full calculate_risk_score (keywords + crisis paraphrase detector).
+
+The corpus mixes short chat messages with multi-KB journal-style entries, with and
+without risk language. The legacy implementation is a verbatim copy of the
+pre-matcher code (tests/risk_engine_reference.py) and is the equivalence / speed reference.
+The matcher must beat it on short messages and stay within MAX_SLOWDOWN_ALL overall.
+
+Run from the repository root:
+    python mental_health_backend/benchmarks/bench_risk_engine.py [--repeat 5]
+"""
+
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT))
+
+from mental_health_backend.mental_health_app.services import risk_engine
+from mental_health_backend.tests.risk_engine_reference import build_corpus, legacy_calculate_risk_score
+
+# Matcher vs legacy on the whole corpus: anything above this is a regression
+MAX_SLOWDOWN_ALL = 1.15
+
+
+def time_scorer(scorer, corpus: List[str], repeat: int) -> float:
+    """Best-of-N total seconds for one pass over the corpus."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in corpus:
+            scorer(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    # Detection warnings would dominate the timing
+    risk_engine.logger.setLevel(logging.ERROR)
+
+    corpus = build_corpus()
+    short = [t for t in corpus if len(t) < 200]
+    long_ = [t for t in corpus if len(t) >= 200]
+
+    for text in corpus:
+        new_score, new_reasons = risk_engine.keyword_risk_score(text)
+        old_score, old_reasons = legacy_calculate_risk_score(text)
+        assert new_score == old_score and set(new_reasons) == set(old_reasons), text[:80]
+
+    ratios = {}
+    print(f"corpus: {len(short)} short msgs, {len(long_)} long msgs (avg {sum(map(len, long_)) // len(long_)} chars)")
+    for name, subset in (("short", short), ("long", long_), ("all", corpus)):
+        legacy = time_scorer(legacy_calculate_risk_score, subset, args.repeat)
+        current = time_scorer(risk_engine.keyword_risk_score, subset, args.repeat)
+        full = time_scorer(risk_engine.calculate_risk_score, subset, args.repeat)
+        ratios[name] = current / legacy
+        per_legacy = legacy / len(subset) * 1e6
+        per_current = current / len(subset) * 1e6
+        print(f"  {name:5}  legacy {per_legacy:7.2f} us/msg   matcher {per_current:7.2f} us/msg   speedup x{legacy / current:.2f}"
+              f"   with paraphrase {full / len(subset) * 1e6:7.2f} us/msg")
+
+    ok = ratios["short"] < 1.0 and ratios["all"] <= MAX_SLOWDOWN_ALL
+    print(f"matcher vs legacy: short x{ratios['short']:.2f} (must be < 1), "
+          f"all x{ratios['all']:.2f} (must be <= {MAX_SLOWDOWN_ALL})  {'OK' if ok else 'REGRESSION'}")
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+"""
+Benchmark: "how is this user trending", aggregating risk_events on every request vs
+reading the incrementally maintained rollup (db.get_risk_rollup), and what maintaining
+the rollup costs per chat-turn write.
+
+The scan path below is the reference query the rollup replaces: counts per level,
+last high-risk time and 7/30-day maximums from the user's risk_events rows.
+
+Run from the repository root:
+    python mental_health_backend/benchmarks/bench_risk_rollups.py [--events 20000] [--writes 2000]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT))
+
+SCAN_SQL = [
+    "SELECT risk_level, COUNT(*), SUM(self_harm_detected) FROM risk_events WHERE user_id = ? GROUP BY risk_level",
+    "SELECT MAX(created_at) FROM risk_events WHERE user_id = ? AND risk_level IN ('high', 'critical')",
+    "SELECT DISTINCT risk_level FROM risk_events WHERE user_id = ? AND created_at >= ?",
+    "SELECT DISTINCT risk_level FROM risk_events WHERE user_id = ? AND created_at >= ?",
+    """SELECT substr(created_at, 1, 10), risk_level, COUNT(*) FROM risk_events
+       WHERE user_id = ? AND created_at >= ? GROUP BY 1, 2""",
+]
+
+
+def scan_summary(conn, user_id, now):
+    conn.execute(SCAN_SQL[0], (user_id,)).fetchall()
+    conn.execute(SCAN_SQL[1], (user_id,)).fetchall()
+    conn.execute(SCAN_SQL[2], (user_id, (now - timedelta(days=7)).isoformat())).fetchall()
+    conn.execute(SCAN_SQL[3], (user_id, (now - timedelta(days=30)).isoformat())).fetchall()
+    conn.execute(SCAN_SQL[4], (user_id, (now - timedelta(days=30)).isoformat())).fetchall()
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=20000, help="risk events of the heavy user")
+    parser.add_argument("--writes", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+
+    os.environ["MENTAL_HEALTH_DB_PATH"] = os.path.join(tempfile.mkdtemp(), "bench.db")
+    from mental_health_backend.mental_health_app import db
+    db.init_db()
+    conn = db.get_db_connection()
+
+    rng = random.Random(5)
+    now = datetime.utcnow()
+    levels = ["low"] * 70 + ["medium"] * 20 + ["high"] * 9 + ["critical"]
+    with conn:
+        conn.executemany(
+            "INSERT INTO risk_events (user_id, risk_level, self_harm_detected, reasons_json, created_at) VALUES (?, ?, ?, '[]', ?)",
+            [("heavy", rng.choice(levels), int(rng.random() < 0.05),
+              (now - timedelta(minutes=rng.randrange(365 * 24 * 60))).isoformat()) for _ in range(args.events)]
+        )
+    t0 = time.perf_counter()
+    db.rebuild_risk_rollups()
+    print(f"rebuild: {args.events:,} events in {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+    scan_ms = timed(lambda: scan_summary(conn, "heavy", now), args.queries)
+    rollup_ms = timed(lambda: db.get_risk_rollup("heavy"), args.queries)
+    print(f"summary of a user with {args.events:,} events:  scan {scan_ms:7.2f} ms   rollup {rollup_ms:7.3f} ms   ({scan_ms / rollup_ms:.0f}x)")
+
+    # Write cost: chat turns with rollup maintenance vs the plain inserts (rollup helpers stubbed out)
+    def write_turns(tag):
+        t0 = time.perf_counter()
+        for i in range(args.writes):
+            db.save_chat_turn(f"{tag}-{i % 200}", "msg", "reply", rng.choice(levels), False, 0, [])
+        return (time.perf_counter() - t0) / args.writes * 1e6
+
+    with_rollup = write_turns("w")
+    add_to_rollup = db._add_to_rollup
+    db._add_to_rollup = lambda *a, **k: None
+    try:
+        without_rollup = write_turns("p")
+    finally:
+        db._add_to_rollup = add_to_rollup
+    print(f"save_chat_turn: {without_rollup:.0f} us without rollup, {with_rollup:.0f} us with "
+          f"(+{(with_rollup - without_rollup) / without_rollup:.0%})")
+    db.close_db_connections()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+"""
+Benchmark: time-to-first-byte of /mental-health/chat/message (JSON) vs /mental-health/chat/stream (SSE).
+
+Requests are driven straight through the gateway ASGI app (no sockets on the client side)
+so the first http.response.body chunk can be timestamped exactly. The LLM is the local
+stub server in streaming mode: first token after --delay, then one chunk every --token-delay.
+
+Run from the repository root:
+    python mental_health_backend/benchmarks/bench_stream_ttfb.py [--chats 20] [--delay 0.3] [--token-delay 0.02]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT))
+
+from mental_health_backend.tests.asgi_helpers import first_byte, first_reply_text, parse_sse, post_asgi
+from mental_health_backend.tests.llm_stub_server import StubLLMServer
+
+
+async def run(app, path: str, chats: int):
+    return await asyncio.gather(
+        *(post_asgi(app, path, {"user_id": f"bench-{i}", "message": "I feel a bit anxious about tomorrow"}) for i in range(chats))
+    )
+
+
+def summarize(label: str, results):
+    p50 = lambda xs: statistics.median(xs) * 1000
+    p95 = lambda xs: sorted(xs)[min(len(xs) - 1, int(len(xs) * 0.95))] * 1000
+    ttfb = [first_byte(chunks) for chunks, _ in results]
+    reply = [first_reply_text(chunks) for chunks, _ in results]
+    total = [t for _, t in results]
+    print(
+        f"  {label:<14} TTFB p50 {p50(ttfb):6.1f} ms  p95 {p95(ttfb):6.1f} ms"
+        f"   first reply text p50 {p50(reply):6.1f} ms   complete p50 {p50(total):6.1f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chats", type=int, default=20)
+    parser.add_argument("--delay", type=float, default=0.3, help="stub LLM time to first token (s)")
+    parser.add_argument("--token-delay", type=float, default=0.02, help="stub LLM delay between chunks (s)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, StubLLMServer(delay=args.delay, token_delay=args.token_delay) as server:
+        os.environ["GROQ_API_KEY"] = "stub"
+        os.environ["GROQ_BASE_URL"] = server.base_url
+        os.environ["MENTAL_HEALTH_DB_PATH"] = os.path.join(tmp, "ttfb.db")
+
+        from gateway.main import gateway_app
+        from mental_health_backend.mental_health_app import db
+        from mental_health_backend.mental_health_app.services import ai_agent
+
+        db.init_db()
+
+        async def bench():
+            try:
+                json_results = await run(gateway_app, "/mental-health/chat/message", args.chats)
+                stream_results = await run(gateway_app, "/mental-health/chat/stream", args.chats)
+            finally:
+                await ai_agent.shutdown_async_client()
+            return json_results, stream_results
+
+        json_results, stream_results = asyncio.run(bench())
+        db.close_db_connections()
+
+    events = parse_sse(b"".join(chunk for _, chunk in stream_results[0][0]))
+    first_token = [e for e in events if e[0] == "token"][0][1]["text"]
+    print(f"{args.chats} concurrent chats, stub first token {args.delay * 1000:.0f} ms, {args.token_delay * 1000:.0f} ms/chunk")
+    summarize("/chat/message", json_results)
+    summarize("/chat/stream", stream_results)
+    print(f"  stream events: {[e[0] for e in events][:4]}...  first token {first_token!r}")
+
+
+if __name__ == "__main__":
+    main()
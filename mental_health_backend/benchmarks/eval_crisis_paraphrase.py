@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+"""
+Evaluation: crisis paraphrase detector recall / false positives and throughput.
+
+The held-out PARAPHRASES and NEAR_MISSES come from tests/crisis_paraphrase_cases.py,
+which the recall / false-positive test uses as well.
+
+Run from the repository root:
+    python mental_health_backend/benchmarks/eval_crisis_paraphrase.py [--repeat 2000]
+"""
+
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT))
+
+from mental_health_backend.mental_health_app.services import crisis_paraphrase, risk_engine
+from mental_health_backend.tests.crisis_paraphrase_cases import NEAR_MISSES, PARAPHRASES
+from mental_health_backend.tests.risk_engine_reference import LONG_FILLER
+
+THRESHOLDS = (0.2, 0.25, 0.3, 0.35, 0.4, 0.5, 0.6)
+
+
+def per_message_us(scorer, texts, repeat: int) -> float:
+    start = time.perf_counter()
+    for i in range(repeat):
+        scorer(texts[i % len(texts)])
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--show-errors", action="store_true")
+    args = parser.parse_args()
+    risk_engine.logger.setLevel(logging.ERROR)
+
+    detector = crisis_paraphrase.detector
+    keyword_hits = sum(risk_engine.keyword_risk_score(t)[0] > 0 for t in PARAPHRASES)
+    print(f"{len(PARAPHRASES)} held-out paraphrases ({keyword_hits} caught by keywords/regexes alone), "
+          f"{len(NEAR_MISSES)} near-miss everyday messages, {len(detector.exemplars)} exemplars")
+
+    pos = [detector.best_match(t) for t in PARAPHRASES]
+    neg = [detector.best_match(t) for t in NEAR_MISSES]
+    sim = lambda m: m.similarity if m is not None else -1.0
+    for threshold in THRESHOLDS:
+        recall = sum(sim(m) >= threshold for m in pos) / len(pos)
+        fp_rate = sum(sim(m) >= threshold for m in neg) / len(neg)
+        marker = "  <- CRISIS_PARAPHRASE_THRESHOLD" if threshold == detector.threshold else ""
+        print(f"  threshold {threshold:4.2f}  recall {recall:5.1%}  false positives {fp_rate:5.1%}{marker}")
+
+    if args.show_errors:
+        for label, texts, matches, want in (("missed", PARAPHRASES, pos, True), ("false positive", NEAR_MISSES, neg, False)):
+            for text, m in zip(texts, matches):
+                if (sim(m) >= detector.threshold) != want:
+                    print(f"  {label:<14} {sim(m):5.2f}  {text!r} ~ {m.exemplar if m else None!r}")
+
+    journal = (LONG_FILLER * 10) + " " + PARAPHRASES[0] + ". " + LONG_FILLER * 2
+    short = PARAPHRASES + NEAR_MISSES
+    print(f"throughput: short messages {per_message_us(detector.best_match, short, args.repeat):6.1f} us/msg"
+          f"   {len(journal)}-char journal entry {per_message_us(detector.best_match, [journal], max(args.repeat // 20, 1)):7.1f} us/msg")
+    print(f"            calculate_risk_score incl. keywords {per_message_us(risk_engine.calculate_risk_score, short, args.repeat):6.1f} us/msg")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+"""
+Evaluation harness: accuracy and speed of the deterministic risk assessment
+(calculate_risk_score + determinize_risk_level) on a labelled corpus.
+
+Corpora live in benchmarks/data/risk_corpus_v<N>.jsonl, one case per line:
+    {"id": "v1-001", "text": "...", "label": "low|medium|high", "tags": ["hinglish", "negation", ...]}
+A published version is never edited (results must stay comparable across commits);
+relabelling or adding cases means a new v<N+1> file. The newest version is the default.
+
+Each case is scored as if the LLM had answered "low" (--llm-risk), i.e. what the keyword
+layer alone guarantees when the LLM is wrong or unavailable. Reported:
+  - precision / recall / F1 per risk level, and the confusion matrix
+  - high_flagged: share of high cases assessed at least medium. A paraphrase match floors
+    at medium and routes to the escalation model, so this is the keyword layer's guarantee
+    for crisis messages; high itself then comes from intent regexes, keywords or the LLM
+  - accuracy per tag (english, hinglish, negation, paraphrase, idiom, ...)
+  - throughput: messages/sec over the corpus, p50 / p99 microseconds per message
+
+Run from the repository root:
+    python mental_health_backend/benchmarks/eval_risk_engine.py [--corpus PATH] [--repeat 20]
+        [--show-errors] [--json report.json]
+"""
+
+import argparse
+import json
+import logging
+import re
+import sys
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Dict, List
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT))
+
+from mental_health_backend.mental_health_app.services import risk_engine
+
+DATA_DIR = Path(__file__).resolve().parent / "data"
+LEVELS = ("low", "medium", "high")
+
+
+def latest_corpus() -> Path:
+    versions = {int(m.group(1)): p for p in DATA_DIR.glob("risk_corpus_v*.jsonl") if (m := re.search(r"_v(\d+)\.jsonl$", p.name))}
+    return versions[max(versions)]
+
+
+def load_corpus(path: Path) -> List[Dict[str, Any]]:
+    cases, seen = [], set()
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            case = json.loads(line)
+            if case["label"] not in LEVELS:
+                raise ValueError(f"{path.name}:{line_no}: unknown label {case['label']!r}")
+            if case["id"] in seen:
+                raise ValueError(f"{path.name}:{line_no}: duplicate id {case['id']!r}")
+            seen.add(case["id"])
+            cases.append(case)
+    return cases
+
+
+def predict(text: str, llm_risk: str = "low") -> str:
+    score, _ = risk_engine.calculate_risk_score(text)
+    level = risk_engine.determinize_risk_level(llm_risk, score, False)
+    # critical only ever comes from the LLM; none is low
+    return {"critical": "high", "none": "low"}.get(level, level)
+
+
+def evaluate(cases: List[Dict[str, Any]], llm_risk: str = "low") -> Dict[str, Any]:
+    confusion = {label: Counter() for label in LEVELS}
+    by_tag = defaultdict(lambda: [0, 0])  # tag -> [correct, total]
+    errors = []
+    for case in cases:
+        predicted = predict(case["text"], llm_risk)
+        confusion[case["label"]][predicted] += 1
+        for tag in case.get("tags", []):
+            by_tag[tag][0] += predicted == case["label"]
+            by_tag[tag][1] += 1
+        if predicted != case["label"]:
+            errors.append({"id": case["id"], "label": case["label"], "predicted": predicted, "text": case["text"]})
+
+    levels = {}
+    for level in LEVELS:
+        tp = confusion[level][level]
+        predicted = sum(confusion[label][level] for label in LEVELS)
+        actual = sum(confusion[level].values())
+        precision = tp / predicted if predicted else 0.0
+        recall = tp / actual if actual else 0.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        levels[level] = {"precision": precision, "recall": recall, "f1": f1, "support": actual}
+
+    high_total = sum(confusion["high"].values())
+    return {
+        "cases": len(cases),
+        "accuracy": sum(confusion[level][level] for level in LEVELS) / len(cases),
+        "levels": levels,
+        "high_flagged": (high_total - confusion["high"]["low"]) / high_total if high_total else 0.0,
+        "confusion": {label: dict(confusion[label]) for label in LEVELS},
+        "tags": {tag: correct / total for tag, (correct, total) in sorted(by_tag.items())},
+        "errors": errors,
+    }
+
+
+def throughput(cases: List[Dict[str, Any]], repeat: int) -> Dict[str, float]:
+    texts = [case["text"] for case in cases]
+    samples = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            t0 = time.perf_counter_ns()
+            risk_engine.calculate_risk_score(text)
+            samples.append(time.perf_counter_ns() - t0)
+    elapsed = time.perf_counter() - start
+    samples.sort()
+    return {
+        "messages_per_sec": len(samples) / elapsed,
+        "p50_us": samples[len(samples) // 2] / 1000,
+        "p99_us": samples[min(len(samples) - 1, int(len(samples) * 0.99))] / 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", type=Path, default=None)
+    parser.add_argument("--llm-risk", default="low", help="LLM verdict assumed for every case (default: low)")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--show-errors", action="store_true")
+    parser.add_argument("--json", type=Path, default=None, help="also write the full report here")
+    args = parser.parse_args()
+
+    # Detection warnings would dominate the timing
+    risk_engine.logger.setLevel(logging.ERROR)
+    path = args.corpus or latest_corpus()
+    cases = load_corpus(path)
+    report = evaluate(cases, args.llm_risk)
+    report.update(corpus=path.name, throughput=throughput(cases, args.repeat))
+
+    print(f"{path.name}: {report['cases']} cases, accuracy {report['accuracy']:.1%} (LLM verdict assumed: {args.llm_risk})")
+    for level, m in report["levels"].items():
+        print(f"  {level:<7} precision {m['precision']:6.1%}  recall {m['recall']:6.1%}  f1 {m['f1']:5.2f}  (n={m['support']})")
+    print(f"  high cases flagged at least medium: {report['high_flagged']:.1%}")
+    print("  confusion (label -> predicted): " + "  ".join(
+        f"{label}: " + "/".join(str(report["confusion"][label].get(p, 0)) for p in LEVELS) for label in LEVELS
+    ) + "   [low/medium/high]")
+    print("  accuracy by tag: " + ", ".join(f"{tag} {acc:.0%}" for tag, acc in report["tags"].items()))
+    t = report["throughput"]
+    print(f"throughput: {t['messages_per_sec']:,.0f} msgs/sec   p50 {t['p50_us']:.1f} us   p99 {t['p99_us']:.1f} us per message")
+
+    if args.show_errors:
+        for e in report["errors"]:
+            print(f"  {e['id']}  {e['label']:>6} -> {e['predicted']:<6}  {e['text'][:90]!r}")
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+One-off: index messages and risk events written before the full-text search
+migration (schema v5). Rows written afterwards are indexed by triggers.
+
+Safe to run while the app is serving: each batch is its own short transaction,
+and progress is stored per batch, so an interrupted run resumes where it stopped.
+
+    python mental_health_backend/mental_health_app/backfill_search_index.py [--db app.db] [--batch-size 1000]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Make `db` importable from any working directory (this file sits next to it)
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import db
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", default=db.DB_NAME, help="SQLite file (default MENTAL_HEALTH_DB_PATH or app.db)")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    db.DB_NAME = args.db
+    db.init_db()  # applies the FTS migration if this database predates it
+    pending = db.search_backfill_pending()
+    print(f"to index: {pending['messages']} messages, {pending['risk_events']} risk events")
+
+    done = {source: 0 for source in pending}
+    start = time.perf_counter()
+
+    def progress(source: str, rows: int):
+        done[source] += rows
+        print(f"  {source}: {done[source]}/{pending[source]}")
+
+    indexed = db.backfill_search_index(batch_size=args.batch_size, on_batch=progress)
+    elapsed = time.perf_counter() - start
+    total = sum(indexed.values())
+    print(f"indexed {total} rows in {elapsed:.1f} s ({total / elapsed if elapsed else 0:,.0f} rows/s)")
+    db.close_db_connections()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,227 @@
 import sqlite3
-from typing import List, Optional, Dict, Any
+import threading
+import queue
+import time
+import os
+from concurrent.futures import Future
+from typing import List, Optional, Dict, Any, Callable, Tuple
 import json
-from datetime import datetime
+import base64
+import re
+from datetime import datetime, timedelta
 
-DB_NAME = "app.db"
+DB_NAME = os.getenv("MENTAL_HEALTH_DB_PATH", "app.db")
 
-def get_db_connection():
-    conn = sqlite3.connect(DB_NAME)
-    conn.row_factory = sqlite3.Row
-    return conn
+# Connection tuning
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "8192"))
+SQLITE_CACHED_STATEMENTS = 256
+SQLITE_BUSY_TIMEOUT_MS = 5000
+
+# Group commit (off by default; enable per deployment)
+GROUP_COMMIT_ENABLED = os.getenv("MENTAL_HEALTH_GROUP_COMMIT", "0") == "1"
+GROUP_COMMIT_MAX_BATCH = int(os.getenv("GROUP_COMMIT_MAX_BATCH", "128"))
+GROUP_COMMIT_MAX_DELAY_MS = float(os.getenv("GROUP_COMMIT_MAX_DELAY_MS", "0"))  # extra linger; 0 = batch whatever queued during the last commit
+
+class ConnectionManager:
+    """
+    Long-lived, per-thread SQLite connections.
+
+    sqlite3 connections must not be shared between threads mid-transaction, so each
+    worker thread lazily opens one connection and reuses it for every request.
+    Connections are opened in WAL mode with synchronous=NORMAL (one fsync per
+    checkpoint instead of per commit), a larger page cache and a statement cache,
+    so repeated INSERTs reuse their prepared statements.
+
+    close_all() (app shutdown) closes every connection; threads transparently
+    reconnect afterwards via the generation counter.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: List[sqlite3.Connection] = []
+        self._generation = 0
+
+    def _connect(self, db_name: str) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            db_name,
+            cached_statements=SQLITE_CACHED_STATEMENTS,
+            check_same_thread=False  # only so close_all() can close it from the shutdown thread
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        with self._lock:
+            self._connections.append(conn)
+        return conn
+
+    def get(self) -> sqlite3.Connection:
+        local = self._local
+        conn = getattr(local, "conn", None)
+        if conn is None or local.generation != self._generation or local.db_name != DB_NAME:
+            conn = self._connect(DB_NAME)
+            local.conn = conn
+            local.generation = self._generation
+            local.db_name = DB_NAME
+        return conn
+
+    def close_all(self):
+        with self._lock:
+            connections, self._connections = self._connections, []
+            self._generation += 1
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+connection_manager = ConnectionManager()
+
+def get_db_connection() -> sqlite3.Connection:
+    """
+    Returns this thread's long-lived connection. Do not close it; use `with conn:` for a transaction.
+    """
+    return connection_manager.get()
+
+_STOP = object()
+
+class GroupCommitWriter:
+    """
+    Single background thread that owns all writes and commits them in batches.
+
+    Callers submit a job `fn(conn) -> result` and get a Future that resolves once the
+    batch containing the job is committed and fsynced: unlike the request threads'
+    connections (synchronous=NORMAL, where a commit can be lost on power failure),
+    the writer's connection runs with synchronous=FULL, and batching is what pays for
+    the fsync. A batch closes after max_batch jobs or max_delay_ms after its first job,
+    whichever comes first.
+
+    If any job in a batch fails, the batch is rolled back and its jobs are replayed
+    one transaction each, so a bad row only fails its own caller.
+    """
+
+    def __init__(self, max_batch: int = GROUP_COMMIT_MAX_BATCH, max_delay_ms: float = GROUP_COMMIT_MAX_DELAY_MS):
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000.0
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self.batches_committed = 0
+        self.jobs_committed = 0
+        self.jobs_failed = 0
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="mh-group-commit", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Flush everything already queued, then stop the thread."""
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+
+    def submit(self, fn: Callable[[sqlite3.Connection], Any]) -> Future:
+        future = Future()
+        self._queue.put((fn, future))
+        return future
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "batches_committed": self.batches_committed,
+            "jobs_committed": self.jobs_committed,
+            "jobs_failed": self.jobs_failed,
+            "avg_batch_size": self.jobs_committed / self.batches_committed if self.batches_committed else 0.0,
+            "queue_depth": self._queue.qsize()
+        }
+
+    def _collect(self, first) -> Tuple[list, bool]:
+        batch, stopping = [first], False
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            try:
+                remaining = deadline - time.monotonic()
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                stopping = True
+                break
+            batch.append(item)
+        return batch, stopping
+
+    def _commit_batch(self, conn: sqlite3.Connection, batch: list):
+        try:
+            with conn:
+                results = [fn(conn) for fn, _ in batch]
+        except Exception:
+            # Isolate the failing job(s): replay each job in its own transaction
+            for fn, future in batch:
+                self._commit_one(conn, fn, future)
+            return
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+        self.batches_committed += 1
+        self.jobs_committed += len(batch)
+
+    def _commit_one(self, conn: sqlite3.Connection, fn, future: Future):
+        try:
+            with conn:
+                result = fn(conn)
+        except Exception as e:
+            self.jobs_failed += 1
+            future.set_exception(e)
+            return
+        self.batches_committed += 1
+        self.jobs_committed += 1
+        future.set_result(result)
+
+    def _run(self):
+        conn = get_db_connection()
+        conn.execute("PRAGMA synchronous=FULL")
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch, stopping = self._collect(item)
+            self._commit_batch(conn, batch)
+
+_group_writer: Optional[GroupCommitWriter] = None
+
+def start_group_commit(max_batch: int = GROUP_COMMIT_MAX_BATCH, max_delay_ms: float = GROUP_COMMIT_MAX_DELAY_MS) -> GroupCommitWriter:
+    global _group_writer
+    if _group_writer is None:
+        _group_writer = GroupCommitWriter(max_batch, max_delay_ms)
+        _group_writer.start()
+    return _group_writer
+
+def stop_group_commit():
+    global _group_writer
+    if _group_writer is not None:
+        _group_writer.stop()
+        _group_writer = None
+
+def group_commit_stats() -> Optional[Dict[str, float]]:
+    return _group_writer.stats() if _group_writer is not None else None
+
+def _run_write(fn: Callable[[sqlite3.Connection], Any]) -> Any:
+    """
+    Execute a write job: through the group-commit writer when enabled,
+    otherwise in its own transaction on this thread's connection.
+    """
+    writer = _group_writer
+    if writer is not None:
+        return writer.submit(fn).result()
+    conn = get_db_connection()
+    with conn:
+        return fn(conn)
+
+def close_db_connections():
+    stop_group_commit()
+    connection_manager.close_all()
 
 def init_db():
     conn = get_db_connection()
@@ -53,56 +266,938 @@ def init_db():
     ''')
     
     conn.commit()
-    conn.close()
+
+    apply_migrations(conn)
+
+    if GROUP_COMMIT_ENABLED:
+        start_group_commit()
+
+# -----------------------------
+# Schema Migrations
+# -----------------------------
+# Versioned, append-only. The applied version is stored in PRAGMA user_version;
+# each migration runs in its own explicit transaction together with the version bump,
+# so a failing statement leaves no part of its migration behind.
+# Never edit a released migration: add a new one.
+# Risk rollups recomputed from risk_events; {users} restricts the user_id range
+_ROLLUP_REBUILD_SQL = [
+    """INSERT INTO risk_rollups
+       SELECT user_id, COUNT(*), SUM(self_harm_detected), MIN(created_at), MAX(created_at),
+              MAX(CASE WHEN risk_level IN ('high', 'critical') THEN created_at END)
+       FROM risk_events WHERE {users} GROUP BY user_id""",
+    """INSERT INTO risk_rollup_levels
+       SELECT user_id, risk_level, COUNT(*) FROM risk_events WHERE {users} GROUP BY user_id, risk_level""",
+    """INSERT INTO risk_rollup_daily
+       SELECT user_id, substr(created_at, 1, 10), risk_level, COUNT(*), SUM(self_harm_detected)
+       FROM risk_events WHERE {users} GROUP BY user_id, substr(created_at, 1, 10), risk_level""",
+]
+
+SCHEMA_MIGRATIONS: List[Tuple[int, str, List[str]]] = [
+    (1, "history indexes, unique daily summary per user/date", [
+        "CREATE INDEX IF NOT EXISTS idx_messages_user_created ON messages(user_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_risk_events_user_created ON risk_events(user_id, created_at)",
+        # Earlier versions inserted a new summary on every submission; keep the latest per day
+        """DELETE FROM daily_summaries WHERE id NOT IN (
+               SELECT MAX(id) FROM daily_summaries GROUP BY user_id, date
+           )""",
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_daily_summaries_user_date ON daily_summaries(user_id, date)",
+    ]),
+    (2, "LLM enrichment columns on risk events (crisis fast path)", [
+        "ALTER TABLE risk_events ADD COLUMN llm_risk_level TEXT",
+        "ALTER TABLE risk_events ADD COLUMN enriched_at TEXT",
+    ]),
+    (3, "deferred check-in summaries (status, answers, LLM result columns)", [
+        # Rows written before this migration were summarized synchronously
+        "ALTER TABLE daily_summaries ADD COLUMN status TEXT NOT NULL DEFAULT 'complete'",
+        "ALTER TABLE daily_summaries ADD COLUMN revision INTEGER NOT NULL DEFAULT 1",
+        "ALTER TABLE daily_summaries ADD COLUMN answers_json TEXT",
+        "ALTER TABLE daily_summaries ADD COLUMN keyword_score INTEGER",
+        "ALTER TABLE daily_summaries ADD COLUMN self_harm_detected BOOLEAN",
+        "ALTER TABLE daily_summaries ADD COLUMN advice_json TEXT",
+        "ALTER TABLE daily_summaries ADD COLUMN reply TEXT",
+        "ALTER TABLE daily_summaries ADD COLUMN completed_at TEXT",
+        # Startup recovery scans only the (few) unfinished rows
+        "CREATE INDEX IF NOT EXISTS idx_daily_summaries_pending ON daily_summaries(status) WHERE status = 'pending'",
+    ]),
+    (4, "numeric mood score per check-in (mood trends)", [
+        "ALTER TABLE daily_summaries ADD COLUMN mood_score REAL",
+        # Trend loads read one date range across all users
+        "CREATE INDEX IF NOT EXISTS idx_daily_summaries_mood ON daily_summaries(date, user_id, mood_score) WHERE mood_score IS NOT NULL",
+    ]),
+    (5, "full-text search over messages and risk event reasons (FTS5)", [
+        # External-content indexes: the text lives only in the base tables
+        """CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+               text, content='messages', content_rowid='id', tokenize='porter unicode61 remove_diacritics 2')""",
+        """CREATE VIRTUAL TABLE IF NOT EXISTS risk_events_fts USING fts5(
+               reasons_json, content='risk_events', content_rowid='id', tokenize='porter unicode61 remove_diacritics 2')""",
+        # Rows that existed before this migration are indexed by backfill_search_index(),
+        # in batches, not here: ids in (last_id, done_through] are still to do
+        """CREATE TABLE IF NOT EXISTS search_backfill (
+               source TEXT PRIMARY KEY, last_id INTEGER NOT NULL, done_through INTEGER NOT NULL)""",
+        "INSERT OR IGNORE INTO search_backfill SELECT 'messages', 0, COALESCE(MAX(id), 0) FROM messages",
+        "INSERT OR IGNORE INTO search_backfill SELECT 'risk_events', 0, COALESCE(MAX(id), 0) FROM risk_events",
+        # New rows are indexed as they are written. Deletes and updates only touch rows the
+        # index already holds (an external-content 'delete' must match what was indexed)
+        """CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN
+               INSERT INTO messages_fts(rowid, text) VALUES (new.id, new.text);
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages
+           WHEN NOT EXISTS (SELECT 1 FROM search_backfill WHERE source = 'messages' AND old.id > last_id AND old.id <= done_through)
+           BEGIN
+               INSERT INTO messages_fts(messages_fts, rowid, text) VALUES ('delete', old.id, old.text);
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS messages_fts_update AFTER UPDATE OF text ON messages
+           WHEN NOT EXISTS (SELECT 1 FROM search_backfill WHERE source = 'messages' AND old.id > last_id AND old.id <= done_through)
+           BEGIN
+               INSERT INTO messages_fts(messages_fts, rowid, text) VALUES ('delete', old.id, old.text);
+               INSERT INTO messages_fts(rowid, text) VALUES (new.id, new.text);
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS risk_events_fts_insert AFTER INSERT ON risk_events BEGIN
+               INSERT INTO risk_events_fts(rowid, reasons_json) VALUES (new.id, new.reasons_json);
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS risk_events_fts_delete AFTER DELETE ON risk_events
+           WHEN NOT EXISTS (SELECT 1 FROM search_backfill WHERE source = 'risk_events' AND old.id > last_id AND old.id <= done_through)
+           BEGIN
+               INSERT INTO risk_events_fts(risk_events_fts, rowid, reasons_json) VALUES ('delete', old.id, old.reasons_json);
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS risk_events_fts_update AFTER UPDATE OF reasons_json ON risk_events
+           WHEN NOT EXISTS (SELECT 1 FROM search_backfill WHERE source = 'risk_events' AND old.id > last_id AND old.id <= done_through)
+           BEGIN
+               INSERT INTO risk_events_fts(risk_events_fts, rowid, reasons_json) VALUES ('delete', old.id, old.reasons_json);
+               INSERT INTO risk_events_fts(rowid, reasons_json) VALUES (new.id, new.reasons_json);
+           END""",
+    ]),
+    (6, "per-user risk rollups, maintained with every risk event write", [
+        """CREATE TABLE IF NOT EXISTS risk_rollups (
+               user_id TEXT PRIMARY KEY,
+               events INTEGER NOT NULL,
+               self_harm_events INTEGER NOT NULL,
+               first_event_at TEXT NOT NULL,
+               last_event_at TEXT NOT NULL,
+               last_high_risk_at TEXT
+           )""",
+        """CREATE TABLE IF NOT EXISTS risk_rollup_levels (
+               user_id TEXT NOT NULL,
+               risk_level TEXT NOT NULL,
+               events INTEGER NOT NULL,
+               PRIMARY KEY (user_id, risk_level)
+           ) WITHOUT ROWID""",
+        """CREATE TABLE IF NOT EXISTS risk_rollup_daily (
+               user_id TEXT NOT NULL,
+               date TEXT NOT NULL,
+               risk_level TEXT NOT NULL,
+               events INTEGER NOT NULL,
+               self_harm_events INTEGER NOT NULL,
+               PRIMARY KEY (user_id, date, risk_level)
+           ) WITHOUT ROWID""",
+        # Existing history, in one pass (rebuild_risk_rollups() does the same per user range)
+        *(sql.format(users="1") for sql in _ROLLUP_REBUILD_SQL),
+    ]),
+    (7, "historical rescoring runs and their differences", [
+        # Rescoring joins each message to its risk event
+        "CREATE INDEX IF NOT EXISTS idx_risk_events_message ON risk_events(message_id)",
+        """CREATE TABLE IF NOT EXISTS rescoring_runs (
+               id INTEGER PRIMARY KEY AUTOINCREMENT,
+               rules_version TEXT NOT NULL,
+               started_at TEXT NOT NULL,
+               finished_at TEXT,
+               rows_scanned INTEGER,
+               rows_changed INTEGER,
+               seconds REAL
+           )""",
+        """CREATE TABLE IF NOT EXISTS rescored_messages (
+               run_id INTEGER NOT NULL REFERENCES rescoring_runs(id),
+               message_id INTEGER NOT NULL,
+               risk_event_id INTEGER,
+               user_id TEXT NOT NULL,
+               old_keyword_score INTEGER,
+               new_keyword_score INTEGER NOT NULL,
+               old_level TEXT,
+               new_level TEXT NOT NULL,
+               stored_risk_level TEXT,
+               old_reasons_json TEXT,
+               new_reasons_json TEXT NOT NULL,
+               PRIMARY KEY (run_id, message_id)
+           ) WITHOUT ROWID""",
+    ]),
+    (8, "trusted-contact escalation outbox", [
+        # One row per high/critical risk event level, written in the risk event's transaction.
+        # Existing events are not queued: escalating history would page contacts about old crises.
+        """CREATE TABLE IF NOT EXISTS escalation_outbox (
+               id INTEGER PRIMARY KEY AUTOINCREMENT,
+               risk_event_id INTEGER NOT NULL REFERENCES risk_events(id),
+               user_id TEXT NOT NULL,
+               risk_level TEXT NOT NULL,
+               self_harm_detected INTEGER NOT NULL,
+               created_at TEXT NOT NULL,
+               status TEXT NOT NULL DEFAULT 'pending',
+               attempts INTEGER NOT NULL DEFAULT 0,
+               next_attempt_at TEXT NOT NULL,
+               sent_at TEXT,
+               last_error TEXT,
+               UNIQUE (risk_event_id, risk_level)
+           )""",
+        "CREATE INDEX IF NOT EXISTS idx_escalation_outbox_due ON escalation_outbox(next_attempt_at) WHERE status = 'pending'",
+        "CREATE INDEX IF NOT EXISTS idx_escalation_outbox_sent ON escalation_outbox(user_id, sent_at) WHERE status = 'sent'",
+    ]),
+    (9, "one-off mood score backfill range", [
+        # Check-ins up to done_through may predate parsing the mood at submit time. They are
+        # parsed once by backfill_mood_scores(), in id batches: ids in (last_id, done_through]
+        # are still to do. Later rows always went through parse_mood on submit.
+        "CREATE TABLE IF NOT EXISTS mood_backfill (last_id INTEGER NOT NULL, done_through INTEGER NOT NULL)",
+        "INSERT INTO mood_backfill SELECT 0, COALESCE(MAX(id), 0) FROM daily_summaries",
+    ]),
+]
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def apply_migrations(conn: sqlite3.Connection):
+    for version, description, statements in SCHEMA_MIGRATIONS:
+        if version <= get_schema_version(conn):
+            continue
+        # sqlite3 only opens a transaction implicitly before DML, so DDL would autocommit
+        # statement by statement: begin explicitly. IMMEDIATE takes the write lock up front,
+        # so of two processes starting together only one applies the migration.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if version <= get_schema_version(conn):
+                # Applied by another process while we waited for the lock
+                conn.rollback()
+                continue
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {int(version)}")
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+        print(f"[mental_health.db] applied migration {version}: {description}")
 
 # Helper functions for persistence
 
-def save_message(user_id: str, role: str, text: str) -> int:
-    conn = get_db_connection()
-    c = conn.cursor()
-    created_at = datetime.utcnow().isoformat()
-    c.execute(
+def _insert_message(conn: sqlite3.Connection, user_id: str, role: str, text: str, created_at: str) -> int:
+    c = conn.execute(
         "INSERT INTO messages (user_id, role, text, created_at) VALUES (?, ?, ?, ?)",
         (user_id, role, text, created_at)
     )
-    msg_id = c.lastrowid
-    conn.commit()
-    conn.close()
-    return msg_id
+    return c.lastrowid
 
-def save_risk_event(user_id: str, message_id: Optional[int], risk_level: str, self_harm_detected: bool, keyword_score: int, reasons: List[str]):
-    conn = get_db_connection()
-    c = conn.cursor()
-    created_at = datetime.utcnow().isoformat()
-    reasons_json = json.dumps(reasons)
-    c.execute(
+def _insert_risk_event(conn: sqlite3.Connection, user_id: str, message_id: Optional[int], risk_level: str, self_harm_detected: bool, keyword_score: int, reasons: List[str], created_at: str) -> int:
+    c = conn.execute(
         '''INSERT INTO risk_events 
            (user_id, message_id, risk_level, self_harm_detected, keyword_score, reasons_json, created_at) 
            VALUES (?, ?, ?, ?, ?, ?, ?)''',
-        (user_id, message_id, risk_level, int(self_harm_detected), keyword_score, reasons_json, created_at)
+        (user_id, message_id, risk_level, int(self_harm_detected), keyword_score, json.dumps(reasons), created_at)
     )
-    conn.commit()
-    conn.close()
+    _add_to_rollup(conn, user_id, created_at, risk_level, self_harm_detected)
+    _enqueue_escalation(conn, c.lastrowid, user_id, risk_level, self_harm_detected, created_at)
+    return c.lastrowid
+
+# -----------------------------
+# Risk rollups (migration 6)
+# -----------------------------
+# Per user: totals, all-time counts per risk level and per-day counts per level,
+# updated in the transaction that writes or re-levels the risk event, so reading
+# them never scans risk_events.
+
+RISK_LEVELS = ("none", "low", "medium", "high", "critical")
+HIGH_RISK_LEVELS = ("high", "critical")
+
+def _add_to_rollup(conn: sqlite3.Connection, user_id: str, created_at: str, risk_level: str, self_harm_detected: bool):
+    high_at = created_at if risk_level in HIGH_RISK_LEVELS else None
+    conn.execute(
+        '''INSERT INTO risk_rollups (user_id, events, self_harm_events, first_event_at, last_event_at, last_high_risk_at)
+           VALUES (?, 1, ?, ?, ?, ?)
+           ON CONFLICT(user_id) DO UPDATE SET
+               events = events + 1,
+               self_harm_events = self_harm_events + excluded.self_harm_events,
+               first_event_at = MIN(first_event_at, excluded.first_event_at),
+               last_event_at = MAX(last_event_at, excluded.last_event_at),
+               last_high_risk_at = NULLIF(MAX(COALESCE(last_high_risk_at, ''), COALESCE(excluded.last_high_risk_at, '')), '')''',
+        (user_id, int(self_harm_detected), created_at, created_at, high_at)
+    )
+    _count_level(conn, user_id, created_at, risk_level, 1, int(self_harm_detected))
+
+def _count_level(conn: sqlite3.Connection, user_id: str, created_at: str, risk_level: str, delta: int, self_harm_delta: int):
+    conn.execute(
+        '''INSERT INTO risk_rollup_levels (user_id, risk_level, events) VALUES (?, ?, ?)
+           ON CONFLICT(user_id, risk_level) DO UPDATE SET events = events + excluded.events''',
+        (user_id, risk_level, delta)
+    )
+    conn.execute(
+        '''INSERT INTO risk_rollup_daily (user_id, date, risk_level, events, self_harm_events) VALUES (?, ?, ?, ?, ?)
+           ON CONFLICT(user_id, date, risk_level) DO UPDATE SET
+               events = events + excluded.events,
+               self_harm_events = self_harm_events + excluded.self_harm_events''',
+        (user_id, created_at[:10], risk_level, delta, self_harm_delta)
+    )
+
+def _relevel_in_rollup(conn: sqlite3.Connection, old: sqlite3.Row, risk_level: str, self_harm_detected: bool):
+    """Move an existing event (old = its risk_events row before the update) to its new level."""
+    user_id, created_at = old["user_id"], old["created_at"]
+    old_self_harm = int(bool(old["self_harm_detected"]))
+    self_harm_delta = int(self_harm_detected) - old_self_harm
+    if old["risk_level"] == risk_level and not self_harm_delta:
+        return
+    _count_level(conn, user_id, created_at, old["risk_level"], -1, -old_self_harm)
+    _count_level(conn, user_id, created_at, risk_level, 1, int(self_harm_detected))
+    # Keep rollups identical to a rebuild: no zero-count rows
+    conn.execute("DELETE FROM risk_rollup_levels WHERE user_id = ? AND risk_level = ? AND events = 0", (user_id, old["risk_level"]))
+    conn.execute(
+        "DELETE FROM risk_rollup_daily WHERE user_id = ? AND date = ? AND risk_level = ? AND events = 0",
+        (user_id, created_at[:10], old["risk_level"])
+    )
+    conn.execute("UPDATE risk_rollups SET self_harm_events = self_harm_events + ? WHERE user_id = ?", (self_harm_delta, user_id))
+    if risk_level in HIGH_RISK_LEVELS:
+        conn.execute(
+            "UPDATE risk_rollups SET last_high_risk_at = MAX(COALESCE(last_high_risk_at, ''), ?) WHERE user_id = ?",
+            (created_at, user_id)
+        )
+    elif old["risk_level"] in HIGH_RISK_LEVELS:
+        # Downgraded: the latest high-risk event may have been this one (rare; one indexed lookup)
+        conn.execute(
+            '''UPDATE risk_rollups SET last_high_risk_at = (
+                   SELECT MAX(created_at) FROM risk_events WHERE user_id = ? AND risk_level IN ('high', 'critical')
+               ) WHERE user_id = ?''',
+            (user_id, user_id)
+        )
+
+def save_message(user_id: str, role: str, text: str) -> int:
+    created_at = datetime.utcnow().isoformat()
+    return _run_write(lambda conn: _insert_message(conn, user_id, role, text, created_at))
+
+def save_risk_event(user_id: str, message_id: Optional[int], risk_level: str, self_harm_detected: bool, keyword_score: int, reasons: List[str]):
+    created_at = datetime.utcnow().isoformat()
+    _run_write(lambda conn: _insert_risk_event(conn, user_id, message_id, risk_level, self_harm_detected, keyword_score, reasons, created_at))
+
+def save_chat_turn(
+    user_id: str,
+    user_text: str,
+    assistant_text: Optional[str],
+    risk_level: str,
+    self_harm_detected: bool,
+    keyword_score: int,
+    reasons: List[str],
+    user_created_at: Optional[str] = None
+) -> Dict[str, Optional[int]]:
+    """
+    Unit of work for one chat turn: user message, risk event and assistant message
+    are written in a single transaction (one commit). Either all three rows
+    exist or none do.
+
+    user_created_at lets the caller keep the time the message was received,
+    since the write now happens after the LLM call.
+    assistant_text None stores no reply (coalesced messages: the burst's reply is stored once).
+    """
+    now = datetime.utcnow().isoformat()
+
+    def write_turn(conn: sqlite3.Connection) -> Dict[str, Optional[int]]:
+        user_msg_id = _insert_message(conn, user_id, "user", user_text, user_created_at or now)
+        risk_event_id = _insert_risk_event(conn, user_id, user_msg_id, risk_level, self_harm_detected, keyword_score, reasons, now)
+        assistant_msg_id = _insert_message(conn, user_id, "assistant", assistant_text, now) if assistant_text is not None else None
+        return {
+            "user_message_id": user_msg_id,
+            "risk_event_id": risk_event_id,
+            "assistant_message_id": assistant_msg_id
+        }
+
+    return _run_write(write_turn)
+
+def enrich_risk_event(
+    risk_event_id: int,
+    user_id: str,
+    risk_level: str,
+    self_harm_detected: bool,
+    llm_risk_level: str,
+    assistant_text: Optional[str]
+) -> Optional[int]:
+    """
+    Second half of a crisis fast-path turn: store the LLM's assessment on the risk
+    event that was saved up front and append the LLM reply as an assistant message,
+    in one transaction. Returns the new assistant message id (None if no reply).
+    """
+    now = datetime.utcnow().isoformat()
+
+    def write_enrichment(conn: sqlite3.Connection) -> Optional[int]:
+        previous = conn.execute(
+            "SELECT user_id, risk_level, self_harm_detected, created_at FROM risk_events WHERE id = ?", (risk_event_id,)
+        ).fetchone()
+        conn.execute(
+            '''UPDATE risk_events
+               SET risk_level = ?, self_harm_detected = ?, llm_risk_level = ?, enriched_at = ?
+               WHERE id = ?''',
+            (risk_level, int(self_harm_detected), llm_risk_level, now, risk_event_id)
+        )
+        if previous is not None:
+            _relevel_in_rollup(conn, previous, risk_level, self_harm_detected)
+            # Raised to high/critical by the LLM: the new level gets its own notification
+            _enqueue_escalation(conn, risk_event_id, previous["user_id"], risk_level, self_harm_detected, previous["created_at"])
+        if assistant_text:
+            return _insert_message(conn, user_id, "assistant", assistant_text, now)
+        return None
+
+    return _run_write(write_enrichment)
 
 def save_daily_summary(user_id: str, date: str, summary_text: str, risk_level: str):
-    conn = get_db_connection()
-    c = conn.cursor()
     created_at = datetime.utcnow().isoformat()
-    c.execute(
+    # One summary per user per day: a resubmission replaces the earlier one
+    _run_write(lambda conn: conn.execute(
         '''INSERT INTO daily_summaries 
            (user_id, date, summary_text, risk_level, created_at) 
-           VALUES (?, ?, ?, ?, ?)''',
+           VALUES (?, ?, ?, ?, ?)
+           ON CONFLICT(user_id, date) DO UPDATE SET
+               summary_text = excluded.summary_text,
+               risk_level = excluded.risk_level,
+               created_at = excluded.created_at,
+               status = 'complete',
+               revision = daily_summaries.revision + 1''',
         (user_id, date, summary_text, risk_level, created_at)
-    )
-    conn.commit()
-    conn.close()
+    ))
+
+def save_pending_checkin(
+    user_id: str,
+    date: str,
+    answers: Dict[str, str],
+    risk_level: str,
+    self_harm_detected: bool,
+    keyword_score: int,
+    mood_score: Optional[float] = None
+) -> int:
+    """
+    Record a check-in whose LLM summary is still to come (status 'pending', keyword risk
+    assessment only). A resubmission on the same day replaces the earlier row and bumps
+    its revision, so a summary still being computed for the old answers cannot land on it.
+    mood_score is the parsed 1–10 answer (None if missing or unparseable).
+    Returns the revision to pass to complete_daily_summary.
+    """
+    now = datetime.utcnow().isoformat()
+
+    def write_pending(conn: sqlite3.Connection) -> int:
+        conn.execute(
+            '''INSERT INTO daily_summaries
+               (user_id, date, summary_text, risk_level, created_at, status, revision,
+                answers_json, keyword_score, self_harm_detected, advice_json, reply, completed_at, mood_score)
+               VALUES (?, ?, NULL, ?, ?, 'pending', 1, ?, ?, ?, NULL, NULL, NULL, ?)
+               ON CONFLICT(user_id, date) DO UPDATE SET
+                   summary_text = NULL,
+                   risk_level = excluded.risk_level,
+                   created_at = excluded.created_at,
+                   status = 'pending',
+                   revision = daily_summaries.revision + 1,
+                   answers_json = excluded.answers_json,
+                   keyword_score = excluded.keyword_score,
+                   self_harm_detected = excluded.self_harm_detected,
+                   advice_json = NULL,
+                   reply = NULL,
+                   completed_at = NULL,
+                   mood_score = excluded.mood_score''',
+            (user_id, date, risk_level, now, json.dumps(answers), keyword_score, int(self_harm_detected), mood_score)
+        )
+        return conn.execute(
+            "SELECT revision FROM daily_summaries WHERE user_id = ? AND date = ?", (user_id, date)
+        ).fetchone()[0]
+
+    return _run_write(write_pending)
+
+def complete_daily_summary(
+    user_id: str,
+    date: str,
+    revision: int,
+    status: str,
+    summary_text: str,
+    risk_level: str,
+    self_harm_detected: bool,
+    advice: List[str],
+    reply: Optional[str]
+) -> bool:
+    """Store the LLM summary for a pending check-in. False if the check-in was resubmitted meanwhile."""
+    now = datetime.utcnow().isoformat()
+    return _run_write(lambda conn: conn.execute(
+        '''UPDATE daily_summaries
+           SET status = ?, summary_text = ?, risk_level = ?, self_harm_detected = ?,
+               advice_json = ?, reply = ?, completed_at = ?
+           WHERE user_id = ? AND date = ? AND revision = ?''',
+        (status, summary_text, risk_level, int(self_harm_detected), json.dumps(advice), reply, now, user_id, date, revision)
+    ).rowcount == 1)
 
 def get_daily_summary(user_id: str, date: str):
     conn = get_db_connection()
-    c = conn.cursor()
-    c.execute("SELECT * FROM daily_summaries WHERE user_id = ? AND date = ?", (user_id, date))
-    row = c.fetchone()
-    conn.close()
+    row = conn.execute("SELECT * FROM daily_summaries WHERE user_id = ? AND date = ?", (user_id, date)).fetchone()
     if row:
-        return dict(row)
+        summary = dict(row)
+        summary["advice"] = json.loads(summary.pop("advice_json") or "[]")
+        summary["answers"] = json.loads(summary.pop("answers_json") or "{}")
+        if summary["self_harm_detected"] is not None:
+            summary["self_harm_detected"] = bool(summary["self_harm_detected"])
+        return summary
     return None
+
+def get_pending_checkins() -> List[Dict[str, Any]]:
+    """Check-ins still waiting for their LLM summary (re-queued on startup)."""
+    rows = get_db_connection().execute(
+        "SELECT user_id, date, revision, answers_json, keyword_score FROM daily_summaries WHERE status = 'pending'"
+    ).fetchall()
+    return [
+        {"user_id": r["user_id"], "date": r["date"], "revision": r["revision"],
+         "answers": json.loads(r["answers_json"] or "{}"), "keyword_score": r["keyword_score"] or 0}
+        for r in rows
+    ]
+
+def get_mood_scores(since: str, user_id: Optional[str] = None) -> List[Tuple[str, str, float]]:
+    """(user_id, date, mood_score) of every check-in with a mood on or after `since` (ISO date)."""
+    sql = "SELECT user_id, date, mood_score FROM daily_summaries WHERE date >= ? AND mood_score IS NOT NULL"
+    params: Tuple[Any, ...] = (since,)
+    if user_id is not None:
+        sql += " AND user_id = ?"
+        params += (user_id,)
+    return [tuple(r) for r in get_db_connection().execute(sql, params)]
+
+def backfill_mood_scores(parse: Callable[[Dict[str, str]], Optional[float]], batch_size: int = 1000) -> int:
+    """
+    Fill mood_score for check-ins stored before it was parsed at submit time (the id range
+    recorded by migration 9), parsing answers_json with `parse` (mood_trends.parse_mood).
+    Progress is stored with each batch, so this runs once: rows without a parseable mood
+    stay NULL but are not read again, and later startups cost a single lookup.
+    Returns the number of rows updated.
+    """
+    def backfill_batch(conn: sqlite3.Connection) -> int:
+        last_id, done_through = conn.execute("SELECT last_id, done_through FROM mood_backfill").fetchone()
+        if last_id >= done_through:
+            return -1
+        rows = conn.execute(
+            "SELECT id, answers_json, mood_score FROM daily_summaries WHERE id > ? AND id <= ? ORDER BY id LIMIT ?",
+            (last_id, done_through, batch_size)
+        ).fetchall()
+        upper = rows[-1]["id"] if len(rows) == batch_size else done_through
+        updates = [
+            (mood, r["id"]) for r in rows
+            if r["mood_score"] is None and r["answers_json"] and (mood := parse(json.loads(r["answers_json"]))) is not None
+        ]
+        conn.executemany("UPDATE daily_summaries SET mood_score = ? WHERE id = ?", updates)
+        conn.execute("UPDATE mood_backfill SET last_id = ?", (upper,))
+        return len(updates)
+
+    updated = 0
+    while (count := _run_write(backfill_batch)) >= 0:
+        updated += count
+    return updated
+
+# -----------------------------
+# History (keyset pagination)
+# -----------------------------
+# Pages are ordered newest first by (created_at, id). The cursor is the
+# (created_at, id) of the last row returned, so each page is an index range
+# seek on (user_id, created_at) instead of an OFFSET scan.
+
+def encode_cursor(created_at: str, row_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{created_at}|{row_id}".encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """Raises ValueError for malformed cursors."""
+    try:
+        created_at, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit("|", 1)
+        return created_at, int(row_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+MESSAGES_PAGE_SQL = """
+    SELECT id, user_id, role, text, created_at FROM messages
+    WHERE user_id = ? AND (created_at, id) < (?, ?)
+    ORDER BY created_at DESC, id DESC
+    LIMIT ?
+"""
+
+RECENT_MESSAGES_SQL = """
+    SELECT role, text FROM messages
+    WHERE user_id = ?
+    ORDER BY created_at DESC, id DESC
+    LIMIT ?
+"""
+
+RISK_EVENTS_PAGE_SQL = """
+    SELECT id, user_id, message_id, risk_level, self_harm_detected, keyword_score, reasons_json,
+           llm_risk_level, enriched_at, created_at
+    FROM risk_events
+    WHERE user_id = ? AND (created_at, id) < (?, ?)
+    ORDER BY created_at DESC, id DESC
+    LIMIT ?
+"""
+
+# Upper bound sorting after any ISO timestamp, used for the first page
+_CURSOR_START = ("\uffff", 0)
+
+def _fetch_page(sql: str, user_id: str, limit: int, cursor: Optional[str]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    created_at, row_id = decode_cursor(cursor) if cursor else _CURSOR_START
+    conn = get_db_connection()
+    # Fetch one extra row to know whether another page exists
+    rows = conn.execute(sql, (user_id, created_at, row_id, limit + 1)).fetchall()
+    items = [dict(r) for r in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor(last["created_at"], last["id"])
+    return items, next_cursor
+
+def get_messages_page(user_id: str, limit: int = 50, cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    return _fetch_page(MESSAGES_PAGE_SQL, user_id, limit, cursor)
+
+def get_risk_events_page(user_id: str, limit: int = 50, cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    items, next_cursor = _fetch_page(RISK_EVENTS_PAGE_SQL, user_id, limit, cursor)
+    for item in items:
+        item["self_harm_detected"] = bool(item["self_harm_detected"])
+        item["reasons"] = json.loads(item.pop("reasons_json") or "[]")
+    return items, next_cursor
+
+def get_recent_messages(user_id: str, limit: int) -> List[Tuple[str, str]]:
+    """Last `limit` messages of a user as (role, text), oldest first (conversation memory loader)."""
+    rows = get_db_connection().execute(RECENT_MESSAGES_SQL, (user_id, limit)).fetchall()
+    return [(r["role"], r["text"]) for r in reversed(rows)]
+
+# -----------------------------
+# Full-text search (FTS5, migration 5)
+# -----------------------------
+# Hits are ordered by bm25 (best first), then source and id. The cursor is the
+# (score, source, id) of the last hit returned. Scores are recomputed per request,
+# so rows written between two pages can shift the ranking slightly; bm25 is computed
+# per index, so across messages and risk events the interleaving is approximate.
+
+SEARCH_SOURCES = ("messages", "risk_events")
+
+# (base table, FTS table, indexed column)
+_SEARCH_TABLES = {
+    "messages": ("messages", "messages_fts", "text"),
+    "risk_events": ("risk_events", "risk_events_fts", "reasons_json"),
+}
+
+MESSAGE_SEARCH_SQL = """
+    SELECT 'messages' AS source, m.id, m.user_id, m.created_at, m.role,
+           NULL AS message_id, NULL AS risk_level, NULL AS reasons_json,
+           snippet(messages_fts, 0, '[', ']', '…', 16) AS snippet, bm25(messages_fts) AS score
+    FROM messages_fts JOIN messages m ON m.id = messages_fts.rowid
+    WHERE messages_fts MATCH :query
+      AND (:user_id IS NULL OR m.user_id = :user_id)
+      AND m.created_at >= :since AND m.created_at < :until
+"""
+
+RISK_EVENT_SEARCH_SQL = """
+    SELECT 'risk_events' AS source, r.id, r.user_id, r.created_at, NULL AS role,
+           r.message_id, r.risk_level, r.reasons_json,
+           snippet(risk_events_fts, 0, '[', ']', '…', 16) AS snippet, bm25(risk_events_fts) AS score
+    FROM risk_events_fts JOIN risk_events r ON r.id = risk_events_fts.rowid
+    WHERE risk_events_fts MATCH :query
+      AND (:user_id IS NULL OR r.user_id = :user_id)
+      AND r.created_at >= :since AND r.created_at < :until
+"""
+
+_SEARCH_TOKEN = re.compile(r"[^\W_]+\*?")
+
+def fts_query(text: str) -> str:
+    """
+    Plain search text -> FTS5 query: every word must match (implicit AND), a trailing *
+    makes it a prefix. Words are quoted, so FTS5 operators and punctuation in the input
+    are never interpreted. Raises ValueError when there is nothing to search for.
+    """
+    terms = []
+    for token in _SEARCH_TOKEN.findall(text):
+        word, prefix = (token[:-1], "*") if token.endswith("*") else (token, "")
+        terms.append(f'"{word}"{prefix}')
+    if not terms:
+        raise ValueError("Empty search query")
+    return " ".join(terms)
+
+def encode_search_cursor(score: float, source: str, row_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{score!r}|{source}|{row_id}".encode()).decode()
+
+def decode_search_cursor(cursor: str) -> Tuple[float, str, int]:
+    """Raises ValueError for malformed cursors."""
+    try:
+        score, source, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return float(score), source, int(row_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def search_history(
+    query: str,
+    user_id: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    sources: Tuple[str, ...] = SEARCH_SOURCES,
+    limit: int = 20,
+    cursor: Optional[str] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Ranked full-text search over message text and risk event reasons.
+    since / until bound created_at (ISO strings, since inclusive, until exclusive).
+    Raises ValueError for an empty query or a malformed cursor.
+    """
+    parts = [{"messages": MESSAGE_SEARCH_SQL, "risk_events": RISK_EVENT_SEARCH_SQL}[s] for s in sources]
+    score, source, row_id = decode_search_cursor(cursor) if cursor else (float("-inf"), "", 0)
+    sql = f"""
+        SELECT * FROM ({" UNION ALL ".join(parts)})
+        WHERE (score, source, id) > (:score, :source, :id)
+        ORDER BY score, source, id
+        LIMIT :limit
+    """
+    params = {
+        "query": fts_query(query), "user_id": user_id,
+        "since": since or "", "until": until or "\uffff",
+        "score": score, "source": source, "id": row_id, "limit": limit + 1
+    }
+    rows = get_db_connection().execute(sql, params).fetchall()
+    items = [dict(r) for r in rows[:limit]]
+    for item in items:
+        reasons_json = item.pop("reasons_json")
+        item["reasons"] = json.loads(reasons_json or "[]") if item["source"] == "risk_events" else None
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_search_cursor(last["score"], last["source"], last["id"])
+    return items, next_cursor
+
+def search_backfill_pending() -> Dict[str, int]:
+    """Rows per source written before migration 5 and not yet indexed."""
+    rows = get_db_connection().execute("SELECT source, last_id, done_through FROM search_backfill").fetchall()
+    pending = {}
+    for r in rows:
+        table = _SEARCH_TABLES[r["source"]][0]
+        pending[r["source"]] = get_db_connection().execute(
+            f"SELECT COUNT(*) FROM {table} WHERE id > ? AND id <= ?", (r["last_id"], r["done_through"])
+        ).fetchone()[0]
+    return pending
+
+def backfill_search_index(
+    batch_size: int = 1000,
+    on_batch: Optional[Callable[[str, int], None]] = None
+) -> Dict[str, int]:
+    """
+    Index rows that existed before migration 5, batch_size rows per transaction so
+    writers are never blocked for long. Progress is stored after each batch, so an
+    interrupted run resumes where it stopped. on_batch(source, rows) reports progress.
+    Returns rows indexed per source.
+    """
+    indexed = {}
+    for source, (table, fts_table, column) in _SEARCH_TABLES.items():
+        indexed[source] = 0
+
+        def index_batch(conn: sqlite3.Connection) -> int:
+            last_id, done_through = conn.execute(
+                "SELECT last_id, done_through FROM search_backfill WHERE source = ?", (source,)
+            ).fetchone()
+            if last_id >= done_through:
+                return -1
+            upper = conn.execute(
+                f"SELECT id FROM {table} WHERE id > ? AND id <= ? ORDER BY id LIMIT 1 OFFSET ?",
+                (last_id, done_through, batch_size - 1)
+            ).fetchone()
+            upper = upper[0] if upper else done_through
+            count = conn.execute(
+                f"INSERT INTO {fts_table}(rowid, {column}) SELECT id, {column} FROM {table} WHERE id > ? AND id <= ?",
+                (last_id, upper)
+            ).rowcount
+            conn.execute("UPDATE search_backfill SET last_id = ? WHERE source = ?", (upper, source))
+            return count
+
+        while (count := _run_write(index_batch)) >= 0:
+            indexed[source] += count
+            if on_batch:
+                on_batch(source, count)
+    return indexed
+
+# -----------------------------
+# Risk rollups: reads and bulk rebuild
+# -----------------------------
+
+def _max_level(counts: Dict[str, int]) -> Optional[str]:
+    present = [level for level, n in counts.items() if n > 0]
+    # Levels outside RISK_LEVELS (free-form LLM output) rank like "low"
+    rank = lambda level: RISK_LEVELS.index(level) if level in RISK_LEVELS else 1
+    return max(present, key=rank) if present else None
+
+def get_risk_rollup(user_id: str, days: int = 30, today: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    A user's risk rollup: totals, counts per level, last high-risk time, the highest level
+    over the last 7 and 30 days, and per-day counts for the last `days` days (newest last).
+    Three primary-key reads, independent of how many events the user has.
+    None if the user has no risk events. today defaults to the current UTC date.
+    """
+    conn = get_db_connection()
+    row = conn.execute("SELECT * FROM risk_rollups WHERE user_id = ?", (user_id,)).fetchone()
+    if row is None:
+        return None
+    levels = conn.execute(
+        "SELECT risk_level, events FROM risk_rollup_levels WHERE user_id = ?", (user_id,)
+    ).fetchall()
+    end = datetime.fromisoformat(today) if today else datetime.utcnow()
+    span = max(days, 30)
+    since = (end - timedelta(days=span - 1)).date().isoformat()
+    daily_rows = conn.execute(
+        '''SELECT date, risk_level, events, self_harm_events FROM risk_rollup_daily
+           WHERE user_id = ? AND date >= ? ORDER BY date''',
+        (user_id, since)
+    ).fetchall()
+
+    by_day: Dict[str, Dict[str, Any]] = {}
+    for r in daily_rows:
+        day = by_day.setdefault(r["date"], {"date": r["date"], "counts": {}, "self_harm_events": 0})
+        day["counts"][r["risk_level"]] = r["events"]
+        day["self_harm_events"] += r["self_harm_events"]
+
+    def window_max(window: int) -> Optional[str]:
+        start = (end - timedelta(days=window - 1)).date().isoformat()
+        counts: Dict[str, int] = {}
+        for day in by_day.values():
+            if day["date"] >= start:
+                for level, n in day["counts"].items():
+                    counts[level] = counts.get(level, 0) + n
+        return _max_level(counts)
+
+    first_day = (end - timedelta(days=days - 1)).date().isoformat()
+    return {
+        "user_id": user_id,
+        "events": row["events"],
+        "self_harm_events": row["self_harm_events"],
+        "counts": {r["risk_level"]: r["events"] for r in levels},
+        "first_event_at": row["first_event_at"],
+        "last_event_at": row["last_event_at"],
+        "last_high_risk_at": row["last_high_risk_at"],
+        "max_level_7d": window_max(7),
+        "max_level_30d": window_max(30),
+        "daily": [day for day in by_day.values() if day["date"] >= first_day],
+    }
+
+def rebuild_risk_rollups(batch_users: int = 500, on_batch: Optional[Callable[[int], None]] = None) -> int:
+    """
+    Recompute every rollup from risk_events (backfills, imports, repairs). Users are
+    processed in user_id ranges of batch_users, each range replaced in one transaction,
+    so concurrent chat writes only wait for one range. Rollups of users with no events
+    left are removed. Returns the number of users rebuilt.
+    """
+    conn = get_db_connection()
+    rebuilt, lower = 0, ""
+    while True:
+        users = [r[0] for r in conn.execute(
+            "SELECT DISTINCT user_id FROM risk_events WHERE user_id > ? ORDER BY user_id LIMIT ?", (lower, batch_users)
+        ).fetchall()]
+        # The last range is open-ended so stale rollups past the last user are cleared too
+        upper = users[-1] if len(users) == batch_users else None
+        users_sql = "user_id > :lower" + (" AND user_id <= :upper" if upper is not None else "")
+        params = {"lower": lower, "upper": upper}
+
+        def replace_range(conn: sqlite3.Connection):
+            for table in ("risk_rollups", "risk_rollup_levels", "risk_rollup_daily"):
+                conn.execute(f"DELETE FROM {table} WHERE {users_sql}", params)
+            for sql in _ROLLUP_REBUILD_SQL:
+                conn.execute(sql.format(users=users_sql), params)
+
+        _run_write(replace_range)
+        rebuilt += len(users)
+        if on_batch and users:
+            on_batch(len(users))
+        if upper is None:
+            return rebuilt
+        lower = upper
+
+# -----------------------------
+# Historical rescoring (migration 7)
+# -----------------------------
+
+RESCORING_CHUNK_SQL = """
+    SELECT m.id, m.user_id, m.text, r.id, r.keyword_score, r.reasons_json, r.risk_level
+    FROM messages m LEFT JOIN risk_events r ON r.message_id = m.id
+    WHERE m.id > ? AND m.role = 'user'
+    ORDER BY m.id
+    LIMIT ?
+"""
+
+def fetch_messages_for_rescoring(after_id: int, limit: int) -> List[Tuple]:
+    """
+    Next `limit` user messages after message id `after_id`, with their risk event:
+    (message_id, user_id, text, risk_event_id, keyword_score, reasons_json, risk_level).
+    """
+    rows = get_db_connection().execute(RESCORING_CHUNK_SQL, (after_id, limit)).fetchall()
+    return [tuple(r) for r in rows]
+
+def start_rescoring_run(rules_version: str) -> int:
+    started_at = datetime.utcnow().isoformat()
+    return _run_write(lambda conn: conn.execute(
+        "INSERT INTO rescoring_runs (rules_version, started_at) VALUES (?, ?)", (rules_version, started_at)
+    ).lastrowid)
+
+def save_rescores(run_id: int, diffs: List[Dict[str, Any]]):
+    _run_write(lambda conn: conn.executemany(
+        '''INSERT OR REPLACE INTO rescored_messages
+           (run_id, message_id, risk_event_id, user_id, old_keyword_score, new_keyword_score,
+            old_level, new_level, stored_risk_level, old_reasons_json, new_reasons_json)
+           VALUES (:run_id, :message_id, :risk_event_id, :user_id, :old_keyword_score, :new_keyword_score,
+                   :old_level, :new_level, :stored_risk_level, :old_reasons_json, :new_reasons_json)''',
+        [{"run_id": run_id, **d} for d in diffs]
+    ))
+
+def finish_rescoring_run(run_id: int, rows_scanned: int, rows_changed: int, seconds: float):
+    finished_at = datetime.utcnow().isoformat()
+    _run_write(lambda conn: conn.execute(
+        "UPDATE rescoring_runs SET finished_at = ?, rows_scanned = ?, rows_changed = ?, seconds = ? WHERE id = ?",
+        (finished_at, rows_scanned, rows_changed, seconds, run_id)
+    ))
+
+# -----------------------------
+# Escalation outbox (migration 8)
+# -----------------------------
+# High/critical risk events queue a notification in the transaction that writes them;
+# services/escalation.py delivers them. Rows stay 'pending' (with a lease in
+# next_attempt_at while a dispatcher holds them) until 'sent', 'suppressed' or 'failed'.
+
+def _enqueue_escalation(conn: sqlite3.Connection, risk_event_id: int, user_id: str, risk_level: str, self_harm_detected: bool, created_at: str):
+    if risk_level not in HIGH_RISK_LEVELS:
+        return
+    conn.execute(
+        '''INSERT OR IGNORE INTO escalation_outbox
+           (risk_event_id, user_id, risk_level, self_harm_detected, created_at, next_attempt_at)
+           VALUES (?, ?, ?, ?, ?, ?)''',
+        (risk_event_id, user_id, risk_level, int(self_harm_detected), created_at, created_at)
+    )
+
+ESCALATION_DUE_SQL = """
+    SELECT id, risk_event_id, user_id, risk_level, self_harm_detected, created_at, attempts
+    FROM escalation_outbox
+    WHERE status = 'pending' AND next_attempt_at <= ?
+    ORDER BY next_attempt_at, id
+    LIMIT ?
+"""
+
+def claim_due_escalations(limit: int, now: str, lease_until: str, sent_since: str) -> List[Dict[str, Any]]:
+    """
+    Lease up to `limit` due notifications (another dispatcher skips them until lease_until;
+    one that dies mid-delivery is retried after it). Each row carries sent_levels: the
+    levels already delivered for its user since sent_since, for deduplication.
+    """
+    def claim(conn: sqlite3.Connection) -> List[Dict[str, Any]]:
+        rows = [dict(r) for r in conn.execute(ESCALATION_DUE_SQL, (now, limit)).fetchall()]
+        if not rows:
+            return rows
+        conn.executemany("UPDATE escalation_outbox SET next_attempt_at = ? WHERE id = ?", [(lease_until, r["id"]) for r in rows])
+        users = sorted({r["user_id"] for r in rows})
+        sent: Dict[str, List[str]] = {}
+        for user_id, level in conn.execute(
+            f'''SELECT user_id, risk_level FROM escalation_outbox
+                WHERE status = 'sent' AND user_id IN ({",".join("?" * len(users))}) AND sent_at >= ?''',
+            (*users, sent_since)
+        ):
+            sent.setdefault(user_id, []).append(level)
+        for r in rows:
+            r["self_harm_detected"] = bool(r["self_harm_detected"])
+            r["sent_levels"] = sent.get(r["user_id"], [])
+        return rows
+
+    return _run_write(claim)
+
+def record_escalation_results(results: List[Dict[str, Any]]):
+    """Store dispatch outcomes: dicts of id, status, attempts, next_attempt_at, sent_at, last_error."""
+    _run_write(lambda conn: conn.executemany(
+        '''UPDATE escalation_outbox
+           SET status = :status, attempts = :attempts, next_attempt_at = :next_attempt_at,
+               sent_at = :sent_at, last_error = :last_error
+           WHERE id = :id''',
+        results
+    ))
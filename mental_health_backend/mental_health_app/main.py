@@ -1,15 +1,18 @@
-from fastapi import FastAPI, HTTPException
-from datetime import datetime, date
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from datetime import datetime, date, timedelta
 import os
-from typing import List
+from typing import List, Optional
 
 # Import local modules
 from models import (
-    ChatRequest, ChatResponse, 
-    CheckinQuestionsResponse, CheckinSubmitRequest, CheckinSubmitResponse
+    ChatRequest, ChatResponse, RiskBatchRequest, RiskBatchResponse, 
+    CheckinQuestionsResponse, CheckinSubmitRequest, CheckinSubmitResponse, CheckinSummaryResponse,
+    MessagePage, RiskEventPage, RiskRollupResponse, SearchPage, MoodTrendResponse, MoodCohortTrendResponse
 )
 import db
-from services import ai_agent, risk_engine
+from services import ai_agent, chat_turn, checkin_summaries, escalation, llm_scheduler, model_router, mood_trends, rescoring, risk_engine
 
 app = FastAPI(
     title="Mental Health Agentic AI Backend",
@@ -21,8 +24,25 @@ app = FastAPI(
 # Startup Event
 # -----------------------------
 @app.on_event("startup")
-def on_startup():
+async def on_startup():
     db.init_db()
+    # Check-ins stored before mood scores were parsed
+    db.backfill_mood_scores(mood_trends.parse_mood)
+    await ai_agent.startup_async_client()
+    # Check-in summaries left pending by the previous process
+    checkin_summaries.requeue_pending(db.get_pending_checkins(), db.complete_daily_summary)
+    # Trusted-contact notifications queued with high/critical risk events
+    if escalation.ESCALATION_DISPATCHER:
+        escalation.dispatcher.start(db.claim_due_escalations, db.record_escalation_results)
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    # Let background LLM work (crisis enrichment, check-in summaries) finish before the client closes
+    await chat_turn.drain_background_tasks()
+    await checkin_summaries.worker.stop()
+    await escalation.dispatcher.stop()
+    await ai_agent.shutdown_async_client()
+    db.close_db_connections()
 
 # -----------------------------
 # Health Check
@@ -35,62 +55,76 @@ def health_check():
 # Chat Endpoint
 # -----------------------------
 @app.post("/chat/message", response_model=ChatResponse)
-def chat_message(request: ChatRequest):
-    # 1. Save User Message
-    user_msg_id = db.save_message(request.user_id, "user", request.message)
-
-    # 2. Get LLM Analysis
-    llm_result = ai_agent.analyze_message_llm(request.message)
-    
-    # 3. Deterministic Risk Assessment
-    # 3. Deterministic Risk Assessment
+async def chat_message(request: ChatRequest):
+    # 1. Note receive time (the whole turn is persisted in one transaction at the end)
+    received_at = datetime.utcnow().isoformat()
+
+    # 2. Deterministic Risk Assessment (cheap, runs before the LLM)
     kw_score, reasons = risk_engine.calculate_risk_score(request.message)
-    
-    # Check if deterministic engine caught self-harm (score >= 20 from our new logic)
-    deterministic_sh = (kw_score >= 20)
-
-    final_risk_level = risk_engine.determinize_risk_level(
-        llm_result.get("risk_level", "medium"),
-        kw_score,
-        llm_result.get("self_harm_detected", False)
+
+    # Crisis fast path: regex-detected intent gets the crisis reply and SOS actions now;
+    # the LLM enriches the stored risk event in the background
+    if chat_turn.is_crisis(kw_score):
+        return await chat_turn.crisis_fast_path(
+            request.user_id, request.message, kw_score, reasons, received_at,
+            db.save_chat_turn, db.enrich_risk_event
+        )
+
+    # Coalescing mode: messages from a burst share one LLM call (each keeps its own risk score)
+    if chat_turn.coalescing_enabled():
+        return await chat_turn.coalesced_chat_turn(
+            request.user_id, request.message, kw_score, reasons, received_at,
+            db.save_chat_turn, db.get_recent_messages
+        )
+
+    # 3. Get LLM Analysis with the conversation so far (bounded by the prompt token budget),
+    #    merged with the keyword score (safety overrides apply)
+    context = await chat_turn.conversation_context(request.user_id, request.message, db.get_recent_messages)
+    llm_result = await ai_agent.analyze_message_llm_async(
+        request.message, priority=llm_scheduler.priority_for_score(kw_score), context=context,
+        route=model_router.router.route_for(kw_score, request.message)
     )
-    
-    # Unified self-harm flag
-    final_sh_detected = llm_result.get("self_harm_detected", False) or deterministic_sh
-
-    # 4. Determine Actions
-    actions = risk_engine.get_actions(final_risk_level)
-    
-    # Add keyword reasons to internal tracking (optional, merging with LLM if needed)
-    # For now we rely on the risk event log
-
-    # 5. Save Risk Event & Assistant Message
-    # We save the risk event first to capture the moment analysis
-    db.save_risk_event(
+    turn = chat_turn.finalize_turn(llm_result, kw_score)
+
+    # 4. Save User Message, Risk Event & Assistant Message atomically
+    await run_in_threadpool(
+        db.save_chat_turn,
         user_id=request.user_id,
-        message_id=user_msg_id,
-        risk_level=final_risk_level,
-        self_harm_detected=final_sh_detected,
+        user_text=request.message,
+        assistant_text=turn["reply"],
+        risk_level=turn["risk_level"],
+        self_harm_detected=turn["self_harm_detected"],
         keyword_score=kw_score,
-        reasons=reasons  # could also add reasons from LLM if we extracted them
+        reasons=reasons,  # could also add reasons from LLM if we extracted them
+        user_created_at=received_at
     )
-    
-    reply_text = llm_result.get("reply", "I am here for you.")
-    
-    # SAFETY OVERRIDE: If LLM failed (fallback used) AND risk is high, provide safe crisis message
-    if reply_text == ai_agent.FALLBACK_ERROR_MESSAGE and final_risk_level in ["high", "critical"]:
-        reply_text = "I hear that you are in pain. Please reach out for help immediately – you are not alone. I’ve listed some resources below."
+    chat_turn.remember_turn(request.user_id, request.message, turn["reply"])
 
-    db.save_message(request.user_id, "assistant", reply_text)
+    return turn
 
-    return {
-        "reply": reply_text,
-        "risk_level": final_risk_level,
-        "self_harm_detected": final_sh_detected,
-        "advice": llm_result.get("advice", []),
-        "actions": actions,
-        "timestamp": datetime.utcnow().isoformat()
-    }
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    Streaming variant of /chat/message (text/event-stream).
+    Sends the keyword risk assessment first, then reply tokens, then the full ChatResponse as "done".
+    """
+    return StreamingResponse(
+        chat_turn.stream_chat_turn(
+            request.user_id, request.message, db.save_chat_turn, db.enrich_risk_event, db.get_recent_messages
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# -----------------------------
+# Batch Risk Scoring
+# -----------------------------
+@app.post("/risk/score-batch", response_model=RiskBatchResponse)
+def score_risk_batch(request: RiskBatchRequest):
+    """Deterministic risk assessment (keywords, intent patterns, paraphrases) of many messages at once, no LLM"""
+    if len(request.messages) > rescoring.RISK_BATCH_MAX_MESSAGES:
+        raise HTTPException(status_code=413, detail=f"At most {rescoring.RISK_BATCH_MAX_MESSAGES} messages per batch")
+    return {"results": rescoring.score_batch(request.messages), "rules_version": rescoring.rules_version()}
 
 # -----------------------------
 # Daily Check-in Endpoints
@@ -111,25 +145,117 @@ def get_checkin_questions(user_id: str):
     }
 
 @app.post("/checkin/submit", response_model=CheckinSubmitResponse)
-def submit_checkin(request: CheckinSubmitRequest):
-    # 1. Summarize with LLM
-    summary_result = ai_agent.summarize_day_llm(request.answers)
-    
-    # 2. Save Daily Summary
-    db.save_daily_summary(
+async def submit_checkin(request: CheckinSubmitRequest):
+    # 1. Deterministic risk assessment of the answers (no LLM wait)
+    today = date.today().isoformat()
+    kw_score, _ = checkin_summaries.score_answers(request.answers)
+    assessment = checkin_summaries.preliminary_checkin(kw_score)
+    mood = mood_trends.parse_mood(request.answers)
+
+    # 2. Upsert today's check-in as pending (a resubmission replaces the earlier one)
+    revision = await run_in_threadpool(
+        db.save_pending_checkin,
         user_id=request.user_id,
-        date=date.today().isoformat(),
-        summary_text=summary_result.get("daily_summary", "Summary unavailable."),
-        risk_level=summary_result.get("risk_level", "low")
+        date=today,
+        answers=request.answers,
+        risk_level=assessment["risk_level"],
+        self_harm_detected=assessment["self_harm_detected"],
+        keyword_score=kw_score,
+        mood_score=mood
+    )
+    mood_trends.cache.record(request.user_id, today, mood)
+
+    # 3. Summarize with the LLM in the background; the client polls /checkin/summary
+    checkin_summaries.worker.submit(
+        checkin_summaries.CheckinJob(request.user_id, today, revision, request.answers, kw_score),
+        db.complete_daily_summary
     )
-    
-    # 3. Determine Actions based on summary risk
-    actions = risk_engine.get_actions(summary_result.get("risk_level", "low"))
 
+    return {"daily_summary": "", "status": "pending", "date": today, "mood_score": mood, **assessment}
+
+@app.get("/checkin/summary", response_model=CheckinSummaryResponse)
+def get_checkin_summary(user_id: str, day: Optional[str] = Query(None, alias="date")):
+    """Status and result of a check-in summary (date defaults to today)"""
+    summary = db.get_daily_summary(user_id, day or date.today().isoformat())
+    if summary is None:
+        raise HTTPException(status_code=404, detail="No check-in for this date")
     return {
-        "daily_summary": summary_result.get("daily_summary", ""),
-        "risk_level": summary_result.get("risk_level", "low"),
-        "self_harm_detected": summary_result.get("self_harm_detected", False),
-        "advice": summary_result.get("advice", []),
-        "actions": actions
+        **summary,
+        "daily_summary": summary["summary_text"],
+        "actions": risk_engine.get_actions(summary["risk_level"] or "low")
     }
+
+@app.get("/checkin/mood-trend", response_model=MoodTrendResponse)
+def get_mood_trend(
+    user_id: str,
+    days: int = Query(90, ge=1, le=mood_trends.MOOD_TREND_DAYS),
+    window: int = Query(mood_trends.MOOD_TREND_WINDOW, ge=2, le=90)
+):
+    """Daily mood, rolling mean and slope over the last `days` days, with drop / decline alerts"""
+    mood_trends.cache.ensure_loaded(db.get_mood_scores)
+    trend = mood_trends.cache.user_trend(user_id, days, window)
+    if trend is None:
+        raise HTTPException(status_code=404, detail="No mood check-ins for this user")
+    return trend
+
+@app.get("/checkin/mood-trend/cohort", response_model=MoodCohortTrendResponse)
+def get_mood_cohort_trend(
+    user_ids: Optional[List[str]] = Query(None),
+    days: int = Query(90, ge=1, le=mood_trends.MOOD_TREND_DAYS),
+    window: int = Query(mood_trends.MOOD_TREND_WINDOW, ge=2, le=90)
+):
+    """Population mood trend for the given users (all users if omitted) and who needs attention"""
+    mood_trends.cache.ensure_loaded(db.get_mood_scores)
+    return mood_trends.cache.cohort_trend(user_ids, days, window)
+
+# -----------------------------
+# History (keyset pagination)
+# -----------------------------
+@app.get("/history/messages", response_model=MessagePage)
+def get_message_history(user_id: str, limit: int = Query(50, ge=1, le=200), cursor: Optional[str] = None):
+    """Newest-first messages for a user; pass next_cursor back to get the next page"""
+    try:
+        items, next_cursor = db.get_messages_page(user_id, limit=limit, cursor=cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"items": items, "next_cursor": next_cursor}
+
+@app.get("/history/risk-events", response_model=RiskEventPage)
+def get_risk_event_history(user_id: str, limit: int = Query(50, ge=1, le=200), cursor: Optional[str] = None):
+    """Newest-first risk events for a user; pass next_cursor back to get the next page"""
+    try:
+        items, next_cursor = db.get_risk_events_page(user_id, limit=limit, cursor=cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"items": items, "next_cursor": next_cursor}
+
+@app.get("/history/risk-summary", response_model=RiskRollupResponse)
+def get_risk_summary(user_id: str, days: int = Query(30, ge=1, le=90)):
+    """Per-user risk rollup (counts by level, last high-risk time, 7/30-day maximum, daily counts) without scanning history"""
+    rollup = db.get_risk_rollup(user_id, days=days)
+    if rollup is None:
+        raise HTTPException(status_code=404, detail="No risk events for this user")
+    return rollup
+
+@app.get("/history/search", response_model=SearchPage)
+def search_history(
+    q: str = Query(..., min_length=1, max_length=200),
+    user_id: Optional[str] = None,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    source: str = Query("all", pattern="^(all|messages|risk_events)$"),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None
+):
+    """Ranked full-text search over messages and risk event reasons, optionally for one user and a date range (until inclusive)"""
+    sources = db.SEARCH_SOURCES if source == "all" else (source,)
+    try:
+        items, next_cursor = db.search_history(
+            q, user_id=user_id,
+            since=since.isoformat() if since else None,
+            until=(until + timedelta(days=1)).isoformat() if until else None,
+            sources=sources, limit=limit, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": items, "next_cursor": next_cursor}
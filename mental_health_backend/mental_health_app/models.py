@@ -14,6 +14,21 @@ class ChatResponse(BaseModel):
     actions: List[str]
     timestamp: str
 
+# Batch risk scoring
+class RiskBatchRequest(BaseModel):
+    messages: List[str]
+
+class RiskAssessment(BaseModel):
+    keyword_score: int
+    reasons: List[str]
+    risk_level: str  # keyword-only level, as reported before the LLM answers
+    self_harm_detected: bool
+    actions: List[str]
+
+class RiskBatchResponse(BaseModel):
+    results: List[RiskAssessment]  # one per message, in order
+    rules_version: str
+
 # Daily Check-in
 class CheckinQuestionsResponse(BaseModel):
     date: str
@@ -29,3 +44,119 @@ class CheckinSubmitResponse(BaseModel):
     self_harm_detected: bool
     advice: List[str]
     actions: List[str]
+    # Summaries are written in the background: poll /checkin/summary until status is "complete"
+    status: str = "complete"
+    date: Optional[str] = None
+    mood_score: Optional[float] = None  # parsed 1–10 answer, None if missing or unparseable
+
+class CheckinSummaryResponse(BaseModel):
+    user_id: str
+    date: str
+    status: str  # pending | complete | failed (LLM unavailable, keyword assessment only)
+    daily_summary: Optional[str] = None
+    risk_level: Optional[str] = None
+    self_harm_detected: Optional[bool] = None
+    advice: List[str]
+    reply: Optional[str] = None
+    actions: List[str]
+    completed_at: Optional[str] = None
+    mood_score: Optional[float] = None
+
+# Mood trends (series are one value per day, oldest first; null = no data / too few check-ins)
+class MoodAlert(BaseModel):
+    date: str
+    kind: str  # sharp_drop | declining_trend
+    mood: Optional[float] = None
+    baseline: Optional[float] = None
+    drop: Optional[float] = None
+    slope: Optional[float] = None
+
+class MoodLatest(BaseModel):
+    mood: Optional[float] = None
+    rolling_mean: Optional[float] = None
+    slope: Optional[float] = None
+
+class MoodTrendResponse(BaseModel):
+    user_id: str
+    window: int
+    dates: List[str]
+    mood: List[Optional[float]]
+    rolling_mean: List[Optional[float]]
+    slope: List[Optional[float]]  # mood points per day over the window
+    latest: MoodLatest
+    alerts: List[MoodAlert]
+
+class MoodCohortTrendResponse(BaseModel):
+    users: int
+    window: int
+    dates: List[str]
+    participants: List[int]
+    mean: List[Optional[float]]
+    p25: List[Optional[float]]
+    median: List[Optional[float]]
+    p75: List[Optional[float]]
+    rolling_mean: List[Optional[float]]
+    slope: List[Optional[float]]
+    declining_users: List[str]
+    recent_drop_users: List[str]
+
+# History (keyset pagination)
+class MessageItem(BaseModel):
+    id: int
+    user_id: str
+    role: str
+    text: str
+    created_at: str
+
+class MessagePage(BaseModel):
+    items: List[MessageItem]
+    next_cursor: Optional[str] = None
+
+class RiskEventItem(BaseModel):
+    id: int
+    user_id: str
+    message_id: Optional[int] = None
+    risk_level: str
+    self_harm_detected: bool
+    keyword_score: Optional[int] = None
+    reasons: List[str]
+    llm_risk_level: Optional[str] = None
+    enriched_at: Optional[str] = None
+    created_at: str
+
+class RiskEventPage(BaseModel):
+    items: List[RiskEventItem]
+    next_cursor: Optional[str] = None
+
+class RiskRollupDay(BaseModel):
+    date: str
+    counts: Dict[str, int]  # risk level -> events
+    self_harm_events: int
+
+class RiskRollupResponse(BaseModel):
+    user_id: str
+    events: int
+    self_harm_events: int
+    counts: Dict[str, int]  # risk level -> events, all time
+    first_event_at: str
+    last_event_at: str
+    last_high_risk_at: Optional[str] = None
+    max_level_7d: Optional[str] = None  # None = no events in the window
+    max_level_30d: Optional[str] = None
+    daily: List[RiskRollupDay]  # days with events, oldest first
+
+class SearchHit(BaseModel):
+    source: str  # "messages" | "risk_events"
+    id: int
+    user_id: str
+    created_at: str
+    snippet: str  # matched terms in [brackets]
+    score: float  # bm25, lower is better
+    role: Optional[str] = None  # messages
+    message_id: Optional[int] = None  # risk events
+    risk_level: Optional[str] = None
+    reasons: Optional[List[str]] = None
+
+class SearchPage(BaseModel):
+    items: List[SearchHit]
+    next_cursor: Optional[str] = None
@@ -0,0 +1,45 @@
+"""
+Recompute the per-user risk rollups (schema v6) from risk_events in bulk: after
+importing or restoring events, or to repair rollups. Normal writes keep them current.
+
+Safe to run while the app is serving: users are rebuilt in user_id ranges, one short
+transaction per range.
+
+    python mental_health_backend/mental_health_app/rebuild_risk_rollups.py [--db app.db] [--batch-users 500]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Make `db` importable from any working directory (this file sits next to it)
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import db
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", default=db.DB_NAME, help="SQLite file (default MENTAL_HEALTH_DB_PATH or app.db)")
+    parser.add_argument("--batch-users", type=int, default=500)
+    args = parser.parse_args()
+
+    db.DB_NAME = args.db
+    db.init_db()
+    start = time.perf_counter()
+    done = [0]
+
+    def progress(users: int):
+        done[0] += users
+        print(f"  {done[0]} users")
+
+    users = db.rebuild_risk_rollups(batch_users=args.batch_users, on_batch=progress)
+    events = db.get_db_connection().execute("SELECT COUNT(*) FROM risk_events").fetchone()[0]
+    elapsed = time.perf_counter() - start
+    print(f"rebuilt rollups for {users} users ({events} risk events) in {elapsed:.1f} s")
+    db.close_db_connections()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Rescore every stored user message with the current risk rules (keywords, intent
+patterns, crisis paraphrase settings) and record where the result differs from
+the stored assessment in rescored_messages, under a new rescoring_runs row.
+Stored risk events are left untouched.
+
+    python mental_health_backend/mental_health_app/rescore_history.py [--db app.db]
+        [--workers N] [--chunk-size 5000]
+
+Inspect a run, e.g. messages that would now be escalated:
+    SELECT * FROM rescored_messages WHERE run_id = ? AND new_keyword_score > COALESCE(old_keyword_score, 0)
+"""
+
+import argparse
+import logging
+import os
+import sys
+from pathlib import Path
+
+# Make `db` and `services` importable from any working directory (this file sits next to them)
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import db
+from services import rescoring, risk_engine
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", default=db.DB_NAME, help="SQLite file (default MENTAL_HEALTH_DB_PATH or app.db)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="scoring processes (1 = in-process)")
+    parser.add_argument("--chunk-size", type=int, default=rescoring.RESCORE_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    db.DB_NAME = args.db
+    db.init_db()
+    risk_engine.logger.setLevel(logging.ERROR)
+    version = rescoring.rules_version()
+    run_id = db.start_rescoring_run(version)
+    print(f"rescoring run {run_id} (rules {version}), {args.workers} workers, chunks of {args.chunk_size}")
+
+    def progress(p):
+        print(f"  {p['rows']:,} rows, {p['changed']:,} changed, {p['rows_per_sec']:,.0f} rows/s")
+
+    result = rescoring.rescore(
+        db.fetch_messages_for_rescoring,
+        lambda diffs: db.save_rescores(run_id, diffs),
+        chunk_size=args.chunk_size, workers=args.workers, on_progress=progress
+    )
+    db.finish_rescoring_run(run_id, result["rows"], result["changed"], result["seconds"])
+    print(f"run {run_id}: {result['rows']:,} messages in {result['seconds']:.1f} s "
+          f"({result['rows_per_sec']:,.0f} rows/s), {result['changed']:,} differ from the stored assessment")
+    for transition, count in sorted(result["transitions"].items(), key=lambda kv: -kv[1]):
+        print(f"  keyword level {transition}: {count:,}")
+    db.close_db_connections()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,234 @@
 import os
 import json
 import re
-from typing import Dict, Any, List
-from openai import OpenAI
+import asyncio
+import time
+from typing import Dict, Any, List, Optional, AsyncIterator, Tuple
 from datetime import datetime
+from .circuit_breaker import CircuitBreaker
+from .conversation_memory import estimate_tokens
+from .llm_providers import LLMProvider, provider_from_env
+from .llm_scheduler import PriorityScheduler, SchedulerFull
+from .model_router import DEFAULT_ROUTE, Route, router as model_router
 
-# Initialize client
-client = OpenAI(
-    api_key=os.getenv("GROQ_API_KEY"),
-    base_url="https://api.groq.com/openai/v1"
-)
+# Stream / concurrency limits (shared by all in-flight chats)
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "20"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "64"))
+
+# Requests waiting for an LLM slot are served by priority (see llm_scheduler)
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "256"))
+LLM_SCHEDULER_AGING_SECONDS = float(os.getenv("LLM_SCHEDULER_AGING_SECONDS", "1.0"))
+
+# Per-request latency budget (queueing for a slot included). Past it the caller gets
+# its deterministic fallback. Streams must produce their first chunk within it.
+# A route can set its own (model_router.Route.deadline).
+LLM_DEADLINE_SECONDS = float(os.getenv("LLM_DEADLINE_SECONDS", "2.5"))
+
+# Waiting for a slot is local queueing and never counts against a breaker. A provider
+# timeout only does if the provider had at least this share of the deadline to answer in;
+# a call cut short because it queued for most of the budget gets no verdict.
+LLM_JUDGED_BUDGET_SHARE = 0.5
+
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+
+# Shared by chat and check-in summaries on the provider's default model. Routes with a
+# model of their own (the escalation tier) get a breaker per model (breaker_for), so a
+# slow large model cannot open the breaker for every other route.
+llm_breaker = CircuitBreaker("llm", failure_threshold=LLM_BREAKER_FAILURES, reset_timeout=LLM_BREAKER_RESET_SECONDS)
+_model_breakers: Dict[str, CircuitBreaker] = {}
+
+def breaker_for(route: Route) -> CircuitBreaker:
+    if route.model is None:
+        return llm_breaker
+    breaker = _model_breakers.get(route.model)
+    if breaker is None:
+        breaker = _model_breakers.setdefault(
+            route.model, CircuitBreaker(f"llm:{route.model}", LLM_BREAKER_FAILURES, LLM_BREAKER_RESET_SECONDS)
+        )
+    return breaker
+
+def llm_breakers() -> List[CircuitBreaker]:
+    """Every breaker in use (metrics)."""
+    return [llm_breaker, *_model_breakers.values()]
+
+def route_deadline(route: Route) -> float:
+    return route.deadline if route.deadline is not None else LLM_DEADLINE_SECONDS
+
+class LLMUnavailable(Exception):
+    """Raised instead of calling the LLM while the circuit breaker is open."""
+
+# Provider is chosen from settings on first use (see llm_providers.provider_from_env);
+# nothing connects at import time
+_provider: Optional[LLMProvider] = None
+llm_scheduler: Optional[PriorityScheduler] = None
+
+def get_provider() -> LLMProvider:
+    global _provider
+    if _provider is None:
+        _provider = provider_from_env()
+    return _provider
+
+def set_provider(provider: LLMProvider) -> LLMProvider:
+    """Swap the LLM backend (benchmarks, tests). Call shutdown_async_client first if one was started."""
+    global _provider
+    _provider = provider
+    return provider
+
+async def startup_async_client() -> LLMProvider:
+    """
+    Start the configured provider (for HTTP backends: the pooled keep-alive client).
+    Safe to call more than once.
+    """
+    global llm_scheduler
+    provider = get_provider()
+    await provider.startup()
+    if llm_scheduler is None:
+        llm_scheduler = PriorityScheduler(LLM_MAX_CONCURRENCY, LLM_MAX_QUEUE, LLM_SCHEDULER_AGING_SECONDS)
+    return provider
+
+async def shutdown_async_client():
+    """Close pooled connections. Called on app shutdown."""
+    global llm_scheduler
+    if _provider is not None:
+        await _provider.shutdown()
+    llm_scheduler = None
+
+def _prompt_tokens(messages: List[Dict[str, str]]) -> int:
+    return sum(estimate_tokens(m["content"]) for m in messages)
+
+async def _acquire_slot(scheduler: PriorityScheduler, priority: str, timeout: float):
+    """Wait at most timeout seconds for a scheduler slot; LLMUnavailable if the queue is full or too slow."""
+    try:
+        await scheduler.acquire(priority, timeout=timeout)
+    except SchedulerFull as e:
+        # Includes QueuedPastDeadline
+        raise LLMUnavailable(str(e)) from e
+
+def _cut_short(budget: float, deadline: float) -> bool:
+    """True if a provider timeout within budget says nothing about the provider (see LLM_JUDGED_BUDGET_SHARE)."""
+    return budget < deadline * LLM_JUDGED_BUDGET_SHARE
+
+async def _complete_async(messages: List[Dict[str, str]], route: Route = DEFAULT_ROUTE, priority: str = "low") -> str:
+    """
+    Run one chat completion on the shared async client, with the route's model, max_tokens
+    and temperature (model_router). Concurrency is capped by the priority scheduler; the
+    whole call, including the wait for a slot, is bounded by the route's deadline and
+    guarded by the route's breaker, which only judges the provider call itself. Per-route
+    latency excludes the wait for a slot.
+    """
+    breaker = breaker_for(route)
+    if not breaker.allow():
+        raise LLMUnavailable(f"LLM circuit breaker {breaker.name} is open")
+    provider = await startup_async_client()
+    scheduler = llm_scheduler
+    deadline = route_deadline(route)
+    loop = asyncio.get_running_loop()
+    queued_at = loop.time()
+
+    try:
+        await _acquire_slot(scheduler, priority, deadline)
+        budget = deadline - (loop.time() - queued_at)
+        started = time.perf_counter()
+        try:
+            content = await asyncio.wait_for(
+                provider.complete(messages, route.temperature, route.model, route.max_tokens),
+                timeout=budget
+            )
+        except BaseException as e:
+            # Includes timeouts: a slow route shows up as failures
+            model_router.observe(route, time.perf_counter() - started, _prompt_tokens(messages), 0, ok=False)
+            if isinstance(e, asyncio.TimeoutError) and _cut_short(budget, deadline):
+                raise LLMUnavailable(f"LLM call cut short after queueing ({budget:.2f}s left)") from e
+            raise
+        finally:
+            scheduler.release()
+        model_router.observe(route, time.perf_counter() - started, _prompt_tokens(messages), estimate_tokens(content or ""), ok=True)
+    except (asyncio.CancelledError, LLMUnavailable):
+        # Caller went away or local queueing: no verdict on the provider
+        breaker.release()
+        raise
+    except Exception:
+        breaker.record_failure()
+        raise
+    breaker.record_success()
+    return content
+
+def _complete_sync(messages: List[Dict[str, str]], route: Route = DEFAULT_ROUTE) -> str:
+    """Blocking counterpart of _complete_async (same deadline and breaker)."""
+    breaker = breaker_for(route)
+    if not breaker.allow():
+        raise LLMUnavailable(f"LLM circuit breaker {breaker.name} is open")
+    try:
+        content = get_provider().complete_sync(
+            messages, route.temperature, timeout=route_deadline(route), model=route.model, max_tokens=route.max_tokens
+        )
+    except Exception:
+        breaker.record_failure()
+        raise
+    breaker.record_success()
+    return content
+
+async def _stream_async(messages: List[Dict[str, str]], route: Route = DEFAULT_ROUTE, priority: str = "low") -> AsyncIterator[str]:
+    """
+    Streaming variant of _complete_async: yields content deltas as they arrive.
+    The first chunk must arrive within the route's deadline, the whole stream within
+    LLM_TIMEOUT_SECONDS. Provider failures at any point count against the route's breaker;
+    queueing for a slot does not.
+    """
+    breaker = breaker_for(route)
+    if not breaker.allow():
+        raise LLMUnavailable(f"LLM circuit breaker {breaker.name} is open")
+    provider = await startup_async_client()
+    deadline = route_deadline(route)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    first_chunk_by = started + deadline
+    finish_by = started + LLM_TIMEOUT_SECONDS
+    remaining = lambda until: max(until - loop.time(), 0)
+
+    try:
+        scheduler = llm_scheduler
+        await _acquire_slot(scheduler, priority, deadline)
+        budget = remaining(first_chunk_by)
+        call_started = time.perf_counter()
+        parts: List[str] = []
+        completed = False
+        try:
+            chunks = provider.stream(messages, route.temperature, route.model, route.max_tokens)
+            try:
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(
+                            chunks.__anext__(),
+                            timeout=remaining(finish_by if parts else first_chunk_by)
+                        )
+                    except StopAsyncIteration:
+                        break
+                    except asyncio.TimeoutError as e:
+                        if not parts and _cut_short(budget, deadline):
+                            raise LLMUnavailable(f"LLM stream cut short after queueing ({budget:.2f}s left)") from e
+                        raise
+                    if chunk:
+                        parts.append(chunk)
+                        yield chunk
+            finally:
+                await chunks.aclose()
+            completed = True
+        finally:
+            model_router.observe(
+                route, time.perf_counter() - call_started, _prompt_tokens(messages),
+                estimate_tokens("".join(parts)) if parts else 0, ok=completed
+            )
+            scheduler.release()
+    except (asyncio.CancelledError, GeneratorExit, LLMUnavailable):
+        # Consumer went away or local queueing: no verdict on the provider
+        breaker.release()
+        raise
+    except Exception:
+        breaker.record_failure()
+        raise
+    breaker.record_success()
 
 SYSTEM_PROMPT = """You are a mental health support AI.
 
@@ -62,32 +281,170 @@ def build_fallback_response(user_msg: str) -> Dict[str, Any]:
         ]
     }
 
+def build_chat_messages(user_message: str, context: Optional[str] = None) -> List[Dict[str, str]]:
+    """context: conversation so far (conversation_memory), kept separate from the JSON instructions."""
+    messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+    if context:
+        messages.append({"role": "system", "content": f"Conversation so far:\n{context}"})
+    messages.append({"role": "user", "content": f'User message: """{user_message}"""'})
+    return messages
+
 def analyze_message_llm(user_message: str) -> Dict[str, Any]:
-    if not os.getenv("GROQ_API_KEY"):
-        print("WARNING: GROQ_API_KEY not set, returning fallback")
+    if not get_provider().available():
+        print("WARNING: LLM provider not configured (GROQ_API_KEY not set), returning fallback")
         return build_fallback_response(user_message)
 
     try:
-        completion = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": f'User message: """{user_message}"""'}
-            ],
-            temperature=0.4
-        )
-        
-        ai_text = completion.choices[0].message.content
+        ai_text = _complete_sync(build_chat_messages(user_message))
         return extract_json(ai_text)
-        
+    except LLMUnavailable:
+        return build_fallback_response(user_message)
     except Exception as e:
         print("LLM ERROR:", e)
         return build_fallback_response(user_message)
 
-def summarize_day_llm(answers: Dict[str, str]) -> Dict[str, Any]:
+async def analyze_message_llm_async(
+    user_message: str,
+    priority: str = "low",
+    context: Optional[str] = None,
+    route: Route = DEFAULT_ROUTE
+) -> Dict[str, Any]:
     """
-    Summarize daily check-in answers.
+    Async variant of analyze_message_llm. Does not hold a worker thread while waiting on the LLM.
+    priority (llm_scheduler.priority_for_score of the keyword score) orders waiting requests;
+    context is the conversation so far (see build_chat_messages); route
+    (model_router.router.route_for) picks model, max_tokens and temperature.
     """
+    if not get_provider().available():
+        print("WARNING: LLM provider not configured (GROQ_API_KEY not set), returning fallback")
+        return build_fallback_response(user_message)
+
+    try:
+        ai_text = await _complete_async(build_chat_messages(user_message, context), route, priority)
+        return extract_json(ai_text)
+    except LLMUnavailable:
+        return build_fallback_response(user_message)
+    except Exception as e:
+        print("LLM ERROR:", repr(e))
+        return build_fallback_response(user_message)
+
+class ReplyStreamExtractor:
+    """
+    Incrementally decodes the "reply" string of a JSON completion while it streams,
+    so reply text can be forwarded before the rest of the object (advice) arrives.
+
+    feed(chunk) returns the newly decoded reply text (possibly ""); the raw text
+    seen so far is kept in .buffer for the final extract_json.
+    """
+
+    _KEY = re.compile(r'"reply"\s*:\s*"')
+    _PLAIN = re.compile(r'[^"\\]+')
+    _ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+    def __init__(self):
+        self.buffer = ""
+        self.done = False
+        self._parts: List[str] = []
+        self._pos: Optional[int] = None
+        self._search_from = 0
+
+    @property
+    def text(self) -> str:
+        return "".join(self._parts)
+
+    def feed(self, chunk: str) -> str:
+        self.buffer += chunk
+        if self.done:
+            return ""
+        buf = self.buffer
+        if self._pos is None:
+            match = self._KEY.search(buf, self._search_from)
+            if not match:
+                # The key may be split across chunks; rescan a short tail next time
+                self._search_from = max(len(buf) - 16, 0)
+                return ""
+            self._pos = match.end()
+
+        out, i, n = [], self._pos, len(buf)
+        while i < n:
+            ch = buf[i]
+            if ch == '"':
+                self.done = True
+                break
+            if ch != "\\":
+                plain = self._PLAIN.match(buf, i)
+                out.append(plain.group(0))
+                i = plain.end()
+                continue
+            if i + 1 >= n:
+                break
+            esc = buf[i + 1]
+            if esc != "u":
+                out.append(self._ESCAPES.get(esc, esc))
+                i += 2
+                continue
+            if i + 6 > n:
+                break
+            try:
+                code = int(buf[i + 2:i + 6], 16)
+            except ValueError:
+                out.append(buf[i:i + 6])
+                i += 6
+                continue
+            if 0xD800 <= code < 0xDC00:
+                # Surrogate pair: wait for the low half
+                if i + 12 > n:
+                    break
+                try:
+                    low = int(buf[i + 8:i + 12], 16) if buf[i + 6:i + 8] == "\\u" else -1
+                except ValueError:
+                    low = -1
+                if 0xDC00 <= low < 0xE000:
+                    out.append(chr(0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)))
+                    i += 12
+                    continue
+            out.append(chr(code))
+            i += 6
+        self._pos = i
+
+        text = "".join(out)
+        if text:
+            self._parts.append(text)
+        return text
+
+async def stream_message_llm_async(
+    user_message: str,
+    priority: str = "low",
+    context: Optional[str] = None,
+    route: Route = DEFAULT_ROUTE
+) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Streaming variant of analyze_message_llm_async.
+    Yields ("token", text) for each piece of the reply as the LLM produces it,
+    then exactly one ("result", dict) with the parsed JSON (or the fallback response).
+    If the stream breaks after part of the reply was sent, the result keeps that partial reply.
+    """
+    if not get_provider().available():
+        print("WARNING: LLM provider not configured (GROQ_API_KEY not set), returning fallback")
+        yield "result", build_fallback_response(user_message)
+        return
+
+    extractor = ReplyStreamExtractor()
+    try:
+        async for delta in _stream_async(build_chat_messages(user_message, context), route, priority):
+            text = extractor.feed(delta)
+            if text:
+                yield "token", text
+        result = extract_json(extractor.buffer)
+    except Exception as e:
+        if not isinstance(e, LLMUnavailable):
+            print("LLM STREAM ERROR:", repr(e))
+        result = build_fallback_response(user_message)
+        if extractor.text:
+            result["reply"] = extractor.text
+    yield "result", result
+
+def build_summary_messages(answers: Dict[str, str]) -> List[Dict[str, str]]:
     formatted_answers = "\n".join([f"{k}: {v}" for k, v in answers.items()])
     
     prompt = f"""
@@ -103,24 +460,63 @@ def summarize_day_llm(answers: Dict[str, str]) -> Dict[str, Any]:
         "reply": "A short comforting message to show immediately"
     }}
     """
-    
+    return [
+        {"role": "system", "content": "You are a compassionate mental health assistant."},
+        {"role": "user", "content": prompt}
+    ]
+
+def build_summary_fallback() -> Dict[str, Any]:
+    return {
+        "daily_summary": "Unable to generate summary at this moment.",
+        "risk_level": "medium",
+        "self_harm_detected": False,
+        "advice": ["Get some rest", "Stay hydrated"],
+        "reply": "Thank you for checking in. Take care of yourself today."
+    }
+
+def summarize_day_llm(answers: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Summarize daily check-in answers.
+    """
+    if not get_provider().available():
+        print("WARNING: LLM provider not configured (GROQ_API_KEY not set), returning fallback")
+        return build_summary_fallback()
+
     try:
-        completion = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[
-                {"role": "system", "content": "You are a compassionate mental health assistant."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.4
-        )
-        ai_text = completion.choices[0].message.content
+        ai_text = _complete_sync(build_summary_messages(answers))
         return extract_json(ai_text)
+    except LLMUnavailable:
+        return build_summary_fallback()
     except Exception as e:
         print("LLM SUMMARY ERROR:", e)
-        return {
-            "daily_summary": "Unable to generate summary at this moment.",
-            "risk_level": "medium",
-            "self_harm_detected": False,
-            "advice": ["Get some rest", "Stay hydrated"],
-            "reply": "Thank you for checking in. Take care of yourself today."
-        }
+        return build_summary_fallback()
+
+async def summarize_day_llm_async(
+    answers: Dict[str, str],
+    priority: str = "low",
+    route: Route = DEFAULT_ROUTE,
+    fallback: bool = True
+) -> Dict[str, Any]:
+    """
+    Async variant of summarize_day_llm.
+    With fallback=False a missing provider, an unavailable LLM or an unparseable reply raises
+    LLMUnavailable instead of returning build_summary_fallback(), so the caller can tell them apart.
+    """
+    if not get_provider().available():
+        if not fallback:
+            raise LLMUnavailable("LLM provider not configured")
+        print("WARNING: LLM provider not configured (GROQ_API_KEY not set), returning fallback")
+        return build_summary_fallback()
+
+    try:
+        ai_text = await _complete_async(build_summary_messages(answers), route, priority)
+        return extract_json(ai_text)
+    except LLMUnavailable:
+        if not fallback:
+            raise
+        return build_summary_fallback()
+    except Exception as e:
+        print("LLM SUMMARY ERROR:", repr(e))
+        if not fallback:
+            raise LLMUnavailable(f"LLM summary failed: {e!r}") from e
+        return build_summary_fallback()
@@ -0,0 +1,287 @@
+"""
+Chat turn assembly shared by the JSON and the streaming (SSE) chat endpoints.
+
+Persistence is injected (save_turn is db.save_chat_turn, enrich is db.enrich_risk_event,
+load_recent is db.get_recent_messages) so this module works under both the standalone
+app and the gateway import paths.
+"""
+
+import asyncio
+import json
+import os
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set
+
+from starlette.concurrency import run_in_threadpool
+
+from . import ai_agent, conversation_memory, llm_scheduler, model_router, risk_engine
+from .message_coalescer import MessageCoalescer
+
+CRISIS_FALLBACK_REPLY = "I hear that you are in pain. Please reach out for help immediately – you are not alone. I’ve listed some resources below."
+
+# Crisis fast path: when the regex engine already detected self-harm intent, answer
+# without waiting for the LLM and let it enrich the stored turn in the background.
+CRISIS_FAST_PATH = os.getenv("CRISIS_FAST_PATH", "1") == "1"
+CRISIS_ADVICE = [
+    "Reach out to someone you trust right now",
+    "Call a local helpline or emergency number",
+    "Stay somewhere safe, away from anything you could hurt yourself with"
+]
+
+# Coalescing of rapid-fire messages (off unless CHAT_COALESCE_WINDOW_MS > 0): messages a user
+# sends within the window of each other share one LLM call; each is still scored on its own
+CHAT_COALESCE_WINDOW_MS = float(os.getenv("CHAT_COALESCE_WINDOW_MS", "0"))
+CHAT_COALESCE_MAX_WAIT_MS = float(os.getenv("CHAT_COALESCE_MAX_WAIT_MS", "2000"))
+coalescer = MessageCoalescer(CHAT_COALESCE_WINDOW_MS / 1000, CHAT_COALESCE_MAX_WAIT_MS / 1000)
+
+# Strong references to fire-and-forget tasks (the event loop only keeps weak ones)
+_background_tasks: Set[asyncio.Task] = set()
+
+def finalize_turn(llm_result: Dict[str, Any], kw_score: int) -> Dict[str, Any]:
+    """
+    Merge the LLM analysis with the deterministic keyword score into the ChatResponse payload.
+    """
+    final_risk_level = risk_engine.determinize_risk_level(
+        llm_result.get("risk_level", "medium"),
+        kw_score,
+        llm_result.get("self_harm_detected", False)
+    )
+    # Unified self-harm flag (deterministic engine caught intent when score >= 20)
+    final_sh_detected = llm_result.get("self_harm_detected", False) or kw_score >= risk_engine.INTENT_SCORE
+
+    reply_text = llm_result.get("reply", "I am here for you.")
+    # SAFETY OVERRIDE: If LLM failed (fallback used) AND risk is high, provide safe crisis message
+    if reply_text == ai_agent.FALLBACK_ERROR_MESSAGE and final_risk_level in ["high", "critical"]:
+        reply_text = CRISIS_FALLBACK_REPLY
+
+    return {
+        "reply": reply_text,
+        "risk_level": final_risk_level,
+        "self_harm_detected": final_sh_detected,
+        "advice": llm_result.get("advice", []),
+        "actions": risk_engine.get_actions(final_risk_level),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+def preliminary_assessment(kw_score: int) -> Dict[str, Any]:
+    """Keyword-only assessment, available before the LLM has answered."""
+    risk_level = risk_engine.determinize_risk_level("none", kw_score, False)
+    return {
+        "risk_level": risk_level,
+        "self_harm_detected": kw_score >= risk_engine.INTENT_SCORE,
+        "actions": risk_engine.get_actions(risk_level)
+    }
+
+def is_crisis(kw_score: int) -> bool:
+    return CRISIS_FAST_PATH and kw_score >= risk_engine.INTENT_SCORE
+
+def crisis_turn(kw_score: int) -> Dict[str, Any]:
+    """ChatResponse payload for the crisis fast path, built from the keyword score alone."""
+    risk_level = risk_engine.determinize_risk_level("high", kw_score, True)
+    return {
+        "reply": CRISIS_FALLBACK_REPLY,
+        "risk_level": risk_level,
+        "self_harm_detected": True,
+        "advice": list(CRISIS_ADVICE),
+        "actions": risk_engine.get_actions(risk_level),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+async def conversation_context(user_id: str, message: str, load_recent: Callable[..., Any]) -> Optional[str]:
+    """Earlier turns for the LLM prompt, fitted to what the system prompt and this message leave of the budget."""
+    reserved = sum(conversation_memory.estimate_tokens(m["content"]) for m in ai_agent.build_chat_messages(message))
+    return await conversation_memory.memory.context(user_id, load_recent, reserved_tokens=reserved)
+
+def remember_turn(user_id: str, message: str, reply: str):
+    conversation_memory.memory.record_turn(user_id, message, reply)
+
+def spawn_background(coro) -> asyncio.Task:
+    task = asyncio.get_running_loop().create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+async def drain_background_tasks(timeout: float = 10.0):
+    """Wait for pending background work (called on shutdown and by tests)."""
+    await coalescer.drain(timeout)
+    if _background_tasks:
+        await asyncio.wait(set(_background_tasks), timeout=timeout)
+
+async def enrich_crisis_turn(
+    risk_event_id: int,
+    user_id: str,
+    message: str,
+    kw_score: int,
+    enrich: Callable[..., Any]
+):
+    """
+    Background half of the crisis fast path: ask the LLM, then record its assessment on the
+    risk event and append its reply to the conversation (enrich is db.enrich_risk_event).
+    Risk can only go up here: determinize_risk_level keeps the keyword floor.
+    """
+    try:
+        llm_result = await ai_agent.analyze_message_llm_async(
+            message, priority=llm_scheduler.priority_for_score(kw_score), route=model_router.router.route_for(kw_score, message)
+        )
+        if llm_result.get("reply") == ai_agent.FALLBACK_ERROR_MESSAGE:
+            # The LLM was unavailable: the crisis reply already stored stands on its own
+            return
+        llm_risk = llm_result.get("risk_level", "high")
+        await run_in_threadpool(
+            enrich,
+            risk_event_id=risk_event_id,
+            user_id=user_id,
+            risk_level=risk_engine.determinize_risk_level(llm_risk, kw_score, llm_result.get("self_harm_detected", False)),
+            self_harm_detected=True,
+            llm_risk_level=llm_risk,
+            assistant_text=llm_result.get("reply")
+        )
+    except Exception as e:
+        print("CRISIS ENRICHMENT ERROR:", repr(e))
+
+async def crisis_fast_path(
+    user_id: str,
+    message: str,
+    kw_score: int,
+    reasons: List[str],
+    received_at: str,
+    save_turn: Callable[..., Any],
+    enrich: Callable[..., Any]
+) -> Dict[str, Any]:
+    """
+    Persist the turn with the crisis reply and return it straight away; the LLM runs afterwards.
+    """
+    turn = crisis_turn(kw_score)
+    ids = await run_in_threadpool(
+        save_turn,
+        user_id=user_id,
+        user_text=message,
+        assistant_text=turn["reply"],
+        risk_level=turn["risk_level"],
+        self_harm_detected=True,
+        keyword_score=kw_score,
+        reasons=reasons,
+        user_created_at=received_at
+    )
+    remember_turn(user_id, message, turn["reply"])
+    spawn_background(enrich_crisis_turn(ids["risk_event_id"], user_id, message, kw_score, enrich))
+    return turn
+
+def coalescing_enabled() -> bool:
+    return coalescer.enabled
+
+async def coalesced_chat_turn(
+    user_id: str,
+    message: str,
+    kw_score: int,
+    reasons: List[str],
+    received_at: str,
+    save_turn: Callable[..., Any],
+    load_recent: Callable[..., Any]
+) -> Dict[str, Any]:
+    """
+    /chat/message with coalescing on: wait for the rest of the user's burst, share one LLM
+    call across it, then persist this message with its own keyword score and risk level.
+    Every request gets the reply; it is stored (and remembered) once, with the last message.
+    """
+    async def analyze_burst(user_id: str, items: List[Any]):
+        combined = "\n".join(text for text, _ in items)
+        top_score = max(score for _, score in items)
+        context = await conversation_context(user_id, combined, load_recent)
+        llm_result = await ai_agent.analyze_message_llm_async(
+            combined, priority=llm_scheduler.priority_for_score(top_score), context=context,
+            route=model_router.router.route_for(top_score, combined)
+        )
+        return combined, llm_result
+
+    (combined, llm_result), is_last = await coalescer.submit(user_id, (message, kw_score), analyze_burst)
+    turn = finalize_turn(llm_result, kw_score)
+    await run_in_threadpool(
+        save_turn,
+        user_id=user_id,
+        user_text=message,
+        assistant_text=turn["reply"] if is_last else None,
+        risk_level=turn["risk_level"],
+        self_harm_detected=turn["self_harm_detected"],
+        keyword_score=kw_score,
+        reasons=reasons,
+        user_created_at=received_at
+    )
+    if is_last:
+        remember_turn(user_id, combined, turn["reply"])
+    return turn
+
+def sse_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+async def stream_chat_turn(
+    user_id: str,
+    message: str,
+    save_turn: Callable[..., Any],
+    enrich: Callable[..., Any],
+    load_recent: Callable[..., Any]
+) -> AsyncIterator[str]:
+    """
+    Server-Sent Events for one chat turn:
+      event: risk   – deterministic assessment, sent before the LLM is called
+      event: token  – reply text as it streams ({"text": ...}), repeated
+      event: done   – the full ChatResponse payload, sent after the turn is persisted
+    On the crisis fast path the reply is a single token and the LLM runs in the background.
+    Otherwise the user message and its keyword risk event are stored before the LLM is
+    called, like the fast path does, so a client that disconnects mid-stream still leaves
+    its turn (and any escalation) behind; the reply and the LLM's assessment are added
+    with enrich once the stream completes.
+    """
+    received_at = datetime.utcnow().isoformat()
+    kw_score, reasons = risk_engine.calculate_risk_score(message)
+    yield sse_event("risk", preliminary_assessment(kw_score))
+
+    if is_crisis(kw_score):
+        turn = await crisis_fast_path(user_id, message, kw_score, reasons, received_at, save_turn, enrich)
+        yield sse_event("token", {"text": turn["reply"]})
+        yield sse_event("done", turn)
+        return
+
+    # Loaded before this message is stored, so it is not in its own context
+    context = await conversation_context(user_id, message, load_recent)
+    assessment = preliminary_assessment(kw_score)
+    ids = await run_in_threadpool(
+        save_turn,
+        user_id=user_id,
+        user_text=message,
+        assistant_text=None,
+        risk_level=assessment["risk_level"],
+        self_harm_detected=assessment["self_harm_detected"],
+        keyword_score=kw_score,
+        reasons=reasons,
+        user_created_at=received_at
+    )
+
+    streamed: List[str] = []
+    llm_result: Dict[str, Any] = {}
+    async for kind, payload in ai_agent.stream_message_llm_async(
+        message, priority=llm_scheduler.priority_for_score(kw_score), context=context,
+        route=model_router.router.route_for(kw_score, message)
+    ):
+        if kind == "token":
+            streamed.append(payload)
+            yield sse_event("token", {"text": payload})
+        else:
+            llm_result = payload
+
+    turn = finalize_turn(llm_result, kw_score)
+    if not streamed:
+        # Nothing came from the LLM (fallback or unparseable stream): send the final reply in one piece
+        yield sse_event("token", {"text": turn["reply"]})
+
+    await run_in_threadpool(
+        enrich,
+        risk_event_id=ids["risk_event_id"],
+        user_id=user_id,
+        risk_level=turn["risk_level"],
+        self_harm_detected=turn["self_harm_detected"],
+        llm_risk_level=llm_result.get("risk_level", turn["risk_level"]),
+        assistant_text=turn["reply"]
+    )
+    remember_turn(user_id, message, turn["reply"])
+    yield sse_event("done", turn)
@@ -0,0 +1,154 @@
+"""
+Deferred daily check-in summarization.
+
+/checkin/submit stores the answers with a keyword-only risk assessment (status 'pending')
+and returns straight away; the LLM summary is produced here, by CHECKIN_SUMMARY_WORKERS
+worker tasks draining an in-process queue, and written back with complete (injected:
+db.complete_daily_summary). Clients poll /checkin/summary until the status is
+'complete' (or 'failed': the LLM was unavailable and the keyword assessment stands).
+
+Pending rows survive restarts: the app re-queues db.get_pending_checkins() on startup.
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from . import ai_agent, chat_turn, llm_scheduler, model_router, risk_engine
+
+CHECKIN_SUMMARY_WORKERS = int(os.getenv("CHECKIN_SUMMARY_WORKERS", "16"))
+
+class CheckinJob(NamedTuple):
+    user_id: str
+    date: str
+    revision: int
+    answers: Dict[str, str]
+    keyword_score: int
+
+def score_answers(answers: Dict[str, str]):
+    return risk_engine.calculate_risk_score(" ".join(answers.values()))
+
+def preliminary_checkin(kw_score: int) -> Dict[str, Any]:
+    """Keyword-only assessment of the answers, returned by /checkin/submit before the summary exists."""
+    risk_level = risk_engine.determinize_risk_level("low", kw_score, False)
+    self_harm = kw_score >= risk_engine.INTENT_SCORE
+    return {
+        "risk_level": risk_level,
+        "self_harm_detected": self_harm,
+        "advice": list(chat_turn.CRISIS_ADVICE) if self_harm else [],
+        "actions": risk_engine.get_actions(risk_level)
+    }
+
+class CheckinSummaryWorker:
+    def __init__(self, workers: int = CHECKIN_SUMMARY_WORKERS):
+        self.workers = workers
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.stale = 0
+        self.seconds_sum = 0.0
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        # First use, or a new event loop (tests run one per asyncio.run)
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._tasks = [loop.create_task(self._run()) for _ in range(self.workers)]
+
+    def submit(self, job: CheckinJob, complete: Callable[..., Any]):
+        """Queue a summary; returns immediately. Must be called from the event loop."""
+        self._ensure_started()
+        self._queue.put_nowait((job, complete, time.perf_counter()))
+        self.submitted += 1
+
+    async def _run(self):
+        while True:
+            job, complete, queued_at = await self._queue.get()
+            try:
+                await self._summarize(job, complete)
+            except Exception as e:
+                print("CHECKIN SUMMARY ERROR:", repr(e))
+            finally:
+                self.seconds_sum += time.perf_counter() - queued_at
+                self._queue.task_done()
+
+    async def _summarize(self, job: CheckinJob, complete: Callable[..., Any]):
+        try:
+            result = await ai_agent.summarize_day_llm_async(
+                job.answers,
+                priority=llm_scheduler.priority_for_score(job.keyword_score),
+                route=model_router.router.route_for(job.keyword_score, " ".join(job.answers.values())),
+                fallback=False
+            )
+            llm_failed = False
+        except ai_agent.LLMUnavailable:
+            result = ai_agent.build_summary_fallback()
+            llm_failed = True
+        self_harm = bool(result.get("self_harm_detected", False)) or job.keyword_score >= risk_engine.INTENT_SCORE
+        stored = await run_in_threadpool(
+            complete,
+            user_id=job.user_id,
+            date=job.date,
+            revision=job.revision,
+            status="failed" if llm_failed else "complete",
+            summary_text=result.get("daily_summary", "Summary unavailable."),
+            # The keyword floor applies to the LLM's verdict, as in chat
+            risk_level=risk_engine.determinize_risk_level(
+                "low" if llm_failed else result.get("risk_level", "low"), job.keyword_score, self_harm
+            ),
+            self_harm_detected=self_harm,
+            advice=result.get("advice", []),
+            reply=result.get("reply")
+        )
+        if not stored:
+            self.stale += 1  # resubmitted while we were summarizing; the newer job wins
+        elif llm_failed:
+            self.failed += 1
+        else:
+            self.completed += 1
+
+    async def drain(self, timeout: float = 10.0):
+        """Wait until every queued summary has been written (shutdown, tests)."""
+        if self._queue is not None and self._loop is asyncio.get_running_loop():
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout=timeout)
+            except asyncio.TimeoutError:
+                print(f"CHECKIN SUMMARY: {self._queue.qsize()} summaries still pending at shutdown (re-queued on next start)")
+
+    async def stop(self, timeout: float = 10.0):
+        await self.drain(timeout)
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        self._loop = None
+        self._queue = None
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "queued": self.queued,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "stale": self.stale,
+            "seconds_sum": self.seconds_sum
+        }
+
+worker = CheckinSummaryWorker()
+
+def requeue_pending(pending: List[Dict[str, Any]], complete: Callable[..., Any]) -> int:
+    """Queue summaries left pending by a previous process (rows from db.get_pending_checkins)."""
+    for row in pending:
+        worker.submit(CheckinJob(**row), complete)
+    return len(pending)
@@ -0,0 +1,203 @@
+"""
+Per-user conversation memory for LLM context.
+
+Each cached user has:
+- a ring buffer of the last CONVERSATION_MEMORY_TURNS turns (user + assistant messages),
+- a rolling summary: when a message falls out of the ring buffer, a short extract of it
+  (first sentence of what the user said) is folded in, oldest extracts dropping off
+  once CONVERSATION_SUMMARY_TOKENS is reached.
+
+The prompt context (summary, then as many recent messages as fit, newest first) is
+built under LLM_PROMPT_TOKEN_BUDGET, so per-turn prompt size and cost stay flat however
+long the conversation gets.
+
+On a cache miss the recent messages are read back from the messages table through an
+injected loader (db.get_recent_messages), so a restart or eviction only costs one
+indexed query. CONVERSATION_MEMORY_TURNS=0 turns memory off (prompts carry only the
+current message, as before). The cache is per process and holds at most
+CONVERSATION_MEMORY_USERS users (least recently used are dropped).
+Not thread-safe: use it from the event loop.
+"""
+
+import bisect
+import os
+import re
+from collections import OrderedDict, deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+CONVERSATION_MEMORY_TURNS = int(os.getenv("CONVERSATION_MEMORY_TURNS", "6"))
+CONVERSATION_MEMORY_USERS = int(os.getenv("CONVERSATION_MEMORY_USERS", "10000"))
+CONVERSATION_SUMMARY_TOKENS = int(os.getenv("CONVERSATION_SUMMARY_TOKENS", "200"))
+LLM_PROMPT_TOKEN_BUDGET = int(os.getenv("LLM_PROMPT_TOKEN_BUDGET", "1200"))
+
+# Older messages read on a miss to seed the rolling summary
+SUMMARY_SEED_MESSAGES = 20
+SUMMARY_SNIPPET_CHARS = 160
+
+# Prompt-size histogram buckets (estimated tokens)
+PROMPT_TOKEN_BUCKETS = (250, 500, 750, 1000, 1500, 2000, 4000, 8000)
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+# (role, text) pairs, oldest first
+Loader = Callable[[str, int], List[Tuple[str, str]]]
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token); avoids a tokenizer dependency."""
+    return len(text) // 4 + 1
+
+def summary_snippet(text: str) -> str:
+    first = _SENTENCE_END.split(text.strip(), 1)[0]
+    if len(first) > SUMMARY_SNIPPET_CHARS:
+        first = first[:SUMMARY_SNIPPET_CHARS - 1].rstrip() + "…"
+    return first
+
+class _UserMemory:
+    __slots__ = ("recent", "snippets", "summary_tokens")
+
+    def __init__(self, max_messages: int):
+        # (role, text, tokens)
+        self.recent: Deque[Tuple[str, str, int]] = deque(maxlen=max_messages)
+        self.snippets: Deque[Tuple[str, int]] = deque()
+        self.summary_tokens = 0
+
+class ConversationMemory:
+    def __init__(
+        self,
+        max_turns: int = CONVERSATION_MEMORY_TURNS,
+        max_users: int = CONVERSATION_MEMORY_USERS,
+        summary_tokens: int = CONVERSATION_SUMMARY_TOKENS,
+        prompt_token_budget: int = LLM_PROMPT_TOKEN_BUDGET
+    ):
+        self.max_messages = max_turns * 2
+        self.max_users = max_users
+        self.summary_token_limit = summary_tokens
+        self.prompt_token_budget = prompt_token_budget
+        self._users: "OrderedDict[str, _UserMemory]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.summary_folds = 0
+        self.prompts = 0
+        self.prompt_tokens_sum = 0
+        self.prompt_tokens_max = 0
+        self.prompt_buckets = [0] * (len(PROMPT_TOKEN_BUCKETS) + 1)
+        self.dropped_messages = 0
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+    def clear(self):
+        self._users.clear()
+
+    def _append(self, memory: _UserMemory, role: str, text: str):
+        if len(memory.recent) == memory.recent.maxlen:
+            self._fold(memory, *memory.recent[0][:2])
+        memory.recent.append((role, text, estimate_tokens(text)))
+
+    def _fold(self, memory: _UserMemory, role: str, text: str):
+        """Fold a message leaving the ring buffer into the rolling summary (user messages only)."""
+        if role != "user" or not text.strip():
+            return
+        snippet = summary_snippet(text)
+        tokens = estimate_tokens(snippet)
+        memory.snippets.append((snippet, tokens))
+        memory.summary_tokens += tokens
+        while memory.summary_tokens > self.summary_token_limit and len(memory.snippets) > 1:
+            _, dropped = memory.snippets.popleft()
+            memory.summary_tokens -= dropped
+        self.summary_folds += 1
+
+    def _store(self, user_id: str, messages: List[Tuple[str, str]]) -> _UserMemory:
+        memory = _UserMemory(self.max_messages)
+        for role, text in messages:
+            self._append(memory, role, text)
+        self._users[user_id] = memory
+        while len(self._users) > self.max_users:
+            self._users.popitem(last=False)
+            self.evictions += 1
+        return memory
+
+    async def _get(self, user_id: str, load: Loader) -> _UserMemory:
+        memory = self._users.get(user_id)
+        if memory is not None:
+            self.hits += 1
+            self._users.move_to_end(user_id)
+            return memory
+        self.misses += 1
+        messages = await run_in_threadpool(load, user_id, self.max_messages + SUMMARY_SEED_MESSAGES)
+        # A concurrent request may have loaded this user while we were reading
+        return self._users.get(user_id) or self._store(user_id, messages)
+
+    def record_turn(self, user_id: str, user_text: str, assistant_text: str):
+        """
+        Append a persisted turn. Users not in the cache are skipped: the turn is already
+        in the messages table and will be read back on their next miss.
+        """
+        memory = self._users.get(user_id)
+        if memory is None:
+            return
+        self._append(memory, "user", user_text)
+        self._append(memory, "assistant", assistant_text)
+
+    async def context(self, user_id: str, load: Loader, reserved_tokens: int = 0) -> Optional[str]:
+        """
+        Conversation-so-far text for the prompt, or None for a new conversation.
+        reserved_tokens is what the rest of the prompt (system prompt, current message) takes;
+        the summary and recent messages share what is left of prompt_token_budget.
+        """
+        if self.max_messages == 0:
+            self._observe_prompt(reserved_tokens)
+            return None
+        memory = await self._get(user_id, load)
+        remaining = self.prompt_token_budget - reserved_tokens
+        used = 0
+        summary = None
+        if memory.snippets and memory.summary_tokens <= remaining:
+            summary = "Earlier the user said: " + "; ".join(s for s, _ in memory.snippets)
+            used = memory.summary_tokens
+
+        lines: List[str] = []
+        for role, text, tokens in reversed(memory.recent):
+            if used + tokens > remaining:
+                break
+            lines.append(("User: " if role == "user" else "You: ") + text)
+            used += tokens
+        self.dropped_messages += len(memory.recent) - len(lines)
+        self._observe_prompt(reserved_tokens + used)
+
+        if summary is None and not lines:
+            return None
+        lines.reverse()
+        if summary is not None:
+            lines.insert(0, summary)
+        return "\n".join(lines)
+
+    def _observe_prompt(self, tokens: int):
+        self.prompts += 1
+        self.prompt_tokens_sum += tokens
+        self.prompt_tokens_max = max(self.prompt_tokens_max, tokens)
+        self.prompt_buckets[bisect.bisect_left(PROMPT_TOKEN_BUCKETS, tokens)] += 1
+
+    def stats(self) -> Dict[str, float]:
+        """Cache and prompt-size metrics; prompt_buckets are cumulative, matching PROMPT_TOKEN_BUCKETS + (+Inf)."""
+        cumulative, running = [], 0
+        for count in self.prompt_buckets:
+            running += count
+            cumulative.append(running)
+        return {
+            "users": len(self._users),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "summary_folds": self.summary_folds,
+            "dropped_messages": self.dropped_messages,
+            "prompts": self.prompts,
+            "prompt_tokens_sum": self.prompt_tokens_sum,
+            "prompt_tokens_max": self.prompt_tokens_max,
+            "prompt_buckets": cumulative
+        }
+
+memory = ConversationMemory()
@@ -0,0 +1,280 @@
+"""
+Offline paraphrase detector for crisis language.
+
+risk_engine's keywords and regexes only catch literal phrasings; this layer catches
+paraphrases ("I don't see a reason to wake up") without an LLM round-trip or a model
+download. Text is turned into a hashed bag of features:
+
+  - word unigrams and bigrams ("no reason", "wake up")
+  - character 3- and 4-grams of each content word, padded (" hope", "less ")
+
+hashed (crc32, signed) into HASH_DIM buckets. CRISIS_EXEMPLARS and CONTRAST_EXEMPLARS
+are vectorized once into an L2-normalized (HASH_DIM x columns) matrix, with features
+that also occur in contrast phrases down-weighted, so scoring a message is one gather
+of the rows for its non-zero features and one small matrix product. Long messages are
+split into sentences; all sentences are scored in the same pass and the best one counts.
+
+risk_engine.calculate_risk_score adds a reason and HIGH_RISK_KW_SCORE when the best
+cosine similarity reaches CRISIS_PARAPHRASE_THRESHOLD (only when no intent regex matched),
+however close the match. A lexical match is a signal, not a verdict: it floors the risk
+level at medium and routes the message to the escalation model, and only the LLM can
+raise it to high ("I wish I could disappear for a vacation" is one word away from an
+exemplar).
+
+Evaluation (recall, false positives, throughput):
+    python mental_health_backend/benchmarks/eval_crisis_paraphrase.py
+"""
+
+import os
+import re
+import zlib
+from functools import lru_cache
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+CRISIS_PARAPHRASE = os.getenv("CRISIS_PARAPHRASE", "1") == "1"
+CRISIS_PARAPHRASE_THRESHOLD = float(os.getenv("CRISIS_PARAPHRASE_THRESHOLD", "0.3"))
+
+HASH_DIM = 1 << 14
+CHAR_NGRAMS = (3, 4)
+# Sentences scored per message; the rest of a very long entry is not scanned by this layer
+MAX_SEGMENTS = 64
+
+# Known crisis phrasings that the keyword lists and intent regexes miss or only half catch
+CRISIS_EXEMPLARS = [
+    "I don't see a reason to wake up",
+    "I don't see the point in living",
+    "there is no point in living anymore",
+    "I don't want to be here anymore",
+    "I don't want to exist",
+    "I wish I could disappear forever",
+    "I wish I was never born",
+    "I wish I could go to sleep and never wake up",
+    "I hope I don't wake up tomorrow",
+    "everyone would be better off without me",
+    "my family would be better off without me",
+    "nobody would care if I was gone",
+    "no one would miss me if I died",
+    "the world would be better without me",
+    "I can't go on like this anymore",
+    "I can't do this anymore",
+    "I'm done with life",
+    "I'm tired of living",
+    "I'm tired of being alive",
+    "life isn't worth living",
+    "my life is not worth living",
+    "what's the point of living",
+    "there's nothing left to live for",
+    "I have nothing to live for",
+    "I've been thinking about ending things",
+    "I want to end things",
+    "I just want it all to stop forever",
+    "I want the pain to stop for good",
+    "I've made a plan to end it",
+    "I've been saying goodbye to people",
+    "I've written a goodbye note",
+    "I've been giving away my things",
+    "I've been looking up ways to die",
+    "I've been stockpiling my pills",
+    "I want to take all my pills",
+    "I want to sleep forever",
+    "I don't want to live anymore",
+    "I can't see a future for myself",
+    "I won't be around much longer",
+    "soon it won't matter anymore",
+    "this is the last time you'll hear from me",
+    "I'm going to do something to myself",
+    "I don't want to wake up again",
+    "I feel like dying",
+    "I'd rather be dead",
+    "it would be easier if I wasn't alive",
+    "I keep thinking about not being alive",
+    "I can't take it anymore, I want out",
+    "mar jaana chahta hoon",
+    "jeene ka mann nahi karta",
+    "ab jeena nahi hai",
+    "main khatam karna chahta hoon sab",
+]
+
+# Everyday phrasings that share surface forms with the exemplars above ("tired of",
+# "better off", "the point of"). They sit in the same matrix: a message only counts as
+# a crisis paraphrase when its nearest neighbour is a crisis exemplar.
+CONTRAST_EXEMPLARS = [
+    "I'm tired of this weather",
+    "I'm so tired after work today",
+    "I'm done with my assignment",
+    "I'm done for the day",
+    "what's the point of this class",
+    "I don't see the point of this app",
+    "I can't wait to go to bed",
+    "I want to sleep early tonight",
+    "I need to wake up early tomorrow",
+    "I hope I wake up in time for my exam",
+    "we'd be better off taking the train",
+    "my team would be better off with more people",
+    "nobody replied to my message",
+    "no one came to the meeting",
+    "the world is so beautiful",
+    "I can't do this homework",
+    "I can't go to the party tonight",
+    "I'm going to do something nice for my mom",
+    "this is the last time I'm ordering from there",
+    "I want to end this argument with my friend",
+    "I want this week to end",
+    "I just want this day to be over",
+    "I gave away my old books",
+    "I'm looking up ways to study better",
+    "I took my vitamins",
+    "I feel like dancing",
+    "I'd rather be at home",
+    "I want to disappear into a good book",
+    "I wish I could disappear for a vacation",
+    "I live with my parents",
+    "living in the city is expensive",
+    "I'm tired of living in this city",
+    "I want to sleep forever this weekend",
+    "I'm done with life admin today",
+    "I want to take all my pills with water as prescribed",
+    "I'm thinking about ending my subscription",
+    "this song is killing me, it's so good",
+    "I'm dying to see that movie",
+    "I can't see the screen properly",
+    "I won't be around this weekend",
+    "say goodbye to the old phone",
+    "I had a good day",
+    "I'm feeling okay today",
+    "thanks for listening",
+]
+
+STOP_WORDS = frozenset("""
+a an the i im ive id me my myself to of and or but in on at for with from is am are was were be been
+being it its this that so just about like do does did have has had will would can could should
+you your we our they them he she his her as by up if then there than too very really
+""".split())
+
+_WORD = re.compile(r"[a-z0-9]+")
+_SENTENCE = re.compile(r"[.!?\n;]+")
+
+class ParaphraseMatch(NamedTuple):
+    similarity: float
+    exemplar: str
+
+def _feature(text: str) -> Tuple[int, float]:
+    h = zlib.crc32(text.encode("utf-8"))
+    # Top bit picks the sign, so colliding features tend to cancel instead of adding up
+    return h % HASH_DIM, -1.0 if h & 0x80000000 else 1.0
+
+@lru_cache(maxsize=65536)
+def _word_features(word: str) -> Tuple[Tuple[int, ...], Tuple[float, ...]]:
+    """(buckets, values) of a word's unigram and character n-grams; cached, words repeat a lot."""
+    features = [_feature("w:" + word)]
+    if word not in STOP_WORDS:
+        padded = f" {word} "
+        grams = [padded[i:i + n] for n in CHAR_NGRAMS for i in range(len(padded) - n + 1)]
+        # A word's character n-grams together weigh as much as its unigram, so long words don't dominate
+        weight = 1.0 / len(grams) ** 0.5
+        for gram in grams:
+            i, v = _feature("c:" + gram)
+            features.append((i, v * weight))
+    index, values = zip(*features)
+    return index, values
+
+@lru_cache(maxsize=65536)
+def _bigram_feature(a: str, b: str) -> Tuple[int, float]:
+    return _feature(f"b:{a} {b}")
+
+def tokenize(text: str) -> List[str]:
+    return _WORD.findall(text.lower().replace("'", "").replace("’", ""))
+
+def features(words: List[str]) -> Tuple[List[int], List[float]]:
+    """Hashed (bucket, signed count) features of one sentence."""
+    index, values = [], []
+    for word in words:
+        i, v = _word_features(word)
+        index.extend(i)
+        values.extend(v)
+    for pair in zip(words, words[1:]):
+        i, v = _bigram_feature(*pair)
+        index.append(i)
+        values.append(v)
+    return index, values
+
+class ParaphraseDetector:
+    def __init__(
+        self,
+        exemplars: List[str],
+        contrast: List[str] = (),
+        threshold: float = CRISIS_PARAPHRASE_THRESHOLD
+    ):
+        self.exemplars = list(exemplars)
+        self.contrast = list(contrast)
+        self.threshold = threshold
+        # (HASH_DIM, exemplars + contrast): a message's non-zero features gather rows of this matrix
+        columns = self.exemplars + self.contrast
+        matrix = np.zeros((HASH_DIM, len(columns)), dtype=np.float32)
+        for column, text in enumerate(columns):
+            index, values = features(tokenize(text))
+            np.add.at(matrix[:, column], index, values)
+        # Features that also occur in contrast phrases say little about crisis: down-weight them
+        contrast_df = np.count_nonzero(matrix[:, len(self.exemplars):], axis=1)
+        self.weights = (1.0 / (1.0 + contrast_df)).astype(np.float32)
+        matrix *= self.weights[:, None]
+        norms = np.linalg.norm(matrix, axis=0)
+        matrix /= np.where(norms == 0, 1.0, norms)
+        self.matrix = matrix
+
+    def similarities(self, text: str) -> np.ndarray:
+        """Cosine similarity of every sentence of text with every exemplar then contrast column, shape (sentences, columns)."""
+        index: List[int] = []
+        values: List[float] = []
+        starts: List[int] = []
+        for sentence in _SENTENCE.split(text)[:MAX_SEGMENTS]:
+            words = tokenize(sentence)
+            if not words:
+                continue
+            starts.append(len(index))
+            i, v = features(words)
+            index.extend(i)
+            values.extend(v)
+        if not starts:
+            return np.zeros((0, self.matrix.shape[1]), dtype=np.float32)
+
+        # (sentences x distinct buckets) counts, then one product with those rows of the matrix
+        buckets, column = np.unique(np.asarray(index, dtype=np.intp), return_inverse=True)
+        segment = np.repeat(np.arange(len(starts)), np.diff(starts + [len(index)]))
+        counts = np.bincount(
+            segment * len(buckets) + column, weights=values, minlength=len(starts) * len(buckets)
+        ).reshape(len(starts), len(buckets)).astype(np.float32)
+        counts *= self.weights[buckets]
+        norms = np.linalg.norm(counts, axis=1)
+        return (counts @ self.matrix[buckets]) / np.where(norms == 0, 1.0, norms)[:, None]
+
+    def best_match(self, text: str) -> Optional[ParaphraseMatch]:
+        """
+        The closest crisis exemplar over all sentences whose nearest neighbour is not a
+        contrast phrase, regardless of the threshold; None when there is none.
+        """
+        sims = self.similarities(text)
+        if sims.size == 0:
+            return None
+        crisis = sims[:, :len(self.exemplars)]
+        best = crisis.max(axis=1)
+        if self.contrast:
+            best = np.where(best > sims[:, len(self.exemplars):].max(axis=1), best, -1.0)
+        segment = int(best.argmax())
+        if best[segment] < 0:
+            return None
+        return ParaphraseMatch(float(best[segment]), self.exemplars[int(crisis[segment].argmax())])
+
+    def match(self, text: str) -> Optional[ParaphraseMatch]:
+        """The closest exemplar when it reaches the threshold, else None."""
+        best = self.best_match(text)
+        return best if best is not None and best.similarity >= self.threshold else None
+
+detector = ParaphraseDetector(CRISIS_EXEMPLARS, CONTRAST_EXEMPLARS)
+
+def rebuild_detector(threshold: Optional[float] = None):
+    """Re-vectorize after CRISIS_EXEMPLARS / CONTRAST_EXEMPLARS change at runtime; keeps the threshold unless given."""
+    global detector
+    detector = ParaphraseDetector(CRISIS_EXEMPLARS, CONTRAST_EXEMPLARS, detector.threshold if threshold is None else threshold)
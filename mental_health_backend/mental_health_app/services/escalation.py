@@ -0,0 +1,234 @@
+"""
+Trusted-contact escalation: delivery of the escalation outbox.
+
+Every high/critical risk event queues a notification in escalation_outbox, in the same
+transaction as the event itself (db._enqueue_escalation), so a crisis is never stored
+without its notification and the chat path does no delivery work at all. The
+EscalationDispatcher task polls the outbox (claim, injected: db.claim_due_escalations),
+sends due notifications to a sink in batches and stores the outcome (record:
+db.record_escalation_results):
+
+  - dedup: one notification per user per ESCALATION_DEDUP_SECONDS; within the window
+    only a higher level (high -> critical) is sent again, the rest are 'suppressed'
+  - retries: a failed batch is retried with exponential backoff
+    (ESCALATION_BACKOFF_SECONDS doubling up to ESCALATION_BACKOFF_MAX_SECONDS), and
+    marked 'failed' after ESCALATION_MAX_ATTEMPTS
+  - delivery is at least once: receivers should dedupe on outbox_id
+
+The sink is pluggable: WebhookSink POSTs {"notifications": [...]} to ESCALATION_WEBHOOK_URL;
+without one, LogSink prints them.
+"""
+
+import asyncio
+import os
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Protocol
+
+import httpx
+from starlette.concurrency import run_in_threadpool
+
+from . import risk_engine
+
+# Set to 0 in processes that should only write the outbox (another process delivers it)
+ESCALATION_DISPATCHER = os.getenv("ESCALATION_DISPATCHER", "1") == "1"
+ESCALATION_WEBHOOK_URL = os.getenv("ESCALATION_WEBHOOK_URL", "")
+ESCALATION_WEBHOOK_TIMEOUT_SECONDS = float(os.getenv("ESCALATION_WEBHOOK_TIMEOUT_SECONDS", "5"))
+ESCALATION_BATCH_SIZE = int(os.getenv("ESCALATION_BATCH_SIZE", "50"))
+ESCALATION_POLL_SECONDS = float(os.getenv("ESCALATION_POLL_SECONDS", "1"))
+ESCALATION_DEDUP_SECONDS = float(os.getenv("ESCALATION_DEDUP_SECONDS", "3600"))
+ESCALATION_MAX_ATTEMPTS = int(os.getenv("ESCALATION_MAX_ATTEMPTS", "8"))
+ESCALATION_BACKOFF_SECONDS = float(os.getenv("ESCALATION_BACKOFF_SECONDS", "2"))
+ESCALATION_BACKOFF_MAX_SECONDS = float(os.getenv("ESCALATION_BACKOFF_MAX_SECONDS", "300"))
+# A claimed batch is invisible to other dispatchers this long (longer than a send can take)
+ESCALATION_LEASE_SECONDS = 60.0
+
+_LEVEL_RANK = {"high": 1, "critical": 2}
+
+class EscalationSink(Protocol):
+    async def send(self, notifications: List[Dict[str, Any]]) -> None:
+        """Deliver a batch; raise to have the whole batch retried."""
+
+    async def close(self) -> None:
+        ...
+
+class LogSink:
+    async def send(self, notifications: List[Dict[str, Any]]) -> None:
+        for n in notifications:
+            print(f"ESCALATION: user {n['user_id']} risk {n['risk_level']} (risk event {n['risk_event_id']}) -> {', '.join(n['actions'])}")
+
+    async def close(self) -> None:
+        pass
+
+class WebhookSink:
+    def __init__(self, url: str, timeout: float = ESCALATION_WEBHOOK_TIMEOUT_SECONDS):
+        self.url = url
+        self._client = httpx.AsyncClient(timeout=httpx.Timeout(timeout, connect=min(timeout, 5.0)))
+
+    async def send(self, notifications: List[Dict[str, Any]]) -> None:
+        response = await self._client.post(self.url, json={"notifications": notifications})
+        response.raise_for_status()
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+def default_sink() -> EscalationSink:
+    return WebhookSink(ESCALATION_WEBHOOK_URL) if ESCALATION_WEBHOOK_URL else LogSink()
+
+def backoff_seconds(attempts: int) -> float:
+    return min(ESCALATION_BACKOFF_SECONDS * 2 ** (attempts - 1), ESCALATION_BACKOFF_MAX_SECONDS)
+
+def notification(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "outbox_id": row["id"],
+        "risk_event_id": row["risk_event_id"],
+        "user_id": row["user_id"],
+        "risk_level": row["risk_level"],
+        "self_harm_detected": row["self_harm_detected"],
+        "created_at": row["created_at"],
+        "actions": risk_engine.get_actions(row["risk_level"]),
+    }
+
+def plan(rows: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Split claimed rows into "send" and "suppressed". Per user, the highest-level row is sent
+    unless that level (or higher) was already delivered in the window; the rest are suppressed.
+    "covered" are suppressed by a row sent in this batch: they share its fate if the send fails.
+    """
+    by_user: Dict[str, List[Dict[str, Any]]] = {}
+    for row in rows:
+        by_user.setdefault(row["user_id"], []).append(row)
+    result: Dict[str, List[Dict[str, Any]]] = {"send": [], "suppressed": [], "covered": []}
+    for user_rows in by_user.values():
+        user_rows.sort(key=lambda r: (-_LEVEL_RANK[r["risk_level"]], r["id"]))
+        delivered = max((_LEVEL_RANK[level] for level in user_rows[0]["sent_levels"]), default=0)
+        best, rest = user_rows[0], user_rows[1:]
+        if _LEVEL_RANK[best["risk_level"]] > delivered:
+            result["send"].append(best)
+            result["covered"].extend(rest)
+        else:
+            result["suppressed"].extend(user_rows)
+    return result
+
+class EscalationDispatcher:
+    def __init__(
+        self,
+        sink: Optional[EscalationSink] = None,
+        batch_size: int = ESCALATION_BATCH_SIZE,
+        poll_seconds: float = ESCALATION_POLL_SECONDS,
+        dedup_seconds: float = ESCALATION_DEDUP_SECONDS,
+        max_attempts: int = ESCALATION_MAX_ATTEMPTS
+    ):
+        self.sink = sink
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self.dedup_seconds = dedup_seconds
+        self.max_attempts = max_attempts
+        self._task: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.sent = 0
+        self.suppressed = 0
+        self.retried = 0
+        self.failed = 0
+        self.delivery_seconds_sum = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, claim: Callable[..., List[Dict[str, Any]]], record: Callable[[List[Dict[str, Any]]], None]):
+        """Start polling the outbox. Must be called from the event loop."""
+        if self.running:
+            return
+        if self.sink is None:
+            self.sink = default_sink()
+        self._task = asyncio.get_running_loop().create_task(self._run(claim, record))
+
+    async def stop(self):
+        """Stop polling. A batch cut off mid-send stays leased and is retried after the lease."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self.sink is not None:
+            await self.sink.close()
+            self.sink = None
+
+    async def _run(self, claim, record):
+        while True:
+            try:
+                handled = await self.dispatch_once(claim, record)
+            except Exception as e:
+                print("ESCALATION DISPATCH ERROR:", repr(e))
+                handled = 0
+            # A full batch means there is probably more waiting: go again straight away
+            if handled < self.batch_size:
+                await asyncio.sleep(self.poll_seconds)
+
+    async def dispatch_once(self, claim, record, now: Optional[datetime] = None) -> int:
+        """Claim, send and record one batch; returns how many notifications were claimed."""
+        now = now or datetime.utcnow()
+        rows = await run_in_threadpool(
+            claim,
+            limit=self.batch_size,
+            now=now.isoformat(),
+            lease_until=(now + timedelta(seconds=ESCALATION_LEASE_SECONDS)).isoformat(),
+            sent_since=(now - timedelta(seconds=self.dedup_seconds)).isoformat()
+        )
+        if not rows:
+            return 0
+        batch = plan(rows)
+        results = [self._outcome(r, "suppressed", now) for r in batch["suppressed"]]
+        if batch["send"]:
+            error = None
+            try:
+                await self.sink.send([notification(r) for r in batch["send"]])
+            except Exception as e:
+                error = repr(e)[:500]
+            if error is None:
+                results += [self._outcome(r, "sent", now) for r in batch["send"]]
+                results += [self._outcome(r, "suppressed", now) for r in batch["covered"]]
+                self.delivery_seconds_sum += sum(
+                    (now - datetime.fromisoformat(r["created_at"])).total_seconds() for r in batch["send"]
+                )
+            else:
+                results += [self._retry(r, now, error) for r in batch["send"] + batch["covered"]]
+        await run_in_threadpool(record, results)
+        self.batches += 1
+        return len(rows)
+
+    def _outcome(self, row: Dict[str, Any], status: str, now: datetime) -> Dict[str, Any]:
+        if status == "sent":
+            self.sent += 1
+        else:
+            self.suppressed += 1
+        return {
+            "id": row["id"], "status": status, "attempts": row["attempts"] + (status == "sent"),
+            "next_attempt_at": now.isoformat(), "sent_at": now.isoformat() if status == "sent" else None,
+            "last_error": None
+        }
+
+    def _retry(self, row: Dict[str, Any], now: datetime, error: str) -> Dict[str, Any]:
+        attempts = row["attempts"] + 1
+        if attempts >= self.max_attempts:
+            self.failed += 1
+            status, next_attempt = "failed", now
+        else:
+            self.retried += 1
+            status, next_attempt = "pending", now + timedelta(seconds=backoff_seconds(attempts))
+        return {
+            "id": row["id"], "status": status, "attempts": attempts,
+            "next_attempt_at": next_attempt.isoformat(), "sent_at": None, "last_error": error
+        }
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "running": int(self.running),
+            "batches": self.batches,
+            "sent": self.sent,
+            "suppressed": self.suppressed,
+            "retried": self.retried,
+            "failed": self.failed,
+            "delivery_seconds_sum": self.delivery_seconds_sum
+        }
+
+dispatcher = EscalationDispatcher()
@@ -0,0 +1,428 @@
+"""
+LLM provider backends behind one small interface.
+
+- OpenAICompatibleProvider: Groq (default) or any OpenAI-compatible endpoint
+- MockProvider: in-process, no network; configurable latency, jitter and failure rate
+- RecordReplayProvider: records request -> response pairs to a JSONL file and replays
+  them offline (optionally with the recorded latency)
+
+ai_agent owns the deadline, circuit breaker and concurrency cap; providers only talk
+to the model. Nothing connects at import time: clients are created in startup().
+Selection comes from the environment, see provider_from_env().
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+import httpx
+
+DEFAULT_MODEL = "llama-3.1-8b-instant"
+GROQ_DEFAULT_BASE_URL = "https://api.groq.com/openai/v1"
+OPENAI_DEFAULT_BASE_URL = "https://api.openai.com/v1"
+
+Messages = List[Dict[str, str]]
+
+class LLMProviderError(Exception):
+    """A provider could not produce a completion (injected failure, replay miss, ...)."""
+
+class LLMProvider:
+    """
+    Interface. complete/stream are used by the async handlers, complete_sync by the
+    blocking helpers. stream defaults to a single chunk with the full completion.
+    model / max_tokens override the provider defaults per request (model_router).
+    """
+
+    name = "base"
+    model = DEFAULT_MODEL
+
+    def available(self) -> bool:
+        """False when the provider is not configured (e.g. no API key): callers use their fallback."""
+        return True
+
+    async def startup(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    async def complete(self, messages: Messages, temperature: float, model: Optional[str] = None, max_tokens: Optional[int] = None) -> str:
+        raise NotImplementedError
+
+    def complete_sync(self, messages: Messages, temperature: float, timeout: float, model: Optional[str] = None, max_tokens: Optional[int] = None) -> str:
+        raise NotImplementedError
+
+    async def stream(self, messages: Messages, temperature: float, model: Optional[str] = None, max_tokens: Optional[int] = None) -> AsyncIterator[str]:
+        yield await self.complete(messages, temperature, model, max_tokens)
+
+# -----------------------------
+# OpenAI-compatible (Groq, OpenAI, local servers)
+# -----------------------------
+class OpenAICompatibleProvider(LLMProvider):
+    name = "openai_compatible"
+
+    def __init__(
+        self,
+        base_url: str = GROQ_DEFAULT_BASE_URL,
+        api_key: Optional[str] = None,
+        api_key_env: str = "GROQ_API_KEY",
+        model: str = DEFAULT_MODEL,
+        timeout: float = 20.0,
+        max_connections: int = 64,
+        max_keepalive: int = 32
+    ):
+        self.base_url = base_url
+        self.model = model
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self._api_key = api_key
+        self._api_key_env = api_key_env
+        self._async_client = None
+        self._sync_client = None
+        self._sync_lock = threading.Lock()
+
+    @property
+    def api_key(self) -> Optional[str]:
+        return self._api_key or os.getenv(self._api_key_env)
+
+    def available(self) -> bool:
+        return bool(self.api_key)
+
+    async def startup(self):
+        """Create the shared async client with a pooled, keep-alive HTTP transport."""
+        if self._async_client is None:
+            from openai import AsyncOpenAI
+
+            http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive
+                ),
+                timeout=httpx.Timeout(self.timeout, connect=5.0)
+            )
+            self._async_client = AsyncOpenAI(
+                api_key=self.api_key or "missing",
+                base_url=self.base_url,
+                http_client=http_client,
+                timeout=self.timeout,
+                max_retries=0
+            )
+
+    async def shutdown(self):
+        if self._async_client is not None:
+            await self._async_client.close()
+        self._async_client = None
+
+    def _request(self, messages: Messages, temperature: float, model: Optional[str], max_tokens: Optional[int]) -> Dict[str, Any]:
+        request = {"model": model or self.model, "messages": messages, "temperature": temperature}
+        if max_tokens:
+            request["max_tokens"] = max_tokens
+        return request
+
+    async def complete(self, messages: Messages, temperature: float, model: Optional[str] = None, max_tokens: Optional[int] = None) -> str:
+        await self.startup()
+        completion = await self._async_client.chat.completions.create(
+            **self._request(messages, temperature, model, max_tokens)
+        )
+        return completion.choices[0].message.content
+
+    def complete_sync(self, messages: Messages, temperature: float, timeout: float, model: Optional[str] = None, max_tokens: Optional[int] = None) -> str:
+        with self._sync_lock:
+            if self._sync_client is None:
+                from openai import OpenAI
+                self._sync_client = OpenAI(api_key=self.api_key or "missing", base_url=self.base_url)
+        completion = self._sync_client.with_options(timeout=timeout, max_retries=0).chat.completions.create(
+            **self._request(messages, temperature, model, max_tokens)
+        )
+        return completion.choices[0].message.content
+
+    async def stream(self, messages: Messages, temperature: float, model: Optional[str] = None, max_tokens: Optional[int] = None) -> AsyncIterator[str]:
+        await self.startup()
+        stream = await self._async_client.chat.completions.create(
+            **self._request(messages, temperature, model, max_tokens),
+            stream=True
+        )
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            await stream.close()
+
+# -----------------------------
+# Mock (offline, deterministic)
+# -----------------------------
+MOCK_CHAT_REPLY = {
+    "risk_level": "low",
+    "self_harm_detected": False,
+    "reply": "Thank you for telling me. It sounds like a lot to carry; what has been weighing on you most?",
+    "advice": ["Take a few slow breaths", "Write down what you are feeling", "Reach out to someone you trust"]
+}
+
+MOCK_SUMMARY_REPLY = {
+    "daily_summary": "You checked in and shared how your day went. Some parts were harder than others.",
+    "risk_level": "low",
+    "self_harm_detected": False,
+    "advice": ["Get some rest", "Do one small thing you enjoy"],
+    "reply": "Thanks for checking in today."
+}
+
+def default_mock_responder(messages: Messages) -> str:
+    prompt = messages[-1]["content"] if messages else ""
+    return json.dumps(MOCK_SUMMARY_REPLY if "daily_summary" in prompt else MOCK_CHAT_REPLY)
+
+class MockProvider(LLMProvider):
+    """
+    Answers in-process after latency ± jitter seconds; fails with probability failure_rate.
+    Seeded, so a run with the same settings and call order sees the same latencies and failures.
+    Streams are split into chunk_chars pieces, token_latency seconds apart.
+    model_latency maps model names to their own base latency (routing benchmarks).
+    """
+
+    name = "mock"
+
+    def __init__(
+        self,
+        latency: float = 0.2,
+        jitter: float = 0.0,
+        failure_rate: float = 0.0,
+        seed: int = 0,
+        chunk_chars: int = 8,
+        token_latency: float = 0.0,
+        responder: Callable[[Messages], str] = default_mock_responder,
+        model_latency: Optional[Dict[str, float]] = None
+    ):
+        self.latency = latency
+        self.model_latency = model_latency or {}
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.chunk_chars = chunk_chars
+        self.token_latency = token_latency
+        self.responder = responder
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _next_call(self, model: Optional[str] = None):
+        """(delay, fail) for the next call, drawn under a lock so sync threads share the sequence."""
+        with self._lock:
+            self.calls += 1
+            delay = self.model_latency.get(model, self.latency) + (self._rng.uniform(-self.jitter, self.jitter) if self.jitter else 0.0)
+            fail = self.failure_rate > 0 and self._rng.random() < self.failure_rate
+        return max(delay, 0.0), fail
+
+    async def complete(self, messages: Messages, temperature: float, model: Optional[str] = None, max_tokens: Optional[int] = None) -> str:
+        delay, fail = self._next_call(model)
+        await asyncio.sleep(delay)
+        if fail:
+            raise LLMProviderError("mock provider: injected failure")
+        return self.responder(messages)
+
+    def complete_sync(self, messages: Messages, temperature: float, timeout: float, model: Optional[str] = None, max_tokens: Optional[int] = None) -> str:
+        delay, fail = self._next_call(model)
+        if delay > timeout:
+            time.sleep(timeout)
+            raise TimeoutError("mock provider: latency exceeded timeout")
+        time.sleep(delay)
+        if fail:
+            raise LLMProviderError("mock provider: injected failure")
+        return self.responder(messages)
+
+    async def stream(self, messages: Messages, temperature: float, model: Optional[str] = None, max_tokens: Optional[int] = None) -> AsyncIterator[str]:
+        delay, fail = self._next_call(model)
+        await asyncio.sleep(delay)
+        if fail:
+            raise LLMProviderError("mock provider: injected failure")
+        content = self.responder(messages)
+        for i in range(0, len(content), self.chunk_chars):
+            if i and self.token_latency:
+                await asyncio.sleep(self.token_latency)
+            yield content[i:i + self.chunk_chars]
+
+# -----------------------------
+# Record / replay
+# -----------------------------
+def request_key(model: str, messages: Messages, temperature: float, max_tokens: Optional[int] = None) -> str:
+    request = {"model": model, "messages": messages, "temperature": temperature}
+    if max_tokens:
+        # Only keyed when set, so recordings made before routing still match
+        request["max_tokens"] = max_tokens
+    payload = json.dumps(request, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+class RecordReplayProvider(LLMProvider):
+    """
+    mode="record": forwards to `upstream` and appends each request/response pair to `path` (JSONL).
+    mode="replay": answers only from `path`; unknown requests raise LLMProviderError.
+    With replay_latency=True, replayed answers wait as long as the recorded call took.
+    """
+
+    name = "record_replay"
+
+    def __init__(
+        self,
+        path: str,
+        mode: str = "replay",
+        upstream: Optional[LLMProvider] = None,
+        replay_latency: bool = False,
+        chunk_chars: int = 8,
+        model: str = DEFAULT_MODEL
+    ):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown record/replay mode: {mode}")
+        if mode == "record" and upstream is None:
+            raise ValueError("record mode needs an upstream provider")
+        self.path = path
+        self.mode = mode
+        self.upstream = upstream
+        self.replay_latency = replay_latency
+        self.chunk_chars = chunk_chars
+        self.model = upstream.model if upstream is not None else model
+        self._records: Optional[Dict[str, Dict[str, Any]]] = None
+        self._lock = threading.Lock()
+
+    def available(self) -> bool:
+        return self.upstream.available() if self.mode == "record" else True
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            if self._records is None:
+                records = {}
+                if os.path.exists(self.path):
+                    with open(self.path, encoding="utf-8") as f:
+                        for line in f:
+                            if line.strip():
+                                record = json.loads(line)
+                                records[record["key"]] = record
+                self._records = records
+            return self._records
+
+    def _save(self, key: str, model: str, messages: Messages, temperature: float, response: str, latency: float):
+        record = {
+            "key": key,
+            "model": model,
+            "temperature": temperature,
+            "messages": messages,
+            "response": response,
+            "latency_ms": round(latency * 1000, 1)
+        }
+        records = self._load()
+        with self._lock:
+            records[key] = record
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def _lookup(self, key: str) -> Dict[str, Any]:
+        record = self._load().get(key)
+        if record is None:
+            raise LLMProviderError("replay: no recorded response for this request")
+        return record
+
+    async def startup(self):
+        if self.upstream is not None:
+            await self.upstream.startup()
+
+    async def shutdown(self):
+        if self.upstream is not None:
+            await self.upstream.shutdown()
+
+    async def complete(self, messages: Messages, temperature: float, model: Optional[str] = None, max_tokens: Optional[int] = None) -> str:
+        model = model or self.model
+        key = request_key(model, messages, temperature, max_tokens)
+        if self.mode == "record":
+            start = time.perf_counter()
+            response = await self.upstream.complete(messages, temperature, model, max_tokens)
+            self._save(key, model, messages, temperature, response, time.perf_counter() - start)
+            return response
+        record = self._lookup(key)
+        if self.replay_latency:
+            await asyncio.sleep(record["latency_ms"] / 1000)
+        return record["response"]
+
+    def complete_sync(self, messages: Messages, temperature: float, timeout: float, model: Optional[str] = None, max_tokens: Optional[int] = None) -> str:
+        model = model or self.model
+        key = request_key(model, messages, temperature, max_tokens)
+        if self.mode == "record":
+            start = time.perf_counter()
+            response = self.upstream.complete_sync(messages, temperature, timeout, model, max_tokens)
+            self._save(key, model, messages, temperature, response, time.perf_counter() - start)
+            return response
+        record = self._lookup(key)
+        if self.replay_latency:
+            time.sleep(min(record["latency_ms"] / 1000, timeout))
+        return record["response"]
+
+    async def stream(self, messages: Messages, temperature: float, model: Optional[str] = None, max_tokens: Optional[int] = None) -> AsyncIterator[str]:
+        model = model or self.model
+        key = request_key(model, messages, temperature, max_tokens)
+        if self.mode == "record":
+            start = time.perf_counter()
+            parts = []
+            async for chunk in self.upstream.stream(messages, temperature, model, max_tokens):
+                parts.append(chunk)
+                yield chunk
+            self._save(key, model, messages, temperature, "".join(parts), time.perf_counter() - start)
+            return
+        record = self._lookup(key)
+        if self.replay_latency:
+            await asyncio.sleep(record["latency_ms"] / 1000)
+        content = record["response"]
+        for i in range(0, len(content), self.chunk_chars):
+            yield content[i:i + self.chunk_chars]
+
+# -----------------------------
+# Settings
+# -----------------------------
+def provider_from_env(env: Optional[Dict[str, str]] = None) -> LLMProvider:
+    """
+    LLM_PROVIDER selects the backend:
+      groq (default) – GROQ_BASE_URL / GROQ_API_KEY
+      openai         – OPENAI_BASE_URL / OPENAI_API_KEY
+      mock           – LLM_MOCK_LATENCY_MS, LLM_MOCK_JITTER_MS, LLM_MOCK_FAILURE_RATE, LLM_MOCK_SEED,
+                       LLM_MOCK_TOKEN_LATENCY_MS
+      record         – LLM_RECORD_PATH, forwarding to LLM_RECORD_UPSTREAM (groq | openai | mock)
+      replay         – LLM_RECORD_PATH, LLM_REPLAY_LATENCY=1 to replay recorded latencies
+    LLM_MODEL, LLM_TIMEOUT_SECONDS, LLM_MAX_CONCURRENCY and LLM_MAX_KEEPALIVE apply to the HTTP backends.
+    """
+    env = os.environ if env is None else env
+    name = env.get("LLM_PROVIDER", "groq").lower()
+
+    if name in ("groq", "openai"):
+        prefix = name.upper()
+        return OpenAICompatibleProvider(
+            base_url=env.get(f"{prefix}_BASE_URL", GROQ_DEFAULT_BASE_URL if name == "groq" else OPENAI_DEFAULT_BASE_URL),
+            api_key_env=f"{prefix}_API_KEY",
+            model=env.get("LLM_MODEL", DEFAULT_MODEL),
+            timeout=float(env.get("LLM_TIMEOUT_SECONDS", "20")),
+            max_connections=int(env.get("LLM_MAX_CONCURRENCY", "64")),
+            max_keepalive=int(env.get("LLM_MAX_KEEPALIVE", "32"))
+        )
+    if name == "mock":
+        return MockProvider(
+            latency=float(env.get("LLM_MOCK_LATENCY_MS", "200")) / 1000,
+            jitter=float(env.get("LLM_MOCK_JITTER_MS", "0")) / 1000,
+            failure_rate=float(env.get("LLM_MOCK_FAILURE_RATE", "0")),
+            seed=int(env.get("LLM_MOCK_SEED", "0")),
+            token_latency=float(env.get("LLM_MOCK_TOKEN_LATENCY_MS", "0")) / 1000
+        )
+    if name in ("record", "replay"):
+        upstream = None
+        if name == "record":
+            upstream_name = env.get("LLM_RECORD_UPSTREAM", "groq")
+            if upstream_name in ("record", "replay"):
+                raise ValueError("LLM_RECORD_UPSTREAM must be a live provider (groq, openai or mock)")
+            upstream = provider_from_env({**env, "LLM_PROVIDER": upstream_name})
+        return RecordReplayProvider(
+            path=env.get("LLM_RECORD_PATH", "llm_recordings.jsonl"),
+            mode=name,
+            upstream=upstream,
+            replay_latency=env.get("LLM_REPLAY_LATENCY", "0") == "1",
+            model=env.get("LLM_MODEL", DEFAULT_MODEL)
+        )
+    raise ValueError(f"Unknown LLM_PROVIDER: {name}")
@@ -0,0 +1,230 @@
+"""
+Priority scheduler for LLM concurrency slots.
+
+Replaces a plain semaphore in ai_agent: when every slot is busy, waiters are served
+by priority (critical > high > medium > low) instead of arrival order, so a user in
+crisis does not queue behind casual chats.
+
+- Priority comes from the keyword score the handlers already computed (priority_for_score).
+- Starvation protection: a waiter's effective priority rises by one level for every
+  aging_seconds it has waited, so low-priority work is delayed, never parked forever.
+- Bounded queue: when max_queue waiters are queued, a new request evicts the
+  lowest-priority waiter if it outranks it, otherwise it is rejected with SchedulerFull
+  (callers then use their fallback, the same as a timeout).
+- Deadline: acquire(timeout=...) gives up with QueuedPastDeadline once the caller's
+  budget is spent in the queue. That is local queueing, counted as "expired", and
+  must not be mistaken for a slow provider.
+"""
+
+import asyncio
+import bisect
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional
+
+from . import risk_engine
+
+PRIORITIES = ("critical", "high", "medium", "low")
+PRIORITY_LEVELS = {name: level for level, name in enumerate(PRIORITIES)}
+PRIORITY_LEVELS["none"] = PRIORITY_LEVELS["low"]
+
+# Wait-time histogram buckets (seconds)
+WAIT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+def priority_for_score(kw_score: int) -> str:
+    """Map a calculate_risk_score result to a scheduling priority."""
+    if kw_score >= risk_engine.INTENT_SCORE:
+        return "critical"
+    if kw_score >= risk_engine.SELF_HARM_KW_SCORE:
+        return "high"
+    if kw_score >= risk_engine.HIGH_RISK_KW_SCORE:
+        return "medium"
+    return "low"
+
+class SchedulerFull(Exception):
+    """The wait queue is full (or this waiter was evicted by a higher-priority request)."""
+
+class QueuedPastDeadline(SchedulerFull):
+    """The waiter's timeout passed before a slot became free."""
+
+class _Waiter:
+    __slots__ = ("level", "enqueued_at", "future")
+
+    def __init__(self, level: int, enqueued_at: float, future: asyncio.Future):
+        self.level = level
+        self.enqueued_at = enqueued_at
+        self.future = future
+
+class _PriorityStats:
+    __slots__ = ("served", "wait_sum", "wait_max", "buckets", "rejected", "evicted", "expired", "promoted")
+
+    def __init__(self):
+        self.served = 0
+        self.wait_sum = 0.0
+        self.wait_max = 0.0
+        self.buckets = [0] * (len(WAIT_BUCKETS) + 1)
+        self.rejected = 0
+        self.evicted = 0
+        self.expired = 0
+        self.promoted = 0
+
+    def observe(self, wait: float):
+        self.served += 1
+        self.wait_sum += wait
+        self.wait_max = max(self.wait_max, wait)
+        self.buckets[bisect.bisect_left(WAIT_BUCKETS, wait)] += 1
+
+class PriorityScheduler:
+    """
+    Usage:
+        async with scheduler.slot("high"):
+            ... call the LLM ...
+    Not thread-safe: create and use it on one event loop (ai_agent does so on startup).
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_queue: int = 256,
+        aging_seconds: float = 1.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.aging_seconds = aging_seconds
+        self._clock = clock
+        self._active = 0
+        self._queues: List[Deque[_Waiter]] = [deque() for _ in PRIORITIES]
+        self._stats = [_PriorityStats() for _ in PRIORITIES]
+
+    @property
+    def queued(self) -> int:
+        return sum(len(q) for q in self._queues)
+
+    def slot(self, priority: str = "low") -> "_Slot":
+        return _Slot(self, priority)
+
+    async def acquire(self, priority: str = "low", timeout: Optional[float] = None):
+        """Wait for a slot; with a timeout, raise QueuedPastDeadline if none is free in time."""
+        level = PRIORITY_LEVELS.get(priority, PRIORITY_LEVELS["low"])
+        if self._active < self.max_concurrency and not self.queued:
+            self._active += 1
+            self._stats[level].observe(0.0)
+            return
+
+        if self.queued >= self.max_queue and not self._evict_below(level):
+            self._stats[level].rejected += 1
+            raise SchedulerFull(f"LLM queue full ({self.max_queue} waiting)")
+
+        waiter = _Waiter(level, self._clock(), asyncio.get_running_loop().create_future())
+        self._queues[level].append(waiter)
+        expiry = None
+        if timeout is not None:
+            expiry = asyncio.get_running_loop().call_later(max(timeout, 0.0), self._expire, waiter)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            future = waiter.future
+            if future.done() and not future.cancelled() and future.exception() is None:
+                # The slot was handed over just as we were cancelled: pass it on
+                self.release()
+            else:
+                self._discard(waiter)
+            raise
+        finally:
+            if expiry is not None:
+                expiry.cancel()
+        self._stats[level].observe(self._clock() - waiter.enqueued_at)
+
+    def release(self):
+        waiter = self._pop_next()
+        if waiter is None:
+            self._active -= 1
+        else:
+            # Hand the slot straight to the next waiter (_active unchanged)
+            waiter.future.set_result(None)
+
+    def _effective_rank(self, waiter: _Waiter, now: float) -> float:
+        if self.aging_seconds <= 0:
+            return waiter.level
+        return waiter.level - (now - waiter.enqueued_at) / self.aging_seconds
+
+    def _pop_next(self) -> Optional[_Waiter]:
+        """Head of the queue with the best effective rank (base level minus aging)."""
+        now = self._clock()
+        best_level, best_key = None, None
+        for level, queue in enumerate(self._queues):
+            while queue and queue[0].future.done():
+                queue.popleft()
+            if not queue:
+                continue
+            head = queue[0]
+            key = (self._effective_rank(head, now), head.enqueued_at)
+            if best_key is None or key < best_key:
+                best_level, best_key = level, key
+        if best_level is None:
+            return None
+        waiter = self._queues[best_level].popleft()
+        if any(self._queues[:best_level]):
+            # Served ahead of higher-priority waiters thanks to aging
+            self._stats[best_level].promoted += 1
+        return waiter
+
+    def _evict_below(self, level: int) -> bool:
+        """Drop the newest waiter of the lowest priority below `level`; False if there is none."""
+        for lower in range(len(PRIORITIES) - 1, level, -1):
+            queue = self._queues[lower]
+            if queue:
+                victim = queue.pop()
+                self._stats[lower].evicted += 1
+                victim.future.set_exception(SchedulerFull("evicted by a higher-priority request"))
+                return True
+        return False
+
+    def _expire(self, waiter: _Waiter):
+        if waiter.future.done():
+            return
+        self._discard(waiter)
+        self._stats[waiter.level].expired += 1
+        waiter.future.set_exception(QueuedPastDeadline("no LLM slot before the deadline"))
+
+    def _discard(self, waiter: _Waiter):
+        try:
+            self._queues[waiter.level].remove(waiter)
+        except ValueError:
+            pass
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-priority wait metrics plus current queue depth; buckets are cumulative, matching WAIT_BUCKETS + (+Inf)."""
+        result = {}
+        for level, name in enumerate(PRIORITIES):
+            s = self._stats[level]
+            cumulative, running = [], 0
+            for count in s.buckets:
+                running += count
+                cumulative.append(running)
+            result[name] = {
+                "queued": len(self._queues[level]),
+                "served": s.served,
+                "wait_sum": s.wait_sum,
+                "wait_max": s.wait_max,
+                "wait_buckets": cumulative,
+                "rejected": s.rejected,
+                "evicted": s.evicted,
+                "expired": s.expired,
+                "promoted": s.promoted
+            }
+        return result
+
+class _Slot:
+    __slots__ = ("_scheduler", "_priority")
+
+    def __init__(self, scheduler: PriorityScheduler, priority: str):
+        self._scheduler = scheduler
+        self._priority = priority
+
+    async def __aenter__(self):
+        await self._scheduler.acquire(self._priority)
+
+    async def __aexit__(self, *exc):
+        self._scheduler.release()
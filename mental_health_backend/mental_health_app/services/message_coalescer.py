@@ -0,0 +1,123 @@
+"""
+Per-user debounce for rapid-fire chat messages.
+
+Mobile users often send 3–5 short messages within a couple of seconds. With coalescing
+on, messages from the same user that arrive within `window` seconds of each other are
+collected into one batch; when the user goes quiet (or `max_wait` after the first
+message) the batch is handed to a single `run(key, items)` call and every waiting
+request receives its result.
+
+Only the LLM call is shared: callers score each message themselves before submitting,
+and crisis messages are never submitted (chat_turn sends them down the fast path).
+Not thread-safe: use it from the event loop.
+"""
+
+import asyncio
+import bisect
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Set, Tuple
+
+# Batch-size histogram buckets (messages per LLM call)
+BATCH_SIZE_BUCKETS = (1, 2, 3, 5, 8)
+
+class _Batch:
+    __slots__ = ("items", "futures", "deadline", "hard_deadline", "run")
+
+    def __init__(self, hard_deadline: float, run: Callable[[Hashable, List[Any]], Awaitable[Any]]):
+        self.items: List[Any] = []
+        self.futures: List[asyncio.Future] = []
+        self.deadline = hard_deadline
+        self.hard_deadline = hard_deadline
+        self.run = run
+
+class MessageCoalescer:
+    def __init__(self, window: float, max_wait: float):
+        self.window = window
+        self.max_wait = max(max_wait, window)
+        self._pending: Dict[Hashable, _Batch] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self.messages = 0
+        self.llm_calls = 0
+        self.calls_saved = 0
+        self.batch_sizes = [0] * (len(BATCH_SIZE_BUCKETS) + 1)
+        self.abandoned = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0
+
+    async def submit(
+        self,
+        key: Hashable,
+        item: Any,
+        run: Callable[[Hashable, List[Any]], Awaitable[Any]]
+    ) -> Tuple[Any, bool]:
+        """
+        Add item to key's open batch (starting one if needed) and wait for the batch result.
+        Returns (result, is_last): is_last is True for exactly one live waiter per batch,
+        the one that submitted last, so per-batch work (storing the reply) happens once.
+        run is taken from the request that opened the batch.
+        """
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = _Batch(now + self.max_wait, run)
+            self._pending[key] = batch
+            task = loop.create_task(self._flush_when_quiet(key, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        batch.deadline = min(now + self.window, batch.hard_deadline)
+        future = loop.create_future()
+        batch.items.append(item)
+        batch.futures.append(future)
+        self.messages += 1
+        return await future
+
+    async def _flush_when_quiet(self, key: Hashable, batch: _Batch):
+        loop = asyncio.get_running_loop()
+        while True:
+            delay = batch.deadline - loop.time()
+            if delay <= 0:
+                break
+            await asyncio.sleep(delay)
+        del self._pending[key]
+
+        live = [f for f in batch.futures if not f.done()]
+        if not live:
+            # Every waiter went away (client disconnects): skip the call
+            self.abandoned += 1
+            return
+        self.llm_calls += 1
+        self.calls_saved += len(batch.items) - 1
+        self.batch_sizes[bisect.bisect_left(BATCH_SIZE_BUCKETS, len(batch.items))] += 1
+        try:
+            result = await batch.run(key, batch.items)
+        except Exception as e:
+            for future in live:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        last = next((f for f in reversed(live) if not f.done()), None)
+        for future in live:
+            if not future.done():
+                future.set_result((result, future is last))
+
+    async def drain(self, timeout: float = 10.0):
+        """Wait for open batches to flush (called on shutdown and by tests)."""
+        if self._tasks:
+            await asyncio.wait(set(self._tasks), timeout=timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """calls_saved counts messages answered by another message's LLM call; batch_sizes are cumulative, matching BATCH_SIZE_BUCKETS + (+Inf)."""
+        cumulative, running = [], 0
+        for count in self.batch_sizes:
+            running += count
+            cumulative.append(running)
+        return {
+            "messages": self.messages,
+            "llm_calls": self.llm_calls,
+            "calls_saved": self.calls_saved,
+            "pending_batches": len(self._pending),
+            "abandoned_batches": self.abandoned,
+            "batch_sizes": cumulative
+        }
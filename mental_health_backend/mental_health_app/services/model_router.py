@@ -0,0 +1,126 @@
+"""
+Model routing: pick the model, max_tokens and temperature per LLM request from the
+pre-LLM keyword score and the message length.
+
+  fast        – small talk: no risk signals, short message (cheapest / lowest latency)
+  standard    – no risk signals, but a long message (more room to answer)
+  escalation  – any risk signal (keyword score >= HIGH_RISK_KW_SCORE): the higher-quality model
+
+Routes are configured per tier with LLM_ROUTE_<TIER>_MODEL / _MAX_TOKENS / _TEMPERATURE /
+_DEADLINE_SECONDS; an empty model means the provider's own (LLM_MODEL), an empty deadline
+means LLM_DEADLINE_SECONDS. The escalation tier's larger model writes longer answers, so it
+gets a longer deadline by default (the crisis fast path does not wait for it). LLM_ROUTING=0 sends everything
+through the "default" route (provider model, no max_tokens), as before routing existed.
+
+Each route keeps latency and (estimated) token counters for the gateway /metrics endpoint.
+"""
+
+import bisect
+import os
+import threading
+from typing import Dict, NamedTuple, Optional
+
+from . import risk_engine
+
+ROUTE_NAMES = ("fast", "standard", "escalation")
+
+# Latency histogram buckets (seconds)
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 1.5, 2.0, 2.5, 5.0, 10.0)
+
+class Route(NamedTuple):
+    name: str
+    model: Optional[str]  # None: the provider's default model
+    max_tokens: Optional[int]
+    temperature: float
+    deadline: Optional[float] = None  # seconds; None: ai_agent.LLM_DEADLINE_SECONDS
+
+DEFAULT_ROUTE = Route("default", None, None, 0.4)
+
+def routes_from_env(env: Optional[Dict[str, str]] = None) -> Dict[str, Route]:
+    env = os.environ if env is None else env
+    # The bigger Groq model is only a sensible default when talking to Groq
+    on_groq = env.get("LLM_PROVIDER", "groq").lower() == "groq"
+    defaults = {
+        "fast": ("", "400", "0.4", ""),
+        "standard": ("", "700", "0.4", ""),
+        "escalation": ("llama-3.3-70b-versatile" if on_groq else "", "800", "0.3", "6"),
+    }
+    routes = {}
+    for name in ROUTE_NAMES:
+        model, max_tokens, temperature, deadline = defaults[name]
+        prefix = f"LLM_ROUTE_{name.upper()}_"
+        routes[name] = Route(
+            name,
+            env.get(prefix + "MODEL", model) or None,
+            int(env.get(prefix + "MAX_TOKENS", max_tokens)) or None,
+            float(env.get(prefix + "TEMPERATURE", temperature)),
+            float(env.get(prefix + "DEADLINE_SECONDS", deadline) or 0) or None
+        )
+    return routes
+
+class RouteStats:
+    __slots__ = ("calls", "failures", "latency_sum", "latency_buckets", "prompt_tokens", "completion_tokens")
+
+    def __init__(self):
+        self.calls = 0
+        self.failures = 0
+        self.latency_sum = 0.0
+        self.latency_buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+class ModelRouter:
+    def __init__(
+        self,
+        routes: Optional[Dict[str, Route]] = None,
+        long_message_chars: int = int(os.getenv("LLM_ROUTE_LONG_MESSAGE_CHARS", "280")),
+        enabled: bool = os.getenv("LLM_ROUTING", "1") == "1"
+    ):
+        self.routes = routes if routes is not None else routes_from_env()
+        self.long_message_chars = long_message_chars
+        self.enabled = enabled
+        # Observed from the event loop and from threadpool (sync) callers
+        self._lock = threading.Lock()
+        self._stats: Dict[str, RouteStats] = {name: RouteStats() for name in (*ROUTE_NAMES, DEFAULT_ROUTE.name)}
+
+    def route_for(self, kw_score: int, text: str) -> Route:
+        if not self.enabled:
+            return DEFAULT_ROUTE
+        if kw_score >= risk_engine.HIGH_RISK_KW_SCORE:
+            return self.routes["escalation"]
+        if len(text) > self.long_message_chars:
+            return self.routes["standard"]
+        return self.routes["fast"]
+
+    def observe(self, route: Route, seconds: float, prompt_tokens: int, completion_tokens: int, ok: bool):
+        with self._lock:
+            stats = self._stats.setdefault(route.name, RouteStats())
+            stats.calls += 1
+            stats.failures += 0 if ok else 1
+            stats.latency_sum += seconds
+            stats.latency_buckets[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            stats.prompt_tokens += prompt_tokens
+            stats.completion_tokens += completion_tokens
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-route counters; latency_buckets are cumulative, matching LATENCY_BUCKETS + (+Inf)."""
+        result = {}
+        with self._lock:
+            for name, s in self._stats.items():
+                cumulative, running = [], 0
+                for count in s.latency_buckets:
+                    running += count
+                    cumulative.append(running)
+                route = self.routes.get(name, DEFAULT_ROUTE)
+                result[name] = {
+                    "model": route.model or "",
+                    "calls": s.calls,
+                    "failures": s.failures,
+                    "latency_sum": s.latency_sum,
+                    "latency_buckets": cumulative,
+                    "prompt_tokens": s.prompt_tokens,
+                    "completion_tokens": s.completion_tokens
+                }
+        return result
+
+router = ModelRouter()
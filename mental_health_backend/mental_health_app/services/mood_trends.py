@@ -0,0 +1,328 @@
+"""
+Numeric mood from daily check-ins, and trends over it.
+
+parse_mood pulls the 1–10 answer out of a check-in ("7", "7/10", "about 6.5", "seven")
+so it can be stored as daily_summaries.mood_score. Trends are computed with NumPy on a
+cached (users x days) float32 matrix covering the last MOOD_TREND_DAYS days, NaN where
+a user did not check in:
+
+  - rolling mean over a window (NaN-aware, at least MOOD_MIN_POINTS check-ins)
+  - rolling least-squares slope (points per day) over the same window
+  - alerts: a sharp drop (today's mood at least MOOD_DROP_POINTS below the mean of the
+    window before it) and a declining trend (latest slope <= -MOOD_DECLINE_SLOPE)
+
+Every statistic comes from windowed differences of cumulative sums along the day axis,
+so one user (a 1 x days row) and a whole cohort (n x days) are the same code, and a
+query only computes over the days it returns plus the window before them.
+
+The matrix is loaded once from the database (injected: db.get_mood_scores), kept current
+by record() on every check-in in this process, and reloaded on day rollover or after
+MOOD_CACHE_TTL_SECONDS (check-ins written by other processes). The all-users cohort
+response is memoized per (days, window) until the next change.
+"""
+
+import math
+import os
+import re
+import threading
+import time
+import warnings
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+MOOD_TREND_DAYS = int(os.getenv("MOOD_TREND_DAYS", "365"))
+MOOD_TREND_WINDOW = int(os.getenv("MOOD_TREND_WINDOW", "7"))
+MOOD_MIN_POINTS = int(os.getenv("MOOD_MIN_POINTS", "3"))
+MOOD_DROP_POINTS = float(os.getenv("MOOD_DROP_POINTS", "3"))
+MOOD_DECLINE_SLOPE = float(os.getenv("MOOD_DECLINE_SLOPE", "0.3"))
+MOOD_CACHE_TTL_SECONDS = float(os.getenv("MOOD_CACHE_TTL_SECONDS", "300"))
+
+MOOD_MIN, MOOD_MAX = 1.0, 10.0
+
+_MOOD_QUESTION = re.compile(r"(1\s*[–-]\s*10|mood|feeling right now)", re.IGNORECASE)
+_NUMBER = re.compile(r"(?<![\d.])(\d+(?:\.\d+)?)(?:\s*(?:/|out of)\s*10)?")
+_NUMBER_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10,
+}
+_WORD = re.compile(r"\b(" + "|".join(_NUMBER_WORDS) + r")\b", re.IGNORECASE)
+
+def parse_mood_answer(answer: str) -> Optional[float]:
+    """The first 1–10 number in a free-text answer, or None."""
+    match = _NUMBER.search(answer)
+    if match:
+        value = float(match.group(1))
+    else:
+        word = _WORD.search(answer)
+        if not word:
+            return None
+        value = float(_NUMBER_WORDS[word.group(1).lower()])
+    return value if MOOD_MIN <= value <= MOOD_MAX else None
+
+def parse_mood(answers: Dict[str, str]) -> Optional[float]:
+    """Mood score from the check-in's 1–10 question (matched by its wording), or None."""
+    for question, answer in answers.items():
+        if _MOOD_QUESTION.search(question):
+            return parse_mood_answer(answer)
+    return None
+
+# -----------------------------
+# Windowed statistics on (rows x days) arrays
+# -----------------------------
+
+def _window_sum(cumulative: np.ndarray, window: int) -> np.ndarray:
+    """Sum over the trailing window ending at each day, from a cumsum along axis 1."""
+    shifted = np.zeros_like(cumulative)
+    shifted[:, window:] = cumulative[:, :-window]
+    return cumulative - shifted
+
+def rolling_stats(moods: np.ndarray, window: int, min_points: int = MOOD_MIN_POINTS) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (rolling mean, rolling slope per day) over the trailing window for every row and day;
+    NaN where the window holds fewer than min_points check-ins.
+    """
+    present = ~np.isnan(moods)
+    x = np.where(present, moods, 0.0).astype(np.float64)
+    t = np.where(present, np.arange(moods.shape[1], dtype=np.float64), 0.0)
+
+    n = _window_sum(np.cumsum(present, axis=1, dtype=np.float64), window)
+    sx = _window_sum(np.cumsum(x, axis=1), window)
+    st = _window_sum(np.cumsum(t, axis=1), window)
+    stt = _window_sum(np.cumsum(t * t, axis=1), window)
+    stx = _window_sum(np.cumsum(t * x, axis=1), window)
+
+    enough = n >= max(min_points, 1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(enough, sx / n, np.nan)
+        denominator = n * stt - st * st
+        slope = np.where(enough & (denominator > 0), (n * stx - st * sx) / denominator, np.nan)
+    return mean.astype(np.float32), slope.astype(np.float32)
+
+def sharp_drops(moods: np.ndarray, window: int, drop_points: float = MOOD_DROP_POINTS,
+                min_points: int = MOOD_MIN_POINTS) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (drop mask, baseline): days whose mood is at least drop_points below the mean of the
+    window of days before it (the day itself excluded).
+    """
+    mean, _ = rolling_stats(moods, window, min_points)
+    baseline = np.full_like(mean, np.nan)
+    baseline[:, 1:] = mean[:, :-1]
+    with np.errstate(invalid="ignore"):
+        drops = (baseline - moods) >= drop_points
+    return drops, baseline
+
+def _nan_list(values: np.ndarray, digits: int = 3) -> List[Optional[float]]:
+    return [None if math.isnan(v) else round(float(v), digits) for v in values]
+
+class MoodTrendCache:
+    def __init__(self, days: int = MOOD_TREND_DAYS, ttl: float = MOOD_CACHE_TTL_SECONDS):
+        self.days = days
+        self.ttl = ttl
+        self.today: Optional[date] = None
+        self.loaded_at = 0.0
+        self.version = 0
+        self.users: Dict[str, int] = {}
+        self.moods = np.full((0, days), np.nan, dtype=np.float32)
+        self._lock = threading.Lock()
+        # All-users cohort response per (days, window, version)
+        self._cohort_memo: Dict[Tuple[int, int, int], Dict[str, Any]] = {}
+        self.loads = 0
+
+    @property
+    def origin(self) -> date:
+        """Date of column 0."""
+        return self.today - timedelta(days=self.days - 1)
+
+    def _column(self, day: date) -> Optional[int]:
+        column = (day - self.origin).days
+        return column if 0 <= column < self.days else None
+
+    def _row(self, user_id: str) -> int:
+        row = self.users.get(user_id)
+        if row is None:
+            row = self.users[user_id] = len(self.users)
+            if row >= self.moods.shape[0]:
+                # Grow by doubling so a burst of new users doesn't copy the matrix each time
+                grown = np.full((max(2 * self.moods.shape[0], 64), self.days), np.nan, dtype=np.float32)
+                grown[:self.moods.shape[0]] = self.moods
+                self.moods = grown
+        return row
+
+    def stale(self, today: date) -> bool:
+        return self.today != today or time.monotonic() - self.loaded_at > self.ttl
+
+    def load(self, rows: List[Tuple[str, str, float]], today: date):
+        """Replace the matrix with (user_id, ISO date, mood) rows (db.get_mood_scores)."""
+        users: Dict[str, int] = {}
+        moods = np.full((0, self.days), np.nan, dtype=np.float32)
+        if rows:
+            user_ids, days, values = zip(*rows)
+            row = np.fromiter((users.setdefault(u, len(users)) for u in user_ids), dtype=np.intp, count=len(rows))
+            origin = np.datetime64(today - timedelta(days=self.days - 1), "D")
+            column = (np.array(days, dtype="datetime64[D]") - origin).astype(np.intp)
+            keep = (column >= 0) & (column < self.days)
+            moods = np.full((len(users), self.days), np.nan, dtype=np.float32)
+            moods[row[keep], column[keep]] = np.asarray(values, dtype=np.float32)[keep]
+        with self._lock:
+            self.today = today
+            self.users = users
+            self.moods = moods
+            self.loaded_at = time.monotonic()
+            self.version += 1
+            self._cohort_memo.clear()
+            self.loads += 1
+
+    def ensure_loaded(self, load_rows: Callable[[str], List[Tuple[str, str, float]]], today: Optional[date] = None):
+        """(Re)load from the database if the cache is empty, from another day, or older than the TTL."""
+        today = today or date.today()
+        if self.stale(today):
+            since = (today - timedelta(days=self.days - 1)).isoformat()
+            self.load(load_rows(since), today)
+
+    def record(self, user_id: str, day: str, mood: Optional[float]):
+        """Apply one check-in (a resubmission overwrites the day; None clears it)."""
+        if self.today is None:
+            return  # not loaded yet: the first query reads it from the database
+        with self._lock:
+            column = self._column(date.fromisoformat(day))
+            if column is None:
+                return
+            row = self._row(user_id)
+            self.moods[row, column] = np.nan if mood is None else mood
+            self.version += 1
+            self._cohort_memo.clear()
+
+    def _rows_for(self, user_ids: Optional[List[str]]) -> np.ndarray:
+        if user_ids is None:
+            return self.moods[:len(self.users)]
+        rows = [self.users[u] for u in user_ids if u in self.users]
+        return self.moods[rows]
+
+    def _span(self, days: int, window: int) -> Tuple[int, int]:
+        """
+        (first returned column, first column to compute from): windowed statistics on the
+        returned days only need the `window` days before them, not the whole horizon.
+        """
+        days = min(days, self.days)
+        return self.days - days, max(0, self.days - days - window)
+
+    def user_trend(self, user_id: str, days: int, window: int = MOOD_TREND_WINDOW) -> Optional[Dict[str, Any]]:
+        """Daily series for the last `days` days, or None when the user has no mood check-ins."""
+        start, lead = self._span(days, window)
+        with self._lock:
+            row = self.users.get(user_id)
+            if row is None:
+                return None
+            moods = self.moods[row:row + 1, lead:].copy()
+            latest = _latest(self.moods[row])
+        mean, slope = rolling_stats(moods, window)
+        drops, baseline = sharp_drops(moods, window)
+        offset = start - lead
+
+        alerts = [
+            {"date": (self.origin + timedelta(days=int(c) + lead)).isoformat(), "kind": "sharp_drop",
+             "mood": float(moods[0, c]), "baseline": round(float(baseline[0, c]), 3),
+             "drop": round(float(baseline[0, c] - moods[0, c]), 3)}
+            for c in np.flatnonzero(drops[0, offset:]) + offset
+        ]
+        # Today's column: the trailing window ending now (None once check-ins are too sparse)
+        latest_slope = _nan_list(slope[0, -1:])[0]
+        if latest_slope is not None and latest_slope <= -MOOD_DECLINE_SLOPE:
+            alerts.append({"date": self.today.isoformat(), "kind": "declining_trend", "slope": round(latest_slope, 3)})
+        return {
+            "user_id": user_id,
+            "window": window,
+            "dates": self._dates(start),
+            "mood": _nan_list(moods[0, offset:]),
+            "rolling_mean": _nan_list(mean[0, offset:]),
+            "slope": _nan_list(slope[0, offset:]),
+            "latest": {"mood": latest, "rolling_mean": _nan_list(mean[0, -1:])[0], "slope": latest_slope},
+            "alerts": alerts
+        }
+
+    def cohort_trend(self, user_ids: Optional[List[str]], days: int, window: int = MOOD_TREND_WINDOW) -> Dict[str, Any]:
+        """
+        Population series (daily mean / quartiles / participants, rolling mean and slope of
+        the daily mean) and which users need attention now. user_ids None = every user;
+        that response is memoized per (days, window) until the next change.
+        """
+        start, lead = self._span(days, window)
+        with self._lock:
+            if user_ids is None:
+                ids = list(self.users)
+                key = (days, window, self.version)
+                cached = self._cohort_memo.get(key)
+                if cached is not None:
+                    return cached
+            else:
+                ids = [u for u in dict.fromkeys(user_ids) if u in self.users]
+            moods = self._rows_for(None if user_ids is None else ids)[:, lead:].copy()
+            dates = self._dates(start)
+
+        offset = start - lead
+        _, slope = rolling_stats(moods, window)
+        drops, _ = sharp_drops(moods, window)
+        with warnings.catch_warnings():
+            # nanmean warns on days nobody checked in; those are just NaN
+            warnings.simplefilter("ignore", RuntimeWarning)
+            daily_mean = np.nanmean(moods, axis=0) if len(ids) else np.full(moods.shape[1], np.nan, dtype=np.float32)
+        population_mean, population_slope = rolling_stats(daily_mean[None, :].astype(np.float32), window, min_points=1)
+        recent = moods[:, offset:]
+        participants, (p25, median, p75) = _nan_quartiles(recent)
+
+        # "Now" = today's trailing window
+        result = {
+            "users": len(ids),
+            "window": window,
+            "dates": dates,
+            "participants": participants.tolist(),
+            "mean": _nan_list(daily_mean[offset:]),
+            "p25": _nan_list(p25),
+            "median": _nan_list(median),
+            "p75": _nan_list(p75),
+            "rolling_mean": _nan_list(population_mean[0, offset:]),
+            "slope": _nan_list(population_slope[0, offset:]),
+            "declining_users": [ids[i] for i in np.flatnonzero(slope[:, -1] <= -MOOD_DECLINE_SLOPE)],
+            "recent_drop_users": [ids[i] for i in np.flatnonzero(drops[:, -window:].any(axis=1))]
+        }
+        if user_ids is None:
+            with self._lock:
+                if key[2] == self.version:
+                    if len(self._cohort_memo) >= 64:
+                        self._cohort_memo.clear()
+                    self._cohort_memo[key] = result
+        return result
+
+    def _dates(self, start: int) -> List[str]:
+        origin = np.datetime64(self.origin, "D")
+        return np.arange(origin + start, origin + self.days).astype(str).tolist()
+
+    def stats(self) -> Dict[str, float]:
+        return {"users": len(self.users), "loads": self.loads, "version": self.version}
+
+def _nan_quartiles(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (non-NaN count, [p25, median, p75]) per column, linear interpolation like np.nanpercentile
+    but with one sort (NaN sorts last) instead of a per-column Python loop.
+    """
+    ordered = np.sort(values, axis=0)
+    count = np.count_nonzero(~np.isnan(values), axis=0)
+    if not len(values):
+        return count, np.full((3, values.shape[1]), np.nan)
+    quartiles = []
+    for q in (0.25, 0.5, 0.75):
+        position = q * np.maximum(count - 1, 0)
+        low = np.floor(position).astype(np.intp)
+        high = np.ceil(position).astype(np.intp)
+        below = np.take_along_axis(ordered, low[None, :], axis=0)[0].astype(np.float64)
+        above = np.take_along_axis(ordered, high[None, :], axis=0)[0].astype(np.float64)
+        quartiles.append(np.where(count > 0, below + (above - below) * (position - low), np.nan))
+    return count, np.array(quartiles)
+
+def _latest(values: np.ndarray) -> Optional[float]:
+    present = np.flatnonzero(~np.isnan(values))
+    return round(float(values[present[-1]]), 3) if len(present) else None
+
+cache = MoodTrendCache()
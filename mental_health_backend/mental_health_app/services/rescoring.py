@@ -0,0 +1,168 @@
+"""
+Batch risk scoring, and rescoring of stored messages after the rules change.
+
+score_batch() runs the deterministic assessment (calculate_risk_score, then the same
+keyword-only level the chat path reports before the LLM answers) over many texts at
+once; identical texts in a batch are scored once.
+
+rescore() re-evaluates history with the current SELF_HARM_KEYWORDS, HIGH_RISK_KEYWORDS,
+SELF_HARM_PATTERNS and crisis paraphrase settings. It streams stored user messages in
+chunks (fetch_chunk, injected: db.fetch_messages_for_rescoring), scores the chunks on
+a process pool, and hands every message whose keyword score, reasons or keyword-only
+level changed to save_diffs (db.save_rescores). Stored risk events are not modified.
+
+Workers are started with the parent's rule lists, paraphrase exemplars and threshold
+(rules()), so rules patched at runtime apply to the workers too, not just rules edited
+in the source, whether the pool forks or spawns.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from . import chat_turn, crisis_paraphrase, risk_engine
+
+RISK_BATCH_MAX_MESSAGES = int(os.getenv("RISK_BATCH_MAX_MESSAGES", "1000"))
+RESCORE_CHUNK_SIZE = int(os.getenv("RESCORE_CHUNK_SIZE", "5000"))
+
+# (message_id, user_id, text, risk_event_id, keyword_score, reasons_json, risk_level) from db
+MessageRow = Tuple[int, str, str, Optional[int], Optional[int], Optional[str], Optional[str]]
+
+def assess(text: str) -> Dict[str, Any]:
+    score, reasons = risk_engine.calculate_risk_score(text, log=False)
+    return {"keyword_score": score, "reasons": reasons, **chat_turn.preliminary_assessment(score)}
+
+def score_batch(texts: Sequence[str]) -> List[Dict[str, Any]]:
+    """One assessment per text, in order."""
+    unique = {text: assess(text) for text in dict.fromkeys(texts)}
+    return [unique[text] for text in texts]
+
+# -----------------------------
+# Rescoring
+# -----------------------------
+
+def rules() -> Dict[str, Any]:
+    """Everything the deterministic score depends on (shipped to workers, hashed into the run's rules_version)."""
+    return {
+        "self_harm_keywords": list(risk_engine.SELF_HARM_KEYWORDS),
+        "high_risk_keywords": list(risk_engine.HIGH_RISK_KEYWORDS),
+        "self_harm_patterns": list(risk_engine.SELF_HARM_PATTERNS),
+        "scores": [risk_engine.INTENT_SCORE, risk_engine.SELF_HARM_KW_SCORE, risk_engine.HIGH_RISK_KW_SCORE],
+        "paraphrase": {
+            "enabled": crisis_paraphrase.CRISIS_PARAPHRASE,
+            "threshold": crisis_paraphrase.detector.threshold,
+            "exemplars": list(crisis_paraphrase.CRISIS_EXEMPLARS),
+            "contrast": list(crisis_paraphrase.CONTRAST_EXEMPLARS),
+        },
+    }
+
+def rules_version(rule_set: Optional[Dict[str, Any]] = None) -> str:
+    encoded = json.dumps(rule_set or rules(), sort_keys=True).encode()
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+def _init_worker(rule_set: Dict[str, Any]):
+    risk_engine.SELF_HARM_KEYWORDS[:] = rule_set["self_harm_keywords"]
+    risk_engine.HIGH_RISK_KEYWORDS[:] = rule_set["high_risk_keywords"]
+    risk_engine.SELF_HARM_PATTERNS[:] = rule_set["self_harm_patterns"]
+    risk_engine.rebuild_matcher()
+    paraphrase = rule_set["paraphrase"]
+    crisis_paraphrase.CRISIS_PARAPHRASE = paraphrase["enabled"]
+    crisis_paraphrase.CRISIS_EXEMPLARS[:] = paraphrase["exemplars"]
+    crisis_paraphrase.CONTRAST_EXEMPLARS[:] = paraphrase["contrast"]
+    crisis_paraphrase.rebuild_detector(paraphrase["threshold"])
+    risk_engine.logger.setLevel(logging.ERROR)
+
+def rescore_rows(rows: List[MessageRow]) -> List[Dict[str, Any]]:
+    """Score one chunk; returns the messages whose assessment differs from the stored one."""
+    diffs = []
+    for message_id, user_id, text, risk_event_id, old_score, old_reasons_json, stored_level in rows:
+        score, reasons = risk_engine.calculate_risk_score(text, log=False)
+        new_level = chat_turn.preliminary_assessment(score)["risk_level"]
+        if risk_event_id is None:
+            # Never assessed (stored without a risk event): only worth reporting if it scores now
+            if score == 0:
+                continue
+            old_level = None
+        else:
+            old_score = old_score or 0
+            old_reasons = json.loads(old_reasons_json or "[]")
+            old_level = chat_turn.preliminary_assessment(old_score)["risk_level"]
+            if score == old_score and reasons == old_reasons:
+                continue
+        diffs.append({
+            "message_id": message_id,
+            "risk_event_id": risk_event_id,
+            "user_id": user_id,
+            "old_keyword_score": old_score,
+            "new_keyword_score": score,
+            "old_level": old_level,
+            "new_level": new_level,
+            "stored_risk_level": stored_level,
+            "old_reasons_json": old_reasons_json,
+            "new_reasons_json": json.dumps(reasons),
+        })
+    return diffs
+
+def rescore(
+    fetch_chunk: Callable[[int, int], List[MessageRow]],
+    save_diffs: Callable[[List[Dict[str, Any]]], None],
+    chunk_size: int = RESCORE_CHUNK_SIZE,
+    workers: Optional[int] = None,
+    on_progress: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> Dict[str, Any]:
+    """
+    Stream every stored user message through rescore_rows. fetch_chunk(after_id, limit)
+    returns the next rows in message id order. At most 2 chunks per worker are in flight,
+    so memory stays bounded however large the table is. workers=1 scores in-process.
+    Returns rows, changed, level transitions ("old->new": count), seconds and rows_per_sec.
+    """
+    workers = workers or os.cpu_count() or 1
+    stats = {"rows": 0, "changed": 0, "transitions": Counter()}
+    start = time.perf_counter()
+
+    def collect(rows_scored: int, diffs: List[Dict[str, Any]]):
+        if diffs:
+            save_diffs(diffs)
+        stats["rows"] += rows_scored
+        stats["changed"] += len(diffs)
+        stats["transitions"].update(f"{d['old_level']}->{d['new_level']}" for d in diffs if d["old_level"] != d["new_level"])
+        if on_progress:
+            elapsed = time.perf_counter() - start
+            on_progress({"rows": stats["rows"], "changed": stats["changed"],
+                         "rows_per_sec": stats["rows"] / elapsed if elapsed else 0.0})
+
+    after_id = 0
+    if workers == 1:
+        while rows := fetch_chunk(after_id, chunk_size):
+            after_id = rows[-1][0]
+            collect(len(rows), rescore_rows(rows))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(rules(),)) as pool:
+            in_flight: Dict[Future, int] = {}
+            exhausted = False
+            while in_flight or not exhausted:
+                while not exhausted and len(in_flight) < 2 * workers:
+                    rows = fetch_chunk(after_id, chunk_size)
+                    if not rows:
+                        exhausted = True
+                        break
+                    after_id = rows[-1][0]
+                    in_flight[pool.submit(rescore_rows, rows)] = len(rows)
+                if in_flight:
+                    done: Set[Future] = wait(in_flight, return_when=FIRST_COMPLETED).done
+                    for future in done:
+                        collect(in_flight.pop(future), future.result())
+
+    seconds = time.perf_counter() - start
+    return {
+        "rows": stats["rows"],
+        "changed": stats["changed"],
+        "transitions": dict(stats["transitions"]),
+        "seconds": seconds,
+        "rows_per_sec": stats["rows"] / seconds if seconds else 0.0,
+    }
@@ -1,7 +1,9 @@
-from typing import List, Tuple
+from typing import List, Tuple, Optional
 import re
 import logging
 
+from . import crisis_paraphrase
+
 # Configure logger
 logger = logging.getLogger("risk_engine")
 logger.setLevel(logging.INFO)
@@ -32,47 +34,114 @@ SELF_HARM_PATTERNS = [
     r"take\s+my\s+(own\s+)?life"             # take my life
 ]
 
+INTENT_SCORE = 20       # Massive boost to ensure HIGH/CRITICAL
+SELF_HARM_KW_SCORE = 5
+HIGH_RISK_KW_SCORE = 2
+
+class RiskMatcher:
+    """
+    Keyword / intent matcher compiled once from the lists above.
+
+    - Intent patterns are precompiled and tried in list order (first match wins, as before).
+    - Keywords keep plain substring semantics; the (keyword, score, reason) table is
+      prebuilt so a hit costs one `in` check and two appends.
+    - The text is lowercased once and shared by both stages.
+
+    Note: a single combined alternation regex (or a pure-Python Aho-Corasick automaton)
+    was measured slower than per-pattern scans on CPython, because each of these scans
+    runs in C with literal-prefix / memchr acceleration that an alternation loses.
+    """
+
+    def __init__(self, self_harm_keywords: List[str], high_risk_keywords: List[str], patterns: List[str]):
+        self.patterns = tuple((p, re.compile(p)) for p in patterns)
+        self.keywords = tuple(
+            self._keyword_table(self_harm_keywords, SELF_HARM_KW_SCORE, "Detected self-harm keyword: '{}'") +
+            self._keyword_table(high_risk_keywords, HIGH_RISK_KW_SCORE, "Detected high-risk keyword: '{}'")
+        )
+
+    @staticmethod
+    def _keyword_table(keywords: List[str], kw_score: int, reason_fmt: str) -> List[Tuple[str, int, Optional[str]]]:
+        # Duplicate keywords still add to the score (as the old loop did) but only report one reason
+        table, seen = [], set()
+        for kw in keywords:
+            table.append((kw, kw_score, None if kw in seen else reason_fmt.format(kw)))
+            seen.add(kw)
+        return table
+
+    def find_intent(self, text_lower: str) -> str:
+        for pattern, compiled in self.patterns:
+            if compiled.search(text_lower):
+                return pattern
+        return ""
+
+    def score(self, text: str) -> Tuple[int, List[str], str]:
+        """
+        Returns (score, reasons, matched_intent_pattern).
+        """
+        text_lower = text.lower()
+        score = 0
+        reasons = []
+
+        pattern = self.find_intent(text_lower)
+        if pattern:
+            score += INTENT_SCORE
+            reasons.append(f"Detected self-harm intent (pattern: {pattern})")
+
+        for kw, kw_score, reason in self.keywords:
+            if kw in text_lower:
+                score += kw_score
+                if reason is not None:
+                    reasons.append(reason)
+
+        return score, reasons, pattern
+
+_matcher = RiskMatcher(SELF_HARM_KEYWORDS, HIGH_RISK_KEYWORDS, SELF_HARM_PATTERNS)
+
+def rebuild_matcher():
+    """
+    Recompile the matcher after SELF_HARM_KEYWORDS / HIGH_RISK_KEYWORDS / SELF_HARM_PATTERNS change at runtime.
+    """
+    global _matcher
+    _matcher = RiskMatcher(SELF_HARM_KEYWORDS, HIGH_RISK_KEYWORDS, SELF_HARM_PATTERNS)
+
 def detect_self_harm_intent(text: str) -> Tuple[bool, str]:
     """
     Returns (True, matched_pattern) if high-risk intent is detected via regex.
     """
-    text_norm = text.lower().strip()
-    
-    for pattern in SELF_HARM_PATTERNS:
-        match = re.search(pattern, text_norm)
-        if match:
-            logger.warning(f"Self-harm intent detected via regex: '{pattern}' in text: '{text}'")
-            return True, pattern
+    pattern = _matcher.find_intent(text.lower())
+    if pattern:
+        logger.warning(f"Self-harm intent detected via regex: '{pattern}' in text: '{text}'")
+        return True, pattern
             
     return False, ""
 
-def calculate_risk_score(text: str) -> Tuple[int, List[str]]:
+def keyword_risk_score(text: str) -> Tuple[int, List[str]]:
+    """
+    Returns (score, reasons) from the keyword lists and intent regexes alone.
+    """
+    score, reasons, _ = _matcher.score(text)
+    return score, reasons
+
+def calculate_risk_score(text: str, log: bool = True) -> Tuple[int, List[str]]:
     """
     Returns (score, reasons)
+    Reasons are unique and ordered: intent first, then self-harm keywords, then high-risk keywords,
+    then a crisis paraphrase match (crisis_paraphrase; only checked when no intent regex matched).
+    log=False skips the per-detection warnings (batch scoring and rescoring of stored messages).
     """
-    text_lower = text.lower()
-    score = 0
-    reasons = []
-
-    # 1. Check Deterministic Intent (Highest Priority)
-    intent_found, pattern = detect_self_harm_intent(text)
-    if intent_found:
-        score += 20  # Massive boost to ensure HIGH/CRITICAL
-        reasons.append(f"Detected self-harm intent (pattern: {pattern})")
-
-    # 2. Check self-harm keywords (High impact)
-    for kw in SELF_HARM_KEYWORDS:
-        if kw in text_lower:
-            score += 5
-            reasons.append(f"Detected self-harm keyword: '{kw}'")
-
-    # 3. Check general high risk keywords
-    for kw in HIGH_RISK_KEYWORDS:
-        if kw in text_lower:
-            score += 2
-            reasons.append(f"Detected high-risk keyword: '{kw}'")
-
-    return score, list(set(reasons))
+    score, reasons, pattern = _matcher.score(text)
+    if pattern:
+        if log:
+            logger.warning(f"Self-harm intent detected via regex: '{pattern}' in text: '{text}'")
+    elif crisis_paraphrase.CRISIS_PARAPHRASE:
+        match = crisis_paraphrase.detector.match(text)
+        if match is not None:
+            # Capped at a high-risk keyword: a lexical lookalike floors at medium, the LLM decides on high
+            score += HIGH_RISK_KW_SCORE
+            reasons.append(f"Detected crisis paraphrase (similarity {match.similarity:.2f}): '{match.exemplar}'")
+            if log:
+                logger.warning(f"Crisis paraphrase detected ({match.similarity:.2f}, '{match.exemplar}') in text: '{text}'")
+    return score, reasons
 
 def determinize_risk_level(llm_risk: str, keyword_score: int, self_harm_detected_llm: bool) -> str:
     """
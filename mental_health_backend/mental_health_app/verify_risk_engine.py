@@ -1,9 +1,12 @@
 
 import sys
-import os
+from pathlib import Path
 
-# Add the project root to the python path so we can import modules
-sys.path.append("c:/Honey/Projects/My_Sehat/BACKEND/mental_health_backend")
+# Make `services` importable from any working directory (this file sits next to it)
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+# Smoke test only; for precision/recall on the labelled corpus and throughput run
+#   python mental_health_backend/benchmarks/eval_risk_engine.py
 
 from services.risk_engine import calculate_risk_score, determinize_risk_level, get_actions, SELF_HARM_KEYWORDS
 
@@ -66,6 +69,7 @@ def test_risk_engine():
         print("\nAll tests passed!")
     else:
         print(f"\n{failures} tests failed.")
+    return failures
 
 if __name__ == "__main__":
-    test_risk_engine()
+    sys.exit(1 if test_risk_engine() else 0)
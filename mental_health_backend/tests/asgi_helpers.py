@@ -0,0 +1,76 @@
+"""
+Drive an ASGI app in-process and timestamp every response body chunk, so tests and
+benchmarks can measure time to first byte without a socket in the way.
+"""
+
+import asyncio
+import json
+import time
+from typing import Any, Dict, List, Tuple
+
+
+async def post_asgi(app, path: str, payload: Dict[str, Any]) -> Tuple[List[Tuple[float, bytes]], float]:
+    """
+    POST a JSON body to an ASGI app. Returns ([(seconds since request, body chunk), ...],
+    seconds until the response completed).
+    """
+    body = json.dumps(payload).encode()
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        "client": ("127.0.0.1", 50000),
+        "server": ("127.0.0.1", 80),
+    }
+    finished = asyncio.Event()
+    request_sent = False
+    chunks: List[Tuple[float, bytes]] = []
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        # Keep the connection "open" until the response is complete
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    start = time.perf_counter()
+
+    async def send(message):
+        if message["type"] == "http.response.body" and message.get("body"):
+            chunks.append((time.perf_counter() - start, message["body"]))
+
+    await app(scope, receive, send)
+    total = time.perf_counter() - start
+    finished.set()
+    return chunks, total
+
+
+def first_byte(chunks: List[Tuple[float, bytes]]) -> float:
+    return chunks[0][0]
+
+
+def first_reply_text(chunks: List[Tuple[float, bytes]]) -> float:
+    """When the user first sees reply text: the first SSE token event, or the whole JSON body."""
+    for t, chunk in chunks:
+        if not chunk.startswith(b"event:") or chunk.startswith(b"event: token"):
+            return t
+    return chunks[-1][0]
+
+
+def parse_sse(raw: bytes) -> List[Tuple[str, Any]]:
+    events = []
+    for block in raw.decode().split("\n\n"):
+        if not block.strip():
+            continue
+        fields = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
@@ -0,0 +1,26 @@
+import pytest
+from mental_health_backend.mental_health_app import db
+from mental_health_backend.mental_health_app.services import ai_agent, conversation_memory
+from mental_health_backend.mental_health_app.services.llm_providers import OpenAICompatibleProvider
+from mental_health_backend.tests.llm_stub_server import StubLLMServer
+
+
+@pytest.fixture
+def temp_db(tmp_path):
+    original = db.DB_NAME
+    db.DB_NAME = str(tmp_path / "mental_health_test.db")
+    db.init_db()
+    # Cached conversations belong to the previous test's database
+    conversation_memory.memory.clear()
+    yield db
+    db.close_db_connections()
+    conversation_memory.memory.clear()
+    db.DB_NAME = original
+
+
+@pytest.fixture
+def stub_llm(monkeypatch):
+    """Local OpenAI-compatible stub: first token after 0.3 s, streaming chunks every 5 ms."""
+    with StubLLMServer(delay=0.3, token_delay=0.005) as server:
+        monkeypatch.setattr(ai_agent, "_provider", OpenAICompatibleProvider(base_url=server.base_url, api_key="stub"))
+        yield server
@@ -0,0 +1,70 @@
+"""
+Held-out data for the crisis paraphrase detector.
+
+PARAPHRASES are crisis messages the keyword lists and intent regexes miss, worded
+differently from every CRISIS_EXEMPLARS entry; NEAR_MISSES are everyday messages that
+share surface forms with them ("tired of my job", "better off with a bigger house").
+Neither list overlaps the exemplars or the contrast phrases. Used by
+tests/test_crisis_paraphrase.py and benchmarks/eval_crisis_paraphrase.py.
+"""
+
+PARAPHRASES = [
+    "I don't see any reason to get out of bed anymore",
+    "nobody would even notice if I disappeared",
+    "I'm so tired of being alive",
+    "everyone would be happier without me around",
+    "I just want to go to sleep and not wake up",
+    "there's no point in going on",
+    "I can't keep living like this",
+    "I have been thinking of ending everything",
+    "I'm planning to end things tonight",
+    "life is not worth it anymore",
+    "what is even the point of living",
+    "I don't want to be alive anymore",
+    "I gave away all my stuff and said goodbye",
+    "my kids would be better off without me",
+    "I've been researching how to overdose",
+    "I feel like I won't be here much longer",
+    "jeene ka koi matlab nahi",
+    "I wish I had never been born",
+    "I can't do this any more",
+    "I wish I could just vanish forever",
+    "honestly I just want everything to stop",
+    "I don't think I'll be here next week",
+    "there's no reason for me to keep going",
+    "I'm a waste of space and everyone would be fine without me",
+    "I want to go to sleep forever",
+]
+
+NEAR_MISSES = [
+    "I don't see the point of this meeting",
+    "I'm tired of my boring job",
+    "I can't wait to go to sleep tonight",
+    "what's the point of homework",
+    "I want to wake up early tomorrow",
+    "my family would be better off with a bigger house",
+    "I had a great day today",
+    "I'm done with my exams",
+    "I can't do this math problem",
+    "the world is a big place",
+    "I want to sleep in this weekend",
+    "no reason to worry, everything is fine",
+    "I love living here",
+    "I hope I wake up on time tomorrow",
+    "I'm tired after the gym",
+    "I gave away my old clothes to charity",
+    "I'm going to do something fun this weekend",
+    "this is the last time I eat that pizza",
+    "I'm not going anywhere",
+    "nobody came to my party",
+    "I'm sick of rain",
+    "there's no point arguing with him",
+    "I want to stop procrastinating",
+    "my brother would be better off studying",
+    "I'm done cooking, dinner is ready",
+    "can't do this level of the game",
+    "I just want the semester to end",
+    "ugh mondays",
+    "what's the point in buying a new phone",
+    "I'll be away for a week",
+]
@@ -0,0 +1,167 @@
+"""
+Local stub of an OpenAI-compatible /chat/completions endpoint for tests and benchmarks.
+
+Runs a tiny asyncio HTTP/1.1 server (keep-alive aware) on a background thread and
+answers every completion after a fixed delay with a valid mental-health JSON reply.
+Requests with "stream": true get the same reply as chat.completion.chunk SSE events:
+the first chunk after `delay`, then one chunk of `token_chars` characters every `token_delay`.
+"""
+
+import asyncio
+import json
+import threading
+import time
+from typing import Optional
+
+STUB_REPLY = {
+    "risk_level": "low",
+    "self_harm_detected": False,
+    "reply": "Thanks for sharing that with me. How has the rest of your day been?",
+    "advice": ["Take a short walk", "Drink some water"]
+}
+
+
+def _completion_body(content: str) -> bytes:
+    return json.dumps({
+        "id": "chatcmpl-stub",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": "stub",
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop"
+        }],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+    }).encode()
+
+
+def _chunk_event(content: Optional[str]) -> bytes:
+    event = json.dumps({
+        "id": "chatcmpl-stub",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": "stub",
+        "choices": [{
+            "index": 0,
+            "delta": {"content": content} if content is not None else {},
+            "finish_reason": None if content is not None else "stop"
+        }]
+    })
+    data = f"data: {event}\n\n".encode()
+    # HTTP/1.1 chunked transfer encoding frame
+    return f"{len(data):x}\r\n".encode() + data + b"\r\n"
+
+
+class StubLLMServer:
+    """
+    Usage:
+        with StubLLMServer(delay=0.2) as server:
+            os.environ["GROQ_BASE_URL"] = server.base_url
+    """
+
+    def __init__(self, delay: float = 0.2, host: str = "127.0.0.1", port: int = 0,
+                 token_delay: float = 0.0, token_chars: int = 8):
+        self.delay = delay
+        self.token_delay = token_delay
+        self.token_chars = token_chars
+        self.host = host
+        self.port = port
+        self.requests_served = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._server = None
+        self._ready = threading.Event()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                headers = {}
+                for line in head.decode("latin-1").split("\r\n")[1:]:
+                    if ":" in line:
+                        k, v = line.split(":", 1)
+                        headers[k.strip().lower()] = v.strip()
+                length = int(headers.get("content-length", "0"))
+                request = json.loads(await reader.readexactly(length)) if length else {}
+
+                if request.get("stream"):
+                    await self._stream(writer)
+                    self.requests_served += 1
+                    continue
+
+                await asyncio.sleep(self.delay)
+                body = _completion_body(json.dumps(STUB_REPLY))
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\n"
+                    b"Content-Type: application/json\r\n"
+                    b"Connection: keep-alive\r\n"
+                    + f"Content-Length: {len(body)}\r\n\r\n".encode()
+                    + body
+                )
+                await writer.drain()
+                self.requests_served += 1
+        except (asyncio.IncompleteReadError, ConnectionResetError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def _stream(self, writer: asyncio.StreamWriter):
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/event-stream\r\n"
+            b"Connection: keep-alive\r\n"
+            b"Transfer-Encoding: chunked\r\n\r\n"
+        )
+        await writer.drain()
+        await asyncio.sleep(self.delay)
+
+        content = json.dumps(STUB_REPLY)
+        for i in range(0, len(content), self.token_chars):
+            if i and self.token_delay:
+                await asyncio.sleep(self.token_delay)
+            writer.write(_chunk_event(content[i:i + self.token_chars]))
+            await writer.drain()
+        done = b"data: [DONE]\n\n"
+        writer.write(_chunk_event(None) + f"{len(done):x}\r\n".encode() + done + b"\r\n0\r\n\r\n")
+        await writer.drain()
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._server = self._loop.run_until_complete(
+            asyncio.start_server(self._handle, self.host, self.port, backlog=1024)
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self._loop.run_forever()
+        self._loop.close()
+
+    async def _shutdown(self):
+        self._server.close()
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._loop.stop()
+
+    def start(self) -> "StubLLMServer":
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def stop(self):
+        if self._loop is not None:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop)
+            self._thread.join(timeout=5)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,83 @@
+"""
+Reference material for the risk engine: a mixed chat/journal corpus and a verbatim copy
+of the pre-matcher keyword scorer. Used by the equivalence tests and by
+benchmarks/bench_risk_engine.py.
+"""
+
+import random
+import re
+from typing import List, Tuple
+
+from mental_health_backend.mental_health_app.services import risk_engine
+
+SHORT_MESSAGES = [
+    "hi",
+    "I had a pretty good day today",
+    "can't sleep again, mind is racing",
+    "my exams are stressing me out so much",
+    "I feel a bit sad and tired",
+    "work was exhausting and my boss yelled at me",
+    "I feel hopeless and worthless lately",
+    "everything feels unbearable, I just want to give up",
+    "I want to die",
+    "sometimes I think about suicide",
+    "I'm a burden to everyone, goodbye",
+    "went for a jog and studied for my test",
+    "I feel trapped and desperate",
+    "I keep thinking about ending my life",
+    "nobody would care if I was gone",
+]
+
+LONG_FILLER = (
+    "Today started slowly. I woke up late, made some tea and tried to read a few pages "
+    "before class. The lecture was about statistics and I studied for a couple of hours "
+    "afterwards in the library. In the evening I called my sister and we talked about "
+    "her new job, which made me smile. Dinner was simple, rice and dal, and then I "
+    "watched an episode of a show I like. "
+)
+
+
+def build_corpus(seed: int = 7, long_count: int = 60) -> List[str]:
+    """Short messages (x40) plus multi-KB entries, some with risk phrases buried inside."""
+    rng = random.Random(seed)
+    corpus = SHORT_MESSAGES * 40
+    for i in range(long_count):
+        body = LONG_FILLER * rng.randint(6, 20)
+        if i % 3 == 0:
+            cut = rng.randint(0, len(body))
+            body = body[:cut] + " " + rng.choice(SHORT_MESSAGES) + " " + body[cut:]
+        corpus.append(body)
+    return corpus
+
+
+# --- Legacy implementation (reference copy) ---
+
+def legacy_detect_self_harm_intent(text: str) -> Tuple[bool, str]:
+    text_norm = text.lower().strip()
+    for pattern in risk_engine.SELF_HARM_PATTERNS:
+        if re.search(pattern, text_norm):
+            return True, pattern
+    return False, ""
+
+
+def legacy_calculate_risk_score(text: str) -> Tuple[int, List[str]]:
+    text_lower = text.lower()
+    score = 0
+    reasons = []
+
+    intent_found, pattern = legacy_detect_self_harm_intent(text)
+    if intent_found:
+        score += 20
+        reasons.append(f"Detected self-harm intent (pattern: {pattern})")
+
+    for kw in risk_engine.SELF_HARM_KEYWORDS:
+        if kw in text_lower:
+            score += 5
+            reasons.append(f"Detected self-harm keyword: '{kw}'")
+
+    for kw in risk_engine.HIGH_RISK_KEYWORDS:
+        if kw in text_lower:
+            score += 2
+            reasons.append(f"Detected high-risk keyword: '{kw}'")
+
+    return score, list(set(reasons))
@@ -0,0 +1,97 @@
+import asyncio
+import json
+import pytest
+from mental_health_backend.mental_health_app import db
+from mental_health_backend.mental_health_app.services import ai_agent, chat_turn
+from mental_health_backend.tests.llm_stub_server import STUB_REPLY
+from mental_health_backend.tests.asgi_helpers import post_asgi, parse_sse, first_byte, first_reply_text
+from gateway.main import gateway_app
+
+STUB_DELAY = 0.3  # stub_llm fixture (conftest.py)
+
+
+def post(path, message, user_id="s1"):
+    async def go():
+        try:
+            return await post_asgi(gateway_app, path, {"user_id": user_id, "message": message})
+        finally:
+            await chat_turn.drain_background_tasks()
+            await ai_agent.shutdown_async_client()
+    return asyncio.run(go())
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 8, 1000])
+def test_reply_extractor_decodes_across_chunks(chunk_size):
+    reply = 'Say "hi"\nto yourself \\ 😀 é'
+    for raw in (json.dumps({"risk_level": "low", "reply": reply, "advice": ["a"]}),
+                json.dumps({"risk_level": "low", "reply": reply}, ensure_ascii=False)):
+        extractor = ai_agent.ReplyStreamExtractor()
+        pieces = [extractor.feed(raw[i:i + chunk_size]) for i in range(0, len(raw), chunk_size)]
+        assert "".join(pieces) == reply == extractor.text
+        assert extractor.done
+        assert ai_agent.extract_json(extractor.buffer)["reply"] == reply
+
+
+def test_stream_sends_risk_before_llm_and_persists_turn(temp_db, stub_llm):
+    chunks, total = post("/mental-health/chat/stream", "I feel hopeless today")
+    events = parse_sse(b"".join(chunk for _, chunk in chunks))
+
+    # Deterministic assessment goes out before the LLM has produced anything
+    assert first_byte(chunks) < STUB_DELAY
+    assert events[0] == ("risk", {"risk_level": "medium", "self_harm_detected": False, "actions": ["SUGGEST_TRUSTED_CONTACT"]})
+
+    tokens = [data["text"] for kind, data in events if kind == "token"]
+    assert len(tokens) > 1
+    assert "".join(tokens) == STUB_REPLY["reply"]
+    assert first_reply_text(chunks) < total
+
+    kind, done = events[-1]
+    assert kind == "done"
+    assert done["reply"] == STUB_REPLY["reply"]
+    assert done["advice"] == STUB_REPLY["advice"]
+    assert done["risk_level"] == "medium"
+
+    rows = db.get_db_connection().execute(
+        "SELECT role, text FROM messages WHERE user_id = 's1' ORDER BY id"
+    ).fetchall()
+    assert [tuple(r) for r in rows] == [("user", "I feel hopeless today"), ("assistant", STUB_REPLY["reply"])]
+
+
+def test_json_endpoint_waits_for_whole_completion(temp_db, stub_llm):
+    chunks, _ = post("/mental-health/chat/message", "I feel hopeless today")
+    assert first_byte(chunks) >= STUB_DELAY
+    assert json.loads(b"".join(chunk for _, chunk in chunks))["reply"] == STUB_REPLY["reply"]
+
+
+def test_stream_without_llm_sends_crisis_reply(temp_db, monkeypatch):
+    monkeypatch.delenv("GROQ_API_KEY", raising=False)
+    chunks, _ = post("/mental-health/chat/stream", "I want to kill myself", user_id="s2")
+    events = parse_sse(b"".join(chunk for _, chunk in chunks))
+
+    assert events[0][1]["self_harm_detected"] is True
+    assert events[0][1]["risk_level"] == "high"
+    assert events[1] == ("token", {"text": chat_turn.CRISIS_FALLBACK_REPLY})
+    assert events[-1][1]["reply"] == chat_turn.CRISIS_FALLBACK_REPLY
+    assert "SHOW_SOS" in events[-1][1]["actions"]
+
+
+def test_stream_disconnect_keeps_the_turn(temp_db, stub_llm):
+    message = "I took an overdose of pills earlier today"
+
+    async def go():
+        stream = chat_turn.stream_chat_turn("s3", message, db.save_chat_turn, db.enrich_risk_event, db.get_recent_messages)
+        try:
+            async for event in stream:
+                if event.startswith("event: token"):
+                    break  # client goes away after the first token
+        finally:
+            await stream.aclose()
+            await ai_agent.shutdown_async_client()
+
+    asyncio.run(go())
+    conn = db.get_db_connection()
+    assert [tuple(r) for r in conn.execute("SELECT role, text FROM messages WHERE user_id = 's3'")] == [("user", message)]
+    event = conn.execute("SELECT id, risk_level, keyword_score FROM risk_events WHERE user_id = 's3'").fetchone()
+    assert (event["risk_level"], event["keyword_score"]) == ("high", 5)
+    assert db.get_risk_rollup("s3")["counts"] == {"high": 1}
+    assert [r["risk_event_id"] for r in conn.execute("SELECT risk_event_id FROM escalation_outbox WHERE user_id = 's3'")] == [event["id"]]
@@ -0,0 +1,125 @@
+import asyncio
+import time
+import pytest
+from mental_health_backend.mental_health_app.services import ai_agent
+from mental_health_backend.mental_health_app.services.circuit_breaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+from mental_health_backend.mental_health_app.services.llm_providers import MockProvider, OpenAICompatibleProvider
+from mental_health_backend.tests.llm_stub_server import StubLLMServer, STUB_REPLY
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_breaker_trips_after_consecutive_failures():
+    breaker = CircuitBreaker("t", failure_threshold=3, reset_timeout=10, clock=FakeClock())
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record_failure()
+    breaker.record_success()  # resets the streak
+    for _ in range(3):
+        assert breaker.allow()
+        breaker.record_failure()
+
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert breaker.stats()["short_circuits"] == 1
+    assert breaker.stats()["trips"] == 1
+
+
+def test_half_open_lets_one_probe_through():
+    clock = FakeClock()
+    breaker = CircuitBreaker("t", failure_threshold=1, reset_timeout=10, clock=clock)
+    breaker.allow()
+    breaker.record_failure()
+
+    clock.now = 10
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()  # probe already in flight
+
+    breaker.record_failure()  # failed probe re-opens
+    assert breaker.state == OPEN and breaker.stats()["trips"] == 2
+
+    clock.now = 20
+    assert breaker.allow()
+    breaker.release()  # cancelled probe frees the slot
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow() and breaker.allow()
+
+
+@pytest.fixture
+def slow_llm(monkeypatch):
+    with StubLLMServer(delay=0.5) as server:
+        monkeypatch.setattr(ai_agent, "_provider", OpenAICompatibleProvider(base_url=server.base_url, api_key="stub"))
+        monkeypatch.setattr(ai_agent, "LLM_DEADLINE_SECONDS", 0.1)
+        monkeypatch.setattr(ai_agent, "llm_breaker", CircuitBreaker("llm", failure_threshold=2, reset_timeout=0.3))
+        yield server
+
+
+def test_deadline_and_breaker_short_circuit_llm(slow_llm):
+    async def scenario():
+        timings = []
+        try:
+            for _ in range(3):
+                start = time.perf_counter()
+                result = await ai_agent.analyze_message_llm_async("hello")
+                timings.append(time.perf_counter() - start)
+                assert result["reply"] == ai_agent.FALLBACK_ERROR_MESSAGE
+            summary = await ai_agent.summarize_day_llm_async({"mood": "ok"})
+            assert summary == ai_agent.build_summary_fallback()
+
+            # Provider recovers: after reset_timeout a probe goes through and closes the breaker
+            slow_llm.delay = 0.0
+            await asyncio.sleep(0.3)
+            recovered = await ai_agent.analyze_message_llm_async("hello")
+        finally:
+            await ai_agent.shutdown_async_client()
+        return timings, recovered
+
+    timings, recovered = asyncio.run(scenario())
+
+    # Two calls hit the deadline, the third is answered by the open breaker without waiting
+    assert all(t < 0.3 for t in timings[:2])
+    assert timings[2] < 0.01
+    stats = ai_agent.llm_breaker.stats()
+    assert stats["failures"] == 2 and stats["short_circuits"] == 2
+    assert recovered["reply"] == STUB_REPLY["reply"]
+    assert stats["state"] == CLOSED
+
+
+def test_sync_summary_uses_deadline(slow_llm):
+    start = time.perf_counter()
+    assert ai_agent.summarize_day_llm({"mood": "ok"}) == ai_agent.build_summary_fallback()
+    assert time.perf_counter() - start < 0.4
+    assert ai_agent.llm_breaker.stats()["failures"] == 1
+
+
+def test_queueing_burst_does_not_trip_breaker(monkeypatch):
+    # Healthy provider, but a burst queues for longer than the deadline allows
+    monkeypatch.setattr(ai_agent, "_provider", MockProvider(latency=0.1))
+    monkeypatch.setattr(ai_agent, "LLM_DEADLINE_SECONDS", 0.25)
+    monkeypatch.setattr(ai_agent, "LLM_MAX_CONCURRENCY", 8)
+    monkeypatch.setattr(ai_agent, "llm_scheduler", None)
+    monkeypatch.setattr(ai_agent, "llm_breaker", CircuitBreaker("llm", failure_threshold=5, reset_timeout=30))
+
+    async def scenario():
+        try:
+            burst = await asyncio.gather(*(ai_agent.analyze_message_llm_async(f"hi {i}") for i in range(40)))
+            after = await ai_agent.analyze_message_llm_async("I feel hopeless", priority="high")
+        finally:
+            await ai_agent.shutdown_async_client()
+        return burst, after
+
+    burst, after = asyncio.run(scenario())
+    fallbacks = sum(r["reply"] == ai_agent.FALLBACK_ERROR_MESSAGE for r in burst)
+    assert 0 < fallbacks < 40  # the tail of the burst queued past the deadline...
+    stats = ai_agent.llm_breaker.stats()
+    assert stats["failures"] == 0 and stats["state"] == CLOSED  # ...without counting against the provider
+    assert after["reply"] != ai_agent.FALLBACK_ERROR_MESSAGE
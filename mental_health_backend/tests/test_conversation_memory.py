@@ -0,0 +1,88 @@
+import asyncio
+import json
+from mental_health_backend.mental_health_app import db
+from mental_health_backend.mental_health_app.services import ai_agent, conversation_memory
+from mental_health_backend.mental_health_app.services.conversation_memory import ConversationMemory, estimate_tokens
+from mental_health_backend.mental_health_app.services.llm_providers import MockProvider, MOCK_CHAT_REPLY
+from mental_health_backend.tests.test_chat_stream import post
+
+
+def no_history(user_id, limit):
+    return []
+
+
+def test_ring_buffer_folds_old_turns_into_bounded_summary():
+    memory = ConversationMemory(max_turns=2, summary_tokens=30, prompt_token_budget=10_000)
+    asyncio.run(memory.context("u", no_history))
+    for i in range(10):
+        memory.record_turn("u", f"Day {i} was rough. More details follow here.", f"reply {i}")
+
+    context = asyncio.run(memory.context("u", no_history))
+    lines = context.split("\n")
+    # Only the last two turns stay verbatim
+    assert lines[1:] == [
+        "User: Day 8 was rough. More details follow here.", "You: reply 8",
+        "User: Day 9 was rough. More details follow here.", "You: reply 9",
+    ]
+    # Older user messages survive as first-sentence extracts, newest kept within the summary budget
+    assert lines[0].startswith("Earlier the user said: ") and lines[0].endswith("Day 7 was rough.")
+    assert "More details" not in lines[0] and "reply" not in lines[0]
+    assert "Day 0" not in lines[0]
+    assert memory.stats()["summary_folds"] == 8
+
+
+def test_context_respects_prompt_token_budget():
+    memory = ConversationMemory(max_turns=6, prompt_token_budget=300)
+    asyncio.run(memory.context("u", no_history))
+    for i in range(6):
+        memory.record_turn("u", f"message {i} " + "x" * 200, "ok")
+
+    context = asyncio.run(memory.context("u", no_history, reserved_tokens=150))
+    assert estimate_tokens(context) <= 150 + 10
+    assert context.endswith("You: ok") and "message 5" in context and "message 0" not in context
+    stats = memory.stats()
+    assert stats["prompt_tokens_max"] <= 300 and stats["dropped_messages"] > 0
+
+
+def test_miss_reads_recent_turns_from_messages_table(temp_db):
+    for i in range(3):
+        db.save_chat_turn("m1", f"hello {i}", f"hi {i}", "low", False, 0, [])
+
+    memory = ConversationMemory(max_turns=2)
+    context = asyncio.run(memory.context("m1", db.get_recent_messages))
+    assert context.split("\n") == [
+        "Earlier the user said: hello 0",
+        "User: hello 1", "You: hi 1", "User: hello 2", "You: hi 2",
+    ]
+    asyncio.run(memory.context("m1", db.get_recent_messages))
+    assert (memory.stats()["misses"], memory.stats()["hits"]) == (1, 1)
+
+
+def test_prompt_size_stays_flat_over_long_conversation():
+    memory = ConversationMemory(max_turns=6, summary_tokens=200, prompt_token_budget=1200)
+    asyncio.run(memory.context("u", no_history))
+    sizes = []
+    for i in range(500):
+        context = asyncio.run(memory.context("u", no_history, reserved_tokens=300))
+        sizes.append(estimate_tokens(context or ""))
+        memory.record_turn("u", f"Turn {i}: I keep thinking about work and it is exhausting.", "That sounds heavy. " * 5)
+    assert max(sizes[50:]) == max(sizes[450:])
+    assert memory.stats()["prompt_tokens_max"] <= 1200
+
+
+def test_chat_endpoint_sends_earlier_turns_to_llm(temp_db, monkeypatch):
+    prompts = []
+
+    def responder(messages):
+        prompts.append(messages)
+        return json.dumps(MOCK_CHAT_REPLY)
+
+    monkeypatch.setattr(ai_agent, "_provider", MockProvider(latency=0, responder=responder))
+    post("/mental-health/chat/message", "My exam is tomorrow", user_id="mem1")
+    post("/mental-health/chat/stream", "I still can't focus", user_id="mem1")
+
+    assert len(prompts[0]) == 2  # first turn: system prompt + message only
+    context = prompts[1][1]["content"]
+    assert context.startswith("Conversation so far:")
+    assert "User: My exam is tomorrow" in context and f"You: {MOCK_CHAT_REPLY['reply']}" in context
+    assert conversation_memory.memory.stats()["users"] == 1
@@ -0,0 +1,56 @@
+import json
+from mental_health_backend.mental_health_app import db
+from mental_health_backend.mental_health_app.services import chat_turn
+from mental_health_backend.tests.llm_stub_server import STUB_REPLY
+from mental_health_backend.tests.asgi_helpers import first_byte
+from mental_health_backend.tests.test_chat_stream import STUB_DELAY, post
+
+CRISIS_MESSAGE = "I want to kill myself tonight"
+
+
+def rows(user_id):
+    conn = db.get_db_connection()
+    messages = conn.execute("SELECT role, text FROM messages WHERE user_id = ? ORDER BY id", (user_id,)).fetchall()
+    events = conn.execute("SELECT * FROM risk_events WHERE user_id = ?", (user_id,)).fetchall()
+    return [tuple(m) for m in messages], events
+
+
+def test_crisis_reply_does_not_wait_for_llm(temp_db, stub_llm):
+    chunks, _ = post("/mental-health/chat/message", CRISIS_MESSAGE, user_id="c1")
+    body = json.loads(b"".join(chunk for _, chunk in chunks))
+
+    assert first_byte(chunks) < STUB_DELAY / 3
+    assert body["reply"] == chat_turn.CRISIS_FALLBACK_REPLY
+    assert body["self_harm_detected"] is True
+    assert body["actions"] == ["SHOW_SOS", "SHOW_HELPLINE", "SUGGEST_TRUSTED_CONTACT"]
+
+    # post() drains background tasks, so the LLM enrichment has landed by now
+    messages, events = rows("c1")
+    assert messages == [
+        ("user", CRISIS_MESSAGE),
+        ("assistant", chat_turn.CRISIS_FALLBACK_REPLY),
+        ("assistant", STUB_REPLY["reply"]),
+    ]
+    assert len(events) == 1
+    event = events[0]
+    assert event["llm_risk_level"] == "low" and event["enriched_at"] is not None
+    # The LLM said "low" but the keyword floor keeps the event at high
+    assert event["risk_level"] == "high" and event["self_harm_detected"] == 1
+
+
+def test_crisis_stream_uses_fast_path(temp_db, stub_llm):
+    chunks, total = post("/mental-health/chat/stream", CRISIS_MESSAGE, user_id="c2")
+    raw = b"".join(chunk for _, chunk in chunks).decode()
+    assert raw.count("event: token") == 1
+    assert raw.rstrip().split("\n")[-2] == "event: done"
+    assert total < STUB_DELAY
+
+
+def test_crisis_without_llm_keeps_stored_reply(temp_db, monkeypatch):
+    monkeypatch.delenv("GROQ_API_KEY", raising=False)
+    post("/mental-health/chat/message", CRISIS_MESSAGE, user_id="c3")
+
+    messages, events = rows("c3")
+    assert [role for role, _ in messages] == ["user", "assistant"]
+    assert events[0]["enriched_at"] is None
+
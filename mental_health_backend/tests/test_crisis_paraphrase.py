@@ -0,0 +1,83 @@
+import logging
+import pytest
+from mental_health_backend.mental_health_app.services import crisis_paraphrase, model_router, risk_engine
+from mental_health_backend.tests.crisis_paraphrase_cases import NEAR_MISSES, PARAPHRASES
+from mental_health_backend.tests.risk_engine_reference import LONG_FILLER
+
+risk_engine.logger.setLevel(logging.ERROR)
+
+
+def test_paraphrase_adds_reason_and_score():
+    score, reasons = risk_engine.calculate_risk_score("I'm so tired of being alive")
+    assert score == risk_engine.HIGH_RISK_KW_SCORE
+    assert len(reasons) == 1
+    assert reasons[0].startswith("Detected crisis paraphrase (similarity 0.9")
+    assert reasons[0].endswith("'I'm tired of being alive'")
+
+    score, reasons = risk_engine.calculate_risk_score("there's no point in going on")
+    assert score == risk_engine.HIGH_RISK_KW_SCORE
+    assert reasons[0].startswith("Detected crisis paraphrase")
+
+
+def test_close_match_floors_at_medium_and_leaves_high_to_the_llm():
+    score, _ = risk_engine.calculate_risk_score("I'm so tired of being alive")
+    assert crisis_paraphrase.detector.match("I'm so tired of being alive").similarity >= 0.9
+    assert risk_engine.determinize_risk_level("low", score, False) == "medium"
+    assert risk_engine.determinize_risk_level("high", score, False) == "high"
+    assert model_router.ModelRouter(enabled=True).route_for(score, "I'm so tired of being alive").name == "escalation"
+
+
+@pytest.mark.parametrize("text", [
+    "I wish I could disappear for a vacation",
+    "I'm tired of living in this city",
+    "I want to sleep forever this weekend",
+    "I'm done with life admin today",
+    "I want to take all my pills with water as prescribed",
+])
+def test_benign_lookalikes_do_not_trigger_sos(text):
+    score, _ = risk_engine.calculate_risk_score(text)
+    assert score < risk_engine.SELF_HARM_KW_SCORE
+    assert risk_engine.determinize_risk_level("low", score, False) != "high"
+
+
+def test_everyday_messages_are_not_flagged():
+    for text in ("I had a great day today", "I'm tired after the gym", "I hope I wake up on time tomorrow"):
+        assert risk_engine.calculate_risk_score(text) == (0, [])
+
+
+def test_held_out_recall_and_false_positive_rate():
+    detector = crisis_paraphrase.detector
+    recall = sum(detector.match(t) is not None for t in PARAPHRASES) / len(PARAPHRASES)
+    false_positives = sum(detector.match(t) is not None for t in NEAR_MISSES) / len(NEAR_MISSES)
+    assert recall >= 0.8
+    assert false_positives <= 0.1
+
+
+def test_intent_regex_takes_precedence():
+    score, reasons = risk_engine.calculate_risk_score("I want to die, I'm tired of being alive")
+    assert score >= risk_engine.INTENT_SCORE
+    assert not any("paraphrase" in r for r in reasons)
+
+
+def test_crisis_sentence_inside_long_entry():
+    entry = LONG_FILLER * 3 + " Honestly I don't want to be alive anymore. " + LONG_FILLER
+    match = crisis_paraphrase.detector.match(entry)
+    assert match is not None and match.similarity >= crisis_paraphrase.CRISIS_PARAPHRASE_THRESHOLD
+    assert crisis_paraphrase.detector.match(LONG_FILLER * 4) is None
+
+
+def test_disabled_and_rebuild(monkeypatch):
+    monkeypatch.setattr(crisis_paraphrase, "CRISIS_PARAPHRASE", False)
+    assert risk_engine.calculate_risk_score("I'm so tired of being alive") == (0, [])
+    monkeypatch.setattr(crisis_paraphrase, "CRISIS_PARAPHRASE", True)
+
+    text = "my cat knocked the plant over"
+    assert crisis_paraphrase.detector.match(text) is None
+    crisis_paraphrase.CRISIS_EXEMPLARS.append("the cat knocked over my plant")
+    try:
+        crisis_paraphrase.rebuild_detector()
+        assert crisis_paraphrase.detector.match(text).exemplar == "the cat knocked over my plant"
+    finally:
+        crisis_paraphrase.CRISIS_EXEMPLARS.pop()
+        crisis_paraphrase.rebuild_detector()
+
@@ -0,0 +1,187 @@
+import threading
+import pytest
+from mental_health_backend.mental_health_app import db
+
+
+def test_connection_is_reused_and_tuned(temp_db):
+    conn = db.get_db_connection()
+    assert db.get_db_connection() is conn
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+
+
+def test_each_thread_gets_its_own_connection(temp_db):
+    main_conn = db.get_db_connection()
+    seen = []
+    t = threading.Thread(target=lambda: seen.append(db.get_db_connection()))
+    t.start()
+    t.join()
+    assert seen[0] is not main_conn
+
+
+def test_close_all_then_reconnect(temp_db):
+    msg_id = db.save_message("u1", "user", "hello")
+    first = db.get_db_connection()
+    db.close_db_connections()
+
+    assert db.get_db_connection() is not first
+    db.save_risk_event("u1", msg_id, "low", False, 0, [])
+    db.save_daily_summary("u1", "2026-01-01", "calm day", "low")
+    assert db.get_daily_summary("u1", "2026-01-01")["summary_text"] == "calm day"
+
+
+def test_save_chat_turn_writes_linked_rows(temp_db):
+    ids = db.save_chat_turn("u2", "I feel hopeless", "I'm here with you.", "medium", False, 2,
+                            ["Detected high-risk keyword: 'hopeless'"], user_created_at="2026-01-01T10:00:00")
+    conn = db.get_db_connection()
+    user_row = conn.execute("SELECT * FROM messages WHERE id = ?", (ids["user_message_id"],)).fetchone()
+    assert user_row["role"] == "user" and user_row["created_at"] == "2026-01-01T10:00:00"
+    event = conn.execute("SELECT * FROM risk_events WHERE id = ?", (ids["risk_event_id"],)).fetchone()
+    assert event["message_id"] == ids["user_message_id"]
+    assert conn.execute("SELECT role FROM messages WHERE id = ?", (ids["assistant_message_id"],)).fetchone()[0] == "assistant"
+
+
+def test_save_chat_turn_is_atomic(temp_db, monkeypatch):
+    original_insert = db._insert_message
+
+    def failing_insert(conn, user_id, role, text, created_at):
+        if role == "assistant":
+            raise RuntimeError("process died mid-turn")
+        return original_insert(conn, user_id, role, text, created_at)
+
+    monkeypatch.setattr(db, "_insert_message", failing_insert)
+    with pytest.raises(RuntimeError):
+        db.save_chat_turn("u3", "hi", "hello", "low", False, 0, [])
+
+    conn = db.get_db_connection()
+    assert conn.execute("SELECT COUNT(*) FROM messages WHERE user_id = 'u3'").fetchone()[0] == 0
+    assert conn.execute("SELECT COUNT(*) FROM risk_events WHERE user_id = 'u3'").fetchone()[0] == 0
+
+
+def test_group_commit_writer_batches_concurrent_turns(temp_db):
+    writer = db.start_group_commit(max_batch=64, max_delay_ms=5)
+    threads = [
+        threading.Thread(target=lambda i=i: db.save_chat_turn(f"g{i}", "hi", "hello", "low", False, 0, []))
+        for i in range(16)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    stats = writer.stats()
+    assert stats["jobs_committed"] == 16
+    assert stats["batches_committed"] < 16
+    # Batches are fsynced on commit, unlike the request threads' NORMAL connections
+    assert writer.submit(lambda conn: conn.execute("PRAGMA synchronous").fetchone()[0]).result() == 2  # FULL
+    db.stop_group_commit()
+
+    conn = db.get_db_connection()
+    assert conn.execute("SELECT COUNT(*) FROM messages WHERE user_id LIKE 'g%'").fetchone()[0] == 32
+
+
+def test_group_commit_isolates_failing_job(temp_db):
+    writer = db.start_group_commit(max_batch=8, max_delay_ms=20)
+    good = writer.submit(lambda conn: db._insert_message(conn, "ok", "user", "fine", "2026-01-01"))
+    bad = writer.submit(lambda conn: conn.execute("INSERT INTO no_such_table VALUES (1)"))
+
+    assert good.result() > 0
+    with pytest.raises(Exception):
+        bad.result()
+    db.stop_group_commit()
+    assert db.get_db_connection().execute("SELECT COUNT(*) FROM messages WHERE user_id = 'ok'").fetchone()[0] == 1
+
+
+def test_migrations_set_schema_version(temp_db):
+    conn = db.get_db_connection()
+    assert db.get_schema_version(conn) == db.SCHEMA_MIGRATIONS[-1][0]
+    # Re-running init_db is a no-op
+    db.init_db()
+    assert db.get_schema_version(conn) == db.SCHEMA_MIGRATIONS[-1][0]
+
+
+def test_failed_migration_rolls_back_and_can_be_retried(temp_db, monkeypatch):
+    all_migrations = db.SCHEMA_MIGRATIONS
+    version, description, statements = all_migrations[2]
+    broken = (version, description, statements[:2] + ["ALTER TABLE no_such_table ADD COLUMN x TEXT"] + statements[2:])
+    db.close_db_connections()
+    db.DB_NAME = db.DB_NAME + ".v2"
+    monkeypatch.setattr(db, "SCHEMA_MIGRATIONS", all_migrations[:2] + [broken])
+    with pytest.raises(Exception, match="no_such_table"):
+        db.init_db()
+
+    # Nothing of migration 3 was kept, so the next startup applies it cleanly
+    conn = db.get_db_connection()
+    assert db.get_schema_version(conn) == 2
+    assert "status" not in [row[1] for row in conn.execute("PRAGMA table_info(daily_summaries)")]
+    monkeypatch.setattr(db, "SCHEMA_MIGRATIONS", all_migrations)
+    db.init_db()
+    assert db.get_schema_version(conn) == all_migrations[-1][0]
+
+
+def test_concurrent_startups_apply_each_migration_once(temp_db, capsys):
+    db.close_db_connections()
+    db.DB_NAME = db.DB_NAME + ".fresh"
+    capsys.readouterr()
+    errors = []
+
+    def start():
+        try:
+            db.init_db()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=start) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert capsys.readouterr().out.count("applied migration") == len(db.SCHEMA_MIGRATIONS)
+
+
+def test_hot_queries_use_indexes(temp_db):
+    conn = db.get_db_connection()
+    cases = [
+        (db.MESSAGES_PAGE_SQL, ("u", "2026-01-01", 10, 5), "idx_messages_user_created"),
+        (db.RISK_EVENTS_PAGE_SQL, ("u", "2026-01-01", 10, 5), "idx_risk_events_user_created"),
+        ("SELECT * FROM daily_summaries WHERE user_id = ? AND date = ?", ("u", "2026-01-01"), "idx_daily_summaries_user_date"),
+    ]
+    for sql, params, index in cases:
+        plan = " ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+        assert index in plan, plan
+        assert "TEMP B-TREE" not in plan, plan
+
+
+def test_message_pages_follow_cursor(temp_db):
+    for i in range(7):
+        db.save_chat_turn("p1", f"msg {i}", f"reply {i}", "low", False, 0, [],
+                          user_created_at=f"2026-01-01T10:00:0{i}")
+    db.save_message("other", "user", "not mine")
+
+    seen, cursor = [], None
+    while True:
+        items, cursor = db.get_messages_page("p1", limit=3, cursor=cursor)
+        seen.extend(items)
+        if cursor is None:
+            break
+
+    assert len(seen) == 14
+    assert len({item["id"] for item in seen}) == 14
+    keys = [(item["created_at"], item["id"]) for item in seen]
+    assert keys == sorted(keys, reverse=True)
+
+    events, cursor = db.get_risk_events_page("p1", limit=10)
+    assert len(events) == 7 and cursor is None
+    assert events[0]["reasons"] == [] and events[0]["self_harm_detected"] is False
+
+    with pytest.raises(ValueError):
+        db.get_messages_page("p1", cursor="not-a-cursor")
+
+
+def test_daily_summary_upserts_per_day(temp_db):
+    db.save_daily_summary("d1", "2026-01-01", "first", "low")
+    db.save_daily_summary("d1", "2026-01-01", "second", "medium")
+    conn = db.get_db_connection()
+    assert conn.execute("SELECT COUNT(*) FROM daily_summaries WHERE user_id = 'd1'").fetchone()[0] == 1
+    assert db.get_daily_summary("d1", "2026-01-01")["summary_text"] == "second"
@@ -0,0 +1,130 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+from mental_health_backend.mental_health_app import db
+from mental_health_backend.mental_health_app.services import ai_agent, chat_turn, escalation
+from mental_health_backend.mental_health_app.services.escalation import EscalationDispatcher, WebhookSink
+from mental_health_backend.mental_health_app.services.llm_providers import MockProvider
+from mental_health_backend.tests.asgi_helpers import post_asgi
+from mental_health_backend.tests.webhook_stub_server import WebhookStubServer
+from gateway.main import gateway_app
+
+
+def turn(user_id, risk_level, text="..."):
+    return db.save_chat_turn(user_id, text, "reply", risk_level, risk_level == "critical", 0, [])
+
+
+def outbox():
+    return [dict(r) for r in db.get_db_connection().execute("SELECT * FROM escalation_outbox ORDER BY id")]
+
+
+def dispatch(dispatcher, at=None):
+    async def go():
+        try:
+            return await dispatcher.dispatch_once(db.claim_due_escalations, db.record_escalation_results, now=at)
+        finally:
+            await dispatcher.sink.close()
+    return asyncio.run(go())
+
+
+def test_outbox_row_written_with_high_risk_events(temp_db):
+    turn("u1", "low")
+    turn("u1", "medium")
+    ids = turn("u1", "high")
+    assert [(r["risk_event_id"], r["risk_level"], r["status"]) for r in outbox()] == [(ids["risk_event_id"], "high", "pending")]
+
+    # Raised by the LLM after the fact: the new level is queued as well
+    db.enrich_risk_event(ids["risk_event_id"], "u1", "critical", True, "critical", None)
+    db.enrich_risk_event(ids["risk_event_id"], "u1", "critical", True, "critical", None)
+    assert [r["risk_level"] for r in outbox()] == ["high", "critical"]
+    assert outbox()[1]["self_harm_detected"] == 1
+
+
+def test_batches_and_dedups_per_user(temp_db):
+    turn("u1", "high")
+    turn("u1", "critical")
+    turn("u1", "high")
+    turn("u2", "high")
+    now = datetime.utcnow() + timedelta(seconds=1)
+
+    with WebhookStubServer() as hook:
+        assert dispatch(EscalationDispatcher(WebhookSink(hook.url)), at=now) == 4
+        assert len(hook.requests) == 1  # one POST for the batch
+        assert sorted((n["user_id"], n["risk_level"]) for n in hook.notifications) == [("u1", "critical"), ("u2", "high")]
+        assert hook.notifications[0]["actions"] == ["SHOW_SOS", "SHOW_HELPLINE", "SUGGEST_TRUSTED_CONTACT"]
+        assert [r["status"] for r in outbox()] == ["suppressed", "sent", "suppressed", "sent"]
+
+        # Inside the window only a higher level goes out again; after it, anything does
+        turn("u1", "critical")
+        turn("u2", "critical")
+        assert dispatch(EscalationDispatcher(WebhookSink(hook.url)), at=now + timedelta(minutes=10)) == 2
+        assert [(n["user_id"], n["risk_level"]) for n in hook.notifications[2:]] == [("u2", "critical")]
+        turn("u1", "high")
+        dispatch(EscalationDispatcher(WebhookSink(hook.url)), at=now + timedelta(hours=2))
+        assert [(n["user_id"], n["risk_level"]) for n in hook.notifications[3:]] == [("u1", "high")]
+
+
+def test_failed_delivery_backs_off_then_gives_up(temp_db):
+    turn("u1", "high")
+    turn("u2", "high")
+    now = datetime.utcnow() + timedelta(seconds=1)
+
+    with WebhookStubServer(fail_next=1) as hook:
+        dispatch(EscalationDispatcher(WebhookSink(hook.url)), at=now)
+        rows = outbox()
+        assert [(r["status"], r["attempts"]) for r in rows] == [("pending", 1)] * 2 and "503" in rows[0]["last_error"]
+        retry_at = now + timedelta(seconds=escalation.backoff_seconds(1))
+        assert rows[0]["next_attempt_at"] == retry_at.isoformat()
+
+        assert dispatch(EscalationDispatcher(WebhookSink(hook.url)), at=retry_at - timedelta(seconds=1)) == 0
+        assert dispatch(EscalationDispatcher(WebhookSink(hook.url)), at=retry_at) == 2
+        assert [(r["status"], r["attempts"]) for r in outbox()] == [("sent", 2)] * 2
+        assert len(hook.notifications) == 2
+
+        turn("u3", "high")
+        hook.fail_next = 10
+        dispatcher = EscalationDispatcher(WebhookSink(hook.url), max_attempts=2)
+        dispatch(dispatcher, at=now + timedelta(seconds=5))
+        dispatch(dispatcher, at=now + timedelta(minutes=5))
+        assert (outbox()[-1]["status"], outbox()[-1]["attempts"]) == ("failed", 2)
+        assert dispatcher.stats()["retried"] == 1 and dispatcher.stats()["failed"] == 1
+
+
+class BlockedSink:
+    """A webhook that never answers."""
+    def __init__(self):
+        self.received = asyncio.Event()
+        self.batches = []
+
+    async def send(self, notifications):
+        self.batches.append(notifications)
+        self.received.set()
+        await asyncio.Event().wait()
+
+    async def close(self):
+        pass
+
+
+def test_chat_reply_does_not_wait_for_delivery(temp_db, monkeypatch):
+    monkeypatch.setattr(ai_agent, "_provider", MockProvider(latency=0.01))
+    sink = BlockedSink()
+    dispatcher = EscalationDispatcher(sink, poll_seconds=0.01)
+
+    async def go():
+        dispatcher.start(db.claim_due_escalations, db.record_escalation_results)
+        try:
+            chunks, seconds = await post_asgi(gateway_app, "/mental-health/chat/message",
+                                              {"user_id": "c1", "message": "I want to kill myself tonight"})
+            await asyncio.wait_for(sink.received.wait(), timeout=5)
+            return json.loads(b"".join(c for _, c in chunks)), seconds
+        finally:
+            await chat_turn.drain_background_tasks()
+            await dispatcher.stop()
+            await ai_agent.shutdown_async_client()
+
+    body, seconds = asyncio.run(go())
+    assert body["risk_level"] in ("high", "critical") and seconds < 1.0
+    assert sink.batches[0][0]["user_id"] == "c1"
+    # Stopped mid-delivery: still pending, leased, and delivered again after the lease
+    row = outbox()[0]
+    assert row["status"] == "pending" and row["next_attempt_at"] > datetime.utcnow().isoformat()
@@ -0,0 +1,93 @@
+import asyncio
+import json
+import time
+import pytest
+from mental_health_backend.mental_health_app.services import ai_agent
+from mental_health_backend.mental_health_app.services.circuit_breaker import CircuitBreaker
+from mental_health_backend.mental_health_app.services.llm_providers import (
+    LLMProviderError, MockProvider, OpenAICompatibleProvider, RecordReplayProvider,
+    MOCK_CHAT_REPLY, MOCK_SUMMARY_REPLY, provider_from_env
+)
+
+
+def test_provider_selected_from_settings(tmp_path):
+    groq = provider_from_env({"GROQ_BASE_URL": "http://localhost:9/v1"})
+    assert isinstance(groq, OpenAICompatibleProvider) and groq.base_url == "http://localhost:9/v1"
+    assert groq._async_client is None  # nothing created until startup
+
+    openai = provider_from_env({"LLM_PROVIDER": "openai", "OPENAI_API_KEY": "k", "LLM_MODEL": "gpt-4o-mini"})
+    assert openai.base_url == "https://api.openai.com/v1" and openai.model == "gpt-4o-mini"
+
+    mock = provider_from_env({"LLM_PROVIDER": "mock", "LLM_MOCK_LATENCY_MS": "50", "LLM_MOCK_FAILURE_RATE": "0.1"})
+    assert isinstance(mock, MockProvider) and mock.latency == 0.05 and mock.failure_rate == 0.1
+
+    path = str(tmp_path / "rec.jsonl")
+    record = provider_from_env({"LLM_PROVIDER": "record", "LLM_RECORD_UPSTREAM": "mock", "LLM_RECORD_PATH": path})
+    assert isinstance(record, RecordReplayProvider) and isinstance(record.upstream, MockProvider)
+    replay = provider_from_env({"LLM_PROVIDER": "replay", "LLM_RECORD_PATH": path, "LLM_REPLAY_LATENCY": "1"})
+    assert replay.mode == "replay" and replay.replay_latency
+
+    with pytest.raises(ValueError):
+        provider_from_env({"LLM_PROVIDER": "carrier-pigeon"})
+
+
+def test_mock_is_deterministic_per_seed():
+    a = MockProvider(latency=0.1, jitter=0.05, failure_rate=0.3, seed=7)
+    b = MockProvider(latency=0.1, jitter=0.05, failure_rate=0.3, seed=7)
+    draws_a = [a._next_call() for _ in range(200)]
+    assert draws_a == [b._next_call() for _ in range(200)]
+    assert all(0.05 <= delay <= 0.15 for delay, _ in draws_a)
+    assert 30 < sum(fail for _, fail in draws_a) < 90
+
+
+def test_chat_pipeline_runs_offline_on_mock(monkeypatch):
+    monkeypatch.setattr(ai_agent, "_provider", MockProvider(latency=0.01, token_latency=0.001))
+
+    async def scenario():
+        try:
+            chat = await ai_agent.analyze_message_llm_async("hello")
+            summary = await ai_agent.summarize_day_llm_async({"mood": "tired"})
+            streamed = [item async for item in ai_agent.stream_message_llm_async("hello")]
+        finally:
+            await ai_agent.shutdown_async_client()
+        return chat, summary, streamed
+
+    chat, summary, streamed = asyncio.run(scenario())
+    assert chat == MOCK_CHAT_REPLY
+    assert summary == MOCK_SUMMARY_REPLY
+    tokens = [text for kind, text in streamed if kind == "token"]
+    assert len(tokens) > 1 and "".join(tokens) == MOCK_CHAT_REPLY["reply"]
+    assert streamed[-1] == ("result", MOCK_CHAT_REPLY)
+    assert ai_agent.summarize_day_llm({"mood": "tired"}) == MOCK_SUMMARY_REPLY
+
+
+def test_mock_failures_fall_back(monkeypatch):
+    monkeypatch.setattr(ai_agent, "_provider", MockProvider(latency=0, failure_rate=1.0))
+    monkeypatch.setattr(ai_agent, "llm_breaker", CircuitBreaker("llm"))
+    assert asyncio.run(ai_agent.analyze_message_llm_async("hello")) == ai_agent.build_fallback_response("hello")
+
+
+def test_record_then_replay(tmp_path):
+    path = str(tmp_path / "recordings.jsonl")
+    messages = ai_agent.build_chat_messages("I could not sleep")
+
+    recorder = RecordReplayProvider(path, mode="record", upstream=MockProvider(latency=0.05))
+    recorded = asyncio.run(recorder.complete(messages, 0.4))
+    streamed_chunks = asyncio.run(_collect(recorder.stream(ai_agent.build_chat_messages("second"), 0.4)))
+
+    with open(path) as f:
+        lines = [json.loads(line) for line in f]
+    assert len(lines) == 2 and lines[0]["latency_ms"] >= 50
+
+    replayer = RecordReplayProvider(path, mode="replay", replay_latency=True)
+    start = time.perf_counter()
+    assert asyncio.run(replayer.complete(messages, 0.4)) == recorded
+    assert time.perf_counter() - start >= 0.045
+    assert replayer.complete_sync(ai_agent.build_chat_messages("second"), 0.4, timeout=1) == "".join(streamed_chunks)
+
+    with pytest.raises(LLMProviderError):
+        replayer.complete_sync(ai_agent.build_chat_messages("never recorded"), 0.4, timeout=1)
+
+
+async def _collect(stream):
+    return [chunk async for chunk in stream]
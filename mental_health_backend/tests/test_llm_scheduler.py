@@ -0,0 +1,151 @@
+import asyncio
+import pytest
+from mental_health_backend.mental_health_app.services import ai_agent
+from mental_health_backend.mental_health_app.services.circuit_breaker import CircuitBreaker
+from mental_health_backend.mental_health_app.services.llm_providers import MockProvider
+from mental_health_backend.mental_health_app.services.llm_scheduler import (
+    PriorityScheduler, QueuedPastDeadline, SchedulerFull, priority_for_score
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+async def queue_behind_held_slot(scheduler, priorities, clock=None, advance=0.0):
+    """Hold the only slot, queue one waiter per priority (in order), then release and record service order."""
+    order = []
+    await scheduler.acquire("low")
+
+    async def waiter(name, priority):
+        async with scheduler.slot(priority):
+            order.append(name)
+
+    tasks = []
+    for name, priority in priorities:
+        tasks.append(asyncio.create_task(waiter(name, priority)))
+        await asyncio.sleep(0)
+        if clock is not None:
+            clock.now += advance
+    scheduler.release()
+    await asyncio.gather(*tasks)
+    return order
+
+
+def test_priority_for_score():
+    assert priority_for_score(0) == "low"
+    assert priority_for_score(2) == "medium"
+    assert priority_for_score(5) == "high"
+    assert priority_for_score(22) == "critical"
+
+
+def test_waiters_are_served_by_priority():
+    scheduler = PriorityScheduler(max_concurrency=1, aging_seconds=0)
+    order = asyncio.run(queue_behind_held_slot(
+        scheduler, [("l1", "low"), ("m", "medium"), ("l2", "low"), ("h", "high"), ("c", "critical")]
+    ))
+    assert order == ["c", "h", "m", "l1", "l2"]
+
+    stats = scheduler.stats()
+    assert stats["low"]["served"] == 3  # includes the holder
+    assert stats["critical"]["served"] == 1 and stats["critical"]["queued"] == 0
+
+
+def test_aging_prevents_starvation():
+    clock = FakeClock()
+    scheduler = PriorityScheduler(max_concurrency=1, aging_seconds=1.0, clock=clock)
+    # The low waiter has waited 5 s by the time the high one arrives: it now outranks it
+    order = asyncio.run(queue_behind_held_slot(scheduler, [("old-low", "low"), ("new-high", "high")], clock, advance=5.0))
+    assert order == ["old-low", "new-high"]
+    assert scheduler.stats()["low"]["promoted"] == 1
+    assert scheduler.stats()["low"]["wait_max"] == 10.0
+
+
+def test_full_queue_rejects_or_evicts_lower_priority():
+    async def scenario():
+        scheduler = PriorityScheduler(max_concurrency=1, max_queue=2, aging_seconds=0)
+        await scheduler.acquire("low")
+        low = [asyncio.create_task(scheduler.acquire("low")) for _ in range(2)]
+        await asyncio.sleep(0)
+
+        with pytest.raises(SchedulerFull):
+            await scheduler.acquire("low")
+
+        critical = asyncio.create_task(scheduler.acquire("critical"))
+        await asyncio.sleep(0)
+        with pytest.raises(SchedulerFull):
+            await low[1]  # newest low-priority waiter was evicted
+
+        scheduler.release()
+        await critical
+        scheduler.release()
+        await low[0]
+        scheduler.release()
+        return scheduler.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["low"]["rejected"] == 1 and stats["low"]["evicted"] == 1
+    assert stats["critical"]["served"] == 1
+
+
+def test_cancelled_waiter_gives_up_its_place():
+    async def scenario():
+        scheduler = PriorityScheduler(max_concurrency=1, aging_seconds=0)
+        await scheduler.acquire("low")
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(scheduler.acquire("critical"), timeout=0.01)
+        assert scheduler.queued == 0
+        scheduler.release()
+        # Slot is free again
+        await asyncio.wait_for(scheduler.acquire("low"), timeout=0.1)
+
+    asyncio.run(scenario())
+
+
+def test_waiter_past_its_deadline_expires():
+    async def scenario():
+        scheduler = PriorityScheduler(max_concurrency=1, aging_seconds=0)
+        await scheduler.acquire("low")
+        with pytest.raises(QueuedPastDeadline):
+            await scheduler.acquire("high", timeout=0.01)
+        assert scheduler.queued == 0
+        scheduler.release()
+        await scheduler.acquire("high", timeout=0.01)  # free slot: no wait, no expiry
+        scheduler.release()
+        return scheduler.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["high"]["expired"] == 1 and stats["high"]["served"] == 1
+    assert stats["high"]["rejected"] == 0 and stats["high"]["evicted"] == 0
+    assert issubclass(QueuedPastDeadline, SchedulerFull)  # callers fall back as for a full queue
+
+
+def test_crisis_chat_overtakes_queued_chats(monkeypatch):
+    monkeypatch.setattr(ai_agent, "_provider", MockProvider(latency=0.02))
+    monkeypatch.setattr(ai_agent, "llm_breaker", CircuitBreaker("llm"))
+    monkeypatch.setattr(ai_agent, "LLM_MAX_CONCURRENCY", 1)
+    monkeypatch.setattr(ai_agent, "llm_scheduler", None)
+
+    async def scenario():
+        finished = []
+
+        async def chat(name, priority):
+            await ai_agent.analyze_message_llm_async(name, priority=priority)
+            finished.append(name)
+
+        try:
+            casual = [asyncio.create_task(chat(f"casual-{i}", "low")) for i in range(6)]
+            await asyncio.sleep(0.005)
+            crisis = asyncio.create_task(chat("crisis", "critical"))
+            await asyncio.gather(crisis, *casual)
+        finally:
+            await ai_agent.shutdown_async_client()
+        return finished
+
+    finished = asyncio.run(scenario())
+    # At most the call already in flight finishes before the crisis message
+    assert finished.index("crisis") <= 1
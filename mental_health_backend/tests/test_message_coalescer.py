@@ -0,0 +1,96 @@
+import asyncio
+import json
+from mental_health_backend.mental_health_app import db
+from mental_health_backend.mental_health_app.services import ai_agent, chat_turn
+from mental_health_backend.mental_health_app.services.message_coalescer import MessageCoalescer
+from mental_health_backend.mental_health_app.services.llm_providers import MockProvider, MOCK_CHAT_REPLY
+from mental_health_backend.tests.asgi_helpers import post_asgi, first_byte
+from gateway.main import gateway_app
+
+
+def test_burst_shares_one_call_and_marks_last_waiter():
+    coalescer = MessageCoalescer(window=0.05, max_wait=1.0)
+    calls = []
+
+    async def run(key, items):
+        calls.append((key, list(items)))
+        return "+".join(items)
+
+    async def send(key, item, delay):
+        await asyncio.sleep(delay)
+        return await coalescer.submit(key, item, run)
+
+    async def scenario():
+        return await asyncio.gather(
+            send("a", "1", 0), send("a", "2", 0.02), send("b", "x", 0.02), send("a", "3", 0.04)
+        )
+
+    results = asyncio.run(scenario())
+    assert sorted(calls) == [("a", ["1", "2", "3"]), ("b", ["x"])]
+    assert [r for r, _ in results] == ["1+2+3", "1+2+3", "x", "1+2+3"]
+    assert [last for _, last in results] == [False, False, True, True]
+    stats = coalescer.stats()
+    assert (stats["messages"], stats["llm_calls"], stats["calls_saved"]) == (4, 2, 2)
+    assert stats["batch_sizes"][0:3] == [1, 1, 2]
+
+
+def test_max_wait_caps_a_never_ending_burst():
+    coalescer = MessageCoalescer(window=0.05, max_wait=0.12)
+    batches = []
+
+    async def run(key, items):
+        batches.append(list(items))
+        return None
+
+    async def scenario():
+        waiters = []
+        for i in range(8):
+            waiters.append(asyncio.ensure_future(coalescer.submit("u", i, run)))
+            await asyncio.sleep(0.03)
+        await asyncio.gather(*waiters)
+
+    asyncio.run(scenario())
+    assert len(batches) >= 2 and sum(len(b) for b in batches) == 8
+
+
+def test_chat_burst_makes_one_llm_call_but_scores_each_message(temp_db, monkeypatch):
+    prompts = []
+
+    def responder(messages):
+        prompts.append(messages[-1]["content"])
+        return json.dumps(MOCK_CHAT_REPLY)
+
+    monkeypatch.setattr(ai_agent, "_provider", MockProvider(latency=0.01, responder=responder))
+    monkeypatch.setattr(chat_turn, "coalescer", MessageCoalescer(window=0.1, max_wait=1.0))
+    burst = ["hey", "rough day", "I feel hopeless", "I want to kill myself"]
+
+    async def scenario():
+        async def send(i, message):
+            await asyncio.sleep(i * 0.02)
+            return await post_asgi(gateway_app, "/mental-health/chat/message", {"user_id": "burst", "message": message})
+        try:
+            return await asyncio.gather(*(send(i, m) for i, m in enumerate(burst)))
+        finally:
+            await chat_turn.drain_background_tasks()
+            await ai_agent.shutdown_async_client()
+
+    responses = asyncio.run(scenario())
+    bodies = [json.loads(b"".join(chunk for _, chunk in chunks)) for chunks, _ in responses]
+
+    # The crisis message took the fast path without waiting for the burst window
+    assert bodies[3]["reply"] == chat_turn.CRISIS_FALLBACK_REPLY
+    assert first_byte(responses[3][0]) < 0.1
+    # The other three shared one call, each keeping its own risk level
+    assert [b["reply"] for b in bodies[:3]] == [MOCK_CHAT_REPLY["reply"]] * 3
+    assert [b["risk_level"] for b in bodies[:3]] == ["low", "low", "medium"]
+    burst_prompts = [p for p in prompts if "rough day" in p]
+    assert burst_prompts == ['User message: """hey\nrough day\nI feel hopeless"""']
+    assert chat_turn.coalescer.stats()["calls_saved"] == 2
+
+    conn = db.get_db_connection()
+    roles = [r["role"] for r in conn.execute("SELECT role FROM messages WHERE user_id = 'burst'")]
+    assert roles.count("user") == 4
+    # One stored reply for the burst, plus the crisis reply and its LLM enrichment
+    assert roles.count("assistant") == 3
+    scores = [r[0] for r in conn.execute("SELECT keyword_score FROM risk_events WHERE user_id = 'burst' ORDER BY keyword_score")]
+    assert len(scores) == 4 and scores[0] == 0 and scores[-1] >= 20
@@ -0,0 +1,120 @@
+import asyncio
+import pytest
+from mental_health_backend.mental_health_app.services import ai_agent
+from mental_health_backend.mental_health_app.services.circuit_breaker import CircuitBreaker
+from mental_health_backend.mental_health_app.services.llm_providers import LLMProviderError, MockProvider, RecordReplayProvider
+from mental_health_backend.mental_health_app.services.model_router import DEFAULT_ROUTE, ModelRouter, Route, routes_from_env
+
+ROUTES = {
+    "fast": Route("fast", "small-model", 300, 0.4),
+    "standard": Route("standard", "small-model", 600, 0.4),
+    "escalation": Route("escalation", "big-model", 800, 0.3),
+}
+
+
+class SpyProvider(MockProvider):
+    """MockProvider that remembers the model and max_tokens of every call."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.requests = []
+
+    async def complete(self, messages, temperature, model=None, max_tokens=None):
+        self.requests.append((model, max_tokens, temperature))
+        return await super().complete(messages, temperature, model, max_tokens)
+
+
+def test_route_by_risk_score_and_length():
+    router = ModelRouter(ROUTES, long_message_chars=20)
+    assert router.route_for(0, "hi").name == "fast"
+    assert router.route_for(0, "a much longer message than twenty characters").name == "standard"
+    assert router.route_for(10, "I want to die").name == "escalation"
+    assert router.route_for(1, "hi").name == "fast"  # below HIGH_RISK_KW_SCORE
+
+
+def test_disabled_routing_uses_default_route():
+    router = ModelRouter(ROUTES, enabled=False)
+    assert router.route_for(10, "I want to die") is DEFAULT_ROUTE
+
+
+def test_routes_from_env():
+    routes = routes_from_env({
+        "LLM_PROVIDER": "openai",
+        "LLM_ROUTE_ESCALATION_MODEL": "gpt-4o",
+        "LLM_ROUTE_FAST_MAX_TOKENS": "0",
+        "LLM_ROUTE_STANDARD_TEMPERATURE": "0.7",
+    })
+    assert routes["escalation"] == Route("escalation", "gpt-4o", 800, 0.3, 6.0)
+    assert routes["fast"].model is None and routes["fast"].max_tokens is None and routes["fast"].deadline is None
+    assert routes_from_env({"LLM_ROUTE_ESCALATION_DEADLINE_SECONDS": ""})["escalation"].deadline is None
+    assert routes["standard"].temperature == 0.7
+    # The larger Groq model is only the default escalation model on Groq
+    assert routes_from_env({})["escalation"].model == "llama-3.3-70b-versatile"
+    assert routes_from_env({"LLM_PROVIDER": "mock"})["escalation"].model is None
+
+
+def test_routed_model_reaches_provider_and_is_observed(monkeypatch):
+    spy = SpyProvider(latency=0.01)
+    router = ModelRouter(ROUTES, long_message_chars=20)
+    monkeypatch.setattr(ai_agent, "_provider", spy)
+    monkeypatch.setattr(ai_agent, "model_router", router)
+
+    async def go():
+        try:
+            await ai_agent.analyze_message_llm_async("hi", route=router.route_for(0, "hi"))
+            await ai_agent.analyze_message_llm_async("I want to die", route=router.route_for(10, "I want to die"))
+        finally:
+            await ai_agent.shutdown_async_client()
+
+    asyncio.run(go())
+    assert spy.requests == [("small-model", 300, 0.4), ("big-model", 800, 0.3)]
+    stats = router.stats()
+    assert stats["fast"]["calls"] == 1 and stats["escalation"]["calls"] == 1
+    assert stats["escalation"]["model"] == "big-model"
+    assert stats["escalation"]["prompt_tokens"] > 0 and stats["escalation"]["completion_tokens"] > 0
+    assert stats["standard"]["calls"] == 0
+
+
+def test_slow_escalation_model_has_its_own_deadline_and_breaker(monkeypatch):
+    # The large model takes longer than the default deadline but fits its route's own
+    slow_big = MockProvider(latency=0.01, model_latency={"big-model": 0.15})
+    routes = {**ROUTES, "escalation": ROUTES["escalation"]._replace(deadline=0.5)}
+    router = ModelRouter(routes)
+    monkeypatch.setattr(ai_agent, "_provider", slow_big)
+    monkeypatch.setattr(ai_agent, "model_router", router)
+    monkeypatch.setattr(ai_agent, "LLM_DEADLINE_SECONDS", 0.1)
+    monkeypatch.setattr(ai_agent, "llm_breaker", CircuitBreaker("llm", failure_threshold=1))
+    monkeypatch.setattr(ai_agent, "_model_breakers", {})
+
+    async def go():
+        try:
+            risky = await ai_agent.analyze_message_llm_async("I want to die", route=routes["escalation"])
+            # Too slow even for its own deadline: fails on the big model's breaker only
+            slow_big.model_latency["big-model"] = 1.0
+            timed_out = await ai_agent.analyze_message_llm_async("I want to die", route=routes["escalation"])
+            casual = await ai_agent.analyze_message_llm_async("hi", route=DEFAULT_ROUTE)
+        finally:
+            await ai_agent.shutdown_async_client()
+        return risky, timed_out, casual
+
+    risky, timed_out, casual = asyncio.run(go())
+    assert risky["reply"] != ai_agent.FALLBACK_ERROR_MESSAGE
+    assert timed_out["reply"] == ai_agent.FALLBACK_ERROR_MESSAGE
+    assert casual["reply"] != ai_agent.FALLBACK_ERROR_MESSAGE
+    assert ai_agent.breaker_for(routes["escalation"]).stats()["failures"] == 1
+    assert ai_agent.breaker_for(routes["escalation"]).name == "llm:big-model"
+    assert ai_agent.llm_breaker.state == "closed"
+    assert ai_agent.llm_breaker.stats()["failures"] == 0 and ai_agent.llm_breaker.stats()["successes"] == 1
+
+
+def test_replay_keys_on_routed_model(tmp_path):
+    path = str(tmp_path / "rec.jsonl")
+    messages = [{"role": "user", "content": "hi"}]
+
+    recorder = RecordReplayProvider(path, "record", upstream=MockProvider(latency=0))
+    asyncio.run(recorder.complete(messages, 0.4, model="big-model", max_tokens=800))
+
+    replay = RecordReplayProvider(path, "replay")
+    assert asyncio.run(replay.complete(messages, 0.4, model="big-model", max_tokens=800))
+    with pytest.raises(LLMProviderError):
+        asyncio.run(replay.complete(messages, 0.4, model="small-model", max_tokens=800))
@@ -0,0 +1,149 @@
+import asyncio
+import json
+import math
+from datetime import date, timedelta
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from mental_health_backend.mental_health_app import db
+from mental_health_backend.mental_health_app.services import ai_agent, checkin_summaries, mood_trends
+from mental_health_backend.mental_health_app.services.checkin_summaries import CheckinSummaryWorker
+from mental_health_backend.mental_health_app.services.llm_providers import MockProvider
+from mental_health_backend.mental_health_app.services.mood_trends import MoodTrendCache, _nan_quartiles, rolling_stats
+from mental_health_backend.tests.asgi_helpers import post_asgi
+from gateway.main import gateway_app
+
+MOOD_QUESTION = "How are you feeling right now (1–10)?"
+TODAY = date.today()
+
+
+def day(offset: int) -> str:
+    return (TODAY - timedelta(days=offset)).isoformat()
+
+
+@pytest.fixture
+def trend_cache(monkeypatch):
+    cache = MoodTrendCache(days=60)
+    monkeypatch.setattr(mood_trends, "cache", cache)
+    return cache
+
+
+def test_parse_mood():
+    assert mood_trends.parse_mood({MOOD_QUESTION: "7"}) == 7.0
+    assert mood_trends.parse_mood({MOOD_QUESTION: "maybe 6.5/10 today"}) == 6.5
+    assert mood_trends.parse_mood({MOOD_QUESTION: "Seven-ish"}) == 7.0
+    assert mood_trends.parse_mood({"mood": "8 out of 10"}) == 8.0
+    assert mood_trends.parse_mood({MOOD_QUESTION: "11"}) is None
+    assert mood_trends.parse_mood({MOOD_QUESTION: "not great"}) is None
+    assert mood_trends.parse_mood({"sleep": "7 hours"}) is None  # not the mood question
+
+
+def test_rolling_stats_match_per_window_least_squares():
+    rng = np.random.default_rng(3)
+    moods = rng.uniform(1, 10, size=(4, 40)).astype(np.float32)
+    moods[rng.random(moods.shape) < 0.3] = np.nan
+    window = 7
+    mean, slope = rolling_stats(moods, window, min_points=3)
+    for r in range(moods.shape[0]):
+        for t in range(moods.shape[1]):
+            values = moods[r, max(0, t - window + 1):t + 1]
+            days = np.arange(max(0, t - window + 1), t + 1)[~np.isnan(values)]
+            values = values[~np.isnan(values)]
+            if len(values) < 3:
+                assert math.isnan(mean[r, t]) and math.isnan(slope[r, t])
+                continue
+            assert mean[r, t] == pytest.approx(values.mean(), rel=1e-5)
+            assert slope[r, t] == pytest.approx(np.polyfit(days, values, 1)[0], abs=1e-4)
+
+
+def test_quartiles_match_nanpercentile():
+    rng = np.random.default_rng(5)
+    moods = rng.uniform(1, 10, size=(9, 30)).astype(np.float32)
+    moods[rng.random(moods.shape) < 0.5] = np.nan
+    moods[:, 0] = np.nan
+    count, quartiles = _nan_quartiles(moods)
+    with pytest.warns(RuntimeWarning):
+        expected = np.nanpercentile(moods, (25, 50, 75), axis=0)
+    assert count.tolist() == np.count_nonzero(~np.isnan(moods), axis=0).tolist()
+    np.testing.assert_allclose(quartiles, expected, rtol=1e-5)
+
+
+def test_sharp_drop_and_decline_alerts(trend_cache):
+    rows = [("steady", day(i), 8.0) for i in range(1, 15)] + [("steady", day(0), 3.0)]
+    rows += [("sliding", day(i), 3.0 + 0.5 * i) for i in range(10)]
+    trend_cache.load(rows, TODAY)
+
+    steady = trend_cache.user_trend("steady", 14)
+    assert len(steady["dates"]) == 14 and steady["dates"][-1] == TODAY.isoformat()
+    assert steady["mood"][-1] == 3.0 and steady["rolling_mean"][-2] == 8.0
+    assert steady["alerts"][0] == {"date": TODAY.isoformat(), "kind": "sharp_drop", "mood": 3.0, "baseline": 8.0, "drop": 5.0}
+
+    sliding = trend_cache.user_trend("sliding", 14)
+    assert sliding["latest"]["slope"] == pytest.approx(-0.5)
+    assert [a["kind"] for a in sliding["alerts"]] == ["declining_trend"]
+    assert trend_cache.user_trend("nobody", 14) is None
+
+
+def test_cohort_trend_and_incremental_record(trend_cache):
+    trend_cache.load([("a", day(0), 4.0), ("b", day(0), 8.0), ("b", day(1), 6.0)], TODAY)
+    cohort = trend_cache.cohort_trend(None, 2)
+    assert cohort["users"] == 2 and cohort["participants"] == [1, 2]
+    assert cohort["mean"] == [6.0, 6.0] and cohort["median"] == [6.0, 6.0]
+
+    trend_cache.record("c", day(0), 9.0)
+    cohort = trend_cache.cohort_trend(None, 1)
+    assert cohort["users"] == 3 and cohort["mean"] == [7.0]
+    assert trend_cache.cohort_trend(["a", "missing"], 1)["mean"] == [4.0]
+
+
+def test_submit_stores_mood_and_trend_endpoint_serves_it(temp_db, trend_cache, monkeypatch):
+    monkeypatch.setattr(ai_agent, "_provider", MockProvider(latency=0.01))
+    monkeypatch.setattr(checkin_summaries, "worker", CheckinSummaryWorker())
+    for offset, mood in ((3, 8.0), (2, 8.0), (1, 7.0)):
+        db.save_pending_checkin("m1", day(offset), {MOOD_QUESTION: str(mood)}, "low", False, 0, mood_score=mood)
+
+    async def submit():
+        try:
+            chunks, _ = await post_asgi(gateway_app, "/mental-health/checkin/submit",
+                                        {"user_id": "m1", "answers": {MOOD_QUESTION: "2/10"}})
+            await checkin_summaries.worker.drain()
+            return json.loads(b"".join(c for _, c in chunks))
+        finally:
+            await checkin_summaries.worker.stop()
+            await ai_agent.shutdown_async_client()
+
+    client = TestClient(gateway_app)
+    # First query loads the cache; the submission after it is applied in place
+    assert client.get("/mental-health/checkin/mood-trend", params={"user_id": "m1", "days": 4}).json()["mood"] == [8.0, 8.0, 7.0, None]
+    assert asyncio.run(submit())["mood_score"] == 2.0
+    assert db.get_daily_summary("m1", day(0))["mood_score"] == 2.0
+
+    trend = client.get("/mental-health/checkin/mood-trend", params={"user_id": "m1", "days": 4}).json()
+    assert trend["mood"] == [8.0, 8.0, 7.0, 2.0]
+    assert trend["alerts"][0]["kind"] == "sharp_drop"
+    assert trend_cache.loads == 1
+
+    cohort = client.get("/mental-health/checkin/mood-trend/cohort", params={"user_ids": ["m1"], "days": 2}).json()
+    assert cohort["users"] == 1 and cohort["mean"] == [7.0, 2.0]
+    assert client.get("/mental-health/checkin/mood-trend", params={"user_id": "nobody"}).status_code == 404
+
+
+def test_backfill_parses_stored_answers_once(temp_db, monkeypatch):
+    db.close_db_connections()
+    db.DB_NAME = db.DB_NAME + ".v8"
+    monkeypatch.setattr(db, "SCHEMA_MIGRATIONS", db.SCHEMA_MIGRATIONS[:8])
+    db.init_db()
+    # Stored without a mood score, as before it was parsed on submit
+    for i, answer in enumerate(["six", "no idea", "7/10", "nothing to say"]):
+        db.save_pending_checkin("old", day(5 - i), {MOOD_QUESTION: answer}, "low", False, 0)
+    monkeypatch.undo()
+    db.apply_migrations(db.get_db_connection())
+    db.save_pending_checkin("new", day(1), {MOOD_QUESTION: "no idea"}, "low", False, 0)
+
+    assert db.backfill_mood_scores(mood_trends.parse_mood, batch_size=3) == 2
+    assert db.get_mood_scores(day(30)) == [("old", day(5), 6.0), ("old", day(3), 7.0)]
+
+    # Unparseable answers are not read again on the next startup
+    parsed = []
+    assert db.backfill_mood_scores(lambda answers: parsed.append(answers)) == 0
+    assert parsed == []
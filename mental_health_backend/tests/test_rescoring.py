@@ -0,0 +1,149 @@
+import multiprocessing
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import pytest
+from fastapi.testclient import TestClient
+from mental_health_backend.mental_health_app import db
+from mental_health_backend.mental_health_app.services import crisis_paraphrase, rescoring, risk_engine
+from gateway.main import gateway_app
+
+MESSAGES = [
+    "had a nice walk today",
+    "I feel exhausted and empty",
+    "I want to kill myself",
+    "everything feels hopeless",
+    "I feel exhausted and empty",
+]
+
+
+@pytest.fixture
+def new_keyword(monkeypatch):
+    """A rules update: 'exhausted' becomes a high-risk keyword."""
+    monkeypatch.setattr(risk_engine, "HIGH_RISK_KEYWORDS", risk_engine.HIGH_RISK_KEYWORDS + ["exhausted"])
+    risk_engine.rebuild_matcher()
+    yield
+    monkeypatch.undo()
+    risk_engine.rebuild_matcher()
+
+
+def seed_history():
+    """Chat turns assessed with the rules in force at the time."""
+    ids = []
+    for text in MESSAGES:
+        score, reasons = risk_engine.calculate_risk_score(text, log=False)
+        level = risk_engine.determinize_risk_level("low", score, False)
+        ids.append(db.save_chat_turn("u1", text, "reply", level, score >= risk_engine.INTENT_SCORE, score, reasons)["user_message_id"])
+    return ids
+
+
+def test_score_batch_matches_single_scoring():
+    results = rescoring.score_batch(MESSAGES)
+    assert len(results) == len(MESSAGES) and results[1] is results[4]  # duplicates scored once
+    for text, result in zip(MESSAGES, results):
+        score, reasons = risk_engine.calculate_risk_score(text, log=False)
+        assert result["keyword_score"] == score and result["reasons"] == reasons
+    assert results[2]["self_harm_detected"] and results[2]["risk_level"] == "high"
+    assert results[0] == {"keyword_score": 0, "reasons": [], "risk_level": "none", "self_harm_detected": False, "actions": ["NONE"]}
+
+
+def test_score_batch_endpoint(monkeypatch):
+    client = TestClient(gateway_app)
+    body = client.post("/mental-health/risk/score-batch", json={"messages": MESSAGES[:3]}).json()
+    assert [r["risk_level"] for r in body["results"]] == ["none", "none", "high"]
+    assert body["rules_version"] == rescoring.rules_version()
+    monkeypatch.setattr(rescoring, "RISK_BATCH_MAX_MESSAGES", 2)
+    assert client.post("/mental-health/risk/score-batch", json={"messages": MESSAGES}).status_code == 413
+
+
+def test_rules_version_tracks_rule_changes(new_keyword):
+    changed = rescoring.rules_version()
+    risk_engine.HIGH_RISK_KEYWORDS.remove("exhausted")
+    assert rescoring.rules_version() != changed
+
+
+@pytest.fixture
+def new_exemplar(monkeypatch):
+    """A paraphrase update: one exemplar replaced (same count) and a stricter threshold."""
+    monkeypatch.setattr(crisis_paraphrase, "CRISIS_EXEMPLARS", crisis_paraphrase.CRISIS_EXEMPLARS[:-1] + ["the cat knocked over my plant"])
+    crisis_paraphrase.rebuild_detector(0.35)
+    yield
+    monkeypatch.undo()
+    crisis_paraphrase.rebuild_detector(crisis_paraphrase.CRISIS_PARAPHRASE_THRESHOLD)
+
+
+def test_rules_version_tracks_paraphrase_changes():
+    before = rescoring.rules_version()
+    crisis_paraphrase.CONTRAST_EXEMPLARS.append("my cat knocked the plant over")
+    try:
+        assert rescoring.rules_version() != before
+    finally:
+        crisis_paraphrase.CONTRAST_EXEMPLARS.pop()
+    assert rescoring.rules_version() == before
+    crisis_paraphrase.rebuild_detector(0.5)
+    try:
+        assert rescoring.rules_version() != before
+    finally:
+        crisis_paraphrase.rebuild_detector(crisis_paraphrase.CRISIS_PARAPHRASE_THRESHOLD)
+
+
+def test_spawned_workers_use_the_parent_paraphrase_rules(new_exemplar):
+    texts = ["my cat knocked the plant over", "I'm so tired of being alive"]
+    expected = [risk_engine.calculate_risk_score(t, log=False) for t in texts]
+    assert expected[0][0] == risk_engine.HIGH_RISK_KW_SCORE
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=rescoring._init_worker, initargs=(rescoring.rules(),)) as pool:
+        scored = list(pool.map(rescoring.score_batch, [texts]))[0]
+    assert [(r["keyword_score"], r["reasons"]) for r in scored] == [(s, r) for s, r in expected]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_rescore_records_only_differences(temp_db, new_keyword, workers):
+    # History scored before the update
+    risk_engine.HIGH_RISK_KEYWORDS.remove("exhausted")
+    risk_engine.rebuild_matcher()
+    ids = seed_history()
+    unassessed = db.save_message("u2", "user", "no way out of this")  # stored without a risk event
+    risk_engine.HIGH_RISK_KEYWORDS.append("exhausted")
+    risk_engine.rebuild_matcher()
+
+    run_id = db.start_rescoring_run(rescoring.rules_version())
+    progress = []
+    result = rescoring.rescore(db.fetch_messages_for_rescoring, lambda diffs: db.save_rescores(run_id, diffs),
+                               chunk_size=2, workers=workers, on_progress=progress.append)
+    db.finish_rescoring_run(run_id, result["rows"], result["changed"], result["seconds"])
+
+    assert result["rows"] == 6 and result["changed"] == 3 and progress[-1]["rows"] == 6
+    assert result["transitions"] == {"none->medium": 2, "None->high": 1}
+    rows = db.get_db_connection().execute(
+        "SELECT * FROM rescored_messages WHERE run_id = ? ORDER BY message_id", (run_id,)
+    ).fetchall()
+    assert [r["message_id"] for r in rows] == [ids[1], ids[4], unassessed]
+    assert rows[0]["old_keyword_score"] == 0 and rows[0]["new_keyword_score"] == risk_engine.HIGH_RISK_KW_SCORE
+    assert "exhausted" in rows[0]["new_reasons_json"] and rows[0]["stored_risk_level"] == "low"
+    assert rows[2]["risk_event_id"] is None and rows[2]["old_level"] is None
+    run = db.get_db_connection().execute("SELECT * FROM rescoring_runs WHERE id = ?", (run_id,)).fetchone()
+    assert run["rows_scanned"] == 6 and run["rows_changed"] == 3 and run["finished_at"]
+    # Stored assessments are untouched
+    assert db.get_db_connection().execute("SELECT keyword_score FROM risk_events WHERE message_id = ?", (ids[1],)).fetchone()[0] == 0
+
+
+def test_rescore_command(tmp_path):
+    path = tmp_path / "cli.db"
+    original = db.DB_NAME
+    db.DB_NAME = str(path)
+    try:
+        db.init_db()
+        db.save_message("u1", "user", "I want to end it all")
+        db.save_chat_turn("u1", "fine thanks", "reply", "low", False, 0, [])
+    finally:
+        db.close_db_connections()
+        db.DB_NAME = original
+
+    script = Path(__file__).resolve().parents[1] / "mental_health_app" / "rescore_history.py"
+    result = subprocess.run([sys.executable, str(script), "--db", str(path), "--workers", "2", "--chunk-size", "1"],
+                            cwd=tmp_path, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert "run 1: 2 messages" in result.stdout and "1 differ from the stored assessment" in result.stdout
+    assert "keyword level None->high: 1" in result.stdout
@@ -0,0 +1,37 @@
+import logging
+from mental_health_backend.mental_health_app.services import risk_engine
+from mental_health_backend.tests.risk_engine_reference import build_corpus, legacy_calculate_risk_score
+
+risk_engine.logger.setLevel(logging.ERROR)
+
+
+def test_matcher_matches_legacy_scores_and_reasons():
+    for text in build_corpus(long_count=15):
+        score, reasons = risk_engine.keyword_risk_score(text)
+        legacy_score, legacy_reasons = legacy_calculate_risk_score(text)
+        assert score == legacy_score
+        assert sorted(reasons) == sorted(legacy_reasons)
+
+
+def test_intent_reports_first_pattern_in_list_order():
+    # "want to kill myself" matches both the want-to and the kill-myself patterns;
+    # the first pattern in SELF_HARM_PATTERNS must be reported, as before.
+    found, pattern = risk_engine.detect_self_harm_intent("I Want To Kill Myself")
+    assert found
+    assert pattern == risk_engine.SELF_HARM_PATTERNS[0]
+
+    found, pattern = risk_engine.detect_self_harm_intent("just a normal day")
+    assert not found and pattern == ""
+
+
+def test_rebuild_matcher_picks_up_new_keywords():
+    risk_engine.HIGH_RISK_KEYWORDS.append("exhausted of everything")
+    try:
+        risk_engine.rebuild_matcher()
+        score, reasons = risk_engine.calculate_risk_score("I am exhausted of everything")
+        assert score == 2
+        assert reasons == ["Detected high-risk keyword: 'exhausted of everything'"]
+    finally:
+        risk_engine.HIGH_RISK_KEYWORDS.remove("exhausted of everything")
+        risk_engine.rebuild_matcher()
+
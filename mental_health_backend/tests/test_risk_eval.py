@@ -0,0 +1,67 @@
+import json
+import logging
+import subprocess
+import sys
+import pytest
+from pathlib import Path
+from mental_health_backend.mental_health_app.services import risk_engine
+from mental_health_backend.benchmarks.eval_risk_engine import (
+    LEVELS, evaluate, latest_corpus, load_corpus, throughput
+)
+
+risk_engine.logger.setLevel(logging.ERROR)
+
+
+def test_corpus_is_versioned_and_covers_hard_cases():
+    path = latest_corpus()
+    assert path.name.startswith("risk_corpus_v")
+    cases = load_corpus(path)
+    assert len({c["id"] for c in cases}) == len(cases)
+    tags = {tag for c in cases for tag in c["tags"]}
+    assert {"hinglish", "negation", "paraphrase", "idiom"} <= tags
+    assert {c["label"] for c in cases} == set(LEVELS)
+
+
+def test_load_rejects_bad_labels_and_duplicate_ids(tmp_path):
+    bad = tmp_path / "risk_corpus_v9.jsonl"
+    bad.write_text(json.dumps({"id": "a", "text": "x", "label": "severe", "tags": []}) + "\n")
+    with pytest.raises(ValueError, match="unknown label"):
+        load_corpus(bad)
+    bad.write_text("\n".join(json.dumps({"id": "a", "text": "x", "label": "low", "tags": []}) for _ in range(2)))
+    with pytest.raises(ValueError, match="duplicate id"):
+        load_corpus(bad)
+
+
+def test_precision_recall_per_level():
+    cases = [
+        {"id": "1", "text": "I want to kill myself", "label": "high", "tags": ["explicit"]},
+        {"id": "2", "text": "I feel hopeless", "label": "medium", "tags": []},
+        {"id": "3", "text": "I studied all day", "label": "low", "tags": ["substring"]},  # "die" keyword
+        {"id": "4", "text": "had a nice lunch", "label": "low", "tags": []},
+    ]
+    report = evaluate(cases)
+    assert report["levels"]["high"] == {"precision": 0.5, "recall": 1.0, "f1": pytest.approx(2 / 3), "support": 1}
+    assert report["levels"]["low"]["recall"] == 0.5 and report["levels"]["low"]["precision"] == 1.0
+    assert report["confusion"]["low"] == {"high": 1, "low": 1}
+    assert report["tags"] == {"explicit": 1.0, "substring": 0.0}
+    assert [e["id"] for e in report["errors"]] == ["3"]
+
+
+def test_high_risk_recall_does_not_regress():
+    # Missing a crisis message is the costly error: keyword/pattern changes must keep these floors.
+    # Paraphrase matches only reach medium (escalation model) without the LLM, hence two numbers.
+    report = evaluate(load_corpus(latest_corpus()))
+    assert report["high_flagged"] >= 0.9
+    assert report["levels"]["high"]["recall"] >= 0.45
+
+
+def test_throughput_reports_rate_and_tail():
+    stats = throughput(load_corpus(latest_corpus())[:20], repeat=2)
+    assert stats["messages_per_sec"] > 0 and 0 < stats["p50_us"] <= stats["p99_us"]
+
+
+def test_verify_script_runs_from_any_directory(tmp_path):
+    script = Path(__file__).resolve().parents[1] / "mental_health_app" / "verify_risk_engine.py"
+    result = subprocess.run([sys.executable, str(script)], cwd=tmp_path, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert "All tests passed!" in result.stdout
@@ -0,0 +1,135 @@
+import random
+import subprocess
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from fastapi.testclient import TestClient
+from mental_health_backend.mental_health_app import db
+from gateway.main import gateway_app
+
+TABLES = ("risk_rollups", "risk_rollup_levels", "risk_rollup_daily")
+
+
+def snapshot():
+    conn = db.get_db_connection()
+    return {table: sorted(tuple(r) for r in conn.execute(f"SELECT * FROM {table} WHERE 1")) for table in TABLES}
+
+
+def event(user_id, risk_level, created_at, self_harm=False):
+    return db.save_chat_turn(user_id, "msg", "reply", risk_level, self_harm, 0, [], user_created_at=created_at)
+
+
+def set_event_time(risk_event_id, created_at):
+    """Backdate an event (writes stamp utcnow); rebuild_risk_rollups() afterwards."""
+    conn = db.get_db_connection()
+    with conn:
+        conn.execute("UPDATE risk_events SET created_at = ? WHERE id = ?", (created_at, risk_event_id))
+
+
+def test_rollup_tracks_writes_and_enrichment(temp_db):
+    today = datetime.utcnow().date()
+    db.save_risk_event("u1", None, "low", False, 0, [])
+    ids = event("u1", "high", None, self_harm=True)
+    db.save_risk_event("u2", None, "medium", False, 2, [])
+
+    rollup = db.get_risk_rollup("u1")
+    assert rollup["events"] == 2 and rollup["self_harm_events"] == 1
+    assert rollup["counts"] == {"low": 1, "high": 1}
+    assert rollup["max_level_7d"] == rollup["max_level_30d"] == "high"
+    assert rollup["last_high_risk_at"] == rollup["last_event_at"]
+    assert rollup["daily"] == [{"date": today.isoformat(), "counts": {"low": 1, "high": 1}, "self_harm_events": 1}]
+
+    # Crisis fast path: the LLM escalates, then a (hypothetical) downgrade clears last_high_risk_at
+    db.enrich_risk_event(ids["risk_event_id"], "u1", "critical", True, "critical", "reply")
+    assert db.get_risk_rollup("u1")["counts"] == {"low": 1, "critical": 1}
+    db.enrich_risk_event(ids["risk_event_id"], "u1", "medium", False, "medium", None)
+    rollup = db.get_risk_rollup("u1")
+    assert rollup["counts"] == {"low": 1, "medium": 1} and rollup["self_harm_events"] == 0
+    assert rollup["last_high_risk_at"] is None and rollup["max_level_7d"] == "medium"
+    assert db.get_risk_rollup("nobody") is None
+
+    # Incremental state equals a rebuild from history
+    incremental = snapshot()
+    assert db.rebuild_risk_rollups() == 2
+    assert snapshot() == incremental
+
+
+def test_rolling_maximums_and_daily_window(temp_db):
+    today = datetime(2026, 3, 31)
+    for days_ago, level in ((40, "critical"), (20, "high"), (3, "medium"), (0, "low")):
+        ids = event("u1", level, None)
+        set_event_time(ids["risk_event_id"], (today - timedelta(days=days_ago, hours=-9)).isoformat())
+    db.rebuild_risk_rollups()
+
+    rollup = db.get_risk_rollup("u1", days=7, today="2026-03-31")
+    assert rollup["events"] == 4 and rollup["counts"]["critical"] == 1
+    assert rollup["max_level_7d"] == "medium" and rollup["max_level_30d"] == "high"
+    assert rollup["last_high_risk_at"] == "2026-03-11T09:00:00"
+    assert [d["date"] for d in rollup["daily"]] == ["2026-03-28", "2026-03-31"]
+    assert db.get_risk_rollup("u1", days=30, today="2026-05-31")["max_level_30d"] is None
+
+
+def test_rebuild_in_batches_matches_incremental_and_clears_stale(temp_db):
+    rng = random.Random(1)
+    for i in range(300):
+        ids = event(f"user-{rng.randrange(37):02d}", rng.choice(db.RISK_LEVELS), None, self_harm=rng.random() < 0.1)
+        if rng.random() < 0.2:
+            db.enrich_risk_event(ids["risk_event_id"], "", rng.choice(("high", "critical")), True, "high", None)
+    incremental = snapshot()
+
+    conn = db.get_db_connection()
+    with conn:
+        conn.execute("DELETE FROM risk_rollup_daily")
+        conn.execute("UPDATE risk_rollups SET events = 0")
+        conn.execute("INSERT INTO risk_rollups VALUES ('zz-gone', 1, 0, 'x', 'x', NULL)")
+    batches = []
+    users = db.rebuild_risk_rollups(batch_users=10, on_batch=batches.append)
+    assert users == len(incremental["risk_rollups"]) and batches[:3] == [10, 10, 10]
+    assert snapshot() == incremental
+
+
+def test_risk_summary_endpoint(temp_db):
+    event("u1", "high", None, self_harm=True)
+    client = TestClient(gateway_app)
+    body = client.get("/mental-health/history/risk-summary", params={"user_id": "u1"}).json()
+    assert body["counts"] == {"high": 1} and body["max_level_7d"] == "high" and len(body["daily"]) == 1
+    assert client.get("/mental-health/history/risk-summary", params={"user_id": "nobody"}).status_code == 404
+
+
+def test_rebuild_command(tmp_path):
+    path = tmp_path / "cli.db"
+    original = db.DB_NAME
+    db.DB_NAME = str(path)
+    try:
+        db.init_db()
+        for user in ("a", "b", "c"):
+            db.save_risk_event(user, None, "high", False, 5, [])
+        with db.get_db_connection() as conn:
+            conn.execute("DELETE FROM risk_rollups")
+    finally:
+        db.close_db_connections()
+        db.DB_NAME = original
+
+    script = Path(__file__).resolve().parents[1] / "mental_health_app" / "rebuild_risk_rollups.py"
+    result = subprocess.run([sys.executable, str(script), "--db", str(path), "--batch-users", "2"],
+                            cwd=tmp_path, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert "rebuilt rollups for 3 users (3 risk events)" in result.stdout
+
+
+def test_migration_builds_rollups_from_existing_history(temp_db, monkeypatch):
+    db.close_db_connections()
+    db.DB_NAME = db.DB_NAME + ".v5"
+    monkeypatch.setattr(db, "SCHEMA_MIGRATIONS", db.SCHEMA_MIGRATIONS[:5])
+    db.init_db()
+    conn = db.get_db_connection()
+    with conn:
+        conn.executemany(
+            "INSERT INTO risk_events (user_id, risk_level, self_harm_detected, reasons_json, created_at) VALUES (?, ?, ?, '[]', ?)",
+            [("old", "high", 1, "2026-01-01T10:00:00"), ("old", "low", 0, "2026-01-02T10:00:00")]
+        )
+    monkeypatch.undo()
+    db.apply_migrations(conn)
+    rollup = db.get_risk_rollup("old", today="2026-01-02")
+    assert rollup["counts"] == {"high": 1, "low": 1} and rollup["self_harm_events"] == 1
+    assert rollup["last_high_risk_at"] == "2026-01-01T10:00:00" and rollup["max_level_7d"] == "high"
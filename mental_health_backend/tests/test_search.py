@@ -0,0 +1,122 @@
+import json
+import sqlite3
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+from fastapi.testclient import TestClient
+from mental_health_backend.mental_health_app import db
+from gateway.main import gateway_app
+
+
+def seed(user_id, text, created_at, reasons=(), risk_level="low"):
+    return db.save_chat_turn(user_id, text, "I'm here with you.", risk_level, False, 0, list(reasons), user_created_at=created_at)
+
+
+def test_fts_query_quotes_user_input():
+    assert db.fts_query("overdose pills") == '"overdose" "pills"'
+    assert db.fts_query('overdos* OR "x" NEAR(') == '"overdos"* "OR" "x" "NEAR"'
+    with pytest.raises(ValueError):
+        db.fts_query("  *** ")
+
+
+def test_triggers_index_new_rows_and_follow_updates_and_deletes(temp_db):
+    ids = seed("u1", "I took an overdose last night", "2026-01-05T10:00:00", ["Detected high-risk keyword: 'overdose'"], "high")
+    items, _ = db.search_history("overdose")
+    assert {(i["source"], i["id"]) for i in items} == {("messages", ids["user_message_id"]), ("risk_events", ids["risk_event_id"])}
+    event = next(i for i in items if i["source"] == "risk_events")
+    assert event["reasons"] == ["Detected high-risk keyword: 'overdose'"] and event["message_id"] == ids["user_message_id"]
+    assert "[overdose]" in next(i for i in items if i["source"] == "messages")["snippet"]
+
+    conn = db.get_db_connection()
+    with conn:
+        conn.execute("UPDATE messages SET text = 'feeling calmer today' WHERE id = ?", (ids["user_message_id"],))
+    assert [i["source"] for i in db.search_history("overdose")[0]] == ["risk_events"]
+    assert len(db.search_history("calmer")[0]) == 1
+    with conn:
+        conn.execute("DELETE FROM risk_events WHERE id = ?", (ids["risk_event_id"],))
+    assert db.search_history("overdose")[0] == []
+    # External-content index still consistent with its tables
+    conn.execute("INSERT INTO messages_fts(messages_fts, rank) VALUES ('integrity-check', 1)")
+    conn.execute("INSERT INTO risk_events_fts(risk_events_fts, rank) VALUES ('integrity-check', 1)")
+
+
+def test_search_filters_by_user_and_date_and_pages_by_rank(temp_db):
+    for day in range(1, 10):
+        seed("u1", "panic attack " + "again " * day, f"2026-01-0{day}T09:00:00")
+    seed("u2", "panic attack", "2026-01-05T09:00:00")
+
+    client = TestClient(gateway_app)
+    url = "/mental-health/history/search"
+    assert client.get(url, params={"q": "panic", "user_id": "u2"}).json()["items"][0]["user_id"] == "u2"
+
+    params = {"q": "panic attack", "user_id": "u1", "since": "2026-01-03", "until": "2026-01-07", "limit": 2}
+    seen, cursor = [], None
+    while True:
+        page = client.get(url, params={**params, **({"cursor": cursor} if cursor else {})}).json()
+        seen += page["items"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert sorted(i["created_at"][:10] for i in seen) == [f"2026-01-0{d}" for d in range(3, 8)]
+    assert [i["score"] for i in seen] == sorted(i["score"] for i in seen)  # best (shortest message) first
+    assert seen[0]["created_at"].startswith("2026-01-03")
+
+    assert client.get(url, params={"q": "panic", "source": "risk_events"}).json()["items"] == []
+    assert client.get(url, params={"q": "panic", "source": "everything"}).status_code == 422
+    assert client.get(url, params={"q": "!!!"}).status_code == 400
+    assert client.get(url, params={"q": "panic", "cursor": "garbage"}).status_code == 400
+
+
+def test_backfill_indexes_rows_written_before_the_migration(temp_db, monkeypatch):
+    db.close_db_connections()
+    db.DB_NAME = db.DB_NAME + ".v4"
+    monkeypatch.setattr(db, "SCHEMA_MIGRATIONS", db.SCHEMA_MIGRATIONS[:4])
+    db.init_db()
+    conn = db.get_db_connection()
+    with conn:  # rows as written by the code of that schema version
+        for i in range(7):
+            created_at = f"2025-12-0{i + 1}T08:00:00"
+            msg_id = conn.execute("INSERT INTO messages (user_id, role, text, created_at) VALUES (?, 'user', ?, ?)",
+                                  (f"u{i}", f"old message {i} about self harm", created_at)).lastrowid
+            conn.execute("INSERT INTO messages (user_id, role, text, created_at) VALUES (?, 'assistant', 'I hear you.', ?)",
+                         (f"u{i}", created_at))
+            conn.execute("INSERT INTO risk_events (user_id, message_id, risk_level, self_harm_detected, reasons_json, created_at) "
+                         "VALUES (?, ?, 'high', 1, ?, ?)",
+                         (f"u{i}", msg_id, json.dumps(["Detected high-risk keyword: 'self harm'"]), created_at))
+    monkeypatch.undo()
+    db.apply_migrations(db.get_db_connection())
+
+    assert db.search_history("harm")[0] == []
+    assert db.search_backfill_pending() == {"messages": 14, "risk_events": 7}
+    new = seed("u9", "new message about self harm", "2026-01-01T08:00:00")
+    assert len(db.search_history("harm")[0]) == 1  # trigger-indexed
+
+    batches = []
+    assert db.backfill_search_index(batch_size=3, on_batch=lambda source, n: batches.append((source, n))) == {"messages": 14, "risk_events": 7}
+    assert batches[:5] == [("messages", 3)] * 4 + [("messages", 2)]
+    assert db.search_backfill_pending() == {"messages": 0, "risk_events": 0}
+    assert db.backfill_search_index() == {"messages": 0, "risk_events": 0}  # idempotent
+    items, _ = db.search_history("harm", limit=100)
+    assert len([i for i in items if i["source"] == "messages"]) == 8
+    assert len([i for i in items if i["source"] == "risk_events"]) == 7
+    assert new["user_message_id"] in {i["id"] for i in items if i["source"] == "messages"}
+
+
+def test_backfill_command(tmp_path):
+    path = tmp_path / "cli.db"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE messages (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT NOT NULL, role TEXT NOT NULL, text TEXT NOT NULL, created_at TEXT NOT NULL)")
+    conn.executemany("INSERT INTO messages (user_id, role, text, created_at) VALUES ('u', 'user', ?, '2025-01-01')",
+                     [(f"note {i} overdose",) for i in range(25)])
+    conn.commit()
+    conn.close()
+
+    script = Path(__file__).resolve().parents[1] / "mental_health_app" / "backfill_search_index.py"
+    result = subprocess.run([sys.executable, str(script), "--db", str(path), "--batch-size", "10"],
+                            cwd=tmp_path, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert "to index: 25 messages, 0 risk events" in result.stdout
+    assert "indexed 25 rows" in result.stdout
+    conn = sqlite3.connect(path)
+    assert conn.execute("SELECT COUNT(*) FROM messages_fts WHERE messages_fts MATCH 'overdose'").fetchone()[0] == 25
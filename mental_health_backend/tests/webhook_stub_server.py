@@ -0,0 +1,73 @@
+"""
+Local stand-in for a trusted-contact escalation webhook (tests and benchmarks).
+
+Runs a threaded HTTP server that records every POSTed JSON body. fail_next makes the
+next N requests answer 503, and delay holds each response, to exercise retries and
+batching in services/escalation.py.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+
+
+class WebhookStubServer:
+    """
+    Usage:
+        with WebhookStubServer() as hook:
+            sink = escalation.WebhookSink(hook.url)
+    """
+
+    def __init__(self, delay: float = 0.0, fail_next: int = 0, host: str = "127.0.0.1"):
+        self.delay = delay
+        self.fail_next = fail_next
+        self.requests: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", "0"))) or b"{}")
+                if stub.delay:
+                    time.sleep(stub.delay)
+                with stub._lock:
+                    failing = stub.fail_next > 0
+                    if failing:
+                        stub.fail_next -= 1
+                    else:
+                        stub.requests.append(body)
+                self.send_response(503 if failing else 204)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/escalations"
+
+    @property
+    def notifications(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [n for body in self.requests for n in body.get("notifications", [])]
+
+    def start(self) -> "WebhookStubServer":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()